@@ -0,0 +1,57 @@
+"""
+Benchmark: custo por busca do BM25Index em Python puro vs. vetorizado (NumPy),
+conforme o número de documentos.
+
+O corpus são os itens pesquisáveis do currículo (ver CurriculoStore), replicados
+até cada tamanho; as consultas são as perguntas de exemplo das roles, sem os
+termos de pergunta, com os mesmos limites de cobertura e score da busca real.
+A vetorização só compensa acima de um certo número de documentos: abaixo disso,
+o custo fixo das chamadas NumPy supera o laço Python. É esse ponto que define
+VECTORIZE_MIN_DOCUMENTS em utils/bm25_index.py.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_bm25_search --rounds 200
+"""
+import argparse
+import time
+
+from tests.test_field_router import example_questions
+from utils.bm25_index import BM25Index, VECTORIZE_MIN_DOCUMENTS, np, tokenize
+from utils.curriculo_handler import CurriculoHandler
+from utils.curriculo_store import MIN_QUERY_COVERAGE, MIN_SCORE_RATIO, QUESTION_TERMS
+
+
+def measure(index, queries, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for query in queries:
+            index.search(query, 8, min_coverage=MIN_QUERY_COVERAGE, min_score_ratio=MIN_SCORE_RATIO)
+    return (time.perf_counter() - start) / (rounds * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[79, 250, 500, 1000, 2000, 5000, 20000])
+    args = parser.parse_args()
+    if np is None:
+        parser.error("numpy não está instalado")
+
+    items = CurriculoHandler().store.items
+    documents = [tokenize(item.text) for item in items]
+    queries = [[term for term in tokenize(question) if term not in QUESTION_TERMS] for question in example_questions()]
+    queries = [query for query in queries if query]
+
+    print(f"{len(queries)} consultas, corpus base de {len(documents)} itens, {args.rounds} rodadas")
+    print(f"VECTORIZE_MIN_DOCUMENTS atual: {VECTORIZE_MIN_DOCUMENTS}")
+    for size in args.sizes:
+        corpus = [(i, documents[i % len(documents)]) for i in range(size)]
+        rounds = max(1, args.rounds * len(documents) // size)
+        pure = measure(BM25Index(corpus, vectorized=False), queries, rounds)
+        vectorized = measure(BM25Index(corpus, vectorized=True), queries, rounds)
+        print(f"{size:6d} documentos: puro {pure * 1e6:9.2f}us  NumPy {vectorized * 1e6:9.2f}us  "
+              f"({pure / vectorized:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
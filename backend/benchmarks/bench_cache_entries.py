@@ -0,0 +1,112 @@
+"""
+Benchmark: tamanho por entrada e latência de hit no L2 do cache de respostas.
+
+Compara o formato antigo (dados factuais embutidos em cada entrada, JSON indentado)
+com o formato compacto (seções deduplicadas em blobs + compressão). As entradas
+usam as seções reais de data/*.json, com combinações variadas de campos, e os
+hits são medidos com o L1 desativado para forçar a leitura do armazenamento.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_cache_entries --entries 500 --lookups 2000
+"""
+import argparse
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from utils.cache_handler import CacheHandler
+from utils.cache_store import JSONFileCacheStore, SQLiteCacheStore
+from utils.compression import available_codecs
+from utils.curriculo_handler import CurriculoHandler
+
+SECTIONS = ["academic_background", "professional_experience", "projects", "skills",
+            "certifications", "languages", "soft_skills"]
+
+
+def build_entries(count, seed=42):
+    """(pergunta, role, campos, dados factuais) com combinações de 1 a 3 seções."""
+    curriculo = CurriculoHandler()
+    rng = random.Random(seed)
+    entries = []
+    for i in range(count):
+        fields = sorted(rng.sample(SECTIONS, rng.randint(1, 3)))
+        entries.append((f"Pergunta de benchmark {i}", "recruiter", fields, curriculo.get_multiple(fields)))
+    return entries
+
+
+def disk_usage(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def run(label, store, entries, lookups, legacy):
+    handler = CacheHandler(store=store, memory_max_entries=0)
+    for question, role, fields, factual_data in entries:
+        if legacy:
+            # Formato anterior: cada entrada carrega uma cópia completa dos dados factuais
+            cache_key = handler.generate_cache_key(question, role, fields)
+            store.set(cache_key, {
+                'question': question, 'role': role, 'relevant_fields': fields,
+                'answer': "Resposta " * 60, 'factual_data': factual_data,
+                'created_at': datetime.now().isoformat(), 'cache_key': cache_key
+            })
+        else:
+            handler.set(question, role, fields, "Resposta " * 60, factual_data)
+
+    if isinstance(store, SQLiteCacheStore):
+        store._connection().execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        on_disk = disk_usage(store.db_path)
+    else:
+        on_disk = disk_usage(store.cache_dir)
+    payload = store.total_size() + store.blob_stats()['blob_bytes']
+
+    rng = random.Random(7)
+    timings = []
+    for _ in range(lookups):
+        question, role, fields, _ = rng.choice(entries)
+        start = time.perf_counter()
+        cached = handler.get(question, role, fields)
+        timings.append(time.perf_counter() - start)
+        assert cached is not None and cached['factual_data']
+    timings.sort()
+    print(f"{label:<28} bytes/entrada={payload / len(entries):9.0f} disco/entrada={on_disk / len(entries):9.0f} "
+          f"hit mean={statistics.mean(timings) * 1e6:8.1f}us p50={timings[len(timings) // 2] * 1e6:8.1f}us "
+          f"p95={timings[int(len(timings) * 0.95)] * 1e6:8.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    entries = build_entries(args.entries)
+    print(f"{args.entries} entradas, {args.lookups} hits no L2")
+    variants = [
+        ("json, embutido (antes)", lambda d: JSONFileCacheStore(d), True),
+        ("sqlite, embutido, sem comp.", lambda d: SQLiteCacheStore(os.path.join(d, "a.sqlite3"), compression="none"), True),
+        ("json, blobs", lambda d: JSONFileCacheStore(d), False),
+    ]
+    for codec in available_codecs():
+        variants.append((f"sqlite, blobs, {codec}",
+                         lambda d, codec=codec: SQLiteCacheStore(os.path.join(d, "a.sqlite3"), compression=codec),
+                         False))
+
+    for label, make_store, legacy in variants:
+        directory = tempfile.mkdtemp()
+        try:
+            run(label, make_store(directory), entries, args.lookups, legacy)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
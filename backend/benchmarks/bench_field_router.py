@@ -0,0 +1,56 @@
+"""
+Benchmark: custo por pergunta do roteamento de campos (identify_relevant_fields).
+
+Compara o FieldRouter (tabelas compiladas uma vez, uma regex combinada) com a
+implementação anterior, que testava cada padrão e cada palavra-chave com
+re.search a cada pergunta. Usa as perguntas de exemplo das roles e as mesmas
+perguntas com variações, para cobrir os caminhos contextual, por palavra-chave
+e de fallback da role. A última linha é o caminho com o memo do RoleHandler já
+aquecido (perguntas repetidas, como as de exemplo).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_field_router --rounds 2000
+"""
+import argparse
+import time
+
+from tests.test_field_router import EDGE_CASES, example_questions, legacy_route
+from utils.field_router import FieldRouter
+from utils.role_handler import RoleHandler
+
+
+def measure(route, questions, roles, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            for role in roles:
+                route(question, role)
+    return (time.perf_counter() - start) / (rounds * len(questions) * len(roles))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    questions = example_questions() + EDGE_CASES
+    roles = ["recruiter", "developer", "client", "student"]
+
+    start = time.perf_counter()
+    router = FieldRouter()
+    build = time.perf_counter() - start
+
+    print(f"{len(questions)} perguntas x {len(roles)} roles, {args.rounds} rodadas")
+    print(f"compilação das tabelas: {build * 1e3:8.2f}ms (uma vez, e a cada reload_roles)")
+    legacy = measure(legacy_route, questions, roles, args.rounds)
+    compiled = measure(router.route, questions, roles, args.rounds)
+    print(f"anterior (re.search por padrão): {legacy * 1e6:8.2f}us/pergunta")
+    print(f"FieldRouter (compilado):         {compiled * 1e6:8.2f}us/pergunta  ({legacy / compiled:.1f}x)")
+    handler = RoleHandler()
+    measure(handler.identify_relevant_fields, questions, roles, 1)
+    memoized = measure(handler.identify_relevant_fields, questions, roles, args.rounds)
+    print(f"RoleHandler (memo aquecido):     {memoized * 1e6:8.2f}us/pergunta  ({legacy / memoized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark: overhead por requisição de um genai.Client novo por chamada vs. clientes do pool.
+
+Sobe um stub HTTP local que responde como o endpoint generateContent e mede o
+tempo de N chamadas sequenciais em cada modo. Não há TLS no stub, então o ganho
+real contra a API (handshake TLS + DNS) é maior que o medido aqui.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_gemini_client_pool --requests 200
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from google import genai
+from google.genai import types
+
+from utils.gemini_client_pool import GeminiClientPool
+
+MODEL = "gemini-1.5-flash-latest"
+STUB_RESPONSE = json.dumps({
+    "candidates": [{"content": {"role": "model", "parts": [{"text": "ok"}]}, "finishReason": "STOP"}]
+}).encode("utf-8")
+
+
+class StubGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Permite keep-alive
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubGeminiHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STUB_RESPONSE)))
+        self.end_headers()
+        self.wfile.write(STUB_RESPONSE)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run(label, get_client, requests):
+    StubGeminiHandler.connections = 0
+    timings = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        client = get_client()
+        client.models.generate_content(model=MODEL, contents="ping", config={"system_instruction": "stub"})
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"{label:<22} mean={statistics.mean(timings) * 1000:7.3f}ms "
+          f"p50={timings[len(timings) // 2] * 1000:7.3f}ms "
+          f"p95={timings[int(len(timings) * 0.95)] * 1000:7.3f}ms "
+          f"connections={StubGeminiHandler.connections}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubGeminiHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}"
+
+    def new_client_per_request():
+        return genai.Client(api_key="bench-key", http_options=types.HttpOptions(base_url=base_url))
+
+    pool = GeminiClientPool(base_url=base_url)
+
+    print(f"{args.requests} requisições sequenciais contra {base_url}")
+    run("client por requisição", new_client_per_request, args.requests)
+    run("client do pool", lambda: pool.get_client("bench-key"), args.requests)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
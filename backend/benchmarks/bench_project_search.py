@@ -0,0 +1,62 @@
+"""
+Benchmark: custo por pergunta da busca de projetos conforme projects.json cresce.
+
+Compara o filtro anterior (difflib.SequenceMatcher da pergunta inteira contra
+cada campo de cada projeto) com a busca BM25 sobre o índice invertido. Os
+projetos reais são replicados (com nomes distintos) para simular seções maiores,
+num CurriculoStore próprio para cada tamanho; o índice é construído uma vez, fora
+da medição, como acontece ao carregar o currículo.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_project_search --sizes 18 180 1800
+"""
+import argparse
+import time
+
+from tests.test_curriculo_handler import PROJECT_QUESTIONS, legacy_filter_projects
+from utils.curriculo_handler import CurriculoHandler
+from utils.curriculo_store import CurriculoStore, build_project_index
+
+
+def replicate(projects, size):
+    copies = []
+    for i in range(size):
+        project = dict(projects[i % len(projects)])
+        project["name"] = f"{project['name']} {i // len(projects)}"
+        copies.append(project)
+    return copies
+
+
+def measure(fn, questions, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for question in questions:
+            fn(question)
+    return (time.perf_counter() - start) / (rounds * len(questions))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[18, 180, 1800])
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    base = CurriculoHandler().store
+    questions = list(PROJECT_QUESTIONS)
+    for size in args.sizes:
+        projects = replicate(base.sections["projects"], size)
+        start = time.perf_counter()
+        build_project_index(projects)
+        build = time.perf_counter() - start
+        # O snapshot é imutável: cada tamanho tem o seu, com os projetos replicados
+        handler = CurriculoHandler(store=CurriculoStore({**base.sections, "projects": projects}, base.versions))
+        projects = handler.get("projects")
+
+        legacy = measure(lambda q: legacy_filter_projects(projects, q), questions, args.rounds)
+        bm25 = measure(lambda q: handler.search_projects(q), questions, args.rounds)
+        print(f"{size:>6} projetos  difflib {legacy * 1e3:10.2f}ms  bm25 {bm25 * 1e3:8.3f}ms  "
+              f"({legacy / bm25:,.0f}x)  índice {build * 1e3:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
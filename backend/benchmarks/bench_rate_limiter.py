@@ -0,0 +1,65 @@
+"""
+Benchmark: verificações por segundo e memória por IP de cada algoritmo de rate limiting.
+
+Simula `--ips` clientes distintos, cada um fazendo `--requests-per-ip` requisições
+intercaladas com os demais (como no before_request), e mede o custo de is_allowed()
+e a memória retida pelo estado dos limitadores (tracemalloc), dividida pelo número
+de IPs rastreados. A janela deslizante guarda um timestamp por requisição; o GCRA,
+um número por IP.
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_rate_limiter --ips 10000 --requests-per-ip 30
+"""
+import argparse
+import time
+import tracemalloc
+
+from utils.rate_limiter import RATE_LIMIT_ALGORITHMS, create_rate_limiter
+
+
+def fill(limiter, addresses, requests_per_ip):
+    allowed = 0
+    for _ in range(requests_per_ip):
+        for ip in addresses:
+            allowed += limiter.is_allowed(ip)[0]
+    return allowed
+
+
+def run(algorithm, ips, requests_per_ip, max_requests, window_seconds):
+    addresses = [f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}" for i in range(ips)]
+    checks = ips * requests_per_ip
+
+    # Vazão, sem tracemalloc
+    limiter = create_rate_limiter(max_requests, window_seconds, algorithm)
+    start = time.perf_counter()
+    allowed = fill(limiter, addresses, requests_per_ip)
+    elapsed = time.perf_counter() - start
+
+    # Memória retida pelo estado, sem contar os próprios endereços (criados antes)
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    limiter = create_rate_limiter(max_requests, window_seconds, algorithm)
+    fill(limiter, addresses, requests_per_ip)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+
+    print(f"{algorithm:<16} {checks / elapsed:12,.0f} checks/s  {retained / ips:8.0f} bytes/IP  "
+          f"permitidas={allowed}/{checks}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ips", type=int, default=10000)
+    parser.add_argument("--requests-per-ip", type=int, default=30)
+    parser.add_argument("--max-requests", type=int, default=30)
+    parser.add_argument("--window", type=int, default=60)
+    args = parser.parse_args()
+
+    print(f"{args.ips} IPs x {args.requests_per_ip} requisições, limite {args.max_requests}/{args.window}s")
+    for algorithm in RATE_LIMIT_ALGORITHMS:
+        run(algorithm, args.ips, args.requests_per_ip, args.max_requests, args.window)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Benchmark: vazão do rate limiter com 1, 8 e 32 threads, com um único lock e com
+lock striping (shards).
+
+Cada thread faz verificações com IPs sorteados de um conjunto fixo, como as
+threads de requisição do servidor no before_request. Mede verificações por
+segundo no total e o p99 da latência de cada verificação (que inclui a espera
+pelo lock).
+
+Uso (a partir de backend/):
+    python -m benchmarks.bench_rate_limiter_threads --checks 20000 --shards 16
+"""
+import argparse
+import random
+import threading
+import time
+
+from utils.rate_limiter import create_rate_limiter
+
+
+def run(limiter, threads, checks_per_thread, ips):
+    addresses = [f"10.0.{i >> 8 & 255}.{i & 255}" for i in range(ips)]
+    latencies = []
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(seed):
+        rng = random.Random(seed)
+        sample = [rng.choice(addresses) for _ in range(checks_per_thread)]
+        local = []
+        barrier.wait()
+        for ip in sample:
+            start = time.perf_counter()
+            limiter.is_allowed(ip)
+            local.append(time.perf_counter() - start)
+        latencies.extend(local)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return threads * checks_per_thread / elapsed, latencies[int(len(latencies) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=20000, help="verificações por thread")
+    parser.add_argument("--ips", type=int, default=5000)
+    parser.add_argument("--shards", type=int, default=16)
+    parser.add_argument("--algorithm", default="gcra")
+    args = parser.parse_args()
+
+    print(f"{args.algorithm}, {args.ips} IPs, {args.checks} verificações por thread")
+    for threads in (1, 8, 32):
+        for shards in (1, args.shards):
+            # Limite alto: mede o custo da verificação, não o bloqueio
+            limiter = create_rate_limiter(10 ** 9, 60, args.algorithm, shards=shards)
+            throughput, p99 = run(limiter, threads, args.checks, args.ips)
+            print(f"threads={threads:<3} shards={shards:<3} {throughput:12,.0f} checks/s  p99={p99 * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,65 @@ class Config:
     # Configurações de cache
     CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
     CACHE_TTL = int(os.getenv("CACHE_TTL", "3600"))  # 1 hora padrão
+    # "sqlite" (arquivo único), "json" (um arquivo por entrada) ou "redis" (compartilhado entre workers/instâncias)
+    CACHE_STORE = os.getenv("CACHE_STORE", "sqlite")
+    CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_COMPRESSION = os.getenv("CACHE_COMPRESSION", "zlib")  # "zlib", "zstd" (requer zstandard) ou "none"
+    # Similaridade mínima (0-1) para reaproveitar a resposta de uma pergunta quase idêntica (ex.: 0.85);
+    # 0 desativa (padrão: perguntas parecidas podem pedir coisas diferentes)
+    CACHE_SIMILARITY_THRESHOLD = float(os.getenv("CACHE_SIMILARITY_THRESHOLD", "0"))
+    # Limites do armazenamento persistente (0 = sem limite) e política de remoção ("lru" ou "lfu")
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+    CACHE_EVICTION_POLICY = os.getenv("CACHE_EVICTION_POLICY", "lru")
+    CACHE_SWEEP_INTERVAL_SECONDS = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "300"))  # 0 desativa
+    # Stale-while-revalidate: janela após a expiração em que a resposta ainda é servida
+    # enquanto é regenerada em segundo plano (0 desativa)
+    CACHE_STALE_GRACE_SECONDS = float(os.getenv("CACHE_STALE_GRACE_SECONDS", "0"))
+    CACHE_MAX_CONCURRENT_REFRESHES = int(os.getenv("CACHE_MAX_CONCURRENT_REFRESHES", "2"))
+    # Snapshot carregado na inicialização (o disco do Render é apagado a cada deploy)
+    CACHE_SNAPSHOT_PATH = os.getenv("CACHE_SNAPSHOT_PATH", "snapshots/answers.snapshot.gz")
+    # Token exigido (cabeçalho X-Admin-Token) por /cache/snapshot; vazio desativa o endpoint
+    CACHE_ADMIN_TOKEN = os.getenv("CACHE_ADMIN_TOKEN", "")
+    CACHE_MEMORY_MAX_ENTRIES = int(os.getenv("CACHE_MEMORY_MAX_ENTRIES", "256"))
+    CACHE_MEMORY_MAX_BYTES = int(os.getenv("CACHE_MEMORY_MAX_BYTES", str(16 * 1024 * 1024)))  # 16 MB
     
     # Configurações de rate limiting
     RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    # Teto global de chamadas ao Gemini por chave de API, por janela (0 desativa)
     RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "100"))  # 100 requests
     RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "3600"))  # 1 hora
+    # Limite de chat por IP, em respostas geradas pelo Gemini por janela. Cada requisição
+    # reserva RATE_LIMIT_GEMINI_COST unidades; uma resposta sem chamada própria ao Gemini (cache
+    # hit, fallback ou geração compartilhada) custa só RATE_LIMIT_CACHE_HIT_COST
+    RATE_LIMIT_CHAT_REQUESTS = int(os.getenv("RATE_LIMIT_CHAT_REQUESTS", "5"))
+    RATE_LIMIT_CHAT_WINDOW = int(os.getenv("RATE_LIMIT_CHAT_WINDOW", "60"))
+    RATE_LIMIT_GEMINI_COST = int(os.getenv("RATE_LIMIT_GEMINI_COST", "4"))
+    RATE_LIMIT_CACHE_HIT_COST = int(os.getenv("RATE_LIMIT_CACHE_HIT_COST", "1"))
+    RATE_LIMIT_ALGORITHM = os.getenv("RATE_LIMIT_ALGORITHM", "sliding_window")  # "sliding_window" ou "gcra"
+    # "memory" (por processo) ou "sqlite" (compartilhado entre os workers da máquina, sempre GCRA)
+    RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_DB_PATH = os.getenv("RATE_LIMIT_DB_PATH", "cache/rate_limits.sqlite3")
+    
+    # Currículo compilado (python -m utils.curriculo_artifact build); ausente ou desatualizado = ler os JSON
+    CURRICULO_ARTIFACT_PATH = os.getenv("CURRICULO_ARTIFACT_PATH", "build/curriculo.artifact")
+    # Intervalo (s) entre verificações de mudança nos JSON de data/; ao mudarem, cada worker
+    # recarrega o currículo sozinho (0 = só via POST /curriculum/reload, no worker que o recebe)
+    CURRICULO_CHECK_INTERVAL_SECONDS = float(os.getenv("CURRICULO_CHECK_INTERVAL_SECONDS", "5"))
+    # Itens do currículo (de todas as seções) enviados no prompt, escolhidos por BM25 (0 = seções inteiras)
+    RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "8"))
+    # Memo do roteamento pergunta -> seções do currículo (entradas por processo)
+    ROUTING_MEMO_MAX_ENTRIES = int(os.getenv("ROUTING_MEMO_MAX_ENTRIES", "1024"))
+    
+    # Configurações do cliente Gemini
+    GEMINI_CLIENT_POOL_SIZE = int(os.getenv("GEMINI_CLIENT_POOL_SIZE", "10"))  # conexões por chave
+    GEMINI_KEEPALIVE_SECONDS = float(os.getenv("GEMINI_KEEPALIVE_SECONDS", "60"))
+    GEMINI_KEY_COOLDOWN_SECONDS = float(os.getenv("GEMINI_KEY_COOLDOWN_SECONDS", "60"))  # após um 429
+    GEMINI_KEY_MAX_COOLDOWN_SECONDS = float(os.getenv("GEMINI_KEY_MAX_COOLDOWN_SECONDS", "900"))
+    # Controle de admissão: chamadas simultâneas ao Gemini (0 desativa), fila de espera e prazo na fila
+    GEMINI_MAX_CONCURRENT = int(os.getenv("GEMINI_MAX_CONCURRENT", "8"))
+    GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "16"))
+    GEMINI_QUEUE_TIMEOUT_SECONDS = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", "10"))
     
     # Configurações de logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -1,27 +1,41 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, send_file
 import google.generativeai as genai
 from flask_cors import CORS
 import os
 from dotenv import load_dotenv
+from config import get_config
 import json
 import time
+import hmac
+import tempfile
+from contextlib import contextmanager
 from utils.role_handler import RoleHandler
 from utils.curriculo_handler import CurriculoHandler
+from utils.curriculo_artifact import load_artifact
+from utils.system_instruction import build_system_instruction
 from utils.cache_handler import CacheHandler
+from utils.cache_store import create_cache_store
 from utils.logger import logger, log_execution_time
-from utils.rate_limiter import rate_limiter
+from utils.rate_limiter import rate_limiter, create_rate_limiter
+from utils.gemini_client_pool import GeminiClientPool
+from utils.api_key_pool import APIKeyPool, APIKeysExhaustedError
+from utils.single_flight import SingleFlight
+from utils.bulkhead import Bulkhead, BulkheadFullError
+from utils.answer_formatter import remove_structural_titles, StructuralTitleFilter, split_answer_chunks
 import sys
 import re
 import unicodedata
-import difflib
 
 # Carregar variáveis de ambiente do arquivo .env
 load_dotenv()
 
 app = Flask(__name__)
+config = get_config()
 
 # --- Initial configuration ---
-api_key = os.getenv("GEMINI_API_KEY")
+# GEMINI_API_KEYS (lista com pesos) e GEMINI_API_KEY/GEMINI_KEY_API2 são aceitos
+configured_api_keys = APIKeyPool.parse_keys_from_env()
+api_key = configured_api_keys[0][0] if configured_api_keys else None
 if not api_key:
     # Em ambiente de teste, não falhar se a chave não estiver presente
     if os.getenv("TESTING") or "pytest" in sys.modules:
@@ -29,7 +43,7 @@ if not api_key:
         print("⚠️  Running in test mode - using dummy API key")
     else:
         # Levanta um erro se a chave API não for encontrada, impedindo que o app inicie sem ela.
-        raise ValueError("GEMINI_API_KEY not found in environment variables. "
+        raise ValueError("GEMINI_API_KEY (or GEMINI_API_KEYS) not found in environment variables. "
                          "Ensure it is in the .env file and you are running the script with `python main.py`.")
 
 # Configurações de CORS para permitir requisições do frontend (localhost:3000)
@@ -40,121 +54,207 @@ CORS(app, resources={r"/*": {"origins": "*"}}, supports_credentials=True)
 if not os.getenv("TESTING") and "pytest" not in sys.modules:
     genai.configure(api_key=api_key)
 
+# Currículo compilado no build: seções, índices, roles e instrução de sistema prontos
+curriculo_artifact = None
+if config.CURRICULO_ARTIFACT_PATH:
+    try:
+        curriculo_artifact = load_artifact(config.CURRICULO_ARTIFACT_PATH)
+        if curriculo_artifact is not None:
+            logger.info("Curriculum artifact loaded", path=config.CURRICULO_ARTIFACT_PATH)
+    except ValueError as e:
+        logger.warning(f"Curriculum artifact ignored, loading JSON sources: {e}")
+
 # Inicializar handlers
-role_handler = RoleHandler()
-curriculo_handler = CurriculoHandler()
-cache_handler = CacheHandler()
+role_handler = RoleHandler(routing_memo_size=config.ROUTING_MEMO_MAX_ENTRIES,
+                           roles=curriculo_artifact.roles if curriculo_artifact else None)
+# Carrega todas as seções do currículo e os índices de busca antes de aceitar requisições
+curriculo_handler = CurriculoHandler(store=curriculo_artifact.store if curriculo_artifact else None,
+                                     check_interval=config.CURRICULO_CHECK_INTERVAL_SECONDS or None)
+
+def answer_data_versions(sections):
+    """Versões das seções que entraram no prompt de uma resposta (invalida o cache quando mudam)."""
+    return curriculo_handler.get_versions(sections)
+
+CACHE_MAX_AGE_HOURS = 24
+cache_handler = CacheHandler(
+    max_age_hours=CACHE_MAX_AGE_HOURS,
+    store=create_cache_store(config.CACHE_STORE, "cache", compression=config.CACHE_COMPRESSION,
+                             redis_url=config.CACHE_REDIS_URL,
+                             ttl_seconds=CACHE_MAX_AGE_HOURS * 3600 + config.CACHE_STALE_GRACE_SECONDS),
+    memory_max_entries=config.CACHE_MEMORY_MAX_ENTRIES,
+    memory_max_bytes=config.CACHE_MEMORY_MAX_BYTES,
+    similarity_threshold=config.CACHE_SIMILARITY_THRESHOLD or None,
+    max_entries=config.CACHE_MAX_ENTRIES or None,
+    max_bytes=config.CACHE_MAX_BYTES or None,
+    eviction_policy=config.CACHE_EVICTION_POLICY,
+    stale_grace_seconds=config.CACHE_STALE_GRACE_SECONDS,
+    max_concurrent_refreshes=config.CACHE_MAX_CONCURRENT_REFRESHES,
+    # Respostas ficam inválidas quando alguma seção que usaram muda
+    version_fn=answer_data_versions
+)
+# Warm start: carrega o snapshot antes de aceitar requisições (uma vez por armazenamento)
+if config.CACHE_SNAPSHOT_PATH and os.path.exists(config.CACHE_SNAPSHOT_PATH):
+    try:
+        cache_handler.import_snapshot(config.CACHE_SNAPSHOT_PATH, once=True)
+    except Exception as e:
+        print(f"⚠️  Failed to load cache snapshot {config.CACHE_SNAPSHOT_PATH}: {e}")
+# Manutenção em segundo plano: remove expiradas e mantém o cache dentro dos limites
+if config.CACHE_SWEEP_INTERVAL_SECONDS > 0:
+    cache_handler.start_sweeper(config.CACHE_SWEEP_INTERVAL_SECONDS)
+# Deduplicação de gerações idênticas em andamento, pela mesma chave do cache
+chat_flight = SingleFlight()
+# Rate limiting: em memória por processo (padrão) ou compartilhado entre workers (sqlite)
+rate_limiter.configure(algorithm=config.RATE_LIMIT_ALGORITHM, backend=config.RATE_LIMIT_BACKEND,
+                       db_path=config.RATE_LIMIT_DB_PATH,
+                       chat_requests=config.RATE_LIMIT_CHAT_REQUESTS, chat_window=config.RATE_LIMIT_CHAT_WINDOW,
+                       gemini_cost=config.RATE_LIMIT_GEMINI_COST, cache_hit_cost=config.RATE_LIMIT_CACHE_HIT_COST)
+# Teto de chamadas ao Gemini por chave de API, independente do IP de origem
+gemini_call_limiter = None
+if config.RATE_LIMIT_ENABLED and config.RATE_LIMIT_REQUESTS > 0:
+    gemini_call_limiter = create_rate_limiter(
+        config.RATE_LIMIT_REQUESTS, config.RATE_LIMIT_WINDOW, config.RATE_LIMIT_ALGORITHM,
+        backend=config.RATE_LIMIT_BACKEND, db_path=config.RATE_LIMIT_DB_PATH, namespace="gemini"
+    )
 
 # --- Gemini API Key Rotation ---
-class GeminiAPIKeyManager:
-    def __init__(self):
-        self.api_keys = [
-            os.getenv("GEMINI_API_KEY"),
-            os.getenv("GEMINI_KEY_API2")
-        ]
-        self.current_index = 0
-        self.last_error = None
-
-    def get_current_key(self):
-        return self.api_keys[self.current_index]
-
-    def switch_key(self):
-        if self.current_index == 0 and self.api_keys[1]:
-            self.current_index = 1
-            return True
-        return False
-
-    def reset(self):
-        self.current_index = 0
-        self.last_error = None
-
-# Instanciar o gerenciador de chaves
-key_manager = GeminiAPIKeyManager()
+# Em modo de teste não há chaves no ambiente; usa a chave resolvida acima
+key_pool = APIKeyPool(
+    configured_api_keys or [api_key],
+    cooldown_seconds=config.GEMINI_KEY_COOLDOWN_SECONDS,
+    max_cooldown_seconds=config.GEMINI_KEY_MAX_COOLDOWN_SECONDS,
+    call_limiter=gemini_call_limiter
+)
 
 # Função para gerar conteúdo com fallback de chave
 from google import genai
 
+# Clientes Gemini de vida longa, reutilizados entre requisições (um por chave)
+gemini_client_pool = GeminiClientPool(
+    pool_size=config.GEMINI_CLIENT_POOL_SIZE,
+    keepalive_seconds=config.GEMINI_KEEPALIVE_SECONDS,
+    client_factory=lambda **kwargs: genai.Client(**kwargs)
+)
+
+GEMINI_MODEL = "gemini-1.5-flash-latest"
+
+# Limita chamadas simultâneas ao Gemini; o excedente espera numa fila curta ou é descartado
+gemini_bulkhead = None
+if config.GEMINI_MAX_CONCURRENT > 0:
+    gemini_bulkhead = Bulkhead(
+        max_concurrent=config.GEMINI_MAX_CONCURRENT,
+        max_queue=config.GEMINI_MAX_QUEUE,
+        queue_timeout=config.GEMINI_QUEUE_TIMEOUT_SECONDS
+    )
+
+@contextmanager
+def gemini_slot():
+    """Vaga no bulkhead do Gemini durante o bloco (levanta BulkheadFullError sob sobrecarga)."""
+    if gemini_bulkhead is None:
+        yield
+        return
+    with gemini_bulkhead.slot():
+        yield
+
+def _is_quota_error(error):
+    # Erros do SDK trazem o status HTTP em .code; senão, identifica pela mensagem
+    if getattr(error, 'code', None) == 429:
+        return True
+    return 'quota' in str(error).lower() or '429' in str(error)
+
+def _acquire_api_key(tried):
+    """Obtém a próxima chave disponível que ainda não foi tentada nesta requisição."""
+    api_key = key_pool.acquire(exclude=tried)
+    if api_key is None:
+        raise APIKeysExhaustedError("Todas as chaves da API Gemini excederam a quota.", key_pool.retry_after())
+    tried.add(api_key)
+    return api_key
+
 def gemini_generate_content(system_instruction, prompt):
     """Gera conteúdo usando o Gemini, alternando a chave se necessário."""
-    for attempt in range(2):
-        client = genai.Client(api_key=key_manager.get_current_key())
-        try:
-            response = client.models.generate_content(
-                model="gemini-1.5-flash-latest",
-                contents=prompt,
-                config={
-                    "system_instruction": system_instruction
-                }
-            )
-            return response.text
-        except Exception as e:
-            # Tenta identificar erro de quota excedida (429) apenas pela mensagem
-            if 'quota' in str(e).lower() or '429' in str(e):
-                if key_manager.switch_key():
+    with gemini_slot():
+        tried = set()
+        while True:
+            api_key = _acquire_api_key(tried)
+            error = None
+            try:
+                client = gemini_client_pool.get_client(api_key)
+                response = client.models.generate_content(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config={
+                        "system_instruction": system_instruction
+                    }
+                )
+                return response.text
+            except Exception as e:
+                error = e
+                if _is_quota_error(e):
+                    # Chave entra em cooldown; tenta a próxima
                     continue
-                else:
-                    raise e
-            else:
                 raise e
-    raise RuntimeError("Todas as chaves da API Gemini excederam a quota diária.")
+            finally:
+                key_pool.release(api_key, error=error, rate_limited=error is not None and _is_quota_error(error))
 
-# --- Here we load and build a system instruction to JSON file ---
-@log_execution_time(logger, "build_system_instruction")
-def build_system_instruction(instruction_data: dict) -> str:
+def gemini_generate_content_stream(system_instruction, prompt):
     """
-    Build a complete string of instruction system from the dict in JSON.
-    This function processes a dictionary to create a structured system instruction string
-    for the generative AI model, including role definition, core rules, and advanced behaviors.
+    Versão em streaming de gemini_generate_content: produz os trechos de texto
+    conforme o modelo os gera. A troca de chave só acontece se a quota estourar
+    antes do primeiro trecho, para não duplicar texto já enviado ao cliente.
+    A vaga no bulkhead fica ocupada até o fim do stream.
     """
-    instruction_parts = []
-    
-    # Get the first system instruction from the 'sys' array
-    if "sys" in instruction_data and instruction_data["sys"]:
-        sys_instruction = instruction_data["sys"][0]  # Use the first instruction
-        
-        if "role_definition" in sys_instruction:
-            role = sys_instruction["role_definition"]
-            instruction_parts.append(f"{role.get('purpose', '')}")
-
-        instruction_parts.append("\nIMPORTANT Rules:")
-        if "core_rules" in sys_instruction:
-            # Itera sobre as regras principais, adicionando-as e seus exemplos.
-            for key, rule_data in sys_instruction["core_rules"].items():
-                # Usa len(instruction_parts) para numerar as regras dinamicamente.
-                instruction_parts.append(f"{len(instruction_parts)}. {rule_data.get('title', key)}: {rule_data.get('instruction', '')}")
-                if "examples" in rule_data and rule_data["examples"]:
-                    instruction_parts.append("    Examples:")
-                    for example in rule_data["examples"]:
-                        instruction_parts.append(f"    - {example}")
-
-        instruction_parts.append("\nAdvanced Behaviors:")
-        if "advanced_behaviors" in sys_instruction:
-            # Itera sobre os comportamentos avançados.
-            for key, rule_data in sys_instruction["advanced_behaviors"].items():
-                instruction_parts.append(f"{len(instruction_parts)}. {rule_data.get('title', key)}: {rule_data.get('instruction', '')}")
-
-    return "\n".join(instruction_parts)
-
-try:
-    with open("data/system_instruction.json", "r", encoding="utf-8") as f:
-        instruction_json_data = json.load(f)
-    SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = build_system_instruction(instruction_json_data)
-
-    if not SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT.strip():
-        raise ValueError("System instruction built from JSON is empty.")
-
-except FileNotFoundError:
-    logger.error("System instruction file not found", error=FileNotFoundError("data/system_instruction.json"))
-    # Fallback para uma instrução padrão se o arquivo não for encontrado.
-    SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
-except json.JSONDecodeError as e:
-    logger.error("Invalid JSON in system instruction file", error=e)
-    # Fallback se o JSON for inválido.
-    SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
-except Exception as e:
-    logger.error("Error loading system instruction", error=e)
-    # Fallback para qualquer outro erro.
-    SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
+    with gemini_slot():
+        tried = set()
+        while True:
+            api_key = _acquire_api_key(tried)
+            started = False
+            error = None
+            try:
+                client = gemini_client_pool.get_client(api_key)
+                for chunk in client.models.generate_content_stream(
+                    model=GEMINI_MODEL,
+                    contents=prompt,
+                    config={
+                        "system_instruction": system_instruction
+                    }
+                ):
+                    text = chunk.text
+                    if text:
+                        started = True
+                        yield text
+                return
+            except Exception as e:
+                error = e
+                if not started and _is_quota_error(e):
+                    continue
+                raise e
+            finally:
+                key_pool.release(api_key, error=error, rate_limited=error is not None and _is_quota_error(error))
+
+# --- Here we load and build a system instruction to JSON file ---
+if curriculo_artifact is not None and curriculo_artifact.system_instruction:
+    # Já montada no build (python -m utils.curriculo_artifact build)
+    SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = curriculo_artifact.system_instruction
+else:
+    try:
+        with open("data/system_instruction.json", "r", encoding="utf-8") as f:
+            instruction_json_data = json.load(f)
+        SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = build_system_instruction(instruction_json_data)
+
+        if not SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT.strip():
+            raise ValueError("System instruction built from JSON is empty.")
+
+    except FileNotFoundError:
+        logger.error("System instruction file not found", error=FileNotFoundError("data/system_instruction.json"))
+        # Fallback para uma instrução padrão se o arquivo não for encontrado.
+        SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
+    except json.JSONDecodeError as e:
+        logger.error("Invalid JSON in system instruction file", error=e)
+        # Fallback se o JSON for inválido.
+        SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
+    except Exception as e:
+        logger.error("Error loading system instruction", error=e)
+        # Fallback para qualquer outro erro.
+        SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT = "You are an AI assistant for Lucas's resume. Please provide relevant information."
 
 def get_client_ip():
     """Extrai o IP real do cliente."""
@@ -172,6 +272,11 @@ def before_request():
     start_time = time.time()
     request.start_time = start_time
     
+    # Preflights de CORS e o health check não passam pelo rate limiting
+    if (not config.RATE_LIMIT_ENABLED or request.method == 'OPTIONS'
+            or request.path in rate_limiter.EXEMPT_ENDPOINTS):
+        return
+    
     # Rate limiting
     client_ip = get_client_ip()
     endpoint = request.endpoint
@@ -212,49 +317,156 @@ def after_request(response):
     return response
 
 def filter_projects_by_question(projects, question):
-    question_lower = question.lower()
-    search_field = ["name", "description", "role", "status", "team", "technologies", "features", "highlights", "challenges", "results"]
-
-    def relevant_projects(project):
-        for field in search_field:
-            value = project.get(field, "")
-            if isinstance(value, list):
-                value = " ".join(str(v).lower() for v in value)
-            else:
-                value = str(value).lower()
-            if question_lower in value or difflib.SequenceMatcher(None, question_lower, value).ratio() > 0.4:
-                return True
-        return False
-
-    filtered_projects = [p for p in projects if relevant_projects(p)]
-
-    if not filtered_projects:
-        filtered_projects = sorted(
-            projects,
-            key=lambda p: difflib.SequenceMatcher(None, question_lower, p.get("description", "").lower()).ratio(),
-            reverse=True
-        )
+    # Top 5 por BM25 (índice invertido construído ao carregar a seção de projetos)
+    return curriculo_handler.search_projects(question, projects, limit=5)
+
+def build_factual_summary(factual_data, question):
+    """Monta uma resposta factual clara para o modelo reescrever."""
+    summarize = []
+    for field, value in factual_data.items():
+        if field == 'projects' and isinstance(value, list):
+            value = filter_projects_by_question(value, question)
+        # Linhas já renderizadas (com destaques) no snapshot do currículo
+        summarize.extend(curriculo_handler.summary_rows(field, value))
+    return '\n'.join(summarize)
+
+# Detectar idioma da question (simples: se tem acento ou palavras típicas do português)
+def is_portuguese(text):
+    # Critério simples: presença de acentos ou palavras comuns do português
+    if re.search(r'[ãáàâêéíóõôúç]', text, re.IGNORECASE):
+        return True
+    pt_keywords = ["qual", "como", "quando", "quem", "onde", "por que", "para que", "sobre", "projects", "formação", "certificações", "habilidades", "experiência"]
+    return any(k in unicodedata.normalize('NFKD', text).lower() for k in pt_keywords)
+
+def build_structured_prompt(question, factual_summary):
+    """Monta o prompt estruturado no idioma da pergunta."""
+    if is_portuguese(question):
+        return (
+            "Responda à question do usuário usando apenas as informações abaixo, sem inventar nada. "
+            "Sempre destaque nomes próprios, tecnologias e informações únicas usando dois asteriscos antes e depois da palavra (exemplo: **Lucas**), nunca use aspas para esse destaque.\n"
+            "Estruture sua resposta em três partes, mas NÃO utilize títulos, marcadores, separadores ou qualquer palavra como 'Introdução', 'Resposta Principal', 'Conclusão' ou variações/sinônimos no texto final. Caso utilize, use apenas em português.\n"
+            "- Comece repetindo parcialmente a question respondida, mostrando ao usuário que você entendeu a questão.\n"
+            "- Em seguida, desenvolva a resposta da questão, separando por parágrafos claros.\n"
+            "- Finalize questionndo ao usuário se a resposta foi útil e/ou sugerindo uma próxima question relacionada ao tema.\n"
+            "Evite saudações e não use essa estrutura para questions que não sejam sobre o Lucas.\n"
+            "\nquestion: {question}\n\nInformações disponíveis:\n{factual_summary}"
+        ).format(question=question, factual_summary=factual_summary)
+    return (
+        "Answer the user's question using only the information below, without making anything up. "
+        "Always highlight proper names, technologies, and unique information using two asterisks before and after the word (example: **Lucas**), never use quotes for this highlight.\n"
+        "Structure your answer in three parts, but DO NOT use headings, bullet points, separators, or any words like 'Introduction', 'Main Answer', 'Conclusion' or similar/synonyms in the final text. If you use any, use only in English.\n"
+        "- Start by partially repeating the question, showing the user you understood it.\n"
+        "- Then, develop the main answer, using clear paragraphs.\n"
+        "- Finish by asking if the answer was helpful and/or suggesting a related follow-up question.\n"
+        "Avoid greetings and do not use this structure for questions not about Lucas.\n"
+        "\nQuestion: {question}\n\nAvailable information:\n{factual_summary}"
+    ).format(question=question, factual_summary=factual_summary)
+
+def build_fallback_answer():
+    """Resposta usada quando não há informação factual para a pergunta."""
+    available_fields = curriculo_handler.searchable_sections() or [
+        'academic_background', 'professional_experience', 'projects', 'skills', 'certifications', 'soft_skills', 'languages', 'intelligent_responses']
+    sugestao = ', '.join([f for f in available_fields if f not in ['contact', 'name', 'title', 'summary', 'what_im_looking_for', 'additional_info']])
+    logger.debug("Fallback response sent", available_fields=available_fields)
+    return f"Não há informações sobre esse tema no currículo de Lucas. Posso te contar sobre: {sugestao.replace('_', ' ')}. Exemplos de questions: 'Qual a formação acadêmica?', 'Quais projects ele já desenvolveu?', 'Quais certificações ele possui?'"
+
+OVERLOADED_ANSWER = "Estou recebendo muitas perguntas no momento. Tente novamente em alguns segundos."
+
+def overloaded_response(error):
+    """
+    Resposta 503 com Retry-After para uma requisição descartada pelo bulkhead do
+    Gemini ou sem chave da API disponível (BulkheadFullError/APIKeysExhaustedError).
+    """
+    response = jsonify({"answer": OVERLOADED_ANSWER, "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 503
+
+def parse_chat_request():
+    """Extrai pergunta e role do corpo da requisição, validando a role."""
+    data = request.get_json()
+    question = data.get("question", "").strip()
+    role = data.get("role", "recruiter")
+
+    if question and not role_handler.validate_role(role):
+        logger.warning(f"Invalid role '{role}', using default", ip=get_client_ip())
+        role = "recruiter"  # Fallback para role padrão
+    return question, role
 
-    ordered_projects = sorted(
-        filtered_projects,
-        key=lambda p: len(p.get("technologies", [])) + p.get("year", 0),
-        reverse=True
+def format_sse_event(event, payload):
+    """Formata um evento Server-Sent Events com payload JSON."""
+    return f"event: {event}\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def collect_factual_data(question, relevant_fields):
+    """
+    Dados do currículo para o prompt: as seções inteiras escolhidas pelo roteamento,
+    mais os itens das demais seções que estão entre os RETRIEVAL_TOP_K mais relevantes
+    para a pergunta (BM25). RETRIEVAL_TOP_K=0 desativa a busca.
+    """
+    factual_data = curriculo_handler.get_multiple(relevant_fields)
+    if config.RETRIEVAL_TOP_K > 0:
+        # Seções roteadas vêm inteiras, substituindo a versão podada da mesma seção
+        factual_data = {**curriculo_handler.retrieve(question, limit=config.RETRIEVAL_TOP_K), **factual_data}
+    return factual_data
+
+def generate_answer(question, role, relevant_fields):
+    """
+    Gera a resposta para um cache miss e a armazena no cache.
+
+    Returns:
+        tuple: (resposta, se chamou o Gemini; False para a resposta de fallback)
+    """
+    factual_data = collect_factual_data(question, relevant_fields)
+    logger.debug("Factual data extracted", data_keys=list(factual_data.keys()))
+
+    # --- NOVO: Montar resposta factual ou fallback robusto ---
+    if not factual_data:
+        # Fallback: não há informação factual
+        return build_fallback_answer(), False
+
+    logger.debug("Generating role prompt")
+    # Gerar prompt personalizado baseado na role
+    personalized_system_instruction = role_handler.generate_role_prompt(
+        role, SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT
     )
-    return ordered_projects[:5]
-
-def format_highlight(text, info_dict):
-    # Destaca valores únicos em negrito (Markdown)
-    for key, value in info_dict.items():
-        if isinstance(value, list):
-            for v in value:
-                v_str = str(v)
-                if v_str and v_str in text:
-                    text = text.replace(v_str, f"**{v_str}**")
-        else:
-            v_str = str(value)
-            if v_str and v_str in text:
-                text = text.replace(v_str, f"**{v_str}**")
-    return text
+    logger.debug("Role prompt generated successfully")
+
+    factual_summary = build_factual_summary(factual_data, question)
+    logger.debug("Factual summary created", summary_length=len(factual_summary))
+
+    answer = gemini_generate_content(
+        personalized_system_instruction,
+        build_structured_prompt(question, factual_summary)
+    )
+    answer = answer or ''
+
+    # Pós-processamento: remover títulos de estrutura
+    answer = remove_structural_titles(answer)
+
+    logger.debug("Gemini response generated successfully")
+    # Armazenar no cache
+    cache_handler.set(question, role, relevant_fields, answer, factual_data)
+    return answer, True
+
+def generate_answer_once(question, role, relevant_fields):
+    """
+    Gera a resposta uma única vez por chave: entre threads (SingleFlight) e entre
+    workers/instâncias (lock do armazenamento do cache).
+
+    Returns:
+        tuple: (resposta, se esta requisição chamou o Gemini, se foi compartilhada de
+        outra requisição em andamento)
+    """
+    cache_key = cache_handler.generate_cache_key(question, role, relevant_fields)
+    (answer, generated), coalesced = chat_flight.do(cache_key, lambda: cache_handler.generate_once(
+        question, role, relevant_fields, lambda: generate_answer(question, role, relevant_fields)
+    ))
+    return answer, generated and not coalesced, coalesced
+
+def refresh_cached_answer(question, role, relevant_fields):
+    """Regenera em segundo plano uma resposta servida após expirar (stale-while-revalidate)."""
+    generate_answer_once(question, role, relevant_fields)
+
+cache_handler.refresh_fn = refresh_cached_answer
 
 # --- Main Endpoint (POST /chat) ---
 @app.route("/chat", methods=["POST"])
@@ -263,23 +475,18 @@ def chat():
     start_time = time.time()
     answer = None
     cache_hit = False
+    coalesced = False
+    generated = False
     
     # Obtém os dados JSON da requisição do frontend.
-    data = request.get_json()
-    question = data.get("question", "").strip()
-    history = data.get("history", []) # O histórico é um array de {role: "user"|"model", parts: [{text: "..."}]}
-    role = data.get("role", "recruiter")  # NOVO: parâmetro role
+    # O histórico (data["history"]) é um array de {role: "user"|"model", parts: [{text: "..."}]}
+    question, role = parse_chat_request()
 
     if not question:
         # Retorna erro se a question estiver vazia.
         logger.warning("Empty question received", ip=get_client_ip())
         return jsonify({"answer": "Please provide your question."}), 400
 
-    # Validar role
-    if not role_handler.validate_role(role):
-        logger.warning(f"Invalid role '{role}', using default", ip=get_client_ip())
-        role = "recruiter"  # Fallback para role padrão
-
     try:
         # --- NOVO: Carregar apenas as seções necessárias do currículo ---
         relevant_fields = role_handler.identify_relevant_fields(question, role)
@@ -292,133 +499,21 @@ def chat():
             answer = cached_response['answer']
             logger.info("Cache hit", question_preview=question[:50])
         else:
-            # Cache miss - processar normalmente
-            curriculo_data = curriculo_handler.get_multiple(relevant_fields)
-            logger.debug("Factual data extracted", data_keys=list(curriculo_data.keys()))
-            factual_data = curriculo_data
-
-            logger.debug("Generating role prompt")
-            # Gerar prompt personalizado baseado na role
-            personalized_system_instruction = role_handler.generate_role_prompt(
-                role, SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT
-            )
-            logger.debug("Role prompt generated successfully")
-
-            logger.debug("Gemini model initialized successfully")
-
-            # --- NOVO: Montar resposta factual ou fallback robusto ---
-            if factual_data:
-                # Monta uma resposta factual clara para o modelo reescrever
-                # summarize = []
-                # for field, value in factual_data.items():
-                #     if isinstance(value, list):
-                #         if field == 'academic_background':
-                #             for degree in value:
-                #                 summarize.append(f"- {degree.get('degree', '')} em {degree.get('school', '')} ({degree.get('year', '')})")
-                #         elif field == 'projects':
-                #             projects_relevantes = filter_projects_by_question(value, question)
-                #             for proj in projects_relevantes:
-                #                 summarize.append(f"- project: {proj.get('name', '')} - {proj.get('description', '')}")
-                #         else:
-                #             summarize.append(f"- {field.replace('_', ' ').capitalize()}: {', '.join(str(x) for x in value[:5])}")
-                #     elif isinstance(value, dict):
-                #         summarize.append(f"- {field.replace('_', ' ').capitalize()}: {', '.join([f'{k}: {v}' for k, v in value.items()])}")
-                #     else:
-                #         summarize.append(f"- {field.replace('_', ' ').capitalize()}: {value}")
-                # factual_summary = '\n'.join(summarize)
-                # logger.debug("Factual summary created", summary_length=len(factual_summary))
-
-                summarize = []
-                for field, value in factual_data.items():
-                    if isinstance(value, list):
-                        if field == 'academic_background':
-                            for formacao in value:
-                                row = f"- {formacao.get('degree', '')} em {formacao.get('school', '')} ({formacao.get('year', '')})"
-                                summarize.append(format_highlight(row, formacao))
-                        elif field == 'projects':
-                            projects_relevantes = filter_projects_by_question(value, question)
-                            for proj in projects_relevantes:
-                                row = f"- Projeto: {proj.get('name', '')} - {proj.get('description', '')}"
-                                summarize.append(format_highlight(row, proj))
-                        else:
-                            row = f"- {field.replace('_', ' ').capitalize()}: {', '.join(str(x) for x in value[:5])}"
-                            summarize.append(format_highlight(row, {field: value}))
-                    elif isinstance(value, dict):
-                        row = f"- {field.replace('_', ' ').capitalize()}: {', '.join([f'{k}: {v}' for k, v in value.items()])}"
-                        summarize.append(format_highlight(row, value))
-                    else:
-                        row = f"- {field.replace('_', ' ').capitalize()}: {value}"
-                        summarize.append(format_highlight(row, {field: value}))
-                factual_summary = '\n'.join(summarize)
-                logger.debug("Factual summary created", summary_length=len(factual_summary))
-
-                # Detectar idioma da question (simples: se tem acento ou palavras típicas do português)
-                def is_portuguese(text):
-                    # Critério simples: presença de acentos ou palavras comuns do português
-                    if re.search(r'[ãáàâêéíóõôúç]', text, re.IGNORECASE):
-                        return True
-                    pt_keywords = ["qual", "como", "quando", "quem", "onde", "por que", "para que", "sobre", "projects", "formação", "certificações", "habilidades", "experiência"]
-                    return any(k in unicodedata.normalize('NFKD', text).lower() for k in pt_keywords)
-
-                if is_portuguese(question):
-                    prompt_estruturado = (
-                        "Responda à question do usuário usando apenas as informações abaixo, sem inventar nada. "
-                        "Sempre destaque nomes próprios, tecnologias e informações únicas usando dois asteriscos antes e depois da palavra (exemplo: **Lucas**), nunca use aspas para esse destaque.\n"
-                        "Estruture sua resposta em três partes, mas NÃO utilize títulos, marcadores, separadores ou qualquer palavra como 'Introdução', 'Resposta Principal', 'Conclusão' ou variações/sinônimos no texto final. Caso utilize, use apenas em português.\n"
-                        "- Comece repetindo parcialmente a question respondida, mostrando ao usuário que você entendeu a questão.\n"
-                        "- Em seguida, desenvolva a resposta da questão, separando por parágrafos claros.\n"
-                        "- Finalize questionndo ao usuário se a resposta foi útil e/ou sugerindo uma próxima question relacionada ao tema.\n"
-                        "Evite saudações e não use essa estrutura para questions que não sejam sobre o Lucas.\n"
-                        "\nquestion: {question}\n\nInformações disponíveis:\n{factual_summary}"
-                    ).format(question=question, factual_summary=factual_summary)
-                else:
-                    prompt_estruturado = (
-                        "Answer the user's question using only the information below, without making anything up. "
-                        "Always highlight proper names, technologies, and unique information using two asterisks before and after the word (example: **Lucas**), never use quotes for this highlight.\n"
-                        "Structure your answer in three parts, but DO NOT use headings, bullet points, separators, or any words like 'Introduction', 'Main Answer', 'Conclusion' or similar/synonyms in the final text. If you use any, use only in English.\n"
-                        "- Start by partially repeating the question, showing the user you understood it.\n"
-                        "- Then, develop the main answer, using clear paragraphs.\n"
-                        "- Finish by asking if the answer was helpful and/or suggesting a related follow-up question.\n"
-                        "Avoid greetings and do not use this structure for questions not about Lucas.\n"
-                        "\nQuestion: {question}\n\nAvailable information:\n{factual_summary}"
-                    ).format(question=question, factual_summary=factual_summary)
-
-                answer = gemini_generate_content(
-                    personalized_system_instruction,
-                    prompt_estruturado
-                )
-                answer = answer or ''
-
-                # Pós-processamento: remover títulos de estrutura
-                def remove_structural_titles(text):
-                    import re
-                    # Regex para títulos comuns em pt/en, com ou sem markdown
-                    patterns = [
-                        r'^\s*#+\s*(Introdu[cç][aã]o|Resposta Principal|Conclus[ãa]o)\s*$',
-                        r'^\s*#+\s*(Introduction|Main Answer|Conclusion)\s*$',
-                        r'^\s*(Introdu[cç][aã]o|Resposta Principal|Conclus[ãa]o)\s*$',
-                        r'^\s*(Introduction|Main Answer|Conclusion)\s*$',
-                    ]
-                    lines = text.splitlines()
-                    filtered = []
-                    for line in lines:
-                        if not any(re.match(p, line.strip(), re.IGNORECASE) for p in patterns):
-                            filtered.append(line)
-                    return '\n'.join(filtered).strip()
-
-                answer = remove_structural_titles(answer)
-
-                logger.debug("Gemini response generated successfully")
-                # Armazenar no cache
-                cache_handler.set(question, role, relevant_fields, answer, factual_data)
-            else:
-                # Fallback: não há informação factual
-                available_fields = list(curriculo_handler.cache.keys()) or [
-                    'academic_background', 'professional_experience', 'projects', 'skills', 'certifications', 'soft_skills', 'languages', 'intelligent_responses']
-                sugestao = ', '.join([f for f in available_fields if f not in ['contact', 'name', 'title', 'summary', 'what_im_looking_for', 'additional_info']])
-                answer = f"Não há informações sobre esse tema no currículo de Lucas. Posso te contar sobre: {sugestao.replace('_', ' ')}. Exemplos de questions: 'Qual a formação acadêmica?', 'Quais projects ele já desenvolveu?', 'Quais certificações ele possui?'"
-                logger.debug("Fallback response sent", available_fields=available_fields)
-
+            # Cache miss - requisições idênticas simultâneas compartilham uma única geração
+            answer, generated, coalesced = generate_answer_once(question, role, relevant_fields)
+            if coalesced:
+                logger.info("Coalesced with in-flight request", question_preview=question[:50])
+        if not generated:
+            # Sem chamada própria ao Gemini (cache hit, fallback, resposta de outra requisição
+            # ou de outro worker): devolve parte do custo reservado no rate limit
+            rate_limiter.refund_cache_hit(get_client_ip())
+
+    except (BulkheadFullError, APIKeysExhaustedError) as e:
+        # Sobrecarga ou quota esgotada: o cache já foi consultado, então descarta com 503 em vez de enfileirar mais
+        logger.warning("Gemini unavailable, request shed", question_preview=question[:50],
+                       reason=type(e).__name__, retry_after=e.retry_after)
+        rate_limiter.refund_cache_hit(get_client_ip())
+        return overloaded_response(e)
     except Exception as e:
         logger.error("Unexpected error in chat endpoint", error=e, question_preview=question[:50])
         answer = "An internal error occurred while processing your question. Please try again later."
@@ -434,12 +529,104 @@ def chat():
         role=role,
         response_time=response_time,
         cache_hit=cache_hit,
+        coalesced=coalesced,
         relevant_fields=relevant_fields
     )
     
     # Retorna a resposta do modelo como JSON.
     return jsonify({"answer": answer, "role": role})
 
+# --- Streaming Endpoint (POST /chat/stream) ---
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Mesma lógica de /chat, mas envia a resposta como Server-Sent Events à medida
+    que o Gemini gera o texto. Eventos: "chunk" ({text}), "done" ({role, cache_hit})
+    e "error" ({answer}). Respostas em cache são reproduzidas no mesmo formato.
+    Sob sobrecarga do Gemini ou sem chave disponível, o evento "error" traz também
+    `retry_after` (o status HTTP do stream já foi enviado).
+    """
+    start_time = time.time()
+    question, role = parse_chat_request()
+    client_ip = get_client_ip()
+
+    if not question:
+        logger.warning("Empty question received", ip=client_ip)
+        return jsonify({"answer": "Please provide your question."}), 400
+
+    def generate():
+        cache_hit = False
+        relevant_fields = []
+        first_chunk_time = None
+        try:
+            relevant_fields = role_handler.identify_relevant_fields(question, role)
+            logger.debug("Relevant fields identified", fields=relevant_fields, role=role)
+
+            cached_response = cache_handler.get(question, role, relevant_fields)
+            if cached_response:
+                cache_hit = True
+                logger.info("Cache hit", question_preview=question[:50])
+                rate_limiter.refund_cache_hit(client_ip)
+                for piece in split_answer_chunks(cached_response['answer']):
+                    yield format_sse_event("chunk", {"text": piece})
+            else:
+                factual_data = collect_factual_data(question, relevant_fields)
+                if factual_data:
+                    personalized_system_instruction = role_handler.generate_role_prompt(
+                        role, SYSTEM_INSTRUCTION_FOR_Lucas_CHATBOT
+                    )
+                    prompt = build_structured_prompt(question, build_factual_summary(factual_data, question))
+
+                    # Remove títulos de estrutura trecho a trecho, sem esperar a resposta inteira
+                    title_filter = StructuralTitleFilter()
+                    answer_parts = []
+                    for chunk in gemini_generate_content_stream(personalized_system_instruction, prompt):
+                        text = title_filter.feed(chunk)
+                        if text:
+                            if first_chunk_time is None:
+                                first_chunk_time = time.time() - start_time
+                            answer_parts.append(text)
+                            yield format_sse_event("chunk", {"text": text})
+                    tail = title_filter.flush()
+                    if tail:
+                        answer_parts.append(tail)
+                        yield format_sse_event("chunk", {"text": tail})
+
+                    cache_handler.set(question, role, relevant_fields, ''.join(answer_parts), factual_data)
+                else:
+                    rate_limiter.refund_cache_hit(client_ip)
+                    for piece in split_answer_chunks(build_fallback_answer()):
+                        yield format_sse_event("chunk", {"text": piece})
+        except (BulkheadFullError, APIKeysExhaustedError) as e:
+            logger.warning("Gemini unavailable, request shed", question_preview=question[:50],
+                           reason=type(e).__name__, retry_after=e.retry_after)
+            rate_limiter.refund_cache_hit(client_ip)
+            yield format_sse_event("error", {"answer": OVERLOADED_ANSWER, "retry_after": e.retry_after})
+            return
+        except Exception as e:
+            logger.error("Unexpected error in chat stream endpoint", error=e, question_preview=question[:50])
+            yield format_sse_event("error", {
+                "answer": "An internal error occurred while processing your question. Please try again later."
+            })
+            return
+
+        logger.log_chat_request(
+            question=question,
+            role=role,
+            response_time=time.time() - start_time,
+            cache_hit=cache_hit,
+            relevant_fields=relevant_fields,
+            streamed=True,
+            time_to_first_chunk_ms=round(first_chunk_time * 1000, 2) if first_chunk_time is not None else None
+        )
+        yield format_sse_event("done", {"role": role, "cache_hit": cache_hit})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 # Novo endpoint para obter roles disponíveis
 @app.route("/roles", methods=["GET"])
 def get_roles():
@@ -468,6 +655,9 @@ def get_cache_stats():
     """Retorna estatísticas do cache"""
     try:
         stats = cache_handler.get_stats()
+        stats['coalescing'] = chat_flight.get_stats()
+        stats['routing'] = role_handler.get_routing_stats()
+        stats['curriculum'] = curriculo_handler.store.get_stats()
         return jsonify(stats)
     except Exception as e:
         logger.error("Error getting cache stats", error=e)
@@ -479,12 +669,86 @@ def clear_cache():
     """Limpa todo o cache"""
     try:
         removed_count = cache_handler.clear_all()
-        logger.info("Cache cleared", removed_files=removed_count)
-        return jsonify({"message": f"Cache cleared. {removed_count} files removed."})
+        logger.info("Cache cleared", removed_entries=removed_count)
+        return jsonify({"message": f"Cache cleared. {removed_count} entries removed."})
     except Exception as e:
         logger.error("Error clearing cache", error=e)
         return jsonify({"error": "Failed to clear cache"}), 500
 
+def check_admin_token():
+    """Valida o cabeçalho X-Admin-Token; retorna uma resposta de erro ou None."""
+    if not config.CACHE_ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled (CACHE_ADMIN_TOKEN not set)"}), 403
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), config.CACHE_ADMIN_TOKEN):
+        return jsonify({"error": "Invalid admin token"}), 401
+    return None
+
+# Endpoints de snapshot do cache (warm start após deploy)
+@app.route("/cache/snapshot", methods=["GET"])
+def export_cache_snapshot():
+    """Baixa o cache atual como um snapshot comprimido"""
+    error = check_admin_token()
+    if error:
+        return error
+    try:
+        fd, path = tempfile.mkstemp(suffix=".snapshot.gz")
+        os.close(fd)
+        counts = cache_handler.export_snapshot(path)
+        snapshot_file = open(path, "rb")
+        # O arquivo aberto continua legível depois de removido do disco
+        os.remove(path)
+        logger.info("Cache snapshot exported", entries=counts['entries'])
+        return send_file(snapshot_file, mimetype="application/gzip", as_attachment=True,
+                         download_name="answers.snapshot.gz")
+    except Exception as e:
+        logger.error("Error exporting cache snapshot", error=e)
+        return jsonify({"error": "Failed to export cache snapshot"}), 500
+
+@app.route("/cache/snapshot", methods=["POST"])
+def import_cache_snapshot():
+    """Carrega um snapshot enviado no corpo da requisição"""
+    error = check_admin_token()
+    if error:
+        return error
+    path = None
+    try:
+        fd, path = tempfile.mkstemp(suffix=".snapshot.gz")
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = request.stream.read(64 * 1024)
+                if not chunk:
+                    break
+                f.write(chunk)
+        counts = cache_handler.import_snapshot(path)
+        logger.info("Cache snapshot imported", entries=counts['entries'])
+        return jsonify(counts)
+    except (ValueError, OSError, EOFError) as e:
+        logger.warning(f"Invalid cache snapshot: {e}")
+        return jsonify({"error": "Invalid snapshot file"}), 400
+    except Exception as e:
+        logger.error("Error importing cache snapshot", error=e)
+        return jsonify({"error": "Failed to import cache snapshot"}), 500
+    finally:
+        if path and os.path.exists(path):
+            os.remove(path)
+
+# Recarrega o currículo sem reiniciar o processo (troca o snapshot de uma vez)
+@app.route("/curriculum/reload", methods=["POST"])
+def reload_curriculum():
+    """Relê as seções de data/ e reconstrói os índices"""
+    error = check_admin_token()
+    if error:
+        return error
+    try:
+        store = curriculo_handler.reload()
+        logger.info("Curriculum reloaded", sections=len(store.sections))
+        # Respostas em cache de seções alteradas ficam inválidas pela mudança de versão; os
+        # demais workers recarregam ao notar a mudança em data/ (CURRICULO_CHECK_INTERVAL_SECONDS)
+        return jsonify({"sections": dict(store.versions)})
+    except Exception as e:
+        logger.error("Error reloading curriculum", error=e)
+        return jsonify({"error": "Failed to reload curriculum"}), 500
+
 # Endpoint para estatísticas do rate limiter
 @app.route("/rate-limit/stats", methods=["GET"])
 def get_rate_limit_stats():
@@ -496,13 +760,28 @@ def get_rate_limit_stats():
         logger.error("Error getting rate limit stats", error=e)
         return jsonify({"error": "Failed to get rate limit stats"}), 500
 
+# Endpoint para estatísticas das chaves e clientes Gemini
+@app.route("/gemini/stats", methods=["GET"])
+def get_gemini_stats():
+    """Retorna uso por chave (em uso, erros, 429s, cooldown) e o estado do pool de clientes"""
+    try:
+        return jsonify({
+            "keys": key_pool.get_stats(),
+            "client_pool": gemini_client_pool.get_stats(),
+            "call_limiter": gemini_call_limiter.get_stats() if gemini_call_limiter is not None else None,
+            "bulkhead": gemini_bulkhead.get_stats() if gemini_bulkhead is not None else None
+        })
+    except Exception as e:
+        logger.error("Error getting Gemini stats", error=e)
+        return jsonify({"error": "Failed to get Gemini stats"}), 500
+
 # Health check endpoint para Render
 @app.route("/health", methods=["GET"])
 def health_check():
     """Endpoint de health check para serviços de deploy"""
     try:
         # Verificar se a API key está configurada
-        api_key_status = "configured" if os.getenv("GEMINI_API_KEY") else "missing"
+        api_key_status = "configured" if configured_api_keys else "missing"
         
         return jsonify({
             "status": "healthy",
@@ -523,9 +802,11 @@ if __name__ == "__main__":
     print("Iniciando Gemini ChatBot...")
     print("Servidor rodando em: http://localhost:5000")
     print("Endpoint principal: http://localhost:5000/chat")
+    print("Endpoint de streaming: http://localhost:5000/chat/stream")
     print("Endpoint de roles: http://localhost:5000/roles")
     print("Cache stats: http://localhost:5000/cache/stats")
     print("Rate limit stats: http://localhost:5000/rate-limit/stats")
+    print("Gemini stats: http://localhost:5000/gemini/stats")
     print("Pressione Ctrl+C para parar o servidor")
     print("-" * 50)
     
@@ -0,0 +1,267 @@
+"""
+Servidor em processo que fala o protocolo Redis (RESP2), com o subconjunto de
+comandos usado por utils.redis_cache_store. Serve para testar o backend redis
+sem um servidor real; vários clientes (threads ou processos) podem se conectar.
+"""
+import socket
+import socketserver
+import threading
+import time
+
+from utils.redis_cache_store import RELEASE_LOCK_SCRIPT
+
+
+class _Store:
+    def __init__(self):
+        self.data = {}  # chave -> valor (bytes, dict para hash, dict membro->score para zset)
+        self.expires = {}  # chave -> timestamp
+        self.lock = threading.Lock()
+
+    def _alive(self, key):
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+
+def _score(value, upper=False):
+    text = value.decode()
+    if text in ("-inf", "+inf", "inf"):
+        return float(text.replace("+", "")), False
+    if text.startswith("("):
+        return float(text[1:]), True
+    return float(text), False
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def setup(self):
+        super().setup()
+        self.server.connections.add(self.request)
+
+    def finish(self):
+        self.server.connections.discard(self.request)
+        super().finish()
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            count = int(line[1:-2])
+            args = []
+            for _ in range(count):
+                length = int(self.rfile.readline()[1:-2])
+                args.append(self.rfile.read(length + 2)[:-2])
+            try:
+                with self.server.store.lock:
+                    reply = self.server.execute(args)
+            except Exception as e:
+                reply = Exception(str(e))
+            self.wfile.write(_encode(reply))
+
+
+def _encode(reply):
+    if isinstance(reply, Exception):
+        return b"-ERR %s\r\n" % str(reply).encode()
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, bool):
+        return b":%d\r\n" % int(reply)
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, str):
+        return b"+%s\r\n" % reply.encode()
+    if isinstance(reply, bytes):
+        return b"$%d\r\n%s\r\n" % (len(reply), reply)
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(_encode(item) for item in reply)
+    raise TypeError(type(reply))
+
+
+class RESPStandIn(socketserver.ThreadingTCPServer):
+    """Servidor RESP em memória. Use `url` para conectar e `shutdown()` para parar."""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, password=None):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.password = password
+        self.connections = set()
+        self.store = _Store()
+        self.commands = []
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return f"redis://127.0.0.1:{self.server_address[1]}/0"
+
+    def drop_connections(self):
+        """Encerra as conexões abertas, como um servidor que fecha clientes ociosos."""
+        for connection in list(self.connections):
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def execute(self, args):
+        name = args[0].decode().upper()
+        self.commands.append(name)
+        handler = getattr(self, f"cmd_{name.lower()}", None)
+        if handler is None:
+            raise Exception(f"unknown command '{name}'")
+        return handler(*args[1:])
+
+    def _get(self, key, kind=None):
+        store = self.store
+        if not store._alive(key):
+            return None
+        value = store.data[key]
+        if kind is not None and not isinstance(value, kind):
+            raise Exception("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    # --- conexão ---
+    def cmd_ping(self, *args):
+        return "PONG"
+
+    def cmd_auth(self, *args):
+        if self.password is not None and args[-1].decode() != self.password:
+            raise Exception("WRONGPASS invalid username-password pair")
+        return "OK"
+
+    def cmd_select(self, *args):
+        return "OK"
+
+    def cmd_flushall(self):
+        self.store.data.clear()
+        self.store.expires.clear()
+        return "OK"
+
+    # --- scripts (só os usados pelo backend) ---
+    def cmd_eval(self, script, numkeys, *args):
+        keys, argv = args[:int(numkeys)], args[int(numkeys):]
+        if script.decode() == RELEASE_LOCK_SCRIPT:
+            return self.cmd_del(keys[0]) if self._get(keys[0], bytes) == argv[0] else 0
+        raise Exception("unsupported script")
+
+    # --- strings ---
+    def cmd_get(self, key):
+        return self._get(key, bytes)
+
+    def cmd_mget(self, *keys):
+        return [self._get(key, bytes) for key in keys]
+
+    def cmd_set(self, key, value, *options):
+        options = [option.decode().upper() if i == 0 or options[i - 1].decode().upper() not in ("PX", "EX")
+                   else option for i, option in enumerate(options)]
+        expires_at = None
+        if "NX" in options and self.store._alive(key):
+            return None
+        if "PX" in options:
+            expires_at = time.time() + int(options[options.index("PX") + 1]) / 1000
+        if "EX" in options:
+            expires_at = time.time() + int(options[options.index("EX") + 1])
+        self.store.data[key] = value
+        self.store.expires.pop(key, None)
+        if expires_at is not None:
+            self.store.expires[key] = expires_at
+        return "OK"
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self.store._alive(key):
+                del self.store.data[key]
+                self.store.expires.pop(key, None)
+                removed += 1
+        return removed
+
+    def cmd_strlen(self, key):
+        value = self._get(key, bytes)
+        return len(value) if value is not None else 0
+
+    def cmd_pttl(self, key):
+        if not self.store._alive(key):
+            return -2
+        expires_at = self.store.expires.get(key)
+        return -1 if expires_at is None else int((expires_at - time.time()) * 1000)
+
+    # --- hashes ---
+    def _hash(self, key, create=False):
+        value = self._get(key, dict)
+        if value is None and create:
+            value = self.store.data[key] = {}
+        return value
+
+    def cmd_hset(self, key, *pairs):
+        hash_value = self._hash(key, create=True)
+        added = 0
+        for i in range(0, len(pairs), 2):
+            added += pairs[i] not in hash_value
+            hash_value[pairs[i]] = pairs[i + 1]
+        return added
+
+    def cmd_hdel(self, key, *fields):
+        hash_value = self._hash(key) or {}
+        return sum(hash_value.pop(field, None) is not None for field in fields)
+
+    def cmd_hvals(self, key):
+        return list((self._hash(key) or {}).values())
+
+    def cmd_hgetall(self, key):
+        return [item for pair in (self._hash(key) or {}).items() for item in pair]
+
+    def cmd_hincrby(self, key, field, amount):
+        hash_value = self._hash(key, create=True)
+        value = int(hash_value.get(field, b"0")) + int(amount)
+        hash_value[field] = str(value).encode()
+        return value
+
+    # --- sorted sets ---
+    def _zset(self, key, create=False):
+        return self._hash(key, create)
+
+    def cmd_zadd(self, key, *args):
+        nx = args and args[0].upper() == b"NX"
+        if nx:
+            args = args[1:]
+        zset = self._zset(key, create=True)
+        added = 0
+        for i in range(0, len(args), 2):
+            member = args[i + 1]
+            if member not in zset:
+                added += 1
+            elif nx:
+                continue
+            zset[member] = float(args[i])
+        return added
+
+    def cmd_zrem(self, key, *members):
+        zset = self._zset(key) or {}
+        return sum(zset.pop(member, None) is not None for member in members)
+
+    def cmd_zcard(self, key):
+        return len(self._zset(key) or {})
+
+    def _ordered(self, key):
+        return sorted((self._zset(key) or {}).items(), key=lambda item: (item[1], item[0]))
+
+    def cmd_zrange(self, key, start, stop):
+        members = [member for member, _ in self._ordered(key)]
+        start, stop = int(start), int(stop)
+        stop = len(members) + stop if stop < 0 else stop
+        return members[start:stop + 1]
+
+    def cmd_zrangebyscore(self, key, minimum, maximum):
+        low, low_exclusive = _score(minimum)
+        high, high_exclusive = _score(maximum)
+        return [member for member, score in self._ordered(key)
+                if (score > low if low_exclusive else score >= low)
+                and (score < high if high_exclusive else score <= high)]
@@ -0,0 +1,60 @@
+import random
+import pytest
+from utils.answer_formatter import (
+    remove_structural_titles,
+    StructuralTitleFilter,
+    split_answer_chunks,
+)
+
+SAMPLES = [
+    "\n\n## Introdução\nOlá, **Lucas** estudou Engenharia.\n\nResposta Principal\nTexto com detalhes.\n\n### Conclusão\nFoi útil?\n\n",
+    "Conclusion\nFirst paragraph\n# Main Answer\n  second  \n\nConclusão",
+    "  \n Introducao\n\n",
+    "texto sem quebra de linha",
+    "# Intro\n#\n##x\nconclusão final\n",
+]
+
+def stream_through_filter(text, chunk_sizes):
+    title_filter = StructuralTitleFilter()
+    output = []
+    position = 0
+    while position < len(text):
+        size = next(chunk_sizes)
+        output.append(title_filter.feed(text[position:position + size]))
+        position += size
+    output.append(title_filter.flush())
+    return output
+
+def test_remove_structural_titles():
+    text = "## Introdução\nLucas é desenvolvedor.\nConclusão\nAlgo mais?"
+    assert remove_structural_titles(text) == "Lucas é desenvolvedor.\nAlgo mais?"
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_filter_matches_batch_result(text):
+    """A saída incremental deve ser idêntica ao pós-processamento da resposta completa."""
+    rng = random.Random(42)
+    expected = remove_structural_titles(text)
+    for _ in range(50):
+        chunk_sizes = iter(lambda: rng.randint(1, 8), None)
+        assert ''.join(stream_through_filter(text, chunk_sizes)) == expected
+
+def test_filter_releases_content_before_line_ends():
+    """Conteúdo que não pode ser título é liberado sem esperar a quebra de linha."""
+    title_filter = StructuralTitleFilter()
+    assert title_filter.feed("Lucas trabalhou com ") == "Lucas trabalhou com"
+    assert title_filter.feed("Python") == " Python"
+
+def test_filter_holds_possible_title():
+    title_filter = StructuralTitleFilter()
+    assert title_filter.feed("## Concl") == ""
+    assert title_filter.feed("usão\nTexto") == "Texto"
+    assert title_filter.flush() == ""
+
+def test_split_answer_chunks_roundtrip():
+    answer = "Lucas é formado em **Engenharia**.\n\nQuer saber mais sobre os projetos?"
+    chunks = list(split_answer_chunks(answer, chunk_size=10))
+    assert len(chunks) > 1
+    assert ''.join(chunks) == answer
+
+def test_split_answer_chunks_empty():
+    assert list(split_answer_chunks("")) == []
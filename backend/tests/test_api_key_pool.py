@@ -0,0 +1,110 @@
+import time
+from collections import Counter
+import pytest
+from utils.api_key_pool import APIKeyPool
+from utils.rate_limiter import create_rate_limiter
+
+def test_parse_keys_from_env():
+    environ = {
+        "GEMINI_API_KEYS": "key-a:3, key-b ,key-c:1",
+        "GEMINI_API_KEY": "key-a",
+        "GEMINI_KEY_API2": "key-d"
+    }
+    assert APIKeyPool.parse_keys_from_env(environ) == [
+        ("key-a", 3), ("key-b", 1), ("key-c", 1), ("key-d", 1)
+    ]
+
+def test_parse_keys_from_env_legacy_only():
+    assert APIKeyPool.parse_keys_from_env({"GEMINI_API_KEY": "key-a"}) == [("key-a", 1)]
+    assert APIKeyPool.parse_keys_from_env({}) == []
+
+def test_weighted_rotation():
+    pool = APIKeyPool([("key-a", 3), ("key-b", 1)])
+    picks = []
+    for _ in range(8):
+        key = pool.acquire()
+        pool.release(key)
+        picks.append(key)
+    assert Counter(picks) == {"key-a": 6, "key-b": 2}
+    # Smooth weighted round-robin intercala as chaves em vez de esgotar uma por vez
+    assert picks[:4] == ["key-a", "key-a", "key-b", "key-a"]
+
+def test_rate_limited_key_cools_down_and_recovers():
+    pool = APIKeyPool(["key-a", "key-b"], cooldown_seconds=0.2)
+    key = pool.acquire()
+    pool.release(key, error=Exception("429 quota"), rate_limited=True)
+
+    for _ in range(4):
+        other = pool.acquire()
+        assert other != key
+        pool.release(other)
+
+    time.sleep(0.25)
+    assert key in {pool.acquire(), pool.acquire()}
+
+def test_consecutive_rate_limits_extend_cooldown():
+    pool = APIKeyPool(["key-a"], cooldown_seconds=10, max_cooldown_seconds=25)
+    for expected in (10, 20, 25):
+        # Requisições concorrentes com a mesma chave recebendo 429 em sequência
+        pool.release("key-a", rate_limited=True)
+        remaining = pool.get_stats()[0]['cooldown_remaining']
+        assert expected - 1 < remaining <= expected
+
+def test_acquire_returns_none_when_all_unavailable():
+    pool = APIKeyPool(["key-a", "key-b"])
+    first = pool.acquire()
+    pool.release(first, rate_limited=True)
+    assert pool.acquire(exclude=["key-b"]) is None
+    pool.reset()
+    assert pool.acquire(exclude=["key-b"]) == "key-a"
+
+def test_stats_track_in_flight_errors_and_rate_limits():
+    pool = APIKeyPool(["secret-key-0001"])
+    key = pool.acquire()
+    stats = pool.get_stats()[0]
+    assert stats['key'] == "...0001"
+    assert stats['in_flight'] == 1
+
+    pool.release(key, error=ValueError("boom"))
+    pool.release(pool.acquire(), error=Exception("429"), rate_limited=True)
+    stats = pool.get_stats()[0]
+    assert stats['in_flight'] == 0
+    assert stats['requests'] == 2
+    assert stats['errors'] == 1
+    assert stats['rate_limited'] == 1
+    assert stats['cooling_down'] is True
+
+def test_call_limiter_skips_exhausted_keys():
+    pool = APIKeyPool(["key-a", "key-b"], call_limiter=create_rate_limiter(2, 60, "gcra"))
+    picks = [pool.acquire() for _ in range(4)]
+    assert Counter(picks) == {"key-a": 2, "key-b": 2}
+    # Todas as chaves sem cota na janela
+    assert pool.acquire() is None
+    stats = {entry['key']: entry for entry in pool.get_stats()}
+    assert stats["...ey-a"]['call_limited'] >= 1
+    assert stats["...ey-b"]['call_limited'] >= 1
+
+def test_retry_after_reports_earliest_available_key():
+    pool = APIKeyPool(["key-a", "key-b"], cooldown_seconds=30)
+    assert pool.retry_after() == 1
+    pool.release("key-a", rate_limited=True)
+    pool.release("key-b", rate_limited=True)
+    pool.release("key-b", rate_limited=True)
+    # key-a volta primeiro (30s); key-b dobrou o cooldown
+    assert pool.retry_after() == 30
+
+def test_retry_after_includes_call_limiter_window():
+    pool = APIKeyPool(["key-a"], call_limiter=create_rate_limiter(1, 20, "sliding_window"))
+    assert pool.acquire() == "key-a"
+    assert pool.acquire() is None
+    assert 19 <= pool.retry_after() <= 20
+
+def test_call_limiter_checked_outside_pool_lock():
+    class LockCheckingLimiter:
+        def is_allowed(self, ip, cost=1):
+            assert not pool.lock.locked()
+            return False, {}
+
+    pool = APIKeyPool(["key-a", "key-b"], call_limiter=LockCheckingLimiter())
+    assert pool.acquire() is None
+    assert all(entry['call_limited'] == 1 for entry in pool.get_stats())
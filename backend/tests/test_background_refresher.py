@@ -0,0 +1,53 @@
+import threading
+import time
+from utils.background_refresher import BackgroundRefresher
+
+def wait_idle(refresher, timeout=5):
+    deadline = time.time() + timeout
+    while refresher.get_stats()['in_flight'] and time.time() < deadline:
+        time.sleep(0.01)
+
+def test_submit_runs_in_background():
+    refresher = BackgroundRefresher()
+    done = threading.Event()
+    assert refresher.submit("chave", done.set)
+    assert done.wait(5)
+    wait_idle(refresher)
+    stats = refresher.get_stats()
+    assert stats['started'] == 1
+    assert stats['completed'] == 1
+    assert stats['in_flight'] == 0
+
+def test_duplicate_key_is_skipped():
+    refresher = BackgroundRefresher(max_concurrent=4)
+    release = threading.Event()
+    assert refresher.submit("chave", release.wait)
+    assert not refresher.submit("chave", release.wait)
+    release.set()
+    wait_idle(refresher)
+    assert refresher.get_stats()['skipped_duplicate'] == 1
+
+def test_concurrency_cap():
+    refresher = BackgroundRefresher(max_concurrent=2)
+    release = threading.Event()
+    results = [refresher.submit(f"chave{i}", release.wait) for i in range(4)]
+    assert results == [True, True, False, False]
+    assert refresher.get_stats()['in_flight'] == 2
+    release.set()
+    wait_idle(refresher)
+    stats = refresher.get_stats()
+    assert stats['skipped_busy'] == 2
+    # Com capacidade livre, a chave pode ser atualizada de novo
+    assert refresher.submit("chave2", lambda: None)
+
+def test_failure_is_counted():
+    refresher = BackgroundRefresher()
+
+    def fail():
+        raise RuntimeError("Gemini indisponível")
+
+    assert refresher.submit("chave", fail)
+    wait_idle(refresher)
+    stats = refresher.get_stats()
+    assert stats['failed'] == 1
+    assert stats['completed'] == 0
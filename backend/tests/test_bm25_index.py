@@ -0,0 +1,69 @@
+import pytest
+from utils.bm25_index import VECTORIZE_MIN_DOCUMENTS, BM25Index, tokenize
+
+def test_tokenize_normalizes_and_folds_plurals():
+    assert tokenize("Quais Projetos usam PyTorch?") == ["qual", "projeto", "usam", "pytorch"]
+    assert tokenize("a formação do Lucas") == ["formacao", "luca"]
+    # Plurais do português caem no mesmo termo do singular
+    for plural, singular in [("certificações", "certificação"), ("alemães", "alemão"), ("linguagens", "linguagem"),
+                             ("relacionais", "relacional"), ("papéis", "papel"), ("desenvolvedores", "desenvolvedor"),
+                             ("vezes", "vez"), ("habilidades", "habilidade")]:
+        assert tokenize(plural) == tokenize(singular), plural
+    assert tokenize("") == []
+
+def test_search_ranks_by_bm25():
+    index = BM25Index([
+        ("a", tokenize("Flask API em Python")),
+        ("b", tokenize("Python Python Python e Django")),
+        ("c", tokenize("Jogo em JavaScript")),
+    ])
+    assert len(index) == 3
+    # Termo raro pesa mais que termo comum
+    assert [doc for doc, _ in index.search(tokenize("python flask"))] == ["a", "b"]
+    # Frequência do termo satura, mas ainda conta
+    assert [doc for doc, _ in index.search(tokenize("python"))] == ["b", "a"]
+    assert index.search(tokenize("rust")) == []
+    assert len(index.search(tokenize("python javascript"), limit=1)) == 1
+
+def test_min_coverage_and_score_ratio():
+    index = BM25Index([
+        ("a", tokenize("Flask API em Python")),
+        ("b", tokenize("Formulário de contato")),
+        ("c", tokenize("Python e Django")),
+    ])
+    # "email" não está no índice: conta com o IDF máximo, e "b" fica abaixo da metade
+    assert index.search(tokenize("email contato"), min_coverage=0.5) == []
+    assert [doc for doc, _ in index.search(tokenize("email contato"))] == ["b"]
+    assert [doc for doc, _ in index.search(tokenize("flask python"), min_coverage=1.0)] == ["a"]
+    # "c" tem só o termo comum: score bem abaixo do melhor
+    assert [doc for doc, _ in index.search(tokenize("flask python"), min_score_ratio=0.5)] == ["a"]
+
+def test_ties_follow_document_order():
+    index = BM25Index([(i, ["igual"]) for i in range(10)])
+    assert [doc for doc, _ in index.search(["igual"], limit=3)] == [0, 1, 2]
+
+def test_empty_index():
+    index = BM25Index([])
+    assert index.search(["qualquer"]) == []
+
+def test_vectorized_search_matches_pure_python():
+    pytest.importorskip("numpy")
+    documents = [(i, tokenize(text)) for i, text in enumerate([
+        "Flask API em Python", "Python Python Python e Django", "Jogo em JavaScript",
+        "API REST com Flask e PostgreSQL", "Modelo de visão com PyTorch e Python", "igual", "igual",
+    ])]
+    pure = BM25Index(documents, vectorized=False)
+    vectorized = BM25Index(documents, vectorized=True)
+    for query in ["python flask", "python", "api javascript pytorch", "igual", "rust", "python rust", ""]:
+        for limit in (1, 3, 10):
+            for minimums in ({}, {"min_coverage": 0.5, "min_score_ratio": 0.5}):
+                expected = pure.search(tokenize(query), limit, **minimums)
+                got = vectorized.search(tokenize(query), limit, **minimums)
+                assert [doc for doc, _ in got] == [doc for doc, _ in expected]
+                assert [score for _, score in got] == pytest.approx([score for _, score in expected])
+
+def test_vectorizes_only_large_indexes():
+    pytest.importorskip("numpy")
+    # Abaixo do limite (ex.: o currículo), o laço Python é mais rápido
+    assert not BM25Index([(i, ["termo"]) for i in range(VECTORIZE_MIN_DOCUMENTS - 1)]).vectorized
+    assert BM25Index([(i, ["termo"]) for i in range(VECTORIZE_MIN_DOCUMENTS)]).vectorized
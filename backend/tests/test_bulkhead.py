@@ -0,0 +1,109 @@
+import threading
+import time
+import pytest
+from utils.bulkhead import Bulkhead, BulkheadFullError
+
+def run_concurrently(count, target):
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_limits_concurrent_calls():
+    bulkhead = Bulkhead(max_concurrent=2, max_queue=10, queue_timeout=5)
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    def call():
+        with bulkhead.slot():
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.05)
+            with lock:
+                active.pop()
+        return "ok"
+
+    results = run_concurrently(8, call)
+
+    assert results == ["ok"] * 8
+    assert max(peak) == 2
+    stats = bulkhead.get_stats()
+    assert stats['admitted'] == 8
+    assert stats['queued'] == 6
+    assert stats['shed'] == 0
+    assert stats['active'] == 0
+    assert stats['queue_depth'] == 0
+    assert stats['max_wait_ms'] > 0
+
+def test_full_queue_rejects_immediately():
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=1, queue_timeout=5)
+    release = threading.Event()
+
+    def hold():
+        with bulkhead.slot():
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    waiter = threading.Thread(target=hold)
+    holder.start()
+    while bulkhead.get_stats()['active'] < 1:
+        time.sleep(0.01)
+    waiter.start()
+    while bulkhead.get_stats()['queue_depth'] < 1:
+        time.sleep(0.01)
+
+    start = time.time()
+    with pytest.raises(BulkheadFullError) as excinfo:
+        with bulkhead.slot():
+            pass
+    assert time.time() - start < 0.5
+    assert excinfo.value.retry_after == 5
+
+    release.set()
+    holder.join()
+    waiter.join()
+    stats = bulkhead.get_stats()
+    assert stats['rejected'] == 1
+    assert stats['admitted'] == 2
+
+def test_queue_deadline_sheds_waiting_request():
+    bulkhead = Bulkhead(max_concurrent=1, max_queue=5, queue_timeout=0.1)
+    release = threading.Event()
+
+    def hold():
+        with bulkhead.slot():
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    while bulkhead.get_stats()['active'] < 1:
+        time.sleep(0.01)
+
+    with pytest.raises(BulkheadFullError):
+        with bulkhead.slot():
+            pass
+    release.set()
+    holder.join()
+
+    stats = bulkhead.get_stats()
+    assert stats['timed_out'] == 1
+    assert stats['shed'] == 1
+    assert stats['queue_depth'] == 0
+    assert stats['avg_wait_ms'] >= 100
+    # A vaga liberada volta a ser usada normalmente
+    with bulkhead.slot():
+        assert bulkhead.get_stats()['active'] == 1
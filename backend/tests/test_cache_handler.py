@@ -1,3 +1,4 @@
+import time
 import os
 import shutil
 import pytest
@@ -78,4 +79,310 @@ def test_cache_stats(cache_handler):
     stats = cache_handler.get_stats()
     assert stats['hits'] >= 1
     assert stats['cache_files'] == 1
-    assert stats['max_age_hours'] > 0 
\ No newline at end of file
+    assert stats['max_age_hours'] > 0 
+
+def test_cache_memory_tier_serves_hits(cache_handler):
+    question = "Qual a formação acadêmica?"
+    role = "recruiter"
+    relevant_fields = ["academic_background"]
+
+    cache_handler.set(question, role, relevant_fields, "Resposta", {"academic_background": ["Engenharia"]})
+    # Sem o arquivo, o hit só pode vir da memória
+    cache_key = cache_handler.generate_cache_key(question, role, relevant_fields)
+    os.remove(cache_handler.store._get_cache_file_path(cache_key))
+
+    cached = cache_handler.get(question, role, relevant_fields)
+    assert cached is not None
+    assert cached['answer'] == "Resposta"
+    stats = cache_handler.get_stats()
+    assert stats['memory_hits'] == 1
+    assert stats['disk_hits'] == 0
+
+
+def test_cache_disk_hit_is_promoted_to_memory(temp_cache_dir):
+    question = "Qual a formação acadêmica?"
+    role = "recruiter"
+    relevant_fields = ["academic_background"]
+    CacheHandler(cache_dir=temp_cache_dir).set(question, role, relevant_fields, "Resposta", {})
+
+    # Nova instância: memória vazia, a entrada está só no disco
+    handler = CacheHandler(cache_dir=temp_cache_dir)
+    assert handler.get(question, role, relevant_fields)['answer'] == "Resposta"
+    assert handler.get(question, role, relevant_fields)['answer'] == "Resposta"
+
+    stats = handler.get_stats()
+    assert stats['disk_hits'] == 1
+    assert stats['memory_hits'] == 1
+    assert stats['memory_hit_rate'] == 50.0
+    assert stats['disk_hit_rate'] == 100.0
+    assert stats['memory']['entries'] == 1
+
+
+def test_cache_memory_tier_respects_entry_budget(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, memory_max_entries=2)
+    for i in range(3):
+        handler.set(f"Pergunta {i}", "recruiter", ["skills"], f"Resposta {i}", {})
+    assert handler.get_stats()['memory']['entries'] == 2
+    # A entrada removida da memória continua disponível no disco
+    assert handler.get("Pergunta 0", "recruiter", ["skills"])['answer'] == "Resposta 0"
+    assert handler.get_stats()['disk_hits'] == 1
+
+
+def test_cache_key_ignores_accents_and_punctuation(cache_handler):
+    relevant_fields = ["projects"]
+    cache_handler.set("Quais projetos ele fez?", "recruiter", relevant_fields, "Resposta", {})
+    cached = cache_handler.get("quais projetos ele fez", "recruiter", relevant_fields)
+    assert cached is not None
+    assert cache_handler.get_stats()['near_hits'] == 0
+
+
+def test_cache_near_hit(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, similarity_threshold=0.8)
+    handler.set("Quais projetos ele desenvolveu?", "recruiter", ["projects"], "Resposta", {})
+
+    cached = handler.get("Quais projetos ele desenvolve?", "recruiter", ["projects"])
+    assert cached is not None
+    assert cached['answer'] == "Resposta"
+    # Outra role ou outros campos não compartilham respostas
+    assert handler.get("Quais projetos ele desenvolve?", "developer", ["projects"]) is None
+    assert handler.get("Quais projetos ele desenvolve?", "recruiter", ["skills"]) is None
+
+    stats = handler.get_stats()
+    assert stats['near_hits'] == 1
+    assert stats['near_hit_rate'] == round(100 / 3, 2)
+
+
+def test_near_hits_are_opt_in_and_keep_meaning(temp_cache_dir):
+    from config import Config
+    assert not Config.CACHE_SIMILARITY_THRESHOLD
+    assert CacheHandler(cache_dir=temp_cache_dir).similarity_index is None
+
+    handler = CacheHandler(cache_dir=temp_cache_dir, similarity_threshold=0.8)
+    handler.set("Quais bancos de dados relacionais ele conhece?", "recruiter", ["skills"], "SQL", {})
+    handler.set("Quais projetos de 2023?", "recruiter", ["projects"], "Projetos 2023", {})
+    assert handler.get("Quais bancos de dados não relacionais ele conhece?", "recruiter", ["skills"]) is None
+    assert handler.get("Quais projetos de 2024?", "recruiter", ["projects"]) is None
+    assert handler.get_stats()['near_hits'] == 0
+
+
+def test_cache_similarity_index_rebuilt_from_store(temp_cache_dir):
+    CacheHandler(cache_dir=temp_cache_dir).set("Quais projetos ele desenvolveu?", "recruiter", ["projects"], "Resposta", {})
+
+    handler = CacheHandler(cache_dir=temp_cache_dir, similarity_threshold=0.8)
+    assert handler.get("Quais projetos ele desenvolve?", "recruiter", ["projects"])['answer'] == "Resposta"
+
+
+def test_cache_max_entries_evicts_least_recently_used(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_entries=2)
+    handler.set("Pergunta um", "recruiter", ["skills"], "R1", {})
+    handler.set("Pergunta dois", "recruiter", ["skills"], "R2", {})
+    # Hit no L1 conta como acesso: "Pergunta um" deixa de ser a menos recente
+    assert handler.get("Pergunta um", "recruiter", ["skills"]) is not None
+    handler.set("Pergunta tres", "recruiter", ["skills"], "R3", {})
+
+    assert handler.get("Pergunta dois", "recruiter", ["skills"]) is None
+    assert handler.get("Pergunta um", "recruiter", ["skills"]) is not None
+    stats = handler.get_stats()
+    assert stats['cache_files'] == 2
+    assert stats['capacity_evictions'] == 1
+    assert stats['evictions'] == 1
+
+
+def test_cache_max_bytes(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_bytes=2000)
+    for i in range(10):
+        handler.set(f"Pergunta {i}", "recruiter", ["skills"], "x" * 500, {})
+    stats = handler.get_stats()
+    assert stats['cache_bytes'] <= 2000
+    assert stats['capacity_evictions'] == 10 - stats['cache_files']
+
+
+def test_cache_set_under_limit_skips_eviction(temp_cache_dir, monkeypatch):
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_entries=5, max_bytes=10 ** 6)
+    calls = []
+    monkeypatch.setattr(handler.store, "evict", lambda *args, **kwargs: calls.append(args) or [])
+    for i in range(5):
+        handler.set(f"Pergunta {i}", "recruiter", ["skills"], "Resposta", {})
+    assert calls == []
+    handler.set("Pergunta 5", "recruiter", ["skills"], "Resposta", {})
+    assert len(calls) == 1
+
+
+def test_invalid_eviction_policy(temp_cache_dir):
+    with pytest.raises(ValueError):
+        CacheHandler(cache_dir=temp_cache_dir, eviction_policy="fifo")
+
+
+def test_run_maintenance_removes_expired(cache_handler):
+    cache_handler.set("Pergunta", "recruiter", ["skills"], "Resposta", {})
+    time.sleep(4)
+    result = cache_handler.run_maintenance()
+    assert result == {'expired': 1, 'evicted': 0, 'pruned_blobs': 0}
+    stats = cache_handler.get_stats()
+    assert stats['cache_files'] == 0
+    assert stats['expired_evictions'] == 1
+    assert stats['sweeps'] == 1
+    assert stats['last_sweep'] is not None
+
+
+def test_background_sweeper(cache_handler):
+    cache_handler.set("Pergunta", "recruiter", ["skills"], "Resposta", {})
+    assert cache_handler.start_sweeper(interval_seconds=0.2)
+    assert not cache_handler.start_sweeper(interval_seconds=0.2)
+    try:
+        deadline = time.time() + 10
+        while cache_handler.get_stats()['cache_files'] and time.time() < deadline:
+            time.sleep(0.2)
+        assert cache_handler.get_stats()['cache_files'] == 0
+        assert cache_handler.get_stats()['sweeper_running']
+    finally:
+        cache_handler.stop_sweeper(timeout=5)
+    assert not cache_handler.get_stats()['sweeper_running']
+
+
+def _age_entry(handler, question, role, relevant_fields, seconds):
+    """Reescreve a entrada como se tivesse sido criada há `seconds` segundos."""
+    cache_key = handler.generate_cache_key(question, role, relevant_fields)
+    data, _, _ = handler.store.get(cache_key)
+    handler.store.set(cache_key, data, created_at=time.time() - seconds)
+    handler.memory.clear()
+
+
+def test_stale_entry_served_and_refreshed(temp_cache_dir):
+    refreshed = []
+
+    def refresh(question, role, relevant_fields):
+        refreshed.append(question)
+        handler.set(question, role, relevant_fields, "Resposta nova", {})
+
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_age_hours=1, stale_grace_seconds=600, refresh_fn=refresh)
+    handler.set("Quais projetos?", "recruiter", ["projects"], "Resposta antiga", {})
+    _age_entry(handler, "Quais projetos?", "recruiter", ["projects"], 3600 + 60)
+
+    cached = handler.get("Quais projetos?", "recruiter", ["projects"])
+    assert cached['answer'] == "Resposta antiga"
+
+    deadline = time.time() + 5
+    while handler.refresher.get_stats()['completed'] < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert refreshed == ["Quais projetos?"]
+    assert handler.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "Resposta nova"
+    stats = handler.get_stats()
+    assert stats['stale_hits'] == 1
+    assert stats['refresh']['completed'] == 1
+
+
+def test_entry_beyond_grace_window_is_removed(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_age_hours=1, stale_grace_seconds=600,
+                           refresh_fn=lambda *args: None)
+    handler.set("Quais projetos?", "recruiter", ["projects"], "Resposta", {})
+    _age_entry(handler, "Quais projetos?", "recruiter", ["projects"], 3600 + 601)
+
+    assert handler.get("Quais projetos?", "recruiter", ["projects"]) is None
+    assert handler.get_stats()['refresh']['started'] == 0
+
+
+def test_sweeper_keeps_entries_inside_grace_window(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir, max_age_hours=1, stale_grace_seconds=600)
+    handler.set("Pergunta um", "recruiter", ["projects"], "R1", {})
+    handler.set("Pergunta dois", "recruiter", ["projects"], "R2", {})
+    _age_entry(handler, "Pergunta um", "recruiter", ["projects"], 3600 + 60)
+    _age_entry(handler, "Pergunta dois", "recruiter", ["projects"], 3600 + 601)
+
+    assert handler.clear_expired() == 1
+    # Sem refresh_fn, a entrada ainda é servida durante a janela, sem atualização
+    assert handler.get("Pergunta um", "recruiter", ["projects"])['answer'] == "R1"
+
+
+def test_changed_section_invalidates_only_dependent_entries(temp_cache_dir):
+    versions = {"projects": "v1", "skills": "v1"}
+    handler = CacheHandler(cache_dir=temp_cache_dir,
+                           version_fn=lambda fields: {field: versions.get(field) for field in fields})
+    handler.set("Quais projetos?", "recruiter", ["projects"], "R1", {})
+    handler.set("Quais skills?", "recruiter", ["skills"], "R2", {})
+    handler.set("Projetos e skills?", "recruiter", ["projects", "skills"], "R3", {})
+
+    versions["projects"] = "v2"
+
+    assert handler.get("Quais projetos?", "recruiter", ["projects"]) is None
+    assert handler.get("Projetos e skills?", "recruiter", ["projects", "skills"]) is None
+    assert handler.get("Quais skills?", "recruiter", ["skills"])['answer'] == "R2"
+    stats = handler.get_stats()
+    assert stats['data_invalidations'] == 2
+    # Só um miss: as entradas ficam no armazenamento até serem regravadas ou expirarem
+    assert stats['cache_files'] == 3
+
+    # Regravada com a nova versão, volta a ser servida
+    handler.set("Quais projetos?", "recruiter", ["projects"], "R1 nova", {})
+    assert handler.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "R1 nova"
+
+
+def test_version_mismatch_keeps_entry_of_other_workers(temp_cache_dir):
+    # Dois workers no mesmo armazenamento; só o primeiro já recarregou o currículo
+    reloaded = CacheHandler(cache_dir=temp_cache_dir, version_fn=lambda fields: {field: "v2" for field in fields})
+    stale = CacheHandler(cache_dir=temp_cache_dir, version_fn=lambda fields: {field: "v1" for field in fields})
+    reloaded.set("Quais projetos?", "recruiter", ["projects"], "R nova", {})
+
+    assert stale.get("Quais projetos?", "recruiter", ["projects"]) is None
+    assert reloaded.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "R nova"
+
+
+def test_data_versions_follow_sections_in_prompt(temp_cache_dir):
+    versions = {"projects": "v1", "skills": "v1"}
+    handler = CacheHandler(cache_dir=temp_cache_dir,
+                           version_fn=lambda fields: {field: versions.get(field) for field in fields})
+    # Roteada para projects e skills, mas só skills entrou no prompt
+    handler.set("Projetos e skills?", "recruiter", ["projects", "skills"], "R1", {"skills": ["Python"]})
+
+    versions["projects"] = "v2"
+    assert handler.get("Projetos e skills?", "recruiter", ["projects", "skills"])['answer'] == "R1"
+    versions["skills"] = "v2"
+    assert handler.get("Projetos e skills?", "recruiter", ["projects", "skills"]) is None
+
+
+def test_data_versions_survive_restart(temp_cache_dir):
+    versions = {"projects": "v1"}
+    version_fn = lambda fields: {field: versions.get(field) for field in fields}
+    CacheHandler(cache_dir=temp_cache_dir, version_fn=version_fn).set(
+        "Quais projetos?", "recruiter", ["projects"], "R1", {})
+
+    assert CacheHandler(cache_dir=temp_cache_dir, version_fn=version_fn).get(
+        "Quais projetos?", "recruiter", ["projects"])['answer'] == "R1"
+    versions["projects"] = "v2"
+    assert CacheHandler(cache_dir=temp_cache_dir, version_fn=version_fn).get(
+        "Quais projetos?", "recruiter", ["projects"]) is None
+
+
+def test_entries_without_versions_are_invalidated(temp_cache_dir):
+    CacheHandler(cache_dir=temp_cache_dir).set("Quais projetos?", "recruiter", ["projects"], "R1", {})
+    handler = CacheHandler(cache_dir=temp_cache_dir, version_fn=lambda fields: {f: "v1" for f in fields})
+    assert handler.get("Quais projetos?", "recruiter", ["projects"]) is None
+
+
+def test_factual_data_is_deduplicated(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir)
+    projects = {"projects": [{"name": f"Projeto {i}", "description": "x" * 200} for i in range(20)]}
+    handler.set("Quais projetos?", "recruiter", ["projects"], "R1", {"projects": projects})
+    handler.set("Fale dos projetos", "recruiter", ["projects"], "R2", {"projects": projects})
+    handler.set("Projetos e skills", "recruiter", ["projects", "skills"], "R3",
+                {"projects": projects, "skills": ["Python"]})
+
+    stats = handler.get_stats()
+    assert stats['blobs'] == 2
+    # Lido do disco (sem L1 e sem blobs em memória), os dados factuais voltam completos
+    handler.memory.clear()
+    handler.blobs.clear()
+    cached = handler.get("Projetos e skills", "recruiter", ["projects", "skills"])
+    assert cached['factual_data'] == {"projects": projects, "skills": ["Python"]}
+
+
+def test_entry_with_missing_blob_is_a_miss(temp_cache_dir):
+    handler = CacheHandler(cache_dir=temp_cache_dir)
+    handler.set("Quais skills?", "recruiter", ["skills"], "R1", {"skills": ["Python"]})
+    handler.memory.clear()
+    handler.blobs.clear()
+    for filename in os.listdir(handler.store.blob_dir):
+        os.remove(os.path.join(handler.store.blob_dir, filename))
+
+    assert handler.get("Quais skills?", "recruiter", ["skills"]) is None
+    assert handler.get_stats()['cache_files'] == 0
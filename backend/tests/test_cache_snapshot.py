@@ -0,0 +1,110 @@
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import pytest
+from utils.cache_handler import CacheHandler
+from utils.cache_snapshot import export_snapshot, import_snapshot, iter_snapshot
+from utils.cache_store import JSONFileCacheStore, SQLiteCacheStore
+
+@pytest.fixture
+def temp_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+def make_handler(directory, store="sqlite", **kwargs):
+    if store == "sqlite":
+        return CacheHandler(store=SQLiteCacheStore(os.path.join(directory, "answers.sqlite3")), **kwargs)
+    return CacheHandler(cache_dir=directory, **kwargs)
+
+@pytest.mark.parametrize("source,target", [("sqlite", "sqlite"), ("json", "sqlite"), ("sqlite", "json")])
+def test_snapshot_round_trip(temp_dir, source, target):
+    origin = make_handler(os.path.join(temp_dir, "origin"), source)
+    projects = {"projects": [{"name": "Chatbot"}]}
+    origin.set("Quais projetos?", "recruiter", ["projects"], "R1", {"projects": projects})
+    origin.set("Fale dos projetos", "developer", ["projects"], "R2", {"projects": projects})
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    assert origin.export_snapshot(path) == {'entries': 2, 'blobs': 1}
+
+    restored = make_handler(os.path.join(temp_dir, "restored"), target)
+    counts = restored.import_snapshot(path)
+    assert counts == {'entries': 2, 'blobs': 1, 'skipped_expired': 0}
+    cached = restored.get("Quais projetos?", "recruiter", ["projects"])
+    assert cached['answer'] == "R1"
+    assert cached['factual_data'] == {"projects": projects}
+    assert restored.get_stats()['disk_hits'] == 1
+
+def test_snapshot_skips_expired_entries(temp_dir):
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+    store.set("nova", {"answer": "a"})
+    store.set("antiga", {"answer": "b"}, created_at=time.time() - 7200)
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    assert export_snapshot(store, path)['entries'] == 2
+
+    target = JSONFileCacheStore(os.path.join(temp_dir, "target"))
+    counts = import_snapshot(target, path, max_age_seconds=3600)
+    assert counts['entries'] == 1
+    assert counts['skipped_expired'] == 1
+    assert target.get("antiga") is None
+
+def test_import_is_batched(temp_dir):
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+    store.set_many([(f"chave{i}", {"answer": i}, time.time()) for i in range(25)])
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    export_snapshot(store, path)
+
+    batches = []
+    target = SQLiteCacheStore(os.path.join(temp_dir, "target.sqlite3"))
+    original_set_many = target.set_many
+    target.set_many = lambda entries: batches.append(len(entries)) or original_set_many(entries)
+    assert import_snapshot(target, path, batch_size=10)['entries'] == 25
+    assert batches == [10, 10, 5]
+    assert target.count() == 25
+
+@pytest.mark.parametrize("store", ["sqlite", "json"])
+def test_import_keeps_newer_entries(temp_dir, store):
+    origin = make_handler(os.path.join(temp_dir, "origin"), store)
+    origin.set("Quais projetos?", "recruiter", ["projects"], "OLD", {})
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    origin.export_snapshot(path)
+
+    # Resposta gerada depois do snapshot: reinício e reimportação não a revertem
+    target = make_handler(os.path.join(temp_dir, "target"), store)
+    time.sleep(0.01)
+    target.set("Quais projetos?", "recruiter", ["projects"], "NEW", {})
+    assert target.import_snapshot(path)['entries'] == 0
+    restarted = make_handler(os.path.join(temp_dir, "target"), store)
+    restarted.import_snapshot(path)
+    assert restarted.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "NEW"
+
+def test_import_once_per_store(temp_dir):
+    origin = make_handler(os.path.join(temp_dir, "origin"))
+    origin.set("Quais projetos?", "recruiter", ["projects"], "R1", {})
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    origin.export_snapshot(path)
+
+    # Dois workers sobre o mesmo armazenamento: só o primeiro importa
+    first = make_handler(os.path.join(temp_dir, "shared"))
+    second = make_handler(os.path.join(temp_dir, "shared"))
+    assert first.import_snapshot(path, once=True)['entries'] == 1
+    assert second.import_snapshot(path, once=True)['entries'] == 0
+    assert second.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "R1"
+
+def test_import_rebuilds_similarity_index(temp_dir):
+    origin = make_handler(os.path.join(temp_dir, "origin"))
+    origin.set("Quais projetos ele desenvolveu?", "recruiter", ["projects"], "R1", {})
+    path = os.path.join(temp_dir, "answers.snapshot.gz")
+    origin.export_snapshot(path)
+
+    restored = make_handler(os.path.join(temp_dir, "restored"), similarity_threshold=0.8)
+    restored.import_snapshot(path)
+    assert restored.get("Quais projetos ele desenvolve?", "recruiter", ["projects"])['answer'] == "R1"
+
+def test_invalid_snapshot(temp_dir):
+    path = os.path.join(temp_dir, "other.gz")
+    with gzip.open(path, 'wt') as f:
+        f.write('{"hello": "world"}\n')
+    with pytest.raises(ValueError):
+        list(iter_snapshot(path))
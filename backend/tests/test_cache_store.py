@@ -0,0 +1,275 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import pytest
+from utils.cache_store import JSONFileCacheStore, SQLiteCacheStore, create_cache_store
+from utils.cache_handler import CacheHandler
+from utils.redis_cache_store import RedisCacheStore
+from tests.resp_stand_in import RESPStandIn
+
+@pytest.fixture
+def temp_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+@pytest.fixture(scope="module")
+def redis_server():
+    server = RESPStandIn()
+    yield server
+    server.stop()
+
+@pytest.fixture(params=["json", "sqlite", "redis"])
+def store(request, temp_dir):
+    if request.param == "json":
+        return JSONFileCacheStore(temp_dir)
+    if request.param == "redis":
+        # Prefixo próprio por teste: o servidor é compartilhado pelo módulo
+        server = request.getfixturevalue("redis_server")
+        return RedisCacheStore(server.url, prefix=f"test:{uuid.uuid4().hex}:")
+    return SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+
+def test_set_get_delete(store):
+    data = {"answer": "Resposta", "factual_data": {"skills": ["Python"]}}
+    size = store.set("chave", data)
+    assert size > 0
+
+    cached, created_at, stored_size = store.get("chave")
+    assert cached == data
+    assert abs(created_at - time.time()) < 5
+    assert stored_size == size
+
+    assert store.delete("chave") is True
+    assert store.delete("chave") is False
+    assert store.get("chave") is None
+
+def test_overwrite_keeps_count(store):
+    store.set("chave", {"answer": "v1"})
+    store.set("chave", {"answer": "v2"})
+    assert store.count() == 1
+    assert store.get("chave")[0] == {"answer": "v2"}
+
+def test_clear_expired(store):
+    store.set("antiga", {"answer": "a"}, created_at=time.time() - 100)
+    store.set("nova", {"answer": "b"})
+    assert store.clear_expired(max_age_seconds=50) == 1
+    assert store.get("antiga") is None
+    assert store.count() == 1
+
+def test_clear_all(store):
+    for i in range(5):
+        store.set(f"chave{i}", {"answer": i})
+    assert store.count() == 5
+    assert store.clear_all() == 5
+    assert store.count() == 0
+    # O armazenamento continua utilizável depois de limpo
+    store.set("chave", {"answer": "ok"})
+    assert store.count() == 1
+
+def test_total_size(store):
+    assert store.total_size() == 0
+    size_a = store.set("a", {"answer": "x" * 100})
+    size_b = store.set("b", {"answer": "y" * 50})
+    assert store.total_size() == size_a + size_b
+    store.delete("a")
+    assert store.total_size() == size_b
+
+def test_usage_tracks_writes_and_deletes(store):
+    size_a = store.set("a", {"answer": "x" * 100})
+    size_b = store.set("b", {"answer": "y" * 50})
+    entries, total_bytes = store.usage()
+    assert entries == 2
+    # Redis não tem contador barato de bytes
+    assert total_bytes in (None, size_a + size_b)
+    store.set("a", {"answer": "z"})
+    store.delete("b")
+    entries, total_bytes = store.usage()
+    assert entries == 1
+    assert total_bytes in (None, store.total_size())
+    store.clear_all()
+    assert store.usage()[0] == 0
+
+def test_json_usage_counts_existing_files(temp_dir):
+    JSONFileCacheStore(temp_dir).set("a", {"answer": "Resposta"})
+    store = JSONFileCacheStore(temp_dir)
+    assert store.usage() == (1, store.total_size())
+
+def test_evict_lru(store):
+    now = time.time()
+    for i in range(4):
+        store.set(f"chave{i}", {"answer": i}, created_at=now - 100 + i)
+    # chave0 foi acessada por último: a menos recente passa a ser chave1
+    store.record_access({"chave0": (now, 1)})
+
+    assert store.evict(max_entries=2, policy="lru") == ["chave1", "chave2"]
+    assert store.count() == 2
+    assert store.get("chave0") is not None
+    assert store.evict(max_entries=2, policy="lru") == []
+
+def test_evict_lfu(store):
+    now = time.time()
+    for i in range(3):
+        store.set(f"chave{i}", {"answer": i}, created_at=now - 100 + i)
+    store.record_access({"chave0": (now - 50, 5), "chave1": (now - 40, 1)})
+    store.record_access({"chave1": (now - 30, 1)})
+
+    assert store.evict(max_entries=2, policy="lfu") == ["chave2"]
+    assert store.evict(max_entries=1, policy="lfu") == ["chave1"]
+
+def test_evict_by_bytes(store):
+    sizes = [store.set(f"chave{i}", {"answer": "x" * 100}, created_at=time.time() - 10 + i) for i in range(5)]
+    evicted = store.evict(max_bytes=sum(sizes[2:]))
+    assert evicted == ["chave0", "chave1"]
+    assert store.total_size() <= sum(sizes[2:])
+
+def test_sqlite_upgrades_old_schema(temp_dir):
+    import sqlite3
+    db_path = os.path.join(temp_dir, "answers.sqlite3")
+    # Banco criado pela primeira versão do esquema (sem colunas de acesso nem contador de bytes)
+    conn = sqlite3.connect(db_path)
+    for statement in SQLiteCacheStore.SCHEMA[1:]:
+        if "cache_entries" in statement and "CREATE TABLE" not in statement:
+            continue
+        conn.execute(statement)
+    conn.execute("""CREATE TABLE cache_entries (
+        cache_key TEXT PRIMARY KEY, created_at REAL NOT NULL, size INTEGER NOT NULL, data TEXT NOT NULL)""")
+    conn.execute("INSERT INTO cache_entries VALUES ('antiga', 123.0, 10, '{\"answer\": 1}')")
+    conn.execute("UPDATE cache_meta SET value = 1 WHERE name = 'entries'")
+    conn.commit()
+    conn.close()
+
+    store = SQLiteCacheStore(db_path)
+    assert store.get("antiga")[0] == {"answer": 1}
+    assert store.count() == 1
+    assert store.total_size() == 10
+    store.set("nova", {"answer": 2})
+    assert store.evict(max_entries=1) == ["antiga"]
+
+def test_blobs(store):
+    store.put_blob("h1", b'{"skills": ["Python"]}')
+    store.put_blob("h1", b'{"skills": ["Python"]}')
+    store.put_blob("h2", b'["Flask"]')
+    assert store.get_blob("h1") == b'{"skills": ["Python"]}'
+    assert store.get_blob("inexistente") is None
+    assert store.blob_stats()['blobs'] == 2
+
+    store.set("chave", {"answer": "a", "factual_data_refs": {"skills": "h1"}})
+    # Blobs recentes são preservados mesmo sem referência
+    assert store.prune_blobs() == 0
+    assert store.prune_blobs(min_age_seconds=-1) == 1
+    assert store.get_blob("h1") is not None
+    assert store.get_blob("h2") is None
+
+    store.clear_all()
+    assert store.blob_stats() == {'blobs': 0, 'blob_bytes': 0}
+
+@pytest.mark.parametrize("kind", ["sqlite", "redis"])
+def test_shared_lock(request, temp_dir, kind):
+    if kind == "redis":
+        url = request.getfixturevalue("redis_server").url
+        first, second = (RedisCacheStore(url, prefix="test:lock:") for _ in range(2))
+    else:
+        db_path = os.path.join(temp_dir, "answers.sqlite3")
+        first, second = SQLiteCacheStore(db_path), SQLiteCacheStore(db_path)
+
+    token = first.acquire_lock("chave", ttl_seconds=30)
+    assert token is not None
+    assert second.acquire_lock("chave", ttl_seconds=30) is None
+    assert second.acquire_lock("outra", ttl_seconds=30) is not None
+    # Só o dono libera o lock
+    assert second.release_lock("chave", "token-errado") is False
+    assert first.release_lock("chave", token) is True
+    assert second.acquire_lock("chave", ttl_seconds=30) is not None
+
+@pytest.mark.parametrize("kind", ["sqlite", "redis"])
+def test_shared_lock_expires(request, temp_dir, kind):
+    if kind == "redis":
+        store = RedisCacheStore(request.getfixturevalue("redis_server").url, prefix="test:lock-ttl:")
+    else:
+        store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+    token = store.acquire_lock("chave", ttl_seconds=0.05)
+    assert store.acquire_lock("chave", ttl_seconds=30) is None
+    time.sleep(0.1)
+    # O dono morreu sem liberar: o lock expira e outro worker assume
+    assert store.acquire_lock("chave", ttl_seconds=30) is not None
+    assert store.release_lock("chave", token) is False
+
+@pytest.mark.parametrize("codec", ["none", "zlib"])
+def test_sqlite_compression(temp_dir, codec):
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"), compression=codec)
+    data = {"answer": "Resposta " * 200, "relevant_fields": ["skills"]}
+    size = store.set("chave", data)
+    assert store.get("chave")[0] == data
+    assert list(store.iter_metadata()) == [("chave", "", "", ["skills"])]
+    if codec == "zlib":
+        assert size < len(json.dumps(data)) / 10
+
+def test_sqlite_reads_entries_written_with_other_codec(temp_dir):
+    db_path = os.path.join(temp_dir, "answers.sqlite3")
+    SQLiteCacheStore(db_path, compression="none").set("texto", {"answer": "a"})
+    SQLiteCacheStore(db_path, compression="zlib").set("zlib", {"answer": "b"})
+    store = SQLiteCacheStore(db_path, compression="none")
+    assert store.get("texto")[0] == {"answer": "a"}
+    assert store.get("zlib")[0] == {"answer": "b"}
+
+def test_sqlite_rejects_unknown_codec(temp_dir):
+    with pytest.raises(ValueError):
+        SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"), compression="lz4")
+
+def test_sqlite_concurrent_writes(temp_dir):
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+
+    def writer(worker):
+        for i in range(20):
+            store.set(f"w{worker}-{i}", {"answer": i})
+
+    threads = [threading.Thread(target=writer, args=(w,)) for w in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert store.count() == 80
+
+def test_sqlite_uses_wal(temp_dir):
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+    mode = store._connection().execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "wal"
+
+def test_import_json_dir(temp_dir):
+    legacy = JSONFileCacheStore(temp_dir)
+    legacy.set("abc", {"answer": "antiga"}, created_at=time.time() - 10)
+    legacy.set("def", {"answer": "outra"})
+    with open(os.path.join(temp_dir, "corrompido.json"), "w") as f:
+        f.write("{invalid")
+
+    store = SQLiteCacheStore(os.path.join(temp_dir, "answers.sqlite3"))
+    assert store.import_json_dir(temp_dir) == 2
+    cached, created_at, _ = store.get("abc")
+    assert cached == {"answer": "antiga"}
+    assert time.time() - created_at >= 9
+    # Reimportar não duplica entradas
+    assert store.import_json_dir(temp_dir) == 0
+
+def test_create_cache_store_migrates_once(temp_dir):
+    JSONFileCacheStore(temp_dir).set("abc", {"answer": "antiga"})
+    store = create_cache_store("sqlite", temp_dir)
+    assert isinstance(store, SQLiteCacheStore)
+    assert store.count() == 1
+    with pytest.raises(ValueError):
+        create_cache_store("memcached", temp_dir)
+
+def test_cache_handler_with_sqlite_store(temp_dir):
+    handler = CacheHandler(cache_dir=temp_dir, store=create_cache_store("sqlite", temp_dir))
+    handler.set("Pergunta?", "recruiter", ["skills"], "Resposta", {"skills": ["Python"]})
+    handler.memory.clear()
+
+    cached = handler.get("Pergunta?", "recruiter", ["skills"])
+    assert cached['answer'] == "Resposta"
+    stats = handler.get_stats()
+    assert stats['storage'] == "sqlite"
+    assert stats['cache_files'] == 1
+    assert handler.clear_all() == 1
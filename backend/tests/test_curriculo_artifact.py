@@ -0,0 +1,77 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import pytest
+from utils import curriculo_artifact
+from utils.curriculo_artifact import CurriculoArtifact, build_artifact, load_artifact, write_artifact
+from utils.curriculo_handler import CurriculoHandler
+from utils.role_handler import RoleHandler
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+@pytest.fixture
+def data_dir():
+    """Cópia de data/, para alterar as fontes sem mexer no repositório."""
+    path = tempfile.mkdtemp()
+    shutil.copytree(DATA_DIR, os.path.join(path, "data"))
+    yield os.path.join(path, "data")
+    shutil.rmtree(path)
+
+@pytest.fixture
+def artifact_path(data_dir):
+    return os.path.join(os.path.dirname(data_dir), "build", "curriculo.artifact")
+
+def test_artifact_round_trip_matches_json_sources(data_dir, artifact_path):
+    header = write_artifact(artifact_path, data_dir)
+    assert header['sections'] > 0 and header['roles'] > 0
+    artifact = load_artifact(artifact_path, data_dir)
+    assert isinstance(artifact, CurriculoArtifact)
+
+    from_json = CurriculoHandler(data_dir=data_dir)
+    from_artifact = CurriculoHandler(data_dir=data_dir, store=artifact.store)
+    assert dict(from_artifact.store.sections) == dict(from_json.store.sections)
+    assert dict(from_artifact.store.versions) == dict(from_json.store.versions)
+    for question in ["Quais projetos usam Python?", "Quais idiomas ele fala?", "Onde ele trabalhou?"]:
+        assert from_artifact.retrieve(question) == from_json.retrieve(question)
+        assert from_artifact.search_projects(question) == from_json.search_projects(question)
+    # Linhas pré-renderizadas continuam valendo para os objetos carregados do artefato
+    projects = from_artifact.get("projects")
+    assert from_artifact.summary_rows("projects", projects) == from_json.summary_rows("projects", from_json.get("projects"))
+    assert id(projects[0]) in from_artifact.store._item_rows
+
+    assert artifact.roles == RoleHandler(roles_dir=os.path.join(data_dir, "roles")).roles
+    assert artifact.system_instruction == build_artifact(data_dir).system_instruction
+    assert artifact.system_instruction.strip()
+
+def test_missing_artifact_returns_none(data_dir, artifact_path):
+    assert load_artifact(artifact_path, data_dir) is None
+
+def test_stale_artifact_is_rejected(data_dir, artifact_path):
+    write_artifact(artifact_path, data_dir)
+    with open(os.path.join(data_dir, "languages.json"), "w", encoding="utf-8") as f:
+        json.dump({"languages": [{"language": "Portuguese"}]}, f)
+    with pytest.raises(ValueError, match="fontes"):
+        load_artifact(artifact_path, data_dir)
+
+    write_artifact(artifact_path, data_dir)
+    assert load_artifact(artifact_path, data_dir).store.sections["languages"] == [{"language": "Portuguese"}]
+    with patch.object(curriculo_artifact, "schema_hash", return_value="outro"):
+        with pytest.raises(ValueError, match="schema"):
+            load_artifact(artifact_path, data_dir)
+
+def test_corrupt_artifact_is_rejected(data_dir, artifact_path):
+    write_artifact(artifact_path, data_dir)
+    with open(artifact_path, "r+b") as f:
+        f.truncate(os.path.getsize(artifact_path) // 2)
+    with pytest.raises(ValueError, match="ilegível"):
+        load_artifact(artifact_path, data_dir)
+
+def test_cli_build_and_check(data_dir, artifact_path, capsys):
+    args = ["--data-dir", data_dir, "--output", artifact_path]
+    assert curriculo_artifact.main(args + ["check"]) == 1
+    assert curriculo_artifact.main(args + ["build"]) == 0
+    assert curriculo_artifact.main(args + ["check"]) == 0
+    assert json.loads(capsys.readouterr().out.strip().splitlines()[-1])['sections'] > 0
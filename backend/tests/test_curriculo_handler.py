@@ -3,6 +3,7 @@ import json
 import pytest
 import tempfile
 import shutil
+from unittest.mock import patch
 from utils.curriculo_handler import CurriculoHandler
 
 @pytest.fixture
@@ -118,9 +119,154 @@ def test_data_structure_without_section_key(curriculo_handler):
     with open(temp_file, 'w', encoding='utf-8') as f:
         json.dump(direct_data, f)
     
-    # Testar carregamento
+    # Seções são carregadas de uma vez: arquivo novo só aparece após reload
+    assert curriculo_handler.load_section("direct_data") is None
+    curriculo_handler.reload()
     data = curriculo_handler.load_section("direct_data")
     assert data == direct_data
     
     # Limpar arquivo temporário
-    os.remove(temp_file) 
\ No newline at end of file
+    os.remove(temp_file) 
+def test_section_versions(temp_data_dir):
+    """Testa que a versão de uma seção muda só quando o arquivo muda."""
+    versions = CurriculoHandler(data_dir=temp_data_dir).get_versions(["academic_background", "skills", "nonexistent"])
+    assert versions["academic_background"] and versions["skills"]
+    assert versions["nonexistent"] is None
+
+    with open(os.path.join(temp_data_dir, "skills.json"), 'w', encoding='utf-8') as f:
+        json.dump({"skills": {"programming": ["Python", "Go"]}}, f)
+
+    updated = CurriculoHandler(data_dir=temp_data_dir).get_versions(["academic_background", "skills"])
+    assert updated["academic_background"] == versions["academic_background"]
+    assert updated["skills"] != versions["skills"]
+
+def test_reloads_when_data_changes(temp_data_dir):
+    """Outro worker (ou uma edição) muda data/: o handler recarrega na próxima verificação."""
+    handler = CurriculoHandler(data_dir=temp_data_dir, check_interval=0)
+    version = handler.get_version("skills")
+    with open(os.path.join(temp_data_dir, "skills.json"), 'w', encoding='utf-8') as f:
+        json.dump({"skills": {"programming": ["Python", "Go"]}}, f)
+    assert handler.get_version("skills") != version
+    assert handler.get("skills") == {"programming": ["Python", "Go"]}
+
+    # Sem mudanças, não relê os arquivos
+    with patch("utils.curriculo_handler.CurriculoStore.load", side_effect=AssertionError("reloaded")):
+        handler.get("skills")
+    # Sem check_interval, só reload() troca o snapshot
+    static = CurriculoHandler(data_dir=temp_data_dir)
+    with open(os.path.join(temp_data_dir, "skills.json"), 'w', encoding='utf-8') as f:
+        json.dump({"skills": {"programming": ["Rust"]}}, f)
+    assert static.get("skills") == {"programming": ["Python", "Go"]}
+
+def legacy_filter_projects(projects, question):
+    """Filtro anterior (difflib contra cada campo, ordenado por ano), usado como referência."""
+    import difflib
+    question_lower = question.lower()
+    search_field = ["name", "description", "role", "status", "team", "technologies", "features", "highlights", "challenges", "results"]
+
+    def relevant_projects(project):
+        for field in search_field:
+            value = project.get(field, "")
+            if isinstance(value, list):
+                value = " ".join(str(v).lower() for v in value)
+            else:
+                value = str(value).lower()
+            if question_lower in value or difflib.SequenceMatcher(None, question_lower, value).ratio() > 0.4:
+                return True
+        return False
+
+    filtered_projects = [p for p in projects if relevant_projects(p)]
+    if not filtered_projects:
+        filtered_projects = sorted(
+            projects,
+            key=lambda p: difflib.SequenceMatcher(None, question_lower, p.get("description", "").lower()).ratio(),
+            reverse=True
+        )
+    return sorted(filtered_projects, key=lambda p: len(p.get("technologies", [])) + p.get("year", 0), reverse=True)[:5]
+
+# Perguntas fixas e os projetos que uma resposta correta deve citar
+PROJECT_QUESTIONS = {
+    "Fale sobre o LibraVoice": {"LibraVoice"},
+    "Quais projetos usam PyTorch?": {"Signature Recognizer", "Seamese Networks Algorithm"},
+    "Projetos com MongoDB": {"Microservices Structure", "URL Shortener", "BlogApp"},
+    "Which games did he build?": {"Mystical Number Castle", "The Forca", "FlappyZap"},
+    "Django banking app": {"FinancialApp"},
+    "Qual projeto usa a API do Gemini?": {"chat-lleria"},
+    "Projetos em Java com MySQL": {"Java Inventory Management System"},
+    "sign language recognition": {"LibraVoice"},
+    "Docker and microservices": {"Microservices Structure"},
+    "Node.js with Express": {"Linktrell", "BlogApp"},
+}
+
+def test_project_search_ranking_beats_legacy_filter():
+    handler = CurriculoHandler()
+    projects = handler.get("projects")
+    legacy_found = bm25_found = 0
+    for question, relevant in PROJECT_QUESTIONS.items():
+        ranked = [p["name"] for p in handler.search_projects(question)]
+        legacy = [p["name"] for p in legacy_filter_projects(projects, question)]
+        assert ranked[0] in relevant, question
+        assert len(relevant & set(ranked)) >= len(relevant & set(legacy)), question
+        bm25_found += len(relevant & set(ranked))
+        legacy_found += len(relevant & set(legacy))
+    assert bm25_found == sum(len(relevant) for relevant in PROJECT_QUESTIONS.values())
+    assert bm25_found > legacy_found
+
+def test_retrieve_skips_weak_matches():
+    handler = CurriculoHandler()
+    # Não há contato no currículo: um projeto com "formulário de contato" não é resposta
+    assert handler.retrieve("Qual o email de contato?") == {}
+    # Só a formação, sem projetos que mencionam "acadêmica" de passagem
+    data = handler.retrieve("Qual a formação acadêmica?")
+    assert list(data) == ["academic_background"]
+    assert data["academic_background"] == handler.get("academic_background")
+
+def test_retrieve_matches_portuguese_plurals():
+    handler = CurriculoHandler()
+    assert "certifications" in handler.retrieve("Quais certificações ele possui?")
+
+def test_project_index_built_on_load(temp_data_dir):
+    projects = [
+        {"name": "Antigo", "year": 2020, "technologies": ["Java"], "description": "Sistema em Java"},
+        {"name": "Novo", "year": 2024, "technologies": ["Python", "Flask"], "description": "API em Flask"},
+    ]
+    with open(os.path.join(temp_data_dir, "projects.json"), "w", encoding="utf-8") as f:
+        json.dump({"projects": projects}, f)
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+    assert len(handler.project_index) == 2
+    loaded = handler.get("projects")
+    assert [p["name"] for p in handler.search_projects("Usa Java?")] == ["Antigo"]
+    # Sem termos em comum: os mais recentes
+    assert [p["name"] for p in handler.search_projects("Bom dia")] == ["Novo", "Antigo"]
+    # Lista de outra origem é indexada na hora
+    assert handler.search_projects("flask", [loaded[1]]) == [loaded[1]]
+
+def test_search_projects_reuses_index_for_pruned_list():
+    handler = CurriculoHandler()
+    projects = handler.get("projects")
+    pruned = [projects[i] for i in (0, 3, 5, 8, 15)]
+    expected = [p for p in handler.search_projects("chatbot gemini python", limit=len(projects)) if p in pruned][:3]
+    with patch("utils.curriculo_handler.build_project_index", side_effect=AssertionError("rebuilt")):
+        ranked = handler.search_projects("chatbot gemini python", pruned, limit=3)
+    assert [p["name"] for p in ranked] == [p["name"] for p in expected]
+    assert all(any(p is q for q in pruned) for p in ranked)
+
+def test_retrieve_prunes_items_across_sections(temp_data_dir):
+    with open(os.path.join(temp_data_dir, "projects.json"), "w", encoding="utf-8") as f:
+        json.dump({"projects": [
+            {"name": "Chatbot", "technologies": ["Python", "Flask"]},
+            {"name": "Jogo", "technologies": ["JavaScript"]},
+        ]}, f)
+    with open(os.path.join(temp_data_dir, "system_instruction.json"), "w", encoding="utf-8") as f:
+        json.dump({"system_instruction": "Responda sempre sobre Flask"}, f)
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+
+    assert "system_instruction" not in handler.searchable_sections()
+    data = handler.retrieve("Ele usa Flask?")
+    # Só os itens com o termo, na estrutura original de cada seção
+    assert data == {
+        "projects": [{"name": "Chatbot", "technologies": ["Python", "Flask"]}],
+        "skills": {"frameworks": ["Flask", "React"]},
+    }
+    assert [item[0] for item in handler.search("Ele usa Flask?", limit=1)] in (["projects"], ["skills"])
+    assert handler.retrieve("pergunta sem relação alguma") == {}
@@ -0,0 +1,123 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest.mock import patch
+
+import pytest
+from utils.curriculo_handler import CurriculoHandler
+from utils.curriculo_store import CurriculoStore, render_item_row, render_section_row
+
+@pytest.fixture
+def temp_data_dir():
+    """Diretório com seções de teste, o currículo monolítico e um arquivo inválido."""
+    temp_dir = tempfile.mkdtemp()
+    test_data = {
+        "academic_background.json": {"academic_background": [
+            {"degree": "Engenharia de Software", "school": "Universidade XYZ", "year": 2023}
+        ]},
+        "projects.json": {"projects": [
+            {"name": "Chatbot", "description": "Chatbot em Flask", "technologies": ["Python", "Flask"]}
+        ]},
+        "skills.json": {"skills": {"programming": ["Python", "JavaScript"]}},
+        "languages.json": {"languages": ["Português", "Inglês"]},
+        "curriculo.json": {"name": "Lucas", "skills": {"programming": ["Python"]}},
+    }
+    for filename, content in test_data.items():
+        with open(os.path.join(temp_dir, filename), 'w', encoding='utf-8') as f:
+            json.dump(content, f, ensure_ascii=False)
+    with open(os.path.join(temp_dir, "invalid.json"), 'w', encoding='utf-8') as f:
+        f.write("invalid json content")
+    yield temp_dir
+    shutil.rmtree(temp_dir)
+
+def test_store_loads_all_sections_eagerly(temp_data_dir):
+    store = CurriculoStore.load(temp_data_dir)
+    # O currículo monolítico repete as seções e não é carregado; JSON inválido é ignorado
+    assert sorted(store.sections) == ["academic_background", "languages", "projects", "skills"]
+    assert set(store.versions) == set(store.sections)
+    assert len(store.project_index) == 1
+    assert [item.section for item in store.items] == ["academic_background", "languages", "languages",
+                                                      "projects", "skills"]
+    skills = store.items[-1]
+    assert skills.path == ("programming",)
+    assert skills.text == skills.text.lower() and "javascript" in skills.text
+    assert skills.fragment == "programming: ['**Python**', '**JavaScript**']"
+    with pytest.raises(TypeError):
+        store.sections["skills"] = {}
+
+def test_requests_do_not_touch_the_filesystem(temp_data_dir):
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+    with patch("builtins.open", side_effect=AssertionError("open")), \
+            patch("os.path.exists", side_effect=AssertionError("exists")), \
+            patch("os.listdir", side_effect=AssertionError("listdir")):
+        assert handler.get_multiple(["skills", "nonexistent"]) == {"skills": {"programming": ["Python", "JavaScript"]}}
+        assert handler.get_versions(["skills"])["skills"]
+        assert handler.retrieve("Ele sabe Flask?") == {"projects": [handler.get("projects")[0]]}
+        assert handler.searchable_sections() == ["academic_background", "languages", "projects", "skills"]
+
+def test_summary_rows_are_prerendered(temp_data_dir):
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+    projects = handler.get("projects")
+    assert handler.summary_rows("projects", projects) == [
+        "- Projeto: **Chatbot** - **Chatbot** em **Flask**"
+    ]
+    assert handler.summary_rows("academic_background", handler.get("academic_background")) == [
+        "- **Engenharia de Software** em **Universidade XYZ** (**2023**)"
+    ]
+    # Dados de outra origem (ex.: entrada do cache) são renderizados na hora, com o mesmo resultado
+    copy = json.loads(json.dumps(handler.get("skills")))
+    assert handler.summary_rows("skills", copy) == handler.summary_rows("skills", handler.get("skills"))
+    assert handler.summary_rows("skills", copy) == [render_section_row("skills", copy)]
+    assert render_item_row("projects", dict(projects[0])) == handler.summary_rows("projects", projects)[0]
+
+def test_pruned_rows_join_prerendered_fragments(temp_data_dir):
+    with open(os.path.join(temp_data_dir, "skills.json"), 'w', encoding='utf-8') as f:
+        json.dump({"skills": {"programming": ["Python", "JavaScript"], "frameworks": ["Flask"]}}, f)
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+    languages = handler.get("languages")
+    with patch("utils.curriculo_store.render_section_row", side_effect=AssertionError("render")):
+        assert handler.summary_rows("skills", handler.retrieve("Sabe Flask?")["skills"]) == [
+            "- Skills: frameworks: ['**Flask**']"
+        ]
+        assert handler.summary_rows("languages", [languages[1]]) == ["- Languages: **Inglês**"]
+    # Mesmo resultado da renderização na hora
+    assert handler.summary_rows("languages", [languages[1]]) == [render_section_row("languages", ["Inglês"])]
+
+def test_reload_swaps_the_snapshot_atomically(temp_data_dir):
+    handler = CurriculoHandler(data_dir=temp_data_dir)
+    old_store = handler.store
+    old_version = handler.get_version("skills")
+
+    with open(os.path.join(temp_data_dir, "skills.json"), 'w', encoding='utf-8') as f:
+        json.dump({"skills": {"programming": ["Go"]}}, f)
+    # Nada muda até a recarga
+    assert handler.get("skills") == {"programming": ["Python", "JavaScript"]}
+
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        # Cada leitura vê um snapshot inteiro: seção e versão sempre do mesmo arquivo
+        while not stop.is_set():
+            store = handler.store
+            programming = store.sections["skills"]["programming"]
+            if (programming == ["Go"]) != (store.versions["skills"] != old_version):
+                errors.append(programming)
+
+    threads = [threading.Thread(target=reader) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    new_store = handler.reload()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert handler.store is new_store is not old_store
+    assert handler.get("skills") == {"programming": ["Go"]}
+    assert handler.get_version("skills") != old_version
+    assert handler.retrieve("Ele sabe Go?") == {"skills": {"programming": ["Go"]}}
+    # O snapshot antigo continua íntegro para quem ainda o usa
+    assert old_store.sections["skills"] == {"programming": ["Python", "JavaScript"]}
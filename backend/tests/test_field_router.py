@@ -0,0 +1,110 @@
+import glob
+import json
+import os
+import random
+import re
+import pytest
+from utils.field_router import FieldRouter, CONTEXT_PATTERNS, FIELD_KEYWORDS, ROLE_FIELD_PRIORITY
+from utils.role_handler import RoleHandler
+
+ROLES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "roles")
+
+def legacy_route(question, role_id):
+    """Implementação anterior (um re.search por padrão e por palavra-chave), usada como referência."""
+    found_fields = set()
+    q_lower = question.lower()
+    context_matches = {}
+    for field, patterns in CONTEXT_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, q_lower):
+                found_fields.add(field)
+                context_matches[field] = True
+                break
+    if not found_fields:
+        for field, keywords in FIELD_KEYWORDS.items():
+            for kw in keywords:
+                if re.search(r'\b' + re.escape(kw) + r'\b', q_lower):
+                    found_fields.add(field)
+                    break
+    if not found_fields and role_id in ROLE_FIELD_PRIORITY:
+        found_fields.update(ROLE_FIELD_PRIORITY[role_id])
+    if len(found_fields) > 3:
+        priority_list = [field for field in context_matches if field in found_fields]
+        for field in ROLE_FIELD_PRIORITY.get(role_id, list(FIELD_KEYWORDS)):
+            if field in found_fields and field not in priority_list:
+                priority_list.append(field)
+                if len(priority_list) >= 3:
+                    break
+        # A versão anterior percorria o set (ordem arbitrária); aqui, a ordem das tabelas
+        for field in FIELD_KEYWORDS:
+            if field in found_fields and field not in priority_list:
+                priority_list.append(field)
+                if len(priority_list) >= 3:
+                    break
+        found_fields = set(priority_list[:3])
+    return found_fields
+
+def example_questions():
+    questions = []
+    for path in glob.glob(os.path.join(ROLES_DIR, "*.json")):
+        with open(path, encoding="utf-8") as f:
+            questions.extend(json.load(f).get("example_questions", []))
+    return questions
+
+EDGE_CASES = [
+    "Ele tem habilidade comportamental?",
+    "Trabalho em equipe é um ponto forte?",
+    "Ele trabalhou em equipe na startup?",
+    "Fez algum curso de Python?",
+    "Conte sobre o projeto de sistema e o desenvolvimento de projeto",
+    "Tem soft skill e stack definida?",
+    "Soft skills?",
+    "Qual conquista importante, resultado alcançado e aprendizado com a habilidade com comunicação com clientes?",
+    "Formou\nem quê?",
+    "Onde formou\ne depois formou em TI?",
+    "Ele predomina o mercado?",
+    "Tecnologias e tecnologia",
+    "",
+    "Bom dia!",
+]
+
+ROLES = list(ROLE_FIELD_PRIORITY) + ["nonexistent"]
+
+@pytest.mark.parametrize("question", example_questions() + EDGE_CASES)
+def test_matches_legacy_routing(question):
+    router = FieldRouter()
+    for role in ROLES:
+        assert set(router.route(question, role)) == legacy_route(question, role), (question, role)
+
+def test_matches_legacy_routing_on_random_questions():
+    router = FieldRouter()
+    rng = random.Random(7)
+    vocabulary = [kw for keywords in FIELD_KEYWORDS.values() for kw in keywords]
+    vocabulary += [p.replace('.*', ' ') for patterns in CONTEXT_PATTERNS.values() for p in patterns]
+    vocabulary += ["qual", "sua", "de", "e", "com", "na", "em", "um", "?", "trabalhou", "skills", "projetos"]
+    for _ in range(500):
+        words = [rng.choice(vocabulary) for _ in range(rng.randint(1, 8))]
+        question = rng.choice([" ", "", ", ", "-"]).join(words)
+        role = rng.choice(ROLES)
+        assert set(router.route(question, role)) == legacy_route(question, role), (question, role)
+
+def test_overlapping_keywords_are_all_found():
+    router = FieldRouter()
+    # "soft skill" contém "skill"; "curso" pertence a dois campos
+    assert router.route("Tem alguma soft skill?", "nonexistent") == ['skills', 'soft_skills']
+    assert router.route("um curso", "nonexistent") == ['academic_background', 'certifications']
+    assert router.route("Bom dia!", "developer") == ['professional_experience', 'projects', 'skills']
+
+def test_role_handler_recompiles_router_on_reload(tmp_path):
+    role = {
+        "id": "custom", "name": "Custom", "description": "d", "icon": "i", "color": "c",
+        "focus_areas": [], "prompt_modifiers": {}, "field_priority": ["languages"]
+    }
+    (tmp_path / "custom.json").write_text(json.dumps(role), encoding="utf-8")
+    handler = RoleHandler(roles_dir=str(tmp_path))
+    assert handler.identify_relevant_fields("Bom dia!", "custom") == ['languages']
+
+    role["field_priority"] = ["skills", "projects"]
+    (tmp_path / "custom.json").write_text(json.dumps(role), encoding="utf-8")
+    handler.reload_roles()
+    assert handler.identify_relevant_fields("Bom dia!", "custom") == ['projects', 'skills']
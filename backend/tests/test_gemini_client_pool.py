@@ -0,0 +1,72 @@
+import threading
+from unittest.mock import MagicMock
+from utils.gemini_client_pool import GeminiClientPool
+
+def make_pool(**kwargs):
+    factory = MagicMock(side_effect=lambda **kw: MagicMock(api_key=kw['api_key']))
+    return GeminiClientPool(client_factory=factory, **kwargs), factory
+
+def test_client_reused_per_key():
+    pool, factory = make_pool()
+    client1 = pool.get_client("key-1")
+    client2 = pool.get_client("key-1")
+    assert client1 is client2
+    assert factory.call_count == 1
+
+def test_separate_client_per_key():
+    pool, factory = make_pool()
+    assert pool.get_client("key-1") is not pool.get_client("key-2")
+    assert factory.call_count == 2
+    assert pool.get_stats()['clients'] == 2
+
+def test_http_options_use_pool_limits():
+    pool, factory = make_pool(pool_size=3, keepalive_seconds=15, base_url="http://127.0.0.1:9999")
+    pool.get_client("key-1")
+    http_options = factory.call_args.kwargs['http_options']
+    limits = http_options.client_args['limits']
+    assert limits.max_connections == 3
+    assert limits.max_keepalive_connections == 3
+    assert limits.keepalive_expiry == 15
+    assert http_options.base_url == "http://127.0.0.1:9999"
+
+def test_concurrent_first_use_creates_single_client():
+    pool, factory = make_pool()
+    barrier = threading.Barrier(16)
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(pool.get_client("key-1"))
+
+    threads = [threading.Thread(target=worker) for _ in range(16)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert factory.call_count == 1
+    assert all(client is results[0] for client in results)
+    assert pool.get_stats()['clients_created'] == 1
+    assert pool.get_stats()['client_reuses'] == 15
+
+def test_concurrent_reuses_are_all_counted():
+    pool, _ = make_pool()
+    pool.get_client("key-1")
+
+    def worker():
+        for _ in range(2000):
+            pool.get_client("key-1")
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert pool.get_stats()['client_reuses'] == 16000
+
+def test_clear():
+    pool, factory = make_pool()
+    pool.get_client("key-1")
+    pool.clear()
+    pool.get_client("key-1")
+    assert factory.call_count == 2
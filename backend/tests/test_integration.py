@@ -13,6 +13,14 @@ def client():
     with app.test_client() as client:
         yield client
 
+@pytest.fixture(autouse=True)
+def reset_gemini_client_pool():
+    """Descarta clientes Gemini reutilizados, para que cada teste use seu próprio mock."""
+    from main import gemini_client_pool
+    gemini_client_pool.clear()
+    yield
+    gemini_client_pool.clear()
+
 @pytest.fixture
 def temp_data_dir():
     """Cria diretório temporário com dados de teste."""
@@ -116,6 +124,8 @@ def mock_gemini():
         # Mock do generate_content também
         mock_model.generate_content.return_value = mock_response
         mock_genai.GenerativeModel.return_value = mock_model
+        # SDK google.genai, usado pelo pool de clientes
+        mock_genai.Client.return_value.models.generate_content.return_value = mock_response
         
         yield mock_genai
 
@@ -288,6 +298,30 @@ def test_rate_limiting(client, reset_rate_limiter):
         # Se não atingiu rate limit, pelo menos deve ter funcionado
         assert response.status_code in [200, 429]
 
+def test_health_and_preflight_skip_rate_limiting(client, reset_rate_limiter):
+    """Health check e preflights de CORS não consomem a cota do IP."""
+    from utils.rate_limiter import rate_limiter
+    before = rate_limiter.get_stats()['general']['total_requests']
+    for _ in range(40):
+        assert client.get('/health').status_code != 429
+    assert client.options('/chat').status_code != 429
+    assert rate_limiter.get_stats()['general']['total_requests'] == before
+
+def test_cached_chat_answers_are_not_throttled(client, mock_gemini, mock_curriculo_data, temp_cache_handler,
+                                               reset_rate_limiter):
+    """Cache hits custam menos que chamadas ao Gemini: a mesma pergunta repetida não esgota a cota."""
+    data = {"question": "Qual sua formação acadêmica?", "role": "recruiter"}
+    for _ in range(12):
+        assert client.post('/chat', json=data).status_code == 200
+    assert mock_gemini.Client.return_value.models.generate_content.call_count == 1
+
+    # Perguntas diferentes (cache miss) ainda são limitadas
+    for i in range(10):
+        response = client.post('/chat', json={"question": f"Pergunta nova {i}", "role": "recruiter"})
+        if response.status_code == 429:
+            break
+    assert response.status_code == 429
+
 def test_cors_headers(client):
     """Testa se os headers CORS estão presentes."""
     response = client.get('/roles')
@@ -392,4 +426,295 @@ def test_performance_under_load(client, mock_gemini, mock_curriculo_data, reset_
     total_time = end_time - start_time
     
     # Deve ser rápido (menos de 3 segundos para 5 requisições)
-    assert total_time < 3.0 
\ No newline at end of file
+    assert total_time < 3.0 
+
+def parse_sse_events(raw):
+    """Converte o corpo de uma resposta SSE em uma lista de (evento, payload)."""
+    events = []
+    for block in raw.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+@pytest.fixture
+def temp_cache_handler():
+    """Substitui o cache global por um cache em diretório temporário."""
+    from utils.cache_handler import CacheHandler
+    cache_dir = tempfile.mkdtemp()
+    with patch('main.cache_handler', CacheHandler(cache_dir=cache_dir)) as handler:
+        yield handler
+    shutil.rmtree(cache_dir)
+
+@pytest.fixture
+def mock_gemini_stream():
+    """Mock do streaming do SDK google.genai."""
+    with patch('main.genai') as mock_genai:
+        chunks = []
+        for text in ["## Introdução\n", "Lucas é formado em ", "**Engenharia de Software**.", "\nConclusão\nAlgo mais?"]:
+            chunk = MagicMock()
+            chunk.text = text
+            chunks.append(chunk)
+        mock_genai.Client.return_value.models.generate_content_stream.return_value = chunks
+        yield mock_genai
+
+def test_overloaded_gemini_sheds_with_retry_after(client, mock_gemini, mock_curriculo_data, temp_cache_handler,
+                                                  reset_rate_limiter):
+    """Com o bulkhead do Gemini cheio, cache misses recebem 503 com Retry-After e cache hits seguem normais."""
+    from utils.bulkhead import Bulkhead
+    data = {"question": "Qual sua formação acadêmica?", "role": "recruiter"}
+    assert client.post('/chat', json=data).status_code == 200
+
+    # Sem vagas nem fila: toda chamada ao Gemini é descartada
+    saturated = Bulkhead(max_concurrent=0, max_queue=0, queue_timeout=3)
+    with patch('main.gemini_bulkhead', saturated):
+        assert client.post('/chat', json=data).status_code == 200
+
+        response = client.post('/chat', json={"question": "Quais tecnologias usa?", "role": "recruiter"})
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == "3"
+        assert json.loads(response.data)['retry_after'] == 3
+
+        response = client.post('/chat/stream', json={"question": "Quais tecnologias usa?", "role": "recruiter"})
+        event, payload = parse_sse_events(response.get_data(as_text=True))[-1]
+        assert event == "error"
+        assert payload['retry_after'] == 3
+
+        stats = json.loads(client.get('/gemini/stats').data)['bulkhead']
+        assert stats['rejected'] == 2
+        assert stats['shed'] == 2
+    assert mock_gemini.Client.return_value.models.generate_content.call_count == 1
+
+def test_exhausted_api_keys_shed_with_retry_after(client, mock_gemini, mock_curriculo_data, temp_cache_handler,
+                                                 reset_rate_limiter):
+    """Sem chave disponível (todas em cooldown), cache misses recebem 503 com Retry-After e a reserva é devolvida."""
+    from utils.api_key_pool import APIKeyPool
+    from utils.rate_limiter import rate_limiter
+    pool = APIKeyPool(["key-a"], cooldown_seconds=30)
+    pool.release("key-a", rate_limited=True)
+    data = {"question": "Quais tecnologias usa?", "role": "recruiter"}
+    with patch('main.key_pool', pool):
+        response = client.post('/chat', json=data)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == "30"
+        assert json.loads(response.data)['retry_after'] == 30
+
+        response = client.post('/chat/stream', json=data)
+        event, payload = parse_sse_events(response.get_data(as_text=True))[-1]
+        assert event == "error"
+        assert payload['retry_after'] == 30
+    # Cada requisição descartada fica só com o custo de um cache hit
+    used = rate_limiter.chat_limiter.is_allowed("127.0.0.1", 0)[1]['current_requests']
+    assert used == 2 * rate_limiter.cache_hit_cost
+    mock_gemini.Client.return_value.models.generate_content.assert_not_called()
+
+def test_answers_without_own_gemini_call_are_refunded(client, mock_gemini, mock_curriculo_data, temp_cache_handler,
+                                                      reset_rate_limiter):
+    """Fallback (sem dados factuais) e resposta gerada por outro worker ficam só com o custo de um cache hit."""
+    from utils.rate_limiter import rate_limiter
+    with patch('main.collect_factual_data', return_value={}):
+        assert client.post('/chat', json={"question": "Qual o time dele?", "role": "recruiter"}).status_code == 200
+        response = client.post('/chat/stream', json={"question": "Qual o time dele?", "role": "recruiter"})
+        assert parse_sse_events(response.get_data(as_text=True))[-1][0] == "done"
+    with patch.object(temp_cache_handler, 'generate_once', return_value=("Resposta de outro worker", False)):
+        response = client.post('/chat', json={"question": "Quais tecnologias usa?", "role": "recruiter"})
+        assert json.loads(response.data)['answer'] == "Resposta de outro worker"
+    used = rate_limiter.chat_limiter.is_allowed("127.0.0.1", 0)[1]['current_requests']
+    assert used == 3 * rate_limiter.cache_hit_cost
+    mock_gemini.Client.return_value.models.generate_content.assert_not_called()
+
+def test_retrieval_adds_to_routed_sections():
+    """Os itens da busca se somam às seções do roteamento, sem substituí-las."""
+    import main
+    questions = [(role, question) for role in ("recruiter", "developer", "client", "student")
+                 for question in main.role_handler.get_role_examples(role)]
+    questions.append(("recruiter", "Quais são as habilidades técnicas?"))
+    assert len(questions) > 1
+    for role, question in questions:
+        relevant_fields = main.role_handler.identify_relevant_fields(question, role)
+        factual_data = main.collect_factual_data(question, relevant_fields)
+        routed = main.curriculo_handler.get_multiple(relevant_fields)
+        assert {section: factual_data[section] for section in routed} == routed, question
+        assert set(main.curriculo_handler.retrieve(question, limit=main.config.RETRIEVAL_TOP_K)) <= set(factual_data)
+
+def test_chat_stream_endpoint(client, mock_gemini_stream, mock_curriculo_data, temp_cache_handler, reset_rate_limiter):
+    """Testa /chat/stream: trechos sem títulos de estrutura, evento final e gravação no cache."""
+    data = {"question": "Qual sua formação acadêmica?", "role": "recruiter"}
+
+    response = client.post('/chat/stream', json=data)
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    events = parse_sse_events(response.get_data(as_text=True))
+    assert events[-1] == ("done", {"role": "recruiter", "cache_hit": False})
+    answer = "".join(payload["text"] for event, payload in events if event == "chunk")
+    assert answer == "Lucas é formado em **Engenharia de Software**.\nAlgo mais?"
+
+    relevant_fields = ["academic_background"]
+    cached = temp_cache_handler.get(data["question"], "recruiter", relevant_fields)
+    assert cached is not None
+    assert cached["answer"] == answer
+
+def test_chat_stream_replays_cache_hit(client, mock_gemini_stream, mock_curriculo_data, temp_cache_handler, reset_rate_limiter):
+    """Respostas em cache são reproduzidas no mesmo formato SSE, sem chamar o Gemini."""
+    question = "Qual sua formação acadêmica?"
+    answer = "Lucas é formado em **Engenharia de Software** pela Universidade XYZ. Quer saber mais?"
+    temp_cache_handler.set(question, "recruiter", ["academic_background"], answer, {})
+
+    response = client.post('/chat/stream', json={"question": question, "role": "recruiter"})
+
+    events = parse_sse_events(response.get_data(as_text=True))
+    assert events[-1] == ("done", {"role": "recruiter", "cache_hit": True})
+    assert "".join(payload["text"] for event, payload in events if event == "chunk") == answer
+    mock_gemini_stream.Client.return_value.models.generate_content_stream.assert_not_called()
+
+def test_chat_stream_empty_question(client, reset_rate_limiter):
+    """Testa /chat/stream com pergunta vazia."""
+    response = client.post('/chat/stream', json={"question": "", "role": "recruiter"})
+
+    assert response.status_code == 400
+    assert "Please provide your question" in json.loads(response.data)["answer"]
+
+def test_chat_stream_gemini_error(client, mock_curriculo_data, temp_cache_handler, reset_rate_limiter):
+    """Falhas do Gemini viram um evento de erro no stream."""
+    with patch('main.genai') as mock_genai:
+        mock_genai.Client.return_value.models.generate_content_stream.side_effect = Exception("API Error")
+        response = client.post('/chat/stream', json={"question": "Qual sua formação acadêmica?", "role": "recruiter"})
+
+    events = parse_sse_events(response.get_data(as_text=True))
+    assert events[-1][0] == "error"
+    assert "internal error" in events[-1][1]["answer"].lower()
+
+def test_gemini_quota_error_rotates_key(mock_gemini):
+    """Um 429 em uma chave coloca a chave em cooldown e repete a chamada com a próxima."""
+    import main
+    from utils.api_key_pool import APIKeyPool
+
+    response = MagicMock()
+    response.text = "Resposta da segunda chave"
+    mock_gemini.Client.return_value.models.generate_content.side_effect = [
+        Exception("429 RESOURCE_EXHAUSTED: quota exceeded"), response
+    ]
+    with patch('main.key_pool', APIKeyPool(["key-a", "key-b"])) as pool:
+        answer = main.gemini_generate_content("system", "prompt")
+        stats = {entry['key']: entry for entry in pool.get_stats()}
+
+    assert answer == "Resposta da segunda chave"
+    assert stats["...ey-a"]['rate_limited'] == 1
+    assert stats["...ey-a"]['cooling_down'] is True
+    assert stats["...ey-b"]['requests'] == 1
+    assert all(entry['in_flight'] == 0 for entry in stats.values())
+
+def test_gemini_stats_endpoint(client):
+    """Testa endpoint /gemini/stats."""
+    response = client.get('/gemini/stats')
+
+    assert response.status_code == 200
+    response_data = json.loads(response.data)
+    assert "keys" in response_data
+    assert "client_pool" in response_data
+
+def test_concurrent_identical_questions_share_one_gemini_call(mock_gemini, mock_curriculo_data, temp_cache_handler):
+    """Perguntas idênticas simultâneas geram uma única chamada ao Gemini."""
+    import threading
+    import time
+    import main
+
+    def slow_generate(**kwargs):
+        time.sleep(0.3)
+        response = MagicMock()
+        response.text = "Resposta compartilhada"
+        return response
+
+    generate_content = mock_gemini.Client.return_value.models.generate_content
+    generate_content.side_effect = slow_generate
+    coalesced_before = main.chat_flight.get_stats()['coalesced']
+    data = {"question": "Qual sua formação acadêmica?", "role": "recruiter"}
+    answers = []
+
+    def ask(index):
+        # Um cliente por thread, com IPs diferentes para não esbarrar no rate limit de /chat
+        response = app.test_client().post('/chat', json=data, headers={"X-Forwarded-For": f"10.1.0.{index}"})
+        answers.append(json.loads(response.data)["answer"])
+
+    threads = [threading.Thread(target=ask, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert answers == ["Resposta compartilhada"] * 6
+    assert generate_content.call_count == 1
+    assert main.chat_flight.get_stats()['coalesced'] - coalesced_before == 5
+
+def test_stale_answer_served_while_refreshing(mock_gemini, mock_curriculo_data, temp_cache_handler):
+    """Resposta expirada dentro da janela de tolerância é servida e regenerada em segundo plano."""
+    import time
+    import main
+
+    response = MagicMock()
+    response.text = "Resposta regenerada"
+    generate_content = mock_gemini.Client.return_value.models.generate_content
+    generate_content.return_value = response
+
+    handler = temp_cache_handler
+    handler.stale_grace_seconds = 3600
+    handler.refresh_fn = main.refresh_cached_answer
+    question = "Qual sua formação acadêmica?"
+    relevant_fields = main.role_handler.identify_relevant_fields(question, "recruiter")
+    handler.set(question, "recruiter", relevant_fields, "Resposta antiga", {})
+    cache_key = handler.generate_cache_key(question, "recruiter", relevant_fields)
+    data, _, _ = handler.store.get(cache_key)
+    handler.store.set(cache_key, data, created_at=time.time() - handler.max_age_seconds - 60)
+    handler.memory.clear()
+
+    response = app.test_client().post('/chat', json={"question": question, "role": "recruiter"},
+                                      headers={"X-Forwarded-For": "10.2.0.1"})
+    assert json.loads(response.data)["answer"] == "Resposta antiga"
+
+    deadline = time.time() + 5
+    while handler.refresher.get_stats()['completed'] < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    assert generate_content.call_count == 1
+    assert handler.get(question, "recruiter", relevant_fields)['answer'] == "Resposta regenerada"
+
+def test_cache_snapshot_endpoints(temp_cache_handler):
+    """Exporta e importa o cache pelos endpoints de snapshot."""
+    import main
+
+    with patch.object(main.config, 'CACHE_ADMIN_TOKEN', ''):
+        assert app.test_client().get('/cache/snapshot').status_code == 403
+
+    temp_cache_handler.set("Quais projetos?", "recruiter", ["projects"], "R1", {"projects": ["Chatbot"]})
+    with patch.object(main.config, 'CACHE_ADMIN_TOKEN', 'segredo'):
+        test_client = app.test_client()
+        assert test_client.get('/cache/snapshot', headers={"X-Admin-Token": "errado"}).status_code == 401
+
+        response = test_client.get('/cache/snapshot', headers={"X-Admin-Token": "segredo"})
+        assert response.status_code == 200
+        snapshot = response.data
+
+        temp_cache_handler.clear_all()
+        response = test_client.post('/cache/snapshot', data=snapshot, headers={"X-Admin-Token": "segredo"})
+        assert response.status_code == 200
+        assert json.loads(response.data)['entries'] == 1
+        assert temp_cache_handler.get("Quais projetos?", "recruiter", ["projects"])['answer'] == "R1"
+
+        response = test_client.post('/cache/snapshot', data=b"not a snapshot", headers={"X-Admin-Token": "segredo"})
+        assert response.status_code == 400
+
+def test_curriculum_reload_endpoint():
+    """Recarrega o currículo pelo endpoint administrativo."""
+    import main
+
+    with patch.object(main.config, 'CACHE_ADMIN_TOKEN', ''):
+        assert app.test_client().post('/curriculum/reload').status_code == 403
+
+    old_store = main.curriculo_handler.store
+    with patch.object(main.config, 'CACHE_ADMIN_TOKEN', 'segredo'):
+        test_client = app.test_client()
+        assert test_client.post('/curriculum/reload', headers={"X-Admin-Token": "errado"}).status_code == 401
+
+        response = test_client.post('/curriculum/reload', headers={"X-Admin-Token": "segredo"})
+        assert response.status_code == 200
+        assert json.loads(response.data)['sections'] == dict(old_store.versions)
+    assert main.curriculo_handler.store is not old_store
@@ -0,0 +1,61 @@
+import time
+from utils.lru_cache import LRUCache
+
+def test_get_and_set():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("b", "padrão") == "padrão"
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "a" passa a ser a mais recente
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.get_stats()['evictions'] == 1
+
+def test_byte_budget():
+    cache = LRUCache(max_entries=10, max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("b", "y", size=30)
+    cache.set("c", "z", size=30)
+    assert "a" not in cache
+    assert cache.get_stats()['bytes'] == 60
+    # Entrada maior que o orçamento inteiro não é armazenada
+    cache.set("d", "grande", size=101)
+    assert "d" not in cache
+    assert len(cache) == 2
+
+def test_replacing_key_updates_size():
+    cache = LRUCache(max_bytes=100)
+    cache.set("a", "x", size=60)
+    cache.set("a", "y", size=10)
+    assert cache.get_stats()['bytes'] == 10
+
+def test_expiration():
+    cache = LRUCache()
+    cache.set("a", 1, expires_at=time.time() + 0.1)
+    cache.set("b", 2, expires_at=time.time() - 1)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    time.sleep(0.15)
+    assert cache.clear_expired() == 1
+    assert len(cache) == 0
+
+def test_stats_and_clear():
+    cache = LRUCache()
+    cache.set("a", 1, size=5)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.get_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 50.0
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.get_stats()['bytes'] == 0
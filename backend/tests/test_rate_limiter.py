@@ -1,9 +1,11 @@
 import time
 import pytest
-from utils.rate_limiter import RateLimiter, IPRateLimiter
+import threading
+from utils.rate_limiter import RateLimiter, GCRARateLimiter, ShardedRateLimiter, IPRateLimiter, create_rate_limiter
 
-def test_rate_limiter_basic():
-    limiter = RateLimiter(max_requests=3, window_seconds=2)
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_rate_limiter_basic(algorithm):
+    limiter = create_rate_limiter(max_requests=3, window_seconds=2, algorithm=algorithm)
     ip = '127.0.0.1'
     # Deve permitir as 3 primeiras
     assert limiter.is_allowed(ip)[0]
@@ -17,8 +19,9 @@ def test_rate_limiter_basic():
     time.sleep(2.1)
     assert limiter.is_allowed(ip)[0]
 
-def test_rate_limiter_reset():
-    limiter = RateLimiter(max_requests=2, window_seconds=10)
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_rate_limiter_reset(algorithm):
+    limiter = create_rate_limiter(max_requests=2, window_seconds=10, algorithm=algorithm)
     ip = '192.168.0.1'
     assert limiter.is_allowed(ip)[0]
     assert limiter.is_allowed(ip)[0]
@@ -46,4 +49,140 @@ def test_ip_rate_limiter():
     ip_limiter.reset(ip)
     assert ip_limiter.check_rate_limit(ip, '/chat')[0]
     assert ip_limiter.check_rate_limit(ip, '/roles')[0]
-    assert ip_limiter.check_rate_limit(ip, '/outro')[0] 
\ No newline at end of file
+    assert ip_limiter.check_rate_limit(ip, '/outro')[0]
+
+def test_gcra_refills_gradually():
+    limiter = GCRARateLimiter(max_requests=4, window_seconds=2)
+    ip = '10.0.0.2'
+    for _ in range(4):
+        assert limiter.is_allowed(ip)[0]
+    assert not limiter.is_allowed(ip)[0]
+    # A cota volta uma requisição a cada window / max_requests (0.5s), não a janela inteira
+    remaining = limiter.get_remaining_time(ip)
+    assert 0.4 < remaining <= 0.5
+    time.sleep(remaining + 0.05)
+    allowed, info = limiter.is_allowed(ip)
+    assert allowed
+    assert info['remaining_requests'] == 1
+    assert not limiter.is_allowed(ip)[0]
+    # Um único número por IP
+    assert isinstance(limiter.requests[ip], float)
+    stats = limiter.get_stats()
+    assert stats['total_requests'] == 5
+    assert stats['denied_requests'] == 2
+
+def test_create_rate_limiter():
+    assert type(create_rate_limiter(algorithm="sliding_window")) is RateLimiter
+    assert create_rate_limiter(algorithm="gcra").get_stats()['algorithm'] == "gcra"
+    assert IPRateLimiter(algorithm="gcra").get_stats()['chat']['algorithm'] == "gcra"
+    with pytest.raises(ValueError):
+        create_rate_limiter(algorithm="leaky")
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_reads_do_not_track_ips(algorithm):
+    limiter = create_rate_limiter(max_requests=2, window_seconds=10, algorithm=algorithm)
+    assert limiter.get_remaining_time('10.0.0.3') is None
+    limiter.reset('10.0.0.4')
+    assert limiter.get_stats()['total_ips'] == 0
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_idle_ips_are_swept(algorithm):
+    limiter = create_rate_limiter(max_requests=2, window_seconds=0.2, algorithm=algorithm)
+    limiter.sweep_interval = 0.2
+    for i in range(50):
+        limiter.is_allowed(f'10.1.0.{i}')
+    assert limiter.get_stats()['total_ips'] == 50
+    time.sleep(0.25)
+    # A próxima verificação varre os IPs sem requisições na janela
+    limiter.is_allowed('10.2.0.1')
+    stats = limiter.get_stats()
+    assert stats['total_ips'] == 1
+    assert stats['idle_evictions'] == 50
+    assert stats['sweeps'] == 1
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_tracked_ips_are_capped_lru(algorithm):
+    limiter = create_rate_limiter(max_requests=1, window_seconds=60, algorithm=algorithm, max_keys=3)
+    for ip in ('a', 'b', 'c'):
+        assert limiter.is_allowed(ip)[0]
+    # 'a' volta a ser usado (mesmo bloqueado): 'b' passa a ser o menos recente
+    assert not limiter.is_allowed('a')[0]
+    assert limiter.is_allowed('d')[0]
+    assert list(limiter.requests) == ['c', 'a', 'd']
+    assert limiter.get_stats()['capacity_evictions'] == 1
+    assert not limiter.is_allowed('a')[0]
+    # Um IP descartado começa do zero
+    assert limiter.is_allowed('b')[0]
+
+def test_sweep_keeps_active_ips():
+    limiter = RateLimiter(max_requests=5, window_seconds=60)
+    limiter.is_allowed('ativo')
+    limiter.requests['ocioso'] = [time.time() - 120]
+    assert limiter.sweep() == 1
+    assert list(limiter.requests) == ['ativo']
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_sharded_limiter_keeps_per_ip_limits(algorithm):
+    limiter = create_rate_limiter(max_requests=3, window_seconds=60, algorithm=algorithm, shards=8)
+    assert isinstance(limiter, ShardedRateLimiter)
+    ips = [f'10.3.0.{i}' for i in range(40)]
+    for ip in ips:
+        for _ in range(3):
+            assert limiter.is_allowed(ip)[0]
+        assert not limiter.is_allowed(ip)[0]
+        assert limiter.get_remaining_time(ip) > 0
+    # Os IPs se espalham pelos shards
+    assert sum(1 for shard in limiter.shards if shard.requests) > 1
+    limiter.reset(ips[0])
+    assert limiter.is_allowed(ips[0])[0]
+    stats = limiter.get_stats()
+    assert stats['total_ips'] == 40
+    assert stats['total_requests'] == 121
+    assert stats['denied_requests'] == 40
+    assert stats['shards'] == 8
+
+def test_sharded_limiter_is_thread_safe():
+    limiter = ShardedRateLimiter(max_requests=50, window_seconds=60, shards=4)
+    allowed = []
+
+    def worker():
+        allowed.append(sum(limiter.is_allowed(f'10.4.0.{i % 10}')[0] for i in range(200)))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    # 10 IPs x 50 requisições permitidas, nem uma a mais
+    assert sum(allowed) == 500
+
+@pytest.mark.parametrize("algorithm", ["sliding_window", "gcra"])
+def test_cost_and_refund(algorithm):
+    limiter = create_rate_limiter(max_requests=8, window_seconds=60, algorithm=algorithm)
+    assert limiter.is_allowed('10.5.0.1', cost=4)[0]
+    assert limiter.is_allowed('10.5.0.1', cost=4)[0]
+    # Cota esgotada: nem uma requisição de custo 1 passa
+    assert not limiter.is_allowed('10.5.0.1')[0]
+    assert limiter.get_remaining_time('10.5.0.1', cost=4) > 0
+    limiter.refund('10.5.0.1', 3)
+    assert limiter.get_remaining_time('10.5.0.1', cost=3) is None
+    assert limiter.is_allowed('10.5.0.1', cost=3)[0]
+    assert not limiter.is_allowed('10.5.0.1')[0]
+    # Custo maior que a cota nunca é permitido
+    assert not limiter.is_allowed('10.5.0.2', cost=9)[0]
+
+def test_cache_hits_are_cheaper_than_gemini_calls():
+    limiter = IPRateLimiter(algorithm="gcra", chat_requests=5, gemini_cost=4, cache_hit_cost=1)
+    for _ in range(5):
+        assert limiter.check_rate_limit('10.6.0.1', '/chat')[0]
+    assert not limiter.check_rate_limit('10.6.0.1', '/chat')[0]
+
+    # Cada requisição reserva o custo de uma chamada ao Gemini e o cache hit devolve a
+    # diferença: cabem 16 hits (1 unidade cada) mais um último com a reserva inteira
+    for _ in range(17):
+        assert limiter.check_rate_limit('10.6.0.2', '/chat')[0]
+        limiter.refund_cache_hit('10.6.0.2')
+    assert not limiter.check_rate_limit('10.6.0.2', '/chat')[0]
+
+    with pytest.raises(ValueError):
+        IPRateLimiter(gemini_cost=1, cache_hit_cost=2)
@@ -0,0 +1,196 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+import pytest
+from utils.cache_handler import CacheHandler
+from utils.cache_snapshot import export_snapshot, import_snapshot
+from utils.cache_store import create_cache_store
+from utils.redis_cache_store import RedisCacheStore
+from utils.resp_client import RedisError, RESPClient
+from tests.resp_stand_in import RESPStandIn
+
+@pytest.fixture(scope="module")
+def server():
+    server = RESPStandIn()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def store(server):
+    return RedisCacheStore(server.url, prefix=f"test:{uuid.uuid4().hex}:")
+
+def test_client_pipeline_and_errors(server):
+    client = RESPClient(server.url)
+    assert client.execute("PING") == "PONG"
+    assert client.pipeline([["SET", "k", "v"], ["GET", "k"], ["GET", "ausente"]]) == ["OK", b"v", None]
+    with pytest.raises(RedisError):
+        client.execute("NAOEXISTE")
+    # A conexão continua utilizável depois de um erro do servidor
+    assert client.execute("GET", "k") == b"v"
+
+def test_client_checks_auth_reply():
+    server = RESPStandIn(password="segredo")
+    try:
+        with pytest.raises(RedisError):
+            RESPClient(server.url.replace("redis://", "redis://:errada@")).execute("PING")
+        assert RESPClient(server.url.replace("redis://", "redis://:segredo@")).execute("PING") == "PONG"
+    finally:
+        server.stop()
+
+def test_client_reconnects_closed_connection(server):
+    client = RESPClient(server.url)
+    assert client.execute("SET", "k", "v") == "OK"
+    # Conexão encerrada pelo servidor enquanto ociosa: detectada antes do envio e reaberta
+    server.drop_connections()
+    time.sleep(0.05)
+    assert client.execute("SET", "k", "w") == "OK"
+    assert client.execute("GET", "k") == b"w"
+
+def test_client_retries_only_read_only_pipelines(server, monkeypatch):
+    client = RESPClient(server.url)
+    calls = []
+    send_and_read = client._send_and_read
+
+    def fail_once(commands):
+        calls.append(commands)
+        if len(calls) == 1:
+            raise ConnectionError("reset")
+        return send_and_read(commands)
+
+    monkeypatch.setattr(client, "_send_and_read", fail_once)
+    assert client.pipeline([["GET", "ausente"], ["PTTL", "ausente"]]) == [None, -2]
+    assert len(calls) == 2
+    calls.clear()
+    # Com escritas, a falha é propagada: o servidor pode já ter aplicado o INCR
+    with pytest.raises(ConnectionError):
+        client.pipeline([["HINCRBY", "h", "f", 1]])
+    assert len(calls) == 1
+
+def test_release_lock_only_by_owner(store):
+    token = store.acquire_lock("chave", 10)
+    assert token is not None
+    assert store.acquire_lock("chave", 10) is None
+    assert store.release_lock("chave", "outro") is False
+    assert store.release_lock("chave", token) is True
+    assert store.release_lock("chave", token) is False
+
+def test_client_rejects_other_schemes():
+    with pytest.raises(ValueError):
+        RESPClient("http://localhost:6379")
+
+def test_entries_expire_by_ttl(server):
+    store = RedisCacheStore(server.url, prefix=f"test:{uuid.uuid4().hex}:", ttl_seconds=0.1)
+    store.set("chave", {"answer": "a"})
+    assert store.get("chave") is not None
+    time.sleep(0.2)
+    assert store.get("chave") is None
+    # O índice é limpo na próxima varredura
+    assert store.count() == 1
+    assert store.clear_expired(max_age_seconds=0.1) == 1
+    assert store.count() == 0
+
+def test_imported_entries_keep_remaining_ttl(server):
+    store = RedisCacheStore(server.url, prefix=f"test:{uuid.uuid4().hex}:", ttl_seconds=60)
+    store.set_many([("velha", {"answer": 1}, time.time() - 59.9), ("nova", {"answer": 2}, time.time())])
+    time.sleep(0.2)
+    assert store.get("velha") is None
+    assert store.get("nova") is not None
+
+def test_get_many_is_one_round_trip(server, store):
+    store.set_many([(f"chave{i}", {"answer": i}, time.time()) for i in range(3)])
+    server.commands.clear()
+    entries = store.get_many(["chave0", "ausente", "chave2"])
+    assert [entry[0] if entry else None for entry in entries] == [{"answer": 0}, None, {"answer": 2}]
+    assert server.commands == ["MGET"]
+
+def test_snapshot_round_trip(server, store):
+    handler = CacheHandler(store=store)
+    handler.set("Pergunta?", "recruiter", ["skills"], "Resposta", {"skills": ["Python"]})
+    path = os.path.join(tempfile.mkdtemp(), "answers.snapshot.gz")
+    assert export_snapshot(store, path) == {'entries': 1, 'blobs': 1}
+
+    target = RedisCacheStore(server.url, prefix=f"test:{uuid.uuid4().hex}:")
+    assert import_snapshot(target, path)['entries'] == 1
+    cached = CacheHandler(store=target).get("Pergunta?", "recruiter", ["skills"])
+    assert cached['factual_data'] == {"skills": ["Python"]}
+
+def test_import_keeps_newer_entries(server, store):
+    now = time.time()
+    store.set("chave", {"answer": "NEW"}, created_at=now)
+    assert store.set_many([("chave", {"answer": "OLD"}, now - 10), ("outra", {"answer": 1}, now - 10)]) == 1
+    assert store.get("chave")[0] == {"answer": "NEW"}
+    assert store.get("outra")[0] == {"answer": 1}
+    assert store.set_many([("chave", {"answer": "NEWER"}, now + 10)]) == 1
+    assert store.get("chave")[0] == {"answer": "NEWER"}
+    assert store.count() == 2
+
+def test_create_cache_store_redis(server):
+    store = create_cache_store("redis", redis_url=server.url, ttl_seconds=60)
+    assert isinstance(store, RedisCacheStore)
+    assert store.ttl_seconds == 60
+
+def test_handlers_share_entries(store):
+    # Dois workers: o que um grava, o outro lê do L2 compartilhado
+    first, second = CacheHandler(store=store), CacheHandler(store=store)
+    first.set("Pergunta?", "recruiter", ["skills"], "Resposta", {"skills": ["Python"]})
+    cached = second.get("Pergunta?", "recruiter", ["skills"])
+    assert cached['answer'] == "Resposta"
+    assert second.get_stats()['storage'] == "redis"
+
+def test_near_hit_prefetches_in_one_round_trip(server, store):
+    handler = CacheHandler(store=store, similarity_threshold=0.5)
+    handler.set("Quais são as principais habilidades técnicas dele?", "recruiter", ["skills"],
+                "Python e Flask", {"skills": ["Python"]})
+    handler.memory.clear()
+    server.commands.clear()
+
+    cached = handler.get("Quais são as principais habilidades técnicas dele hoje?", "recruiter", ["skills"])
+    assert cached['answer'] == "Python e Flask"
+    assert server.commands.count("MGET") == 1
+    assert "GET" not in server.commands
+
+def test_generate_once_across_workers(store):
+    workers = [CacheHandler(store=store) for _ in range(4)]
+    calls = []
+    started = threading.Event()
+
+    def generate(handler):
+        calls.append(1)
+        started.set()
+        time.sleep(0.2)
+        handler.set("Pergunta?", "recruiter", ["skills"], "Resposta", {"skills": ["Python"]})
+        return "Resposta", True
+
+    results = []
+
+    def run(handler):
+        results.append(handler.generate_once("Pergunta?", "recruiter", ["skills"],
+                                             lambda: generate(handler), poll_interval=0.02))
+
+    threads = [threading.Thread(target=run, args=(worker,)) for worker in workers]
+    threads[0].start()
+    started.wait(1)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # Só quem chamou o modelo informa a geração (os demais têm o custo devolvido)
+    assert sorted(results) == [("Resposta", False)] * 3 + [("Resposta", True)]
+    assert len(calls) == 1
+    assert sum(worker.get_stats()['peer_hits'] for worker in workers) == 3
+
+def test_generate_once_takes_over_when_nothing_is_cached(store):
+    # O dono do lock devolve um fallback (não armazenado): quem espera gera por conta própria
+    first, second = CacheHandler(store=store), CacheHandler(store=store)
+    token = store.acquire_lock(first.generate_cache_key("Pergunta?", "recruiter", ["skills"]), 30)
+    releaser = threading.Timer(0.1, store.release_lock,
+                               args=(first.generate_cache_key("Pergunta?", "recruiter", ["skills"]), token))
+    releaser.start()
+    answer = second.generate_once("Pergunta?", "recruiter", ["skills"], lambda: ("gerada", True), poll_interval=0.02)
+    releaser.join()
+    assert answer == ("gerada", True)
+    assert second.get_stats()['peer_waits'] == 1
+    assert second.get_stats()['peer_hits'] == 0
@@ -243,4 +243,20 @@ def test_get_role_summary_nonexistent(role_handler):
     summary = role_handler.get_role_summary("nonexistent")
     # Como não existe, usa a role padrão (recruiter)
     assert summary is not None
-    assert summary["id"] == "recruiter" 
\ No newline at end of file
+    assert summary["id"] == "recruiter" 
+
+def test_identify_relevant_fields_is_memoized(role_handler):
+    """Perguntas repetidas (mesma role, qualquer caixa) não passam de novo pelo roteador."""
+    first = role_handler.identify_relevant_fields("Qual sua experiência com Python?", "recruiter")
+    first.append("mutado")
+    again = role_handler.identify_relevant_fields("QUAL SUA EXPERIÊNCIA COM PYTHON?", "recruiter")
+    assert "mutado" not in again
+    role_handler.identify_relevant_fields("Qual sua experiência com Python?", "developer")
+    stats = role_handler.get_routing_stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 2
+    assert stats['entries'] == 2
+
+    role_handler.reload_roles()
+    assert role_handler.get_routing_stats()['entries'] == 0
+    assert role_handler.identify_relevant_fields("Qual sua experiência com Python?", "recruiter") == again
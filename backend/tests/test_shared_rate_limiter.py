@@ -0,0 +1,91 @@
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+import pytest
+from utils.rate_limiter import IPRateLimiter, create_rate_limiter
+from utils.shared_rate_limiter import SQLiteRateLimiter
+
+@pytest.fixture
+def db_path():
+    path = tempfile.mkdtemp()
+    yield os.path.join(path, "rate_limits.sqlite3")
+    shutil.rmtree(path)
+
+def _worker(db_path, attempts, start, results):
+    # Processo separado, como um worker do gunicorn: limitador e conexão próprios
+    limiter = SQLiteRateLimiter(db_path, max_requests=20, window_seconds=60, namespace="chat")
+    start.wait()
+    results.put(sum(limiter.is_allowed("10.0.0.1")[0] for _ in range(attempts)))
+
+def test_limit_holds_across_processes(db_path):
+    SQLiteRateLimiter(db_path, namespace="chat")  # cria o esquema antes dos workers
+    context = multiprocessing.get_context("spawn")
+    start, results = context.Event(), context.Queue()
+    workers = [context.Process(target=_worker, args=(db_path, 15, start, results)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    start.set()
+    allowed = [results.get(timeout=60) for _ in workers]
+    for worker in workers:
+        worker.join(timeout=10)
+    # 4 workers x 15 tentativas: só as 20 da cota passam, no total
+    assert sum(allowed) == 20
+
+def test_basic_and_remaining_time(db_path):
+    limiter = SQLiteRateLimiter(db_path, max_requests=3, window_seconds=3)
+    for _ in range(3):
+        assert limiter.is_allowed("ip")[0]
+    allowed, info = limiter.is_allowed("ip")
+    assert not allowed
+    assert info['remaining_requests'] == 0
+    assert 0.9 < limiter.get_remaining_time("ip") <= 1.0
+    assert limiter.get_remaining_time("outro") is None
+    limiter.reset("ip")
+    assert limiter.is_allowed("ip")[0]
+
+def test_instances_share_state_by_namespace(db_path):
+    first = SQLiteRateLimiter(db_path, max_requests=1, window_seconds=60, namespace="chat")
+    second = SQLiteRateLimiter(db_path, max_requests=1, window_seconds=60, namespace="chat")
+    other = SQLiteRateLimiter(db_path, max_requests=1, window_seconds=60, namespace="roles")
+    assert first.is_allowed("ip")[0]
+    assert not second.is_allowed("ip")[0]
+    assert other.is_allowed("ip")[0]
+
+def test_sweep_and_key_cap(db_path):
+    limiter = SQLiteRateLimiter(db_path, max_requests=2, window_seconds=0.2, max_keys=3)
+    for i in range(5):
+        limiter.is_allowed(f"ip{i}")
+    assert limiter.get_stats()['total_ips'] == 5
+    time.sleep(0.25)
+    assert limiter.sweep() == 5
+    for i in range(5):
+        limiter.is_allowed(f"ip{i}")
+    limiter.sweep()
+    stats = limiter.get_stats()
+    assert stats['total_ips'] == 3
+    assert stats['capacity_evictions'] == 2
+    assert stats['total_requests'] == 10
+
+def test_ip_rate_limiter_sqlite_backend(db_path):
+    limiter = IPRateLimiter(backend="sqlite", db_path=db_path)
+    for _ in range(5):
+        assert limiter.check_rate_limit("ip", "/chat")[0]
+    assert not limiter.check_rate_limit("ip", "/chat/stream")[0]
+    assert limiter.check_rate_limit("ip", "/roles")[0]
+    limiter.reset("ip")
+    assert limiter.check_rate_limit("ip", "/chat")[0]
+    assert limiter.get_stats()['chat']['backend'] == "sqlite"
+    with pytest.raises(ValueError):
+        create_rate_limiter(backend="memcached")
+
+def test_cost_and_refund(db_path):
+    limiter = SQLiteRateLimiter(db_path, max_requests=8, window_seconds=60)
+    assert limiter.is_allowed("ip", cost=4)[0]
+    assert limiter.is_allowed("ip", cost=4)[0]
+    assert not limiter.is_allowed("ip")[0]
+    limiter.refund("ip", 3)
+    assert limiter.get_remaining_time("ip", cost=3) is None
+    assert limiter.is_allowed("ip", cost=3)[0]
+    assert not limiter.is_allowed("ip")[0]
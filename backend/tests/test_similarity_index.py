@@ -0,0 +1,58 @@
+from utils.similarity_index import MinHashIndex, char_ngrams, guard_tokens, jaccard
+from utils.text_normalizer import normalize_question
+
+def test_char_ngrams_and_jaccard():
+    a = char_ngrams("projetos python")
+    assert " pr" in a and "on " in a
+    assert jaccard(a, a) == 1.0
+    assert jaccard(a, char_ngrams("formacao academica")) < 0.2
+
+def test_query_finds_near_duplicate():
+    index = MinHashIndex(threshold=0.8)
+    index.add("recruiter|projects", "quais projetos desenvolveu", "k1")
+    index.add("recruiter|projects", "quais certificacoes possui", "k2")
+
+    match = index.query("recruiter|projects", "quais projetos desenvolve")
+    assert match is not None
+    assert match[0] == "k1"
+    assert match[1] >= 0.8
+
+def test_query_respects_threshold():
+    index = MinHashIndex(threshold=0.8)
+    index.add("recruiter|projects", "quais projetos python", "k1")
+    assert index.query("recruiter|projects", "quais projetos java") is None
+
+def test_partitions_are_isolated():
+    index = MinHashIndex(threshold=0.8)
+    index.add("recruiter|projects", "quais projetos desenvolveu", "k1")
+    assert index.query("developer|projects", "quais projetos desenvolveu") is None
+
+def test_remove_and_replace():
+    index = MinHashIndex(threshold=0.8)
+    index.add("p", "quais projetos desenvolveu", "k1")
+    index.add("p", "quais projetos desenvolveu", "k1")
+    assert len(index) == 1
+    index.remove("k1")
+    assert index.query("p", "quais projetos desenvolveu") is None
+    assert len(index) == 0
+
+def test_negation_and_numbers_must_match():
+    index = MinHashIndex(threshold=0.8)
+    relational = normalize_question("Quais bancos de dados relacionais ele conhece?")
+    non_relational = normalize_question("Quais bancos de dados não relacionais ele conhece?")
+    projects_2023 = normalize_question("Quais projetos de 2023?")
+    projects_2024 = normalize_question("Quais projetos de 2024?")
+    # Textos parecidos o bastante para passar do limiar pelos n-gramas
+    assert jaccard(char_ngrams(relational), char_ngrams(non_relational)) >= 0.8
+    assert jaccard(char_ngrams(projects_2023), char_ngrams(projects_2024)) >= 0.8
+
+    index.add("p", relational, "relacionais")
+    index.add("p", projects_2023, "2023")
+    assert index.query("p", non_relational) is None
+    assert index.query("p", projects_2024) is None
+    assert index.query("p", normalize_question("Quais bancos de dados relacionais conhece?"))[0] == "relacionais"
+
+def test_guard_tokens():
+    assert guard_tokens("quais bancos dados nao relacionais") == {"nao"}
+    assert guard_tokens("projetos 2023 python3") == {"2023", "python3"}
+    assert guard_tokens("quais projetos desenvolveu") == frozenset()
@@ -0,0 +1,67 @@
+import threading
+import time
+import pytest
+from utils.single_flight import SingleFlight
+
+def run_concurrently(count, target):
+    barrier = threading.Barrier(count)
+    results = []
+
+    def worker():
+        barrier.wait()
+        try:
+            results.append(target())
+        except Exception as e:
+            results.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    executions = []
+
+    def generate():
+        executions.append(1)
+        time.sleep(0.2)
+        return "resposta"
+
+    results = run_concurrently(8, lambda: flight.do("chave", generate))
+
+    assert len(executions) == 1
+    assert all(result == "resposta" for result, _ in results)
+    assert sorted(shared for _, shared in results) == [False] + [True] * 7
+    stats = flight.get_stats()
+    assert stats['executions'] == 1
+    assert stats['coalesced'] == 7
+    assert stats['in_flight'] == 0
+
+def test_different_keys_run_independently():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.get_stats()['executions'] == 2
+
+def test_sequential_calls_are_not_coalesced():
+    flight = SingleFlight()
+    flight.do("a", lambda: 1)
+    assert flight.do("a", lambda: 2) == (2, False)
+    assert flight.get_stats()['coalesced'] == 0
+
+def test_error_is_shared_with_waiters():
+    flight = SingleFlight()
+
+    def failing():
+        time.sleep(0.2)
+        raise RuntimeError("quota")
+
+    results = run_concurrently(4, lambda: flight.do("chave", failing))
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert flight.get_stats()['executions'] == 1
+    # A chave é liberada após a falha; a próxima chamada executa de novo
+    assert flight.do("chave", lambda: "ok") == ("ok", False)
@@ -0,0 +1,26 @@
+import pytest
+from utils.text_normalizer import normalize_text, normalize_question, strip_accents
+
+def test_strip_accents():
+    assert strip_accents("formação acadêmica") == "formacao academica"
+
+def test_normalize_text():
+    assert normalize_text("  Quais   PROJETOS,  ele fez?! ") == "quais projetos ele fez"
+
+@pytest.mark.parametrize("variant", [
+    "Quais projetos ele fez?",
+    "quais projetos ele fez",
+    "Quais  projetos   ele fez ?",
+    "QUAIS PROJETOS ELE FEZ!",
+])
+def test_question_variants_normalize_equally(variant):
+    assert normalize_question(variant) == "quais projetos fez"
+
+def test_accents_do_not_change_question():
+    assert normalize_question("Qual a formação acadêmica?") == normalize_question("qual a formacao academica")
+
+def test_negation_and_question_words_are_kept():
+    assert normalize_question("Por que ele não estudou?") == "por que nao estudou"
+
+def test_only_stopwords_are_kept():
+    assert normalize_question("de a o") == "de a o"
@@ -0,0 +1,143 @@
+import re
+from typing import Iterator, List
+
+# Títulos de estrutura que o modelo às vezes insere mesmo quando instruído a não usar
+STRUCTURAL_TITLE_PATTERNS = [
+    re.compile(r'^\s*#+\s*(Introdu[cç][aã]o|Resposta Principal|Conclus[ãa]o)\s*$', re.IGNORECASE),
+    re.compile(r'^\s*#+\s*(Introduction|Main Answer|Conclusion)\s*$', re.IGNORECASE),
+    re.compile(r'^\s*(Introdu[cç][aã]o|Resposta Principal|Conclus[ãa]o)\s*$', re.IGNORECASE),
+    re.compile(r'^\s*(Introduction|Main Answer|Conclusion)\s*$', re.IGNORECASE),
+]
+
+# Todas as grafias aceitas pelos padrões acima, usadas para decidir cedo se uma
+# linha parcial ainda pode virar um título
+STRUCTURAL_TITLES = [
+    'introdução', 'introduçao', 'introducão', 'introducao', 'resposta principal',
+    'conclusão', 'conclusao', 'introduction', 'main answer', 'conclusion',
+]
+
+
+def is_structural_title(line: str) -> bool:
+    """Verifica se uma linha completa é apenas um título de estrutura."""
+    stripped = line.strip()
+    return any(pattern.match(stripped) for pattern in STRUCTURAL_TITLE_PATTERNS)
+
+
+def remove_structural_titles(text: str) -> str:
+    """
+    Remove títulos de estrutura (Introdução, Conclusão, etc.) de uma resposta completa.
+
+    Args:
+        text (str): Resposta gerada pelo modelo
+
+    Returns:
+        str: Resposta sem as linhas de título
+    """
+    filtered = [line for line in text.splitlines() if not is_structural_title(line)]
+    return '\n'.join(filtered).strip()
+
+
+class StructuralTitleFilter:
+    """
+    Versão incremental de remove_structural_titles para respostas em streaming.
+
+    Os trechos recebidos são liberados assim que fica claro que a linha atual não
+    é um título, então apenas linhas curtas e ambíguas ficam retidas. A concatenação
+    de tudo que feed() e flush() retornam é igual a remove_structural_titles(texto).
+    """
+
+    def __init__(self):
+        self._line = ''           # Início da linha atual ainda não liberado
+        self._line_decided = False  # Linha atual já foi liberada como conteúdo
+        self._held = ''           # Espaços finais retidos (equivale ao strip())
+        self._started = False     # Já liberou algum conteúdo não-branco
+
+    def _could_be_title(self, partial: str) -> bool:
+        rest = partial.strip().lstrip('#').strip().lower()
+        return any(title.startswith(rest) for title in STRUCTURAL_TITLES)
+
+    def _write(self, text: str) -> str:
+        combined = self._held + text
+        if not self._started:
+            combined = combined.lstrip()
+            if not combined:
+                self._held = ''
+                return ''
+            self._started = True
+        emitted = combined.rstrip()
+        self._held = combined[len(emitted):]
+        return emitted
+
+    def feed(self, chunk: str) -> str:
+        """
+        Processa um novo trecho da resposta.
+
+        Args:
+            chunk (str): Trecho recebido do modelo
+
+        Returns:
+            str: Texto que já pode ser enviado ao cliente (pode ser vazio)
+        """
+        output = []
+        while chunk:
+            newline_index = chunk.find('\n')
+            if newline_index == -1:
+                piece, chunk, line_complete = chunk, '', False
+            else:
+                piece, chunk, line_complete = chunk[:newline_index], chunk[newline_index + 1:], True
+
+            if self._line_decided:
+                output.append(self._write(piece + ('\n' if line_complete else '')))
+            else:
+                self._line += piece
+                if line_complete:
+                    if not is_structural_title(self._line):
+                        output.append(self._write(self._line + '\n'))
+                elif not self._could_be_title(self._line):
+                    output.append(self._write(self._line))
+                    self._line = ''
+                    self._line_decided = True
+                    continue
+
+            if line_complete:
+                self._line = ''
+                self._line_decided = False
+        return ''.join(output)
+
+    def flush(self) -> str:
+        """
+        Finaliza o stream, liberando a última linha se ela não for um título.
+
+        Returns:
+            str: Texto restante a ser enviado
+        """
+        output = ''
+        if self._line and not self._line_decided and not is_structural_title(self._line):
+            output = self._write(self._line)
+        self._line = ''
+        self._line_decided = False
+        self._held = ''
+        return output
+
+
+def split_answer_chunks(answer: str, chunk_size: int = 64) -> Iterator[str]:
+    """
+    Divide uma resposta pronta em trechos, para reproduzi-la no mesmo formato do streaming.
+
+    Args:
+        answer (str): Resposta completa
+        chunk_size (int): Tamanho aproximado de cada trecho em caracteres
+
+    Returns:
+        Iterator[str]: Trechos cuja concatenação é a resposta original
+    """
+    current: List[str] = []
+    current_len = 0
+    for token in re.findall(r'\s*\S+\s*|\s+', answer):
+        current.append(token)
+        current_len += len(token)
+        if current_len >= chunk_size:
+            yield ''.join(current)
+            current, current_len = [], 0
+    if current:
+        yield ''.join(current)
@@ -0,0 +1,232 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+
+class APIKeysExhaustedError(Exception):
+    """Nenhuma chave disponível: todas em cooldown, sem cota no teto de chamadas ou já tentadas."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class _KeyState:
+    """Estado interno de uma chave do pool."""
+
+    __slots__ = ('key', 'limit_key', 'weight', 'current_weight', 'in_flight', 'requests', 'errors',
+                 'rate_limited', 'consecutive_rate_limits', 'cooldown_until', 'call_limited')
+
+    def __init__(self, key: str, weight: int):
+        self.key = key
+        # Identificador da chave no limitador de chamadas (que pode ser um arquivo compartilhado)
+        self.limit_key = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+        self.weight = weight
+        self.current_weight = 0
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.rate_limited = 0
+        self.consecutive_rate_limits = 0
+        self.cooldown_until = 0.0
+        self.call_limited = 0
+
+
+class APIKeyPool:
+    """
+    Pool de chaves da API Gemini com rotação ponderada e cooldown automático.
+
+    A escolha usa smooth weighted round-robin (o mesmo do nginx): chaves com peso
+    maior recebem proporcionalmente mais tráfego, intercaladas com as demais.
+    Uma chave que recebe 429 entra em cooldown e volta sozinha quando ele expira;
+    429s consecutivos dobram o cooldown até `max_cooldown_seconds`.
+
+    Com `call_limiter`, cada chave também tem um teto próprio de chamadas por
+    janela: uma chave que esgotou o teto é pulada como se estivesse em cooldown.
+    """
+
+    def __init__(self, keys: Iterable[Union[str, Tuple[str, int]]], cooldown_seconds: float = 60.0,
+                 max_cooldown_seconds: float = 900.0, call_limiter=None):
+        """
+        Inicializa o APIKeyPool.
+
+        Args:
+            keys (Iterable): Chaves, como string ou tupla (chave, peso)
+            cooldown_seconds (float): Cooldown após o primeiro 429
+            max_cooldown_seconds (float): Limite do cooldown para 429s consecutivos
+            call_limiter: Rate limiter (ver utils.rate_limiter) consultado a cada
+                acquire(), com um hash da chave como identificador (None = sem teto)
+        """
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self.call_limiter = call_limiter
+        self._keys: Dict[str, _KeyState] = {}
+        for entry in keys:
+            key, weight = (entry, 1) if isinstance(entry, str) else entry
+            if key and key not in self._keys:
+                self._keys[key] = _KeyState(key, max(1, int(weight)))
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def parse_keys_from_env(environ: Optional[Mapping[str, str]] = None) -> List[Tuple[str, int]]:
+        """
+        Lê as chaves configuradas no ambiente.
+
+        GEMINI_API_KEYS aceita uma lista separada por vírgulas, com peso opcional
+        no formato `chave:peso`. GEMINI_API_KEY e GEMINI_KEY_API2 continuam
+        aceitos e entram com peso 1.
+
+        Args:
+            environ (Mapping): Variáveis de ambiente (padrão: os.environ)
+
+        Returns:
+            List[Tuple[str, int]]: Pares (chave, peso), sem duplicatas
+        """
+        environ = os.environ if environ is None else environ
+        keys: List[Tuple[str, int]] = []
+        for item in environ.get("GEMINI_API_KEYS", "").split(","):
+            item = item.strip()
+            if not item:
+                continue
+            key, _, weight = item.rpartition(":")
+            if key and weight.isdigit():
+                keys.append((key, int(weight)))
+            else:
+                keys.append((item, 1))
+        for name in ("GEMINI_API_KEY", "GEMINI_KEY_API2"):
+            if environ.get(name):
+                keys.append((environ[name], 1))
+
+        seen = set()
+        return [(key, weight) for key, weight in keys if not (key in seen or seen.add(key))]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def acquire(self, exclude: Iterable[str] = ()) -> Optional[str]:
+        """
+        Escolhe a próxima chave disponível e a marca como em uso.
+
+        Args:
+            exclude (Iterable[str]): Chaves que não devem ser escolhidas (já tentadas)
+
+        Returns:
+            Optional[str]: Chave escolhida ou None se todas estão em cooldown, excluídas ou sem cota
+                (ver retry_after)
+        """
+        exclude = set(exclude)
+        now = time.time()
+        while True:
+            with self.lock:
+                candidates = [
+                    state for state in self._keys.values()
+                    if state.key not in exclude and state.cooldown_until <= now
+                ]
+                if not candidates:
+                    return None
+
+                total_weight = 0
+                selected = None
+                for state in candidates:
+                    state.current_weight += state.weight
+                    total_weight += state.weight
+                    if selected is None or state.current_weight > selected.current_weight:
+                        selected = state
+                selected.current_weight -= total_weight
+
+                if self.call_limiter is None:
+                    selected.in_flight += 1
+                    selected.requests += 1
+                    return selected.key
+
+            # O teto é consultado fora do lock: o limitador pode gravar num arquivo compartilhado (sqlite)
+            allowed = self.call_limiter.is_allowed(selected.limit_key)[0]
+            with self.lock:
+                if allowed:
+                    selected.in_flight += 1
+                    selected.requests += 1
+                    return selected.key
+                # Teto de chamadas da chave esgotado nesta janela: tenta outra
+                selected.call_limited += 1
+            exclude.add(selected.key)
+
+    def retry_after(self) -> int:
+        """
+        Segundos até alguma chave voltar a ficar disponível (fim do cooldown e, com
+        call_limiter, cota liberada na janela), para o cabeçalho Retry-After quando
+        acquire() não encontra chave.
+
+        Returns:
+            int: Segundos (no mínimo 1)
+        """
+        now = time.time()
+        with self.lock:
+            keys = [(state.limit_key, state.cooldown_until) for state in self._keys.values()]
+        waits = []
+        for limit_key, cooldown_until in keys:
+            wait = max(0.0, cooldown_until - now)
+            if self.call_limiter is not None:
+                wait = max(wait, self.call_limiter.get_remaining_time(limit_key) or 0.0)
+            waits.append(wait)
+        return max(1, math.ceil(min(waits, default=self.cooldown_seconds)))
+
+    def release(self, key: str, error: Optional[Exception] = None, rate_limited: bool = False):
+        """
+        Devolve uma chave após o uso, registrando o resultado.
+
+        Args:
+            key (str): Chave obtida em acquire()
+            error (Exception): Erro da chamada, se houver
+            rate_limited (bool): Se a chamada falhou por quota (429)
+        """
+        with self.lock:
+            state = self._keys.get(key)
+            if state is None:
+                return
+            state.in_flight = max(0, state.in_flight - 1)
+            if rate_limited:
+                state.rate_limited += 1
+                state.consecutive_rate_limits += 1
+                cooldown = min(
+                    self.cooldown_seconds * (2 ** (state.consecutive_rate_limits - 1)),
+                    self.max_cooldown_seconds
+                )
+                state.cooldown_until = time.time() + cooldown
+            elif error is not None:
+                state.errors += 1
+            else:
+                state.consecutive_rate_limits = 0
+
+    def reset(self):
+        """Tira todas as chaves do cooldown."""
+        with self.lock:
+            for state in self._keys.values():
+                state.cooldown_until = 0.0
+                state.consecutive_rate_limits = 0
+
+    def get_stats(self) -> List[Dict[str, Union[str, int, float, bool]]]:
+        """
+        Retorna estatísticas por chave, com a chave mascarada.
+
+        Returns:
+            List[Dict]: Uma entrada por chave
+        """
+        now = time.time()
+        with self.lock:
+            return [
+                {
+                    'key': f"...{state.key[-4:]}",
+                    'weight': state.weight,
+                    'in_flight': state.in_flight,
+                    'requests': state.requests,
+                    'errors': state.errors,
+                    'rate_limited': state.rate_limited,
+                    'call_limited': state.call_limited,
+                    'cooling_down': state.cooldown_until > now,
+                    'cooldown_remaining': round(max(0.0, state.cooldown_until - now), 2)
+                }
+                for state in self._keys.values()
+            ]
@@ -0,0 +1,79 @@
+import threading
+from typing import Callable, Dict, Hashable, Set
+
+
+class BackgroundRefresher:
+    """
+    Executa atualizações em segundo plano com limite de concorrência.
+
+    Cada chave tem no máximo uma atualização em andamento. Quando o limite de
+    atualizações simultâneas é atingido, novos pedidos são descartados (e não
+    enfileirados): quem pediu continua usando o valor que já tem.
+    """
+
+    def __init__(self, max_concurrent: int = 2):
+        """
+        Inicializa o BackgroundRefresher.
+
+        Args:
+            max_concurrent (int): Máximo de atualizações simultâneas
+        """
+        self.max_concurrent = max_concurrent
+        self._in_flight: Set[Hashable] = set()
+        self.lock = threading.Lock()
+        self._stats = {
+            'started': 0,
+            'completed': 0,
+            'failed': 0,
+            'skipped_duplicate': 0,
+            'skipped_busy': 0
+        }
+
+    def submit(self, key: Hashable, fn: Callable[[], object]) -> bool:
+        """
+        Agenda `fn` em uma thread daemon, se houver capacidade.
+
+        Args:
+            key (Hashable): Chave da atualização (ex.: chave do cache)
+            fn (Callable): Função sem argumentos que faz a atualização
+
+        Returns:
+            bool: True se a atualização foi iniciada
+        """
+        with self.lock:
+            if key in self._in_flight:
+                self._stats['skipped_duplicate'] += 1
+                return False
+            if len(self._in_flight) >= self.max_concurrent:
+                self._stats['skipped_busy'] += 1
+                return False
+            self._in_flight.add(key)
+            self._stats['started'] += 1
+
+        def run():
+            try:
+                fn()
+                outcome = 'completed'
+            except Exception as e:
+                print(f"DEBUG: Background refresh error for {key}: {e}")
+                outcome = 'failed'
+            with self.lock:
+                self._in_flight.discard(key)
+                self._stats[outcome] += 1
+
+        threading.Thread(target=run, name="cache-refresh", daemon=True).start()
+        return True
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas das atualizações.
+
+        Returns:
+            Dict: Estatísticas
+        """
+        with self.lock:
+            return {
+                **self._stats,
+                'in_flight': len(self._in_flight),
+                'max_concurrent': self.max_concurrent
+            }
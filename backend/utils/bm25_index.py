@@ -0,0 +1,187 @@
+import heapq
+import math
+from collections import Counter
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+from utils.text_normalizer import STOPWORDS, normalize_text
+
+# NumPy é opcional: sem ele, a busca soma os pesos das postings em Python
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Com menos documentos que isso, o laço Python é mais rápido que o custo fixo das
+# chamadas NumPy (medido com benchmarks/bench_bm25_search.py)
+VECTORIZE_MIN_DOCUMENTS = 500
+
+
+def _fold_plural(token: str) -> str:
+    # Plurais do português, já sem acentos (o mesmo corte vale para documentos e perguntas):
+    # "certificacoes"/"alemaes" -> "-ao", "linguagens" -> "-gem", "relacionais"/"papeis" -> "-l",
+    # "desenvolvedores"/"vezes" -> sem "-es", e o caso simples "projetos"/"games" -> sem "-s"
+    if len(token) <= 3 or not token.endswith('s') or token.endswith('ss'):
+        return token
+    if len(token) > 4:
+        if token.endswith(('oes', 'aes')):
+            return token[:-3] + 'ao'
+        if token.endswith('gens'):
+            return token[:-2] + 'm'
+        if token.endswith(('ais', 'eis', 'ois', 'uis')):
+            return token[:-2] + 'l'
+        if token.endswith(('res', 'zes')):
+            return token[:-2]
+    return token[:-1]
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Termos de busca de um texto: normalize_text (minúsculas, sem acentos e sem
+    pontuação), sem stopwords e com os plurais regulares do português reduzidos ao singular.
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        List[str]: Termos, na ordem do texto (com repetições)
+    """
+    return [_fold_plural(token) for token in normalize_text(text).split(' ') if token and token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice invertido com ranking BM25, construído uma vez sobre um conjunto fixo de
+    documentos (listas de termos).
+
+    O peso BM25 de cada termo em cada documento é pré-calculado na construção, então
+    uma busca só percorre as listas de ocorrências (postings) dos termos da pergunta:
+    o custo depende de quantos documentos contêm esses termos, não do total.
+
+    Com NumPy e ao menos VECTORIZE_MIN_DOCUMENTS documentos, as postings ficam
+    concatenadas em dois arrays (posições e pesos), com o trecho de cada termo guardado
+    à parte, e a busca soma os scores de uma vez com np.bincount, em vez de um laço
+    Python por ocorrência.
+    """
+
+    def __init__(self, documents: Iterable[Tuple[Hashable, List[str]]], k1: float = 1.5, b: float = 0.75,
+                 vectorized: Optional[bool] = None):
+        """
+        Constrói o índice.
+
+        Args:
+            documents (Iterable): Pares (id do documento, termos do documento)
+            k1 (float): Saturação da frequência do termo
+            b (float): Peso da normalização pelo tamanho do documento
+            vectorized (bool): Pontuar com NumPy (padrão: se estiver instalado e houver ao
+                menos VECTORIZE_MIN_DOCUMENTS documentos)
+        """
+        if vectorized and np is None:
+            raise ValueError("Busca vetorizada requer o pacote numpy")
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[Hashable] = []
+        term_counts: List[Counter] = []
+        lengths: List[int] = []
+        for doc_id, tokens in documents:
+            self.doc_ids.append(doc_id)
+            term_counts.append(Counter(tokens))
+            lengths.append(len(tokens))
+
+        total = len(self.doc_ids)
+        if vectorized is None:
+            vectorized = np is not None and total >= VECTORIZE_MIN_DOCUMENTS
+        self.vectorized = vectorized
+        average_length = sum(lengths) / total if total else 0
+        document_frequency = Counter(term for counts in term_counts for term in counts)
+        self.idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+        # termo -> [(posição do documento, peso BM25 do termo no documento)]
+        self.postings: Dict[str, List[Tuple[int, float]]] = {}
+        for position, counts in enumerate(term_counts):
+            norm = k1 * (1 - b + b * lengths[position] / average_length) if average_length else k1
+            for term, tf in counts.items():
+                weight = self.idf[term] * tf * (k1 + 1) / (tf + norm)
+                self.postings.setdefault(term, []).append((position, weight))
+
+        # termo -> (início, fim) do trecho do termo em _positions/_weights
+        self._slices: Optional[Dict[str, Tuple[int, int]]] = None
+        if self.vectorized:
+            self._slices = {}
+            positions: List[int] = []
+            weights: List[float] = []
+            for term, entries in self.postings.items():
+                self._slices[term] = (len(positions), len(positions) + len(entries))
+                positions.extend(position for position, _ in entries)
+                weights.extend(weight for _, weight in entries)
+            self._positions = np.array(positions, dtype=np.int64)
+            self._weights = np.array(weights, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def _query_idf(self, term: str) -> float:
+        # Termo fora do índice: IDF de um termo que nenhum documento contém (o máximo possível)
+        idf = self.idf.get(term)
+        return idf if idf is not None else math.log(1 + (len(self.doc_ids) + 0.5) / 0.5)
+
+    def search(self, query_tokens: List[str], limit: int = 5, min_coverage: float = 0.0,
+               min_score_ratio: float = 0.0) -> List[Tuple[Hashable, float]]:
+        """
+        Documentos mais relevantes para os termos da consulta.
+
+        Args:
+            query_tokens (List[str]): Termos da consulta (ver tokenize)
+            limit (int): Máximo de resultados
+            min_coverage (float): Fração mínima do IDF somado dos termos da consulta que
+                o documento precisa conter (termos fora do índice contam com o IDF máximo)
+            min_score_ratio (float): Score mínimo, como fração do melhor score
+
+        Returns:
+            List[Tuple[Hashable, float]]: (id do documento, score), do mais relevante ao
+            menos; só documentos com algum termo da consulta. Empates seguem a ordem
+            dos documentos.
+        """
+        terms = sorted(set(query_tokens))
+        required = min_coverage * sum(self._query_idf(term) for term in terms)
+        if self._slices is not None:
+            return self._search_vectorized(terms, limit, required, min_score_ratio)
+        scores: Dict[int, float] = {}
+        matched: Dict[int, float] = {}
+        for term in terms:
+            idf = self.idf.get(term)
+            for position, weight in self.postings.get(term, ()):
+                scores[position] = scores.get(position, 0.0) + weight
+                if required:
+                    matched[position] = matched.get(position, 0.0) + idf
+        if required:
+            scores = {position: score for position, score in scores.items() if matched[position] >= required - 1e-9}
+        if min_score_ratio and scores:
+            floor = min_score_ratio * max(scores.values())
+            scores = {position: score for position, score in scores.items() if score >= floor}
+        best = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [(self.doc_ids[position], score) for position, score in best]
+
+    def _search_vectorized(self, terms: List[str], limit: int, required: float = 0.0,
+                           min_score_ratio: float = 0.0) -> List[Tuple[Hashable, float]]:
+        terms = [term for term in terms if term in self._slices]
+        rows = [self._slices[term] for term in terms]
+        if not rows or limit <= 0:
+            return []
+        positions = np.concatenate([self._positions[start:stop] for start, stop in rows])
+        weights = np.concatenate([self._weights[start:stop] for start, stop in rows])
+        scores = np.bincount(positions, weights=weights, minlength=len(self.doc_ids))
+        if required:
+            # Cada termo aparece uma vez por documento nas postings: a soma dos IDFs é a dos termos presentes
+            idf = np.repeat([self.idf[term] for term in terms], [stop - start for start, stop in rows])
+            matched = np.bincount(positions, weights=idf, minlength=len(self.doc_ids))
+            scores[matched < required - 1e-9] = 0.0
+        if min_score_ratio:
+            scores[scores < min_score_ratio * scores.max()] = 0.0
+        # Pesos BM25 são sempre positivos: score zero = nenhum termo da consulta (ou abaixo dos mínimos)
+        candidates = np.flatnonzero(scores)
+        # Maior score primeiro; empates pela posição do documento
+        best = candidates[np.lexsort((candidates, -scores[candidates]))][:limit]
+        return [(self.doc_ids[position], float(scores[position])) for position in best.tolist()]
@@ -0,0 +1,128 @@
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class BulkheadFullError(Exception):
+    """Chamada recusada pelo Bulkhead (fila cheia ou prazo de espera esgotado)."""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Bulkhead:
+    """
+    Controle de admissão para chamadas ao Gemini: no máximo `max_concurrent`
+    chamadas simultâneas e uma fila de espera limitada a `max_queue` requisições.
+
+    Sem ele, uma rajada dispara chamadas ilimitadas que estouram a quota juntas e
+    falham juntas. Com a fila cheia, a requisição é recusada na hora; na fila, espera
+    no máximo `queue_timeout` segundos por uma vaga. Nos dois casos levanta
+    BulkheadFullError, e quem chama decide como descartar a carga (cache, resposta
+    de fallback ou 503 com Retry-After).
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_queue: int = 16, queue_timeout: float = 10):
+        """
+        Inicializa o Bulkhead.
+
+        Args:
+            max_concurrent (int): Máximo de chamadas simultâneas
+            max_queue (int): Máximo de requisições esperando por uma vaga
+            queue_timeout (float): Tempo máximo de espera na fila, em segundos
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._active = 0
+        self._waiting = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'admitted': 0,
+            'queued': 0,
+            'rejected': 0,
+            'timed_out': 0,
+            'wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    def retry_after(self) -> int:
+        """Segundos sugeridos no cabeçalho Retry-After de uma requisição descartada."""
+        return max(1, math.ceil(self.queue_timeout))
+
+    def _acquire(self):
+        with self._condition:
+            # Sem fila: entra direto; com fila, respeita a ordem de quem já espera
+            if self._active < self.max_concurrent and self._waiting == 0:
+                self._active += 1
+                self._stats['admitted'] += 1
+                return
+            if self._waiting >= self.max_queue:
+                self._stats['rejected'] += 1
+                raise BulkheadFullError("Fila de chamadas ao Gemini cheia", self.retry_after())
+
+            self._waiting += 1
+            self._stats['queued'] += 1
+            start = time.time()
+            deadline = start + self.queue_timeout
+            try:
+                while self._active >= self.max_concurrent:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        self._stats['timed_out'] += 1
+                        raise BulkheadFullError("Tempo de espera por uma chamada ao Gemini esgotado",
+                                                self.retry_after())
+                    self._condition.wait(remaining)
+            finally:
+                self._waiting -= 1
+                waited = time.time() - start
+                self._stats['wait_seconds'] += waited
+                self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+            self._active += 1
+            self._stats['admitted'] += 1
+
+    def _release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def slot(self):
+        """
+        Ocupa uma vaga durante o bloco `with`, esperando na fila se necessário.
+
+        Raises:
+            BulkheadFullError: Fila cheia ou prazo de espera esgotado
+        """
+        self._acquire()
+        try:
+            yield
+        finally:
+            self._release()
+
+    def get_stats(self) -> Dict[str, Optional[float]]:
+        """
+        Retorna estatísticas de admissão.
+
+        Returns:
+            Dict: Estatísticas
+        """
+        with self._condition:
+            queued = self._stats['queued']
+            return {
+                'max_concurrent': self.max_concurrent,
+                'max_queue': self.max_queue,
+                'queue_timeout_seconds': self.queue_timeout,
+                'active': self._active,
+                'queue_depth': self._waiting,
+                'admitted': self._stats['admitted'],
+                'queued': queued,
+                'rejected': self._stats['rejected'],
+                'timed_out': self._stats['timed_out'],
+                'shed': self._stats['rejected'] + self._stats['timed_out'],
+                'avg_wait_ms': round(self._stats['wait_seconds'] / queued * 1000, 2) if queued else 0,
+                'max_wait_ms': round(self._stats['max_wait_seconds'] * 1000, 2)
+            }
@@ -1,39 +1,143 @@
-import json
 import hashlib
+import json
+import os
+import threading
 import time
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable, Tuple
 from datetime import datetime, timedelta
-import os
+from utils.lru_cache import LRUCache
+from utils.cache_store import EVICTION_POLICIES, JSONFileCacheStore
+from utils.text_normalizer import normalize_question
+from utils.similarity_index import MinHashIndex
+from utils.background_refresher import BackgroundRefresher
+from utils import cache_snapshot
 
 class CacheHandler:
     """
     Sistema de cache para armazenar respostas frequentes do chatbot.
     Reduz chamadas à API do Gemini e melhora performance.
+    
+    Funciona em dois níveis: um LRU em memória (L1) na frente do armazenamento
+    persistente (L2, ver utils.cache_store). O L2 só é lido quando a entrada não
+    está em memória, e entradas encontradas nele são promovidas para o L1.
+    
+    As perguntas são normalizadas (acentos, pontuação, espaços e stopwords) antes
+    de gerar a chave. Com `similarity_threshold`, uma busca sem correspondência
+    exata ainda pode reaproveitar a resposta de uma pergunta quase idêntica da
+    mesma role e campos (near hit).
+    
+    O L2 pode ser limitado em entradas e/ou bytes (max_entries/max_bytes); ao
+    passar do limite, as entradas menos usadas (LRU) ou menos acessadas (LFU) são
+    removidas. Cada gravação só confere os contadores O(1) do store (usage) e
+    despeja quando eles passam do limite; a thread de manutenção (start_sweeper)
+    remove periodicamente as entradas expiradas e aplica esses limites por completo.
+    
+    Com `stale_grace_seconds` (stale-while-revalidate), uma entrada expirada há
+    menos que a janela de tolerância ainda é servida, e `refresh_fn` é chamada em
+    segundo plano para regenerá-la (com limite de atualizações simultâneas).
+    
+    Com `version_fn`, cada entrada guarda a versão (hash do conteúdo) das seções
+    do currículo que entraram no prompt (as chaves dos dados factuais; sem dados
+    factuais, os campos relevantes). Na leitura, a entrada só vale se essas versões ainda
+    forem as atuais: editar uma seção invalida apenas as respostas que dependem
+    dela, de forma preguiçosa e sem varrer o cache.
+    
+    Os dados factuais não são copiados em cada entrada: cada seção é gravada uma
+    única vez como blob endereçado pelo hash do conteúdo, e a entrada guarda só as
+    referências (`factual_data_refs`). Os blobs lidos ficam decodificados em memória.
+    
+    Com um armazenamento compartilhado (ex.: redis), generate_once() usa um lock do
+    próprio armazenamento para que só um worker gere cada resposta; os demais
+    esperam a entrada aparecer no cache.
     """
     
-    def __init__(self, cache_dir: str = "cache", max_age_hours: int = 24):
+    def __init__(self, cache_dir: str = "cache", max_age_hours: int = 24,
+                 memory_max_entries: int = 256, memory_max_bytes: Optional[int] = 16 * 1024 * 1024,
+                 store=None, similarity_threshold: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+                 eviction_policy: str = "lru", stale_grace_seconds: float = 0,
+                 max_concurrent_refreshes: int = 2,
+                 refresh_fn: Optional[Callable[[str, str, list], Any]] = None,
+                 version_fn: Optional[Callable[[list], Dict[str, Optional[str]]]] = None,
+                 generation_lock_seconds: float = 30):
         """
         Inicializa o CacheHandler.
         
         Args:
             cache_dir (str): Diretório para armazenar cache
             max_age_hours (int): Tempo máximo de vida do cache em horas
+            memory_max_entries (int): Máximo de entradas no cache em memória
+            memory_max_bytes (int): Máximo de bytes (JSON serializado) no cache em memória
+            store: Armazenamento persistente (padrão: um arquivo JSON por entrada em cache_dir)
+            similarity_threshold (float): Similaridade mínima (0-1) para near hits; None desativa
+            max_entries (int): Máximo de entradas no armazenamento persistente (None = sem limite)
+            max_bytes (int): Máximo de bytes no armazenamento persistente (None = sem limite)
+            eviction_policy (str): "lru" ou "lfu"
+            stale_grace_seconds (float): Janela após a expiração em que a entrada ainda é servida (0 desativa)
+            max_concurrent_refreshes (int): Máximo de regenerações simultâneas em segundo plano
+            refresh_fn (Callable): Regenera e regrava uma entrada: refresh_fn(pergunta, role, campos)
+            version_fn (Callable): Versões atuais das seções: version_fn(campos) -> {campo: versão}
+            generation_lock_seconds (float): Validade do lock de geração entre workers
         """
+        if eviction_policy not in EVICTION_POLICIES:
+            raise ValueError(f"Unknown eviction policy: {eviction_policy}")
         self.cache_dir = cache_dir
         self.max_age_seconds = max_age_hours * 3600
-        self._ensure_cache_dir()
+        self.store = store if store is not None else JSONFileCacheStore(cache_dir)
+        self.memory = LRUCache(max_entries=memory_max_entries, max_bytes=memory_max_bytes)
         self._cache_stats = {
             'hits': 0,
             'misses': 0,
-            'evictions': 0
+            'evictions': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'near_hits': 0,
+            'expired_evictions': 0,
+            'capacity_evictions': 0,
+            'sweeps': 0,
+            'stale_hits': 0,
+            'data_invalidations': 0,
+            'peer_waits': 0,
+            'peer_hits': 0
         }
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.eviction_policy = eviction_policy
+        # Acessos acumulados desde a última manutenção (chave -> (último acesso, acessos)).
+        # Hits no L1 não tocam o L2; os acessos são gravados em lote por enforce_limits()
+        self._access_log: Dict[str, tuple] = {}
+        self._access_lock = threading.Lock()
+        self._maintenance_lock = threading.Lock()
+        self._sweeper_thread = None
+        self._sweeper_stop = threading.Event()
+        self._last_sweep = None
+        self.stale_grace_seconds = stale_grace_seconds
+        self.refresh_fn = refresh_fn
+        self.refresher = BackgroundRefresher(max_concurrent=max_concurrent_refreshes)
+        self.version_fn = version_fn
+        # Blobs de dados factuais já decodificados (hash -> valor), compartilhados entre entradas
+        self.blobs = LRUCache(max_entries=256)
+        self.generation_lock_seconds = generation_lock_seconds
+        self.similarity_index = None
+        if similarity_threshold:
+            self.similarity_index = MinHashIndex(threshold=similarity_threshold)
+            self._rebuild_similarity_index()
     
-    def _ensure_cache_dir(self):
-        """Garante que o diretório de cache existe."""
-        if not os.path.exists(self.cache_dir):
-            os.makedirs(self.cache_dir)
+    @staticmethod
+    def _partition(role: str, relevant_fields: list) -> str:
+        """Partição do índice de similaridade: só compara perguntas da mesma role e campos."""
+        return f"{role}|{','.join(sorted(relevant_fields))}"
+    
+    def _rebuild_similarity_index(self):
+        """Indexa as perguntas já armazenadas no L2."""
+        try:
+            for cache_key, question, role, relevant_fields in self.store.iter_metadata():
+                self.similarity_index.add(self._partition(role, relevant_fields),
+                                          normalize_question(question), cache_key)
+        except Exception as e:
+            print(f"DEBUG: Similarity index rebuild error: {e}")
     
-    def _generate_cache_key(self, question: str, role: str, relevant_fields: list) -> str:
+    def generate_cache_key(self, question: str, role: str, relevant_fields: list) -> str:
         """
         Gera uma chave única para o cache baseada na pergunta, role e campos relevantes.
         
@@ -45,18 +149,135 @@ class CacheHandler:
         Returns:
             str: Chave única para o cache
         """
-        # Normalizar a pergunta (lowercase, remover espaços extras)
-        normalized_question = question.lower().strip()
-        
+        # Normalizar a pergunta (acentos, pontuação, espaços e stopwords)
+        return self._key_for(normalize_question(question), role, relevant_fields)
+    
+    def _key_for(self, normalized_question: str, role: str, relevant_fields: list) -> str:
         # Criar string para hash
         cache_string = f"{normalized_question}|{role}|{','.join(sorted(relevant_fields))}"
         
         # Gerar hash MD5
         return hashlib.md5(cache_string.encode('utf-8')).hexdigest()
     
-    def _get_cache_file_path(self, cache_key: str) -> str:
-        """Retorna o caminho completo do arquivo de cache."""
-        return os.path.join(self.cache_dir, f"{cache_key}.json")
+    def _store_factual_data(self, factual_data: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Grava cada seção dos dados factuais como blob deduplicado.
+        
+        Returns:
+            Dict[str, str]: seção -> hash do conteúdo
+        """
+        refs = {}
+        for section, value in factual_data.items():
+            raw = json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            blob_hash = hashlib.sha256(raw).hexdigest()[:32]
+            # Sempre grava (INSERT OR IGNORE): o blob pode ter sido removido por prune_blobs
+            self.store.put_blob(blob_hash, raw)
+            self.blobs.set(blob_hash, value)
+            refs[section] = blob_hash
+        return refs
+    
+    def _expand(self, cache_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Resolve as referências de dados factuais de uma entrada lida do L2.
+        
+        Returns:
+            Optional[Dict]: Entrada com `factual_data`, ou None se algum blob sumiu
+        """
+        refs = cache_data.get('factual_data_refs')
+        if refs is None:
+            # Entrada no formato antigo, com os dados embutidos
+            return cache_data
+        factual_data = {}
+        for section, blob_hash in refs.items():
+            value = self.blobs.get(blob_hash)
+            if value is None:
+                raw = self.store.get_blob(blob_hash)
+                if raw is None:
+                    return None
+                value = json.loads(raw)
+                self.blobs.set(blob_hash, value)
+            factual_data[section] = value
+        cache_data['factual_data'] = factual_data
+        return cache_data
+    
+    def _is_current(self, cache_data: Dict[str, Any]) -> bool:
+        """True se as seções usadas pela entrada não mudaram desde que ela foi gravada."""
+        if self.version_fn is None:
+            return True
+        data_versions = cache_data.get('data_versions')
+        # Entradas sem versões são anteriores ao controle de versão e não podem ser validadas
+        if not isinstance(data_versions, dict):
+            return False
+        return data_versions == self.version_fn(list(data_versions))
+    
+    def _version_miss(self, cache_key: str):
+        """
+        Trata como miss uma entrada gravada com outras versões das seções. Ela só sai
+        do L1: com o armazenamento compartilhado, a diferença pode ser deste worker,
+        que ainda não recarregou o currículo, e a entrada continua válida para os
+        demais (a regeneração a substitui).
+        """
+        self.memory.delete(cache_key)
+        self._cache_stats['data_invalidations'] += 1
+    
+    def _invalidate(self, cache_key: str):
+        """Remove uma entrada que não pode mais ser servida (ex.: blob ausente)."""
+        self.memory.delete(cache_key)
+        self.store.delete(cache_key)
+        if self.similarity_index is not None:
+            self.similarity_index.remove(cache_key)
+        self._cache_stats['evictions'] += 1
+        self._cache_stats['data_invalidations'] += 1
+    
+    def _load(self, cache_key: str, prefetched: Optional[Dict[str, Any]] = None):
+        """
+        Busca uma chave no L1 e depois no L2, descartando entradas expiradas.
+        `prefetched` traz leituras do L2 já feitas em lote (chave -> entrada ou None).
+        
+        Returns:
+            Tuple: (dados, nível "memory"/"disk", expirada dentro da tolerância) ou (None, None, False)
+        """
+        # L1: memória (a expiração segue a criação da entrada no L2; entradas
+        # expiradas saem do L1, então só são servidas pelo L2 na janela de tolerância)
+        cache_data = self.memory.get(cache_key)
+        if cache_data is not None:
+            if not self._is_current(cache_data):
+                self._version_miss(cache_key)
+                return None, None, False
+            return cache_data, 'memory', False
+        
+        # L2: armazenamento persistente
+        if prefetched is not None and cache_key in prefetched:
+            stored = prefetched[cache_key]
+        else:
+            stored = self.store.get(cache_key)
+        if stored is None:
+            return None, None, False
+        cache_data, created_at, size = stored
+        
+        # Verificar se o cache não expirou (nem passou da janela de tolerância)
+        age = time.time() - created_at
+        if age > self.max_age_seconds + self.stale_grace_seconds:
+            self.store.delete(cache_key)
+            if self.similarity_index is not None:
+                self.similarity_index.remove(cache_key)
+            self._cache_stats['evictions'] += 1
+            self._cache_stats['expired_evictions'] += 1
+            return None, None, False
+        if not self._is_current(cache_data):
+            self._version_miss(cache_key)
+            return None, None, False
+        cache_data = self._expand(cache_data)
+        if cache_data is None:
+            self._invalidate(cache_key)
+            return None, None, False
+        if age > self.max_age_seconds:
+            return cache_data, 'disk', True
+        
+        # Promover para o L1
+        self.memory.set(cache_key, cache_data, size=size,
+                        expires_at=created_at + self.max_age_seconds)
+        return cache_data, 'disk', False
     
     def get(self, question: str, role: str, relevant_fields: list) -> Optional[Dict[str, Any]]:
         """
@@ -70,34 +291,54 @@ class CacheHandler:
         Returns:
             Optional[Dict]: Dados do cache ou None se não encontrado/expirado
         """
-        cache_key = self._generate_cache_key(question, role, relevant_fields)
-        cache_file = self._get_cache_file_path(cache_key)
+        normalized_question = normalize_question(question)
+        cache_key = self._key_for(normalized_question, role, relevant_fields)
+        near_hit = False
         
         try:
-            if not os.path.exists(cache_file):
-                self._cache_stats['misses'] += 1
-                return None
-            
-            # Verificar se o cache não expirou
-            file_age = time.time() - os.path.getmtime(cache_file)
-            if file_age > self.max_age_seconds:
-                os.remove(cache_file)
-                self._cache_stats['evictions'] += 1
-                self._cache_stats['misses'] += 1
-                return None
-            
-            # Ler dados do cache
-            with open(cache_file, 'r', encoding='utf-8') as f:
-                cache_data = json.load(f)
-            
-            self._cache_stats['hits'] += 1
-            print(f"DEBUG: Cache HIT for question: {question[:50]}...")
-            return cache_data
+            match = None
+            prefetched = None
+            if self.store.remote and self.similarity_index is not None and cache_key not in self.memory:
+                # Armazenamento remoto: busca a chave exata e a candidata a near hit
+                # em uma única ida à rede
+                match = self.similarity_index.query(self._partition(role, relevant_fields), normalized_question)
+                if match is not None and match[0] != cache_key:
+                    keys = [cache_key, match[0]]
+                    prefetched = dict(zip(keys, self.store.get_many(keys)))
             
+            cache_data, tier, stale = self._load(cache_key, prefetched)
+            
+            # Sem correspondência exata: procurar uma pergunta quase idêntica
+            if cache_data is None and self.similarity_index is not None:
+                if prefetched is None:
+                    match = self.similarity_index.query(self._partition(role, relevant_fields), normalized_question)
+                if match is not None and match[0] != cache_key:
+                    cache_data, tier, stale = self._load(match[0], prefetched)
+                    if cache_data is None:
+                        self.similarity_index.remove(match[0])
+                    else:
+                        near_hit = True
         except Exception as e:
             print(f"DEBUG: Cache error: {e}")
             self._cache_stats['misses'] += 1
             return None
+        
+        if cache_data is None:
+            self._cache_stats['misses'] += 1
+            return None
+        
+        self._cache_stats['hits'] += 1
+        self._cache_stats[f'{tier}_hits'] += 1
+        self._record_access(cache_data.get('cache_key', cache_key))
+        if stale:
+            self._cache_stats['stale_hits'] += 1
+            self._schedule_refresh(cache_data)
+        if near_hit:
+            self._cache_stats['near_hits'] += 1
+            print(f"DEBUG: Cache NEAR HIT for question: {question[:50]}...")
+        elif tier == 'disk':
+            print(f"DEBUG: Cache HIT for question: {question[:50]}...")
+        return cache_data
     
     def set(self, question: str, role: str, relevant_fields: list, 
             answer: str, factual_data: Dict[str, Any]) -> bool:
@@ -115,57 +356,259 @@ class CacheHandler:
             bool: True se armazenado com sucesso
         """
         try:
-            cache_key = self._generate_cache_key(question, role, relevant_fields)
-            cache_file = self._get_cache_file_path(cache_key)
+            normalized_question = normalize_question(question)
+            cache_key = self._key_for(normalized_question, role, relevant_fields)
             
             cache_data = {
                 'question': question,
                 'role': role,
                 'relevant_fields': relevant_fields,
                 'answer': answer,
-                'factual_data': factual_data,
                 'created_at': datetime.now().isoformat(),
                 'cache_key': cache_key
             }
+            if self.version_fn is not None:
+                # Só as seções que entraram no prompt: mudanças nas demais não afetam a resposta
+                sections = list(factual_data) if isinstance(factual_data, dict) and factual_data else relevant_fields
+                cache_data['data_versions'] = self.version_fn(sections)
             
-            with open(cache_file, 'w', encoding='utf-8') as f:
-                json.dump(cache_data, f, ensure_ascii=False, indent=2)
+            if isinstance(factual_data, dict):
+                cache_data['factual_data_refs'] = self._store_factual_data(factual_data)
+                size = self.store.set(cache_key, cache_data)
+            else:
+                size = self.store.set(cache_key, dict(cache_data, factual_data=factual_data))
+            cache_data['factual_data'] = factual_data
+            
+            self.memory.set(cache_key, cache_data, size=size,
+                            expires_at=time.time() + self.max_age_seconds)
+            if self.similarity_index is not None:
+                self.similarity_index.add(self._partition(role, relevant_fields), normalized_question, cache_key)
             
             print(f"DEBUG: Cache SET for question: {question[:50]}...")
+            if self._over_limits():
+                self.enforce_limits()
             return True
             
         except Exception as e:
             print(f"DEBUG: Cache SET error: {e}")
             return False
     
+    def generate_once(self, question: str, role: str, relevant_fields: list,
+                      generate_fn: Callable[[], Tuple[Any, bool]], poll_interval: float = 0.1) -> Tuple[Any, bool]:
+        """
+        Executa `generate_fn` (que deve gravar a resposta no cache) com um lock do
+        armazenamento, para que workers diferentes não gerem a mesma resposta.
+        
+        Quem não obtém o lock espera a entrada aparecer no cache. Se o lock for
+        liberado sem que a entrada apareça (ex.: resposta de fallback, que não é
+        armazenada) ou expirar, o worker gera a resposta ele mesmo.
+        
+        Args:
+            question (str): Pergunta do usuário
+            role (str): Role selecionada
+            relevant_fields (list): Campos relevantes identificados
+            generate_fn (Callable): Gera a resposta, a armazena no cache e retorna
+                (resposta, se chamou o modelo)
+            poll_interval (float): Intervalo entre verificações enquanto espera
+            
+        Returns:
+            Tuple[Any, bool]: Resultado de `generate_fn`, ou (resposta gerada por outro
+            worker, False)
+        """
+        cache_key = self.generate_cache_key(question, role, relevant_fields)
+        token = self.store.acquire_lock(cache_key, self.generation_lock_seconds)
+        if token is None:
+            self._cache_stats['peer_waits'] += 1
+            deadline = time.time() + self.generation_lock_seconds
+            while token is None and time.time() < deadline:
+                time.sleep(poll_interval)
+                cache_data = self._load(cache_key)[0]
+                if cache_data is not None:
+                    self._cache_stats['peer_hits'] += 1
+                    return cache_data['answer'], False
+                token = self.store.acquire_lock(cache_key, self.generation_lock_seconds)
+                if token is not None:
+                    # O lock foi liberado: a entrada pode ter sido gravada logo antes
+                    cache_data = self._load(cache_key)[0]
+                    if cache_data is not None:
+                        self.store.release_lock(cache_key, token)
+                        self._cache_stats['peer_hits'] += 1
+                        return cache_data['answer'], False
+        
+        try:
+            return generate_fn()
+        finally:
+            if token is not None:
+                self.store.release_lock(cache_key, token)
+    
+    def _schedule_refresh(self, cache_data: Dict[str, Any]) -> bool:
+        """
+        Agenda a regeneração em segundo plano de uma entrada servida fora da validade.
+        
+        Args:
+            cache_data (Dict): Entrada expirada que acabou de ser servida
+            
+        Returns:
+            bool: True se a regeneração foi iniciada
+        """
+        if self.refresh_fn is None:
+            return False
+        question = cache_data['question']
+        role = cache_data['role']
+        relevant_fields = cache_data['relevant_fields']
+        started = self.refresher.submit(
+            cache_data.get('cache_key') or self.generate_cache_key(question, role, relevant_fields),
+            lambda: self.refresh_fn(question, role, relevant_fields)
+        )
+        if started:
+            print(f"DEBUG: Cache STALE, refreshing in background: {question[:50]}...")
+        return started
+    
+    def _record_access(self, cache_key: str):
+        """Acumula um acesso para as políticas LRU/LFU."""
+        with self._access_lock:
+            _, hits = self._access_log.get(cache_key, (0, 0))
+            self._access_log[cache_key] = (time.time(), hits + 1)
+    
+    def _flush_access_log(self):
+        """Grava no L2 os acessos acumulados."""
+        with self._access_lock:
+            accesses, self._access_log = self._access_log, {}
+        self.store.record_access(accesses)
+    
+    def _forget(self, cache_keys: list):
+        """Remove entradas já apagadas do L2 dos índices em memória."""
+        for cache_key in cache_keys:
+            self.memory.delete(cache_key)
+            if self.similarity_index is not None:
+                self.similarity_index.remove(cache_key)
+    
+    def _over_limits(self) -> bool:
+        """
+        Se o armazenamento passou de max_entries/max_bytes, pelos contadores O(1) do
+        store. Sem contador barato de bytes, o limite de bytes fica para a varredura
+        periódica (start_sweeper).
+        """
+        if self.max_entries is None and self.max_bytes is None:
+            return False
+        try:
+            entries, total_bytes = self.store.usage()
+        except Exception as e:
+            print(f"DEBUG: Cache usage error: {e}")
+            return False
+        if self.max_entries is not None and entries > self.max_entries:
+            return True
+        return self.max_bytes is not None and total_bytes is not None and total_bytes > self.max_bytes
+    
+    def enforce_limits(self) -> int:
+        """
+        Remove entradas até o armazenamento respeitar max_entries/max_bytes.
+        
+        Returns:
+            int: Número de entradas removidas
+        """
+        if self.max_entries is None and self.max_bytes is None:
+            return 0
+        
+        try:
+            with self._maintenance_lock:
+                self._flush_access_log()
+                evicted = self.store.evict(self.max_entries, self.max_bytes, self.eviction_policy)
+            self._forget(evicted)
+        except Exception as e:
+            print(f"DEBUG: Cache eviction error: {e}")
+            return 0
+        
+        if evicted:
+            self._cache_stats['evictions'] += len(evicted)
+            self._cache_stats['capacity_evictions'] += len(evicted)
+            print(f"DEBUG: Evicted {len(evicted)} cache entries ({self.eviction_policy})")
+        return len(evicted)
+    
     def clear_expired(self) -> int:
         """
-        Remove arquivos de cache expirados.
+        Remove entradas de cache expiradas.
         
         Returns:
-            int: Número de arquivos removidos
+            int: Número de entradas removidas
         """
         removed_count = 0
-        current_time = time.time()
         
         try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    file_age = current_time - os.path.getmtime(file_path)
-                    
-                    if file_age > self.max_age_seconds:
-                        os.remove(file_path)
-                        removed_count += 1
+            removed_count = self.store.clear_expired(self.max_age_seconds + self.stale_grace_seconds)
+            self.memory.clear_expired()
             
             if removed_count > 0:
-                print(f"DEBUG: Removed {removed_count} expired cache files")
+                self._cache_stats['evictions'] += removed_count
+                self._cache_stats['expired_evictions'] += removed_count
+                print(f"DEBUG: Removed {removed_count} expired cache entries")
                 
         except Exception as e:
             print(f"DEBUG: Cache cleanup error: {e}")
         
         return removed_count
     
+    def run_maintenance(self) -> Dict[str, int]:
+        """
+        Uma rodada de manutenção: remove expiradas e aplica os limites de tamanho.
+        
+        Returns:
+            Dict: Entradas removidas por motivo
+        """
+        result = {
+            'expired': self.clear_expired(),
+            'evicted': self.enforce_limits(),
+            'pruned_blobs': self._prune_blobs()
+        }
+        self._flush_access_log()
+        self._cache_stats['sweeps'] += 1
+        self._last_sweep = time.time()
+        return result
+    
+    def _prune_blobs(self) -> int:
+        """Remove blobs de dados factuais que nenhuma entrada referencia mais."""
+        try:
+            removed_count = self.store.prune_blobs()
+        except Exception as e:
+            print(f"DEBUG: Blob prune error: {e}")
+            return 0
+        if removed_count > 0:
+            print(f"DEBUG: Pruned {removed_count} unreferenced factual data blobs")
+        return removed_count
+    
+    def start_sweeper(self, interval_seconds: float = 300) -> bool:
+        """
+        Inicia a thread de manutenção em segundo plano (daemon).
+        
+        Args:
+            interval_seconds (float): Intervalo entre rodadas de manutenção
+            
+        Returns:
+            bool: True se a thread foi iniciada (False se já estava rodando)
+        """
+        if self._sweeper_thread is not None and self._sweeper_thread.is_alive():
+            return False
+        
+        self._sweeper_stop.clear()
+        
+        def sweep_loop():
+            while not self._sweeper_stop.wait(interval_seconds):
+                try:
+                    self.run_maintenance()
+                except Exception as e:
+                    print(f"DEBUG: Cache sweeper error: {e}")
+        
+        self._sweeper_thread = threading.Thread(target=sweep_loop, name="cache-sweeper", daemon=True)
+        self._sweeper_thread.start()
+        return True
+    
+    def stop_sweeper(self, timeout: Optional[float] = None):
+        """Para a thread de manutenção."""
+        self._sweeper_stop.set()
+        if self._sweeper_thread is not None:
+            self._sweeper_thread.join(timeout)
+            self._sweeper_thread = None
+    
     def get_stats(self) -> Dict[str, Any]:
         """
         Retorna estatísticas do cache.
@@ -175,11 +618,20 @@ class CacheHandler:
         """
         total_requests = self._cache_stats['hits'] + self._cache_stats['misses']
         hit_rate = (self._cache_stats['hits'] / total_requests * 100) if total_requests > 0 else 0
+        # Taxa do L1 sobre todas as buscas; a do L2 sobre as buscas que chegaram ao disco
+        memory_hit_rate = (self._cache_stats['memory_hits'] / total_requests * 100) if total_requests > 0 else 0
+        near_hit_rate = (self._cache_stats['near_hits'] / total_requests * 100) if total_requests > 0 else 0
+        disk_requests = total_requests - self._cache_stats['memory_hits']
+        disk_hit_rate = (self._cache_stats['disk_hits'] / disk_requests * 100) if disk_requests > 0 else 0
         
-        # Contar arquivos de cache
+        # Contar entradas armazenadas
         cache_files = 0
+        cache_bytes = 0
+        blob_stats = {'blobs': 0, 'blob_bytes': 0}
         try:
-            cache_files = len([f for f in os.listdir(self.cache_dir) if f.endswith('.json')])
+            cache_files = self.store.count()
+            cache_bytes = self.store.total_size()
+            blob_stats = self.store.blob_stats()
         except:
             pass
         
@@ -188,29 +640,107 @@ class CacheHandler:
             'misses': self._cache_stats['misses'],
             'evictions': self._cache_stats['evictions'],
             'hit_rate': round(hit_rate, 2),
+            'memory_hits': self._cache_stats['memory_hits'],
+            'disk_hits': self._cache_stats['disk_hits'],
+            'memory_hit_rate': round(memory_hit_rate, 2),
+            'disk_hit_rate': round(disk_hit_rate, 2),
+            'near_hits': self._cache_stats['near_hits'],
+            'near_hit_rate': round(near_hit_rate, 2),
+            'similarity_threshold': self.similarity_index.threshold if self.similarity_index is not None else None,
+            'expired_evictions': self._cache_stats['expired_evictions'],
+            'capacity_evictions': self._cache_stats['capacity_evictions'],
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'eviction_policy': self.eviction_policy,
+            'sweeper_running': self._sweeper_thread is not None and self._sweeper_thread.is_alive(),
+            'sweeps': self._cache_stats['sweeps'],
+            'stale_hits': self._cache_stats['stale_hits'],
+            'stale_grace_seconds': self.stale_grace_seconds,
+            'data_invalidations': self._cache_stats['data_invalidations'],
+            'peer_waits': self._cache_stats['peer_waits'],
+            'peer_hits': self._cache_stats['peer_hits'],
+            'refresh': self.refresher.get_stats(),
+            'last_sweep': datetime.fromtimestamp(self._last_sweep).isoformat() if self._last_sweep else None,
+            'memory': self.memory.get_stats(),
             'cache_files': cache_files,
+            'cache_bytes': cache_bytes,
+            'blobs': blob_stats['blobs'],
+            'blob_bytes': blob_stats['blob_bytes'],
+            'storage': self.store.name,
             'max_age_hours': self.max_age_seconds / 3600
         }
     
+    def export_snapshot(self, path: str) -> Dict[str, int]:
+        """
+        Exporta as entradas ainda servíveis para um arquivo de snapshot (ver utils.cache_snapshot).
+        
+        Args:
+            path (str): Arquivo de destino
+            
+        Returns:
+            Dict: Número de entradas e blobs exportados
+        """
+        self._flush_access_log()
+        counts = cache_snapshot.export_snapshot(self.store, path,
+                                                max_age_seconds=self.max_age_seconds + self.stale_grace_seconds)
+        print(f"DEBUG: Exported cache snapshot to {path} ({counts['entries']} entries)")
+        return counts
+    
+    def import_snapshot(self, path: str, once: bool = False) -> Dict[str, int]:
+        """
+        Importa um snapshot em streaming, ignorando entradas já expiradas.
+        Entradas importadas só substituem as de mesma chave se forem mais novas,
+        e entram no índice de similaridade.
+        
+        Args:
+            path (str): Arquivo de snapshot
+            once (bool): Importa cada versão do arquivo uma única vez por armazenamento
+                (os demais workers, e reinícios, pulam a importação)
+            
+        Returns:
+            Dict: Número de entradas e blobs importados e de entradas ignoradas
+        """
+        if once:
+            stat = os.stat(path)
+            marker = f"snapshot-import:{os.path.abspath(path)}:{stat.st_mtime_ns}:{stat.st_size}"
+            # O lock nunca é liberado: ele marca a importação até as entradas expirarem
+            if self.store.acquire_lock(marker, self.max_age_seconds + self.stale_grace_seconds) is None:
+                print(f"DEBUG: Cache snapshot {path} already imported into this store")
+                return {'entries': 0, 'blobs': 0, 'skipped_expired': 0}
+        def on_entry(cache_key, data):
+            self.memory.delete(cache_key)
+            if self.similarity_index is not None:
+                self.similarity_index.add(self._partition(data.get('role', ''), data.get('relevant_fields', [])),
+                                          normalize_question(data.get('question', '')), cache_key)
+        
+        counts = cache_snapshot.import_snapshot(self.store, path,
+                                                max_age_seconds=self.max_age_seconds + self.stale_grace_seconds,
+                                                on_entry=on_entry)
+        print(f"DEBUG: Imported cache snapshot from {path} ({counts['entries']} entries)")
+        if self.max_entries is not None or self.max_bytes is not None:
+            self.enforce_limits()
+        return counts
+    
     def clear_all(self) -> int:
         """
-        Remove todos os arquivos de cache.
+        Remove todas as entradas de cache.
         
         Returns:
-            int: Número de arquivos removidos
+            int: Número de entradas removidas
         """
         removed_count = 0
+        self.memory.clear()
+        self.blobs.clear()
+        if self.similarity_index is not None:
+            self.similarity_index.clear()
+        with self._access_lock:
+            self._access_log.clear()
         
         try:
-            for filename in os.listdir(self.cache_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.cache_dir, filename)
-                    os.remove(file_path)
-                    removed_count += 1
-            
-            print(f"DEBUG: Cleared all cache files ({removed_count} files)")
+            removed_count = self.store.clear_all()
+            print(f"DEBUG: Cleared all cache entries ({removed_count} entries)")
             
         except Exception as e:
             print(f"DEBUG: Cache clear error: {e}")
         
-        return removed_count 
\ No newline at end of file
+        return removed_count
@@ -0,0 +1,187 @@
+"""
+Snapshot do cache de respostas: exporta todas as entradas (e os blobs de dados
+factuais) para um único arquivo JSON Lines comprimido com gzip, e importa de
+volta lendo linha a linha, em lotes, sem carregar o arquivo inteiro em memória.
+
+Formato (uma linha JSON por registro):
+    {"format": "answer-cache-snapshot", "version": 1, "created_at": ...}   cabeçalho
+    {"type": "blob", "hash": ..., "raw": ...}                              antes das entradas
+    {"type": "entry", "key": ..., "created_at": ..., "data": {...}}
+
+Uso (a partir de backend/):
+    python -m utils.cache_snapshot export snapshots/answers.snapshot.gz
+    python -m utils.cache_snapshot import snapshots/answers.snapshot.gz
+    python -m utils.cache_snapshot download https://<app>/cache/snapshot snapshots/answers.snapshot.gz --token ...
+"""
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+import urllib.request
+from typing import Any, Callable, Dict, Iterator, Optional
+
+SNAPSHOT_FORMAT = "answer-cache-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+def export_snapshot(store, path: str, max_age_seconds: Optional[float] = None) -> Dict[str, int]:
+    """
+    Exporta o armazenamento para um arquivo de snapshot (gravação atômica).
+
+    Args:
+        store: Armazenamento do cache (ver utils.cache_store)
+        path (str): Arquivo de destino
+        max_age_seconds (float): Omite entradas mais antigas que isso (None = todas)
+
+    Returns:
+        Dict: Número de entradas e blobs exportados
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    counts = {'entries': 0, 'blobs': 0}
+    cutoff = time.time() - max_age_seconds if max_age_seconds is not None else None
+
+    with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=6) as f:
+        f.write(json.dumps({"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION,
+                            "created_at": time.time()}) + "\n")
+        for blob_hash, raw in store.iter_blobs():
+            f.write(json.dumps({"type": "blob", "hash": blob_hash, "raw": raw.decode('utf-8')},
+                               ensure_ascii=False) + "\n")
+            counts['blobs'] += 1
+        for cache_key, data, created_at in store.iter_entries():
+            if cutoff is not None and created_at < cutoff:
+                continue
+            f.write(json.dumps({"type": "entry", "key": cache_key, "created_at": created_at, "data": data},
+                               ensure_ascii=False, separators=(',', ':')) + "\n")
+            counts['entries'] += 1
+    os.replace(temp_path, path)
+    return counts
+
+
+def iter_snapshot(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Lê os registros de um snapshot, um por vez.
+
+    Args:
+        path (str): Arquivo de snapshot
+
+    Returns:
+        Iterator[Dict]: Registros (blobs e entradas), sem o cabeçalho
+
+    Raises:
+        ValueError: Se o arquivo não for um snapshot válido
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            header = json.loads(f.readline() or 'null')
+        except json.JSONDecodeError:
+            header = None
+        if not isinstance(header, dict) or header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{path} is not an answer cache snapshot")
+        if header.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {header.get('version')}")
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def import_snapshot(store, path: str, max_age_seconds: Optional[float] = None, batch_size: int = 500,
+                    on_entry: Optional[Callable[[str, Dict[str, Any]], None]] = None) -> Dict[str, int]:
+    """
+    Importa um snapshot para o armazenamento, em lotes de `batch_size` entradas.
+
+    Args:
+        store: Armazenamento do cache (ver utils.cache_store)
+        path (str): Arquivo de snapshot
+        max_age_seconds (float): Ignora entradas mais antigas que isso (None = todas)
+        batch_size (int): Entradas gravadas por transação
+        on_entry (Callable): Chamada para cada entrada importada: on_entry(chave, dados)
+
+    Returns:
+        Dict: Número de entradas e blobs importados e de entradas ignoradas por idade
+    """
+    counts = {'entries': 0, 'blobs': 0, 'skipped_expired': 0}
+    cutoff = time.time() - max_age_seconds if max_age_seconds is not None else None
+    batch = []
+
+    def flush():
+        counts['entries'] += store.set_many(batch)
+        if on_entry is not None:
+            for cache_key, data, _ in batch:
+                on_entry(cache_key, data)
+        batch.clear()
+
+    for record in iter_snapshot(path):
+        if record.get("type") == "blob":
+            store.put_blob(record["hash"], record["raw"].encode('utf-8'))
+            counts['blobs'] += 1
+        elif record.get("type") == "entry":
+            if cutoff is not None and record["created_at"] < cutoff:
+                counts['skipped_expired'] += 1
+                continue
+            batch.append((record["key"], record["data"], record["created_at"]))
+            if len(batch) >= batch_size:
+                flush()
+    if batch:
+        flush()
+    return counts
+
+
+def download_snapshot(url: str, path: str, token: Optional[str] = None, timeout: float = 60) -> int:
+    """
+    Baixa o snapshot de uma instância em execução (GET /cache/snapshot).
+
+    Args:
+        url (str): URL do endpoint
+        path (str): Arquivo de destino
+        token (str): Valor do cabeçalho X-Admin-Token
+        timeout (float): Timeout da requisição em segundos
+
+    Returns:
+        int: Bytes gravados
+    """
+    req = urllib.request.Request(url, headers={"X-Admin-Token": token} if token else {})
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with urllib.request.urlopen(req, timeout=timeout) as response, open(temp_path, 'wb') as f:
+        shutil.copyfileobj(response, f)
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+
+def main(argv=None):
+    from config import get_config
+    from utils.cache_store import create_cache_store
+
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Export/import the answer cache snapshot")
+    parser.add_argument("--store", default=config.CACHE_STORE, help="sqlite or json (default: CACHE_STORE)")
+    parser.add_argument("--cache-dir", default="cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("export", help="write the local cache to a snapshot").add_argument("path")
+    subparsers.add_parser("import", help="load a snapshot into the local cache").add_argument("path")
+    download = subparsers.add_parser("download", help="fetch a snapshot from a running instance")
+    download.add_argument("url")
+    download.add_argument("path")
+    download.add_argument("--token", default=os.getenv("CACHE_ADMIN_TOKEN"))
+    args = parser.parse_args(argv)
+
+    if args.command == "download":
+        print(f"Downloaded {download_snapshot(args.url, args.path, args.token)} bytes to {args.path}")
+        return
+
+    store = create_cache_store(args.store, args.cache_dir, compression=config.CACHE_COMPRESSION)
+    if args.command == "export":
+        counts = export_snapshot(store, args.path)
+        print(f"Exported {counts['entries']} entries and {counts['blobs']} blobs to {args.path}")
+    else:
+        counts = import_snapshot(store, args.path)
+        print(f"Imported {counts['entries']} entries and {counts['blobs']} blobs from {args.path}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,946 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from utils.compression import available_codecs, compress, decompress
+
+# (dados, criado_em, tamanho em bytes)
+StoredEntry = Tuple[Dict[str, Any], float, int]
+
+# Políticas de remoção quando o cache passa do limite de tamanho
+EVICTION_POLICIES = ("lru", "lfu")
+
+
+def _blob_refs(data: Dict[str, Any]) -> List[str]:
+    """Hashes dos blobs (dados factuais deduplicados) referenciados por uma entrada."""
+    refs = data.get('factual_data_refs')
+    return sorted(set(refs.values())) if isinstance(refs, dict) else []
+
+
+def _select_victims(candidates, count: int, total_bytes: int,
+                    max_entries: Optional[int], max_bytes: Optional[int]) -> List[str]:
+    """
+    Escolhe, na ordem dada, as entradas a remover até respeitar os limites.
+
+    Args:
+        candidates: Iterável de (chave, tamanho) já ordenado da primeira à última vítima
+        count (int): Número atual de entradas
+        total_bytes (int): Tamanho atual em bytes
+        max_entries (int): Limite de entradas (None = sem limite)
+        max_bytes (int): Limite de bytes (None = sem limite)
+
+    Returns:
+        List[str]: Chaves a remover
+    """
+    victims = []
+    for cache_key, size in candidates:
+        if (max_entries is None or count <= max_entries) and (max_bytes is None or total_bytes <= max_bytes):
+            break
+        victims.append(cache_key)
+        count -= 1
+        total_bytes -= size
+    return victims
+
+
+class CacheStore:
+    """
+    Interface dos armazenamentos persistentes do cache (L2).
+
+    Operações por entrada: get, get_many, set, set_many, delete.
+    Manutenção: clear_expired, clear_all, count, total_size, usage, record_access, evict.
+    Blobs de dados factuais: put_blob, get_blob, prune_blobs, blob_stats.
+    Varredura: iter_metadata, iter_entries, iter_blobs.
+    Coordenação entre processos: acquire_lock, release_lock.
+
+    As implementações padrão abaixo servem para armazenamentos locais; backends
+    compartilhados (ex.: utils.redis_cache_store) sobrescrevem get_many e os locks.
+    """
+
+    name = "base"
+    # True quando cada operação custa uma ida à rede (vale agrupar leituras)
+    remote = False
+
+    def get_many(self, cache_keys: List[str]) -> List[Optional[StoredEntry]]:
+        """
+        Lê várias entradas.
+
+        Args:
+            cache_keys (List[str]): Chaves do cache
+
+        Returns:
+            List: (dados, criado_em, tamanho) ou None para cada chave, na mesma ordem
+        """
+        return [self.get(cache_key) for cache_key in cache_keys]
+
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any], float]]) -> int:
+        """
+        Grava várias entradas (chave, dados, criado_em). Usado na importação de
+        snapshots: uma entrada só substitui a de mesma chave se for mais nova.
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        written = 0
+        for cache_key, data, created_at in entries:
+            existing = self.get(cache_key)
+            if existing is not None and existing[1] >= created_at:
+                continue
+            self.set(cache_key, data, created_at=created_at)
+            written += 1
+        return written
+
+    def usage(self) -> Tuple[int, Optional[int]]:
+        """
+        Entradas e bytes armazenados, lidos de contadores em O(1) (usado a cada gravação
+        para decidir se vale rodar evict).
+
+        Returns:
+            Tuple: (entradas, bytes); bytes é None quando não há contador barato
+        """
+        return self.count(), self.total_size()
+
+    def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """
+        Tenta obter um lock com expiração, sem bloquear.
+
+        Args:
+            name (str): Nome do lock (ex.: chave do cache)
+            ttl_seconds (float): Expiração do lock, caso o dono morra sem liberá-lo
+
+        Returns:
+            Optional[str]: Token do lock, ou None se outro processo já o tem.
+            Armazenamentos de um único processo não coordenam nada e sempre concedem.
+        """
+        return uuid.uuid4().hex
+
+    def release_lock(self, name: str, token: str) -> bool:
+        """Libera um lock obtido com acquire_lock. Retorna True se ele ainda era do token."""
+        return True
+
+
+class JSONFileCacheStore(CacheStore):
+    """
+    Armazenamento original do cache: um arquivo JSON por entrada em `cache_dir`.
+    A idade da entrada é o mtime do arquivo.
+    """
+
+    name = "json"
+
+    def __init__(self, cache_dir: str = "cache"):
+        """
+        Inicializa o JSONFileCacheStore.
+
+        Args:
+            cache_dir (str): Diretório para armazenar cache
+        """
+        self.cache_dir = cache_dir
+        if not os.path.exists(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        # Os arquivos não guardam acessos; ficam em memória (chave -> [último acesso, acessos])
+        self._access: Dict[str, list] = {}
+        self._access_lock = threading.Lock()
+        # Dados factuais deduplicados: um arquivo por hash de conteúdo
+        self.blob_dir = os.path.join(cache_dir, "blobs")
+        # Contadores de entradas e bytes mantidos a cada gravação/remoção; evict os ressincroniza
+        # com o diretório (outros processos também podem escrever nele)
+        self._usage_lock = threading.Lock()
+        self._resync_usage(self._scan())
+
+    def _resync_usage(self, entries: List[Tuple[str, float, int]]):
+        with self._usage_lock:
+            self._entries = len(entries)
+            self._bytes = sum(size for _, _, size in entries)
+
+    def _adjust_usage(self, entries: int, size: int):
+        with self._usage_lock:
+            self._entries += entries
+            self._bytes += size
+
+    def _file_size(self, path: str) -> Optional[int]:
+        try:
+            return os.stat(path).st_size
+        except FileNotFoundError:
+            return None
+
+    def _get_cache_file_path(self, cache_key: str) -> str:
+        """Retorna o caminho completo do arquivo de cache."""
+        return os.path.join(self.cache_dir, f"{cache_key}.json")
+
+    def get(self, cache_key: str) -> Optional[StoredEntry]:
+        """
+        Lê uma entrada.
+
+        Args:
+            cache_key (str): Chave do cache
+
+        Returns:
+            Optional[StoredEntry]: (dados, criado_em, tamanho) ou None se não existir
+        """
+        cache_file = self._get_cache_file_path(cache_key)
+        if not os.path.exists(cache_file):
+            return None
+        created_at = os.path.getmtime(cache_file)
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            raw_data = f.read()
+        return json.loads(raw_data), created_at, len(raw_data)
+
+    def set(self, cache_key: str, data: Dict[str, Any], created_at: Optional[float] = None) -> int:
+        """
+        Grava uma entrada, substituindo a anterior.
+
+        Args:
+            cache_key (str): Chave do cache
+            data (Dict): Dados da entrada
+            created_at (float): Timestamp de criação (padrão: agora)
+
+        Returns:
+            int: Tamanho gravado em bytes
+        """
+        cache_file = self._get_cache_file_path(cache_key)
+        raw_data = json.dumps(data, ensure_ascii=False, indent=2)
+        # Escreve em arquivo temporário e renomeia: leitores nunca veem um JSON pela metade
+        temp_file = f"{cache_file}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            f.write(raw_data)
+        if created_at is not None:
+            os.utime(temp_file, (created_at, created_at))
+        new_size = os.stat(temp_file).st_size
+        old_size = self._file_size(cache_file)
+        os.replace(temp_file, cache_file)
+        if old_size is None:
+            self._adjust_usage(1, new_size)
+        else:
+            self._adjust_usage(0, new_size - old_size)
+        return len(raw_data)
+
+    def delete(self, cache_key: str) -> bool:
+        """Remove uma entrada. Retorna True se ela existia."""
+        with self._access_lock:
+            self._access.pop(cache_key, None)
+        cache_file = self._get_cache_file_path(cache_key)
+        size = self._file_size(cache_file)
+        try:
+            os.remove(cache_file)
+        except FileNotFoundError:
+            return False
+        self._adjust_usage(-1, -(size or 0))
+        return True
+
+    def _get_blob_file_path(self, blob_hash: str) -> str:
+        return os.path.join(self.blob_dir, f"{blob_hash}.json")
+
+    def put_blob(self, blob_hash: str, raw: bytes):
+        """
+        Grava um blob de conteúdo, se ainda não existir.
+
+        Args:
+            blob_hash (str): Hash do conteúdo
+            raw (bytes): Conteúdo (JSON em UTF-8)
+        """
+        blob_file = self._get_blob_file_path(blob_hash)
+        if os.path.exists(blob_file):
+            return
+        os.makedirs(self.blob_dir, exist_ok=True)
+        temp_file = f"{blob_file}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(raw)
+        os.replace(temp_file, blob_file)
+
+    def get_blob(self, blob_hash: str) -> Optional[bytes]:
+        """Lê um blob, ou None se ele não existir."""
+        try:
+            with open(self._get_blob_file_path(blob_hash), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def prune_blobs(self, min_age_seconds: float = 3600) -> int:
+        """
+        Remove blobs que nenhuma entrada referencia (lendo todas as entradas).
+
+        Args:
+            min_age_seconds (float): Só remove blobs mais antigos que isso, para não
+                apagar um blob gravado por um set() ainda em andamento
+
+        Returns:
+            int: Número de blobs removidos
+        """
+        if not os.path.isdir(self.blob_dir):
+            return 0
+        referenced = set()
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                try:
+                    with open(os.path.join(self.cache_dir, filename), 'r', encoding='utf-8') as f:
+                        referenced.update(_blob_refs(json.load(f)))
+                except (OSError, json.JSONDecodeError):
+                    continue
+        removed_count = 0
+        cutoff = time.time() - min_age_seconds
+        for filename in os.listdir(self.blob_dir):
+            blob_file = os.path.join(self.blob_dir, filename)
+            if (filename.endswith('.json') and filename[:-len('.json')] not in referenced
+                    and os.path.getmtime(blob_file) < cutoff):
+                os.remove(blob_file)
+                removed_count += 1
+        return removed_count
+
+    def blob_stats(self) -> Dict[str, int]:
+        """Número de blobs e bytes ocupados."""
+        if not os.path.isdir(self.blob_dir):
+            return {'blobs': 0, 'blob_bytes': 0}
+        sizes = [os.path.getsize(os.path.join(self.blob_dir, f)) for f in os.listdir(self.blob_dir) if f.endswith('.json')]
+        return {'blobs': len(sizes), 'blob_bytes': sum(sizes)}
+
+    def record_access(self, accesses: Dict[str, Tuple[float, int]]):
+        """
+        Registra acessos às entradas, usados pelas políticas LRU/LFU.
+
+        Args:
+            accesses (Dict): chave -> (último acesso, número de acessos desde o último registro)
+        """
+        with self._access_lock:
+            for cache_key, (last_accessed, hits) in accesses.items():
+                entry = self._access.setdefault(cache_key, [last_accessed, 0])
+                entry[0] = max(entry[0], last_accessed)
+                entry[1] += hits
+
+    def total_size(self) -> int:
+        """Soma dos tamanhos das entradas em bytes."""
+        return sum(size for _, _, size in self._scan())
+
+    def usage(self) -> Tuple[int, Optional[int]]:
+        """Entradas e bytes pelos contadores em memória (O(1), sem varrer o diretório)."""
+        with self._usage_lock:
+            return self._entries, self._bytes
+
+    def _scan(self) -> List[Tuple[str, float, int]]:
+        """(chave, mtime, tamanho) de cada arquivo do cache."""
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                try:
+                    stat = os.stat(os.path.join(self.cache_dir, filename))
+                except FileNotFoundError:
+                    continue
+                entries.append((filename[:-len('.json')], stat.st_mtime, stat.st_size))
+        return entries
+
+    def evict(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+              policy: str = "lru") -> List[str]:
+        """
+        Remove entradas até respeitar os limites de quantidade e tamanho.
+
+        Args:
+            max_entries (int): Máximo de entradas (None = sem limite)
+            max_bytes (int): Máximo de bytes (None = sem limite)
+            policy (str): "lru" (menos recente primeiro) ou "lfu" (menos acessada primeiro)
+
+        Returns:
+            List[str]: Chaves removidas
+        """
+        entries = self._scan()
+        self._resync_usage(entries)
+        with self._access_lock:
+            # Descarta acessos de entradas que não existem mais
+            existing = {key for key, _, _ in entries}
+            for cache_key in [key for key in self._access if key not in existing]:
+                del self._access[cache_key]
+            # Entradas nunca acessadas contam a partir da criação
+            ranked = [(self._access.get(key, (mtime, 0)), key, size) for key, mtime, size in entries]
+        if policy == "lfu":
+            ranked.sort(key=lambda item: (item[0][1], item[0][0]))
+        else:
+            ranked.sort(key=lambda item: item[0][0])
+        victims = _select_victims(((key, size) for _, key, size in ranked), len(entries),
+                                  sum(size for _, _, size in entries), max_entries, max_bytes)
+        for cache_key in victims:
+            self.delete(cache_key)
+        return victims
+
+    def clear_expired(self, max_age_seconds: float) -> int:
+        """
+        Remove entradas mais antigas que `max_age_seconds`.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        removed_count = 0
+        current_time = time.time()
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                file_path = os.path.join(self.cache_dir, filename)
+                if current_time - os.path.getmtime(file_path) > max_age_seconds:
+                    self.delete(filename[:-len('.json')])
+                    removed_count += 1
+        return removed_count
+
+    def clear_all(self) -> int:
+        """
+        Remove todas as entradas.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        removed_count = 0
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, filename))
+                removed_count += 1
+        with self._access_lock:
+            self._access.clear()
+        self._resync_usage(self._scan())
+        if os.path.isdir(self.blob_dir):
+            for filename in os.listdir(self.blob_dir):
+                os.remove(os.path.join(self.blob_dir, filename))
+        return removed_count
+
+    def count(self) -> int:
+        """Número de entradas armazenadas."""
+        return len([f for f in os.listdir(self.cache_dir) if f.endswith('.json')])
+
+    def iter_metadata(self) -> Iterator[Tuple[str, str, str, list]]:
+        """
+        Percorre as entradas sem manter os dados em memória.
+
+        Returns:
+            Iterator: (chave, pergunta, role, campos relevantes) de cada entrada
+        """
+        for filename in os.listdir(self.cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.cache_dir, filename), 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            yield filename[:-len('.json')], data.get('question', ''), data.get('role', ''), data.get('relevant_fields', [])
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """
+        Percorre as entradas completas, uma por vez.
+
+        Returns:
+            Iterator: (chave, dados, criado_em) de cada entrada
+        """
+        for cache_key, created_at, _ in self._scan():
+            try:
+                with open(self._get_cache_file_path(cache_key), 'r', encoding='utf-8') as f:
+                    yield cache_key, json.load(f), created_at
+            except (OSError, json.JSONDecodeError):
+                continue
+
+    def iter_blobs(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Percorre os blobs de dados factuais.
+
+        Returns:
+            Iterator: (hash, conteúdo) de cada blob
+        """
+        if not os.path.isdir(self.blob_dir):
+            return
+        for filename in os.listdir(self.blob_dir):
+            if filename.endswith('.json'):
+                raw = self.get_blob(filename[:-len('.json')])
+                if raw is not None:
+                    yield filename[:-len('.json')], raw
+
+
+class SQLiteCacheStore(CacheStore):
+    """
+    Armazenamento do cache em um único arquivo SQLite em modo WAL.
+
+    - Busca pela chave primária, sem varrer diretório
+    - Expiração via índice em `created_at` (custo proporcional ao que expirou)
+    - Contagem e tamanho total mantidos por triggers em `cache_meta`, lidos em O(1)
+    - Último acesso e número de acessos por entrada, indexados para remoção LRU/LFU
+    - Entradas comprimidas (zlib por padrão, zstd opcional) e dados factuais
+      deduplicados em `cache_blobs`, endereçados pelo hash do conteúdo
+    - Locks com expiração em `cache_locks`, compartilhados pelos processos
+      (workers) que usam o mesmo arquivo
+    - Cada escrita é uma transação atômica; leitores não bloqueiam escritores (WAL)
+    """
+
+    name = "sqlite"
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS cache_entries (
+            cache_key TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            size INTEGER NOT NULL,
+            data TEXT NOT NULL,
+            last_accessed REAL NOT NULL DEFAULT 0,
+            hits INTEGER NOT NULL DEFAULT 0,
+            blob_refs TEXT NOT NULL DEFAULT '[]'
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_cache_entries_created_at ON cache_entries (created_at)",
+        "CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+        "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('entries', 0)",
+        """CREATE TRIGGER IF NOT EXISTS trg_cache_entries_insert AFTER INSERT ON cache_entries
+        BEGIN
+            UPDATE cache_meta SET value = value + 1 WHERE name = 'entries';
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_cache_entries_delete AFTER DELETE ON cache_entries
+        BEGIN
+            UPDATE cache_meta SET value = value - 1 WHERE name = 'entries';
+        END""",
+    )
+
+    # Colunas e contadores adicionados depois da primeira versão do esquema;
+    # aplicados também em bancos já existentes
+    SCHEMA_V2 = (
+        "CREATE INDEX IF NOT EXISTS idx_cache_entries_last_accessed ON cache_entries (last_accessed)",
+        "CREATE INDEX IF NOT EXISTS idx_cache_entries_hits ON cache_entries (hits, last_accessed)",
+        "INSERT OR IGNORE INTO cache_meta (name, value) SELECT 'bytes', COALESCE(SUM(size), 0) FROM cache_entries",
+        """CREATE TRIGGER IF NOT EXISTS trg_cache_entries_insert_bytes AFTER INSERT ON cache_entries
+        BEGIN
+            UPDATE cache_meta SET value = value + NEW.size WHERE name = 'bytes';
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_cache_entries_delete_bytes AFTER DELETE ON cache_entries
+        BEGIN
+            UPDATE cache_meta SET value = value - OLD.size WHERE name = 'bytes';
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS trg_cache_entries_update_bytes AFTER UPDATE OF size ON cache_entries
+        BEGIN
+            UPDATE cache_meta SET value = value - OLD.size + NEW.size WHERE name = 'bytes';
+        END""",
+        """CREATE TABLE IF NOT EXISTS cache_blobs (
+            blob_hash TEXT PRIMARY KEY,
+            created_at REAL NOT NULL,
+            size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )""",
+        """CREATE TABLE IF NOT EXISTS cache_locks (
+            name TEXT PRIMARY KEY,
+            token TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )""",
+    )
+
+    # Colunas adicionadas depois da primeira versão: (nome, definição, preenchimento inicial)
+    UPGRADE_COLUMNS = (
+        ("last_accessed", "REAL NOT NULL DEFAULT 0", "UPDATE cache_entries SET last_accessed = created_at"),
+        ("hits", "INTEGER NOT NULL DEFAULT 0", None),
+        ("blob_refs", "TEXT NOT NULL DEFAULT '[]'", None),
+    )
+
+    def __init__(self, db_path: str = "cache/answers.sqlite3", compression: str = "zlib"):
+        """
+        Inicializa o SQLiteCacheStore.
+
+        Args:
+            db_path (str): Caminho do arquivo SQLite
+            compression (str): Codec das novas gravações: "zlib", "zstd" (requer zstandard) ou "none"
+        """
+        if compression not in available_codecs():
+            raise ValueError(f"Unsupported compression codec: {compression}")
+        self.compression = compression
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as conn:
+            self._create_schema(conn)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (conexões SQLite não devem ser compartilhadas entre threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: transações controladas explicitamente em _transaction()
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transação explícita (BEGIN IMMEDIATE), incluindo comandos DDL."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+        for name, definition, backfill in self.UPGRADE_COLUMNS:
+            if name not in columns:
+                # Banco de uma versão anterior
+                conn.execute(f"ALTER TABLE cache_entries ADD COLUMN {name} {definition}")
+                if backfill:
+                    conn.execute(backfill)
+        for statement in self.SCHEMA_V2:
+            conn.execute(statement)
+
+    def _encode(self, data: Any):
+        """Serializa (JSON compacto) e comprime; sem compressão grava texto, como antes."""
+        raw_data = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        if self.compression == "none":
+            return raw_data
+        return compress(raw_data.encode('utf-8'), self.compression)
+
+    @staticmethod
+    def _decode(payload) -> Any:
+        """Lê entradas em texto (sem compressão) ou comprimidas com qualquer codec."""
+        if isinstance(payload, bytes):
+            payload = decompress(payload)
+        return json.loads(payload)
+
+    def get(self, cache_key: str) -> Optional[StoredEntry]:
+        """
+        Lê uma entrada.
+
+        Args:
+            cache_key (str): Chave do cache
+
+        Returns:
+            Optional[StoredEntry]: (dados, criado_em, tamanho) ou None se não existir
+        """
+        row = self._connection().execute(
+            "SELECT data, created_at, size FROM cache_entries WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return self._decode(row[0]), row[1], row[2]
+
+    def set(self, cache_key: str, data: Dict[str, Any], created_at: Optional[float] = None) -> int:
+        """
+        Grava uma entrada atomicamente, substituindo a anterior.
+
+        Args:
+            cache_key (str): Chave do cache
+            data (Dict): Dados da entrada
+            created_at (float): Timestamp de criação (padrão: agora)
+
+        Returns:
+            int: Tamanho gravado em bytes
+        """
+        payload = self._encode(data)
+        created_at = time.time() if created_at is None else created_at
+        with self._transaction() as conn:
+            # Upsert: substituir uma entrada não dispara os triggers de contagem
+            conn.execute(
+                """INSERT INTO cache_entries (cache_key, created_at, size, data, last_accessed, blob_refs)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(cache_key) DO UPDATE SET
+                       created_at = excluded.created_at, size = excluded.size, data = excluded.data,
+                       last_accessed = excluded.last_accessed, blob_refs = excluded.blob_refs""",
+                (cache_key, created_at, len(payload), payload, created_at, json.dumps(_blob_refs(data)))
+            )
+        return len(payload)
+
+    def put_blob(self, blob_hash: str, raw: bytes):
+        """
+        Grava um blob de conteúdo, se ainda não existir.
+
+        Args:
+            blob_hash (str): Hash do conteúdo
+            raw (bytes): Conteúdo (JSON em UTF-8)
+        """
+        payload = compress(raw, self.compression)
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO cache_blobs (blob_hash, created_at, size, data) VALUES (?, ?, ?, ?)",
+                (blob_hash, time.time(), len(payload), payload)
+            )
+
+    def get_blob(self, blob_hash: str) -> Optional[bytes]:
+        """Lê um blob, ou None se ele não existir."""
+        row = self._connection().execute(
+            "SELECT data FROM cache_blobs WHERE blob_hash = ?", (blob_hash,)
+        ).fetchone()
+        return decompress(row[0]) if row else None
+
+    def prune_blobs(self, min_age_seconds: float = 3600) -> int:
+        """
+        Remove blobs que nenhuma entrada referencia, em um único comando
+        (json_each sobre a coluna `blob_refs`).
+
+        Args:
+            min_age_seconds (float): Só remove blobs mais antigos que isso, para não
+                apagar um blob gravado por um set() ainda em andamento
+
+        Returns:
+            int: Número de blobs removidos
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                """DELETE FROM cache_blobs WHERE created_at < ? AND blob_hash NOT IN (
+                       SELECT refs.value FROM cache_entries, json_each(cache_entries.blob_refs) AS refs
+                   )""",
+                (time.time() - min_age_seconds,)
+            ).rowcount
+
+    def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """
+        Tenta obter um lock com expiração, sem bloquear (compartilhado entre processos).
+
+        Args:
+            name (str): Nome do lock (ex.: chave do cache)
+            ttl_seconds (float): Expiração do lock, caso o dono morra sem liberá-lo
+
+        Returns:
+            Optional[str]: Token do lock, ou None se outro processo já o tem
+        """
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM cache_locks WHERE name = ? AND expires_at <= ?", (name, now))
+            acquired = conn.execute(
+                "INSERT OR IGNORE INTO cache_locks (name, token, expires_at) VALUES (?, ?, ?)",
+                (name, token, now + ttl_seconds)
+            ).rowcount > 0
+        return token if acquired else None
+
+    def release_lock(self, name: str, token: str) -> bool:
+        """Libera um lock obtido com acquire_lock. Retorna True se ele ainda era do token."""
+        with self._transaction() as conn:
+            return conn.execute(
+                "DELETE FROM cache_locks WHERE name = ? AND token = ?", (name, token)
+            ).rowcount > 0
+
+    def blob_stats(self) -> Dict[str, int]:
+        """Número de blobs e bytes ocupados."""
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache_blobs"
+        ).fetchone()
+        return {'blobs': count, 'blob_bytes': total}
+
+    def delete(self, cache_key: str) -> bool:
+        """Remove uma entrada. Retorna True se ela existia."""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM cache_entries WHERE cache_key = ?", (cache_key,)).rowcount > 0
+
+    def record_access(self, accesses: Dict[str, Tuple[float, int]]):
+        """
+        Registra acessos às entradas em uma única transação, usados pelas políticas LRU/LFU.
+
+        Args:
+            accesses (Dict): chave -> (último acesso, número de acessos desde o último registro)
+        """
+        if not accesses:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                """UPDATE cache_entries SET last_accessed = MAX(last_accessed, ?), hits = hits + ?
+                   WHERE cache_key = ?""",
+                [(last_accessed, hits, cache_key) for cache_key, (last_accessed, hits) in accesses.items()]
+            )
+
+    def total_size(self) -> int:
+        """Soma dos tamanhos das entradas em bytes (O(1), mantida pelos triggers)."""
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE name = 'bytes'").fetchone()
+        return row[0] if row else 0
+
+    def evict(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+              policy: str = "lru") -> List[str]:
+        """
+        Remove entradas até respeitar os limites, percorrendo o índice da política escolhida.
+
+        Args:
+            max_entries (int): Máximo de entradas (None = sem limite)
+            max_bytes (int): Máximo de bytes (None = sem limite)
+            policy (str): "lru" (menos recente primeiro) ou "lfu" (menos acessada primeiro)
+
+        Returns:
+            List[str]: Chaves removidas
+        """
+        order = "hits, last_accessed" if policy == "lfu" else "last_accessed"
+        with self._transaction() as conn:
+            count, total_bytes = self.count(), self.total_size()
+            if (max_entries is None or count <= max_entries) and (max_bytes is None or total_bytes <= max_bytes):
+                return []
+            cursor = conn.execute(f"SELECT cache_key, size FROM cache_entries ORDER BY {order}")
+            victims = _select_victims(cursor, count, total_bytes, max_entries, max_bytes)
+            cursor.close()
+            conn.executemany("DELETE FROM cache_entries WHERE cache_key = ?", [(key,) for key in victims])
+        return victims
+
+    def clear_expired(self, max_age_seconds: float) -> int:
+        """
+        Remove entradas mais antigas que `max_age_seconds` usando o índice de `created_at`.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        with self._transaction() as conn:
+            return conn.execute(
+                "DELETE FROM cache_entries WHERE created_at < ?", (time.time() - max_age_seconds,)
+            ).rowcount
+
+    def clear_all(self) -> int:
+        """
+        Remove todas as entradas recriando a tabela, sem apagar linha por linha.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        with self._transaction() as conn:
+            removed_count = self.count()
+            conn.execute("DROP TABLE cache_entries")
+            conn.execute("DELETE FROM cache_blobs")
+            conn.execute("UPDATE cache_meta SET value = 0 WHERE name IN ('entries', 'bytes')")
+            self._create_schema(conn)
+        return removed_count
+
+    def count(self) -> int:
+        """Número de entradas armazenadas (O(1), mantido pelos triggers)."""
+        row = self._connection().execute("SELECT value FROM cache_meta WHERE name = 'entries'").fetchone()
+        return row[0] if row else 0
+
+    def iter_metadata(self) -> Iterator[Tuple[str, str, str, list]]:
+        """
+        Percorre as entradas, descomprimindo uma por vez.
+
+        Returns:
+            Iterator: (chave, pergunta, role, campos relevantes) de cada entrada
+        """
+        cursor = self._connection().execute("SELECT cache_key, data FROM cache_entries")
+        for cache_key, payload in cursor:
+            try:
+                data = self._decode(payload)
+            except (ValueError, json.JSONDecodeError):
+                continue
+            yield cache_key, data.get('question', ''), data.get('role', ''), data.get('relevant_fields', [])
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """
+        Percorre as entradas completas, descomprimindo uma por vez.
+
+        Returns:
+            Iterator: (chave, dados, criado_em) de cada entrada
+        """
+        cursor = self._connection().execute("SELECT cache_key, data, created_at FROM cache_entries")
+        for cache_key, payload, created_at in cursor:
+            try:
+                yield cache_key, self._decode(payload), created_at
+            except (ValueError, json.JSONDecodeError):
+                continue
+
+    def iter_blobs(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Percorre os blobs de dados factuais.
+
+        Returns:
+            Iterator: (hash, conteúdo) de cada blob
+        """
+        for blob_hash, payload in self._connection().execute("SELECT blob_hash, data FROM cache_blobs"):
+            yield blob_hash, decompress(payload)
+
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any], float]]) -> int:
+        """
+        Grava várias entradas (chave, dados, criado_em) em uma única transação.
+        Uma entrada só substitui a de mesma chave se for mais nova.
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        rows = []
+        for cache_key, data, created_at in entries:
+            payload = self._encode(data)
+            rows.append((cache_key, created_at, len(payload), payload, created_at, json.dumps(_blob_refs(data))))
+        with self._transaction() as conn:
+            return conn.executemany(
+                """INSERT INTO cache_entries (cache_key, created_at, size, data, last_accessed, blob_refs)
+                   VALUES (?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(cache_key) DO UPDATE SET
+                       created_at = excluded.created_at, size = excluded.size, data = excluded.data,
+                       last_accessed = excluded.last_accessed, blob_refs = excluded.blob_refs
+                   WHERE excluded.created_at > cache_entries.created_at""",
+                rows
+            ).rowcount
+
+    def import_json_dir(self, cache_dir: str) -> int:
+        """
+        Importa entradas do formato antigo (um arquivo JSON por entrada).
+        Entradas já existentes são mantidas; os arquivos não são removidos.
+
+        Args:
+            cache_dir (str): Diretório com os arquivos `<chave>.json`
+
+        Returns:
+            int: Número de entradas importadas
+        """
+        if not os.path.isdir(cache_dir):
+            return 0
+
+        rows = []
+        for filename in os.listdir(cache_dir):
+            if not filename.endswith('.json'):
+                continue
+            file_path = os.path.join(cache_dir, filename)
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"DEBUG: Skipping cache file {filename}: {e}")
+                continue
+            payload = self._encode(data)
+            created_at = os.path.getmtime(file_path)
+            rows.append((filename[:-len('.json')], created_at, len(payload), payload, created_at,
+                         json.dumps(_blob_refs(data))))
+
+        with self._transaction() as conn:
+            before = self.count()
+            conn.executemany(
+                """INSERT OR IGNORE INTO cache_entries (cache_key, created_at, size, data, last_accessed, blob_refs)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                rows
+            )
+            return self.count() - before
+
+
+def create_cache_store(kind: str = "json", cache_dir: str = "cache", compression: str = "zlib",
+                       redis_url: Optional[str] = None, ttl_seconds: Optional[float] = None) -> CacheStore:
+    """
+    Cria o armazenamento do cache.
+
+    Args:
+        kind (str): "json" (um arquivo por entrada), "sqlite" (arquivo único indexado)
+            ou "redis" (servidor compartilhado entre workers/instâncias)
+        cache_dir (str): Diretório do cache (json/sqlite)
+        compression (str): Codec dos armazenamentos sqlite e redis ("zlib", "zstd" ou "none")
+        redis_url (str): URL do servidor redis
+        ttl_seconds (float): TTL das entradas no redis
+
+    Returns:
+        Armazenamento do tipo pedido
+    """
+    if kind == "redis":
+        from utils.redis_cache_store import RedisCacheStore
+        return RedisCacheStore(redis_url or "redis://localhost:6379/0", ttl_seconds=ttl_seconds,
+                               compression=compression)
+    if kind == "sqlite":
+        store = SQLiteCacheStore(os.path.join(cache_dir, "answers.sqlite3"), compression=compression)
+        # Migração única: um banco novo importa os arquivos JSON já existentes
+        if store.count() == 0:
+            imported = store.import_json_dir(cache_dir)
+            if imported:
+                print(f"DEBUG: Imported {imported} JSON cache files into {store.db_path}")
+        return store
+    if kind == "json":
+        return JSONFileCacheStore(cache_dir)
+    raise ValueError(f"Unknown cache store: {kind}")
+
+
+if __name__ == "__main__":
+    # Migração manual: python -m utils.cache_store <diretório com *.json> [arquivo sqlite]
+    if len(sys.argv) < 2:
+        print("Usage: python -m utils.cache_store <json_cache_dir> [sqlite_path]")
+        sys.exit(1)
+    source_dir = sys.argv[1]
+    target = SQLiteCacheStore(sys.argv[2] if len(sys.argv) > 2 else os.path.join(source_dir, "answers.sqlite3"))
+    print(f"Imported {target.import_json_dir(source_dir)} entries into {target.db_path}")
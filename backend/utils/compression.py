@@ -0,0 +1,68 @@
+import zlib
+
+# zstd é opcional: só fica disponível com o pacote `zstandard` instalado
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Primeiro byte de cada payload: identifica o codec usado na gravação, então
+# dados gravados com um codec continuam legíveis depois de trocar a configuração
+_HEADERS = {
+    "none": b"\x00",
+    "zlib": b"z",
+    "zstd": b"s",
+}
+_CODECS_BY_HEADER = {header: codec for codec, header in _HEADERS.items()}
+
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+
+
+def available_codecs() -> tuple:
+    """Codecs utilizáveis neste ambiente."""
+    return tuple(codec for codec in _HEADERS if codec != "zstd" or zstandard is not None)
+
+
+def compress(raw: bytes, codec: str = "zlib") -> bytes:
+    """
+    Comprime bytes, prefixando o codec usado.
+
+    Args:
+        raw (bytes): Dados originais
+        codec (str): "none", "zlib" ou "zstd"
+
+    Returns:
+        bytes: Payload comprimido
+    """
+    if codec == "zlib":
+        return _HEADERS[codec] + zlib.compress(raw, ZLIB_LEVEL)
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd compression requires the 'zstandard' package")
+        return _HEADERS[codec] + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    if codec == "none":
+        return _HEADERS[codec] + raw
+    raise ValueError(f"Unknown compression codec: {codec}")
+
+
+def decompress(payload: bytes) -> bytes:
+    """
+    Descomprime um payload gerado por compress().
+
+    Args:
+        payload (bytes): Payload com o prefixo do codec
+
+    Returns:
+        bytes: Dados originais
+    """
+    codec = _CODECS_BY_HEADER.get(payload[:1])
+    if codec == "zlib":
+        return zlib.decompress(payload[1:])
+    if codec == "zstd":
+        if zstandard is None:
+            raise ValueError("zstd payload found but the 'zstandard' package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload[1:])
+    if codec == "none":
+        return payload[1:]
+    raise ValueError("Unknown compression header")
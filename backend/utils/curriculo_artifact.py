@@ -0,0 +1,186 @@
+"""
+Artefato compilado do currículo: seções, índices de busca, roles e a instrução de
+sistema num único arquivo binário, gerado no build e carregado de uma vez na
+inicialização, sem parse de JSON nem construção de índices em cada processo.
+
+O arquivo tem dois pickles seguidos: um cabeçalho pequeno (formato, hash do schema
+e hash das fontes) e o conteúdo. O cabeçalho é conferido antes de ler o conteúdo;
+se o código que monta o artefato mudou (schema) ou algum JSON de data/ mudou
+(fontes), o artefato é recusado e a aplicação volta a ler os JSON. O artefato é
+gerado localmente no build e só deve ser carregado dessa origem (pickle).
+
+Uso (a partir de backend/):
+    python -m utils.curriculo_artifact build
+    python -m utils.curriculo_artifact check
+"""
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from utils import bm25_index, curriculo_store, field_router, role_handler, system_instruction, text_normalizer
+from utils.curriculo_store import CurriculoStore
+from utils.role_handler import RoleHandler
+from utils.system_instruction import build_system_instruction
+
+ARTIFACT_FORMAT = 1
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+# Módulos que definem o conteúdo do artefato: qualquer mudança neles invalida artefatos antigos
+SCHEMA_MODULES = (curriculo_store, bm25_index, field_router, text_normalizer, role_handler, system_instruction)
+
+
+class CurriculoArtifact(NamedTuple):
+    """Conteúdo do artefato."""
+    store: CurriculoStore
+    roles: Dict[str, Dict]
+    # None se data/system_instruction.json não existir ou for inválido
+    system_instruction: Optional[str]
+
+
+def schema_hash() -> str:
+    """Hash do formato do artefato e do código dos módulos que o montam."""
+    digest = hashlib.sha1(f"{ARTIFACT_FORMAT}:{sys.version_info[0]}.{sys.version_info[1]}".encode())
+    for module in SCHEMA_MODULES:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def source_hash(data_dir: str) -> str:
+    """Hash dos JSON de data/ e data/roles/ (nomes e conteúdo)."""
+    digest = hashlib.sha1()
+    for subdir in ("", "roles"):
+        directory = os.path.join(data_dir, subdir)
+        if not os.path.isdir(directory):
+            continue
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".json"):
+                digest.update(f"{subdir}/{filename}\0".encode("utf-8"))
+                with open(os.path.join(directory, filename), "rb") as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def build_artifact(data_dir: str = DEFAULT_DATA_DIR) -> CurriculoArtifact:
+    """Lê os JSON de `data_dir` e monta o snapshot do currículo, as roles e a instrução de sistema."""
+    store = CurriculoStore.load(data_dir)
+    roles = RoleHandler(roles_dir=os.path.join(data_dir, "roles")).roles
+    instruction = None
+    instruction_data = store.sections.get("system_instruction")
+    if isinstance(instruction_data, dict):
+        instruction = build_system_instruction(instruction_data)
+        if not instruction.strip():
+            instruction = None
+    return CurriculoArtifact(store, roles, instruction)
+
+
+def write_artifact(path: str, data_dir: str = DEFAULT_DATA_DIR) -> Dict[str, Any]:
+    """
+    Compila `data_dir` e grava o artefato em `path` (escrita atômica).
+
+    Returns:
+        Dict: Cabeçalho gravado
+    """
+    artifact = build_artifact(data_dir)
+    header = {
+        'format': ARTIFACT_FORMAT,
+        'schema': schema_hash(),
+        'sources': source_hash(data_dir),
+        'built_at': time.time(),
+        'sections': len(artifact.store.sections),
+        'roles': len(artifact.roles)
+    }
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(artifact, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+    return header
+
+
+def check_header(header: Dict[str, Any], data_dir: str = DEFAULT_DATA_DIR) -> Optional[str]:
+    """Motivo para recusar um artefato com este cabeçalho, ou None se estiver atualizado."""
+    if not isinstance(header, dict) or header.get('format') != ARTIFACT_FORMAT:
+        return "formato desconhecido"
+    if header.get('schema') != schema_hash():
+        return "schema diferente (código alterado desde o build)"
+    if header.get('sources') != source_hash(data_dir):
+        return "fontes alteradas em data/ desde o build"
+    return None
+
+
+def load_artifact(path: str, data_dir: str = DEFAULT_DATA_DIR) -> Optional[CurriculoArtifact]:
+    """
+    Carrega o artefato, se existir e estiver atualizado.
+
+    Args:
+        path (str): Caminho do artefato
+        data_dir (str): Diretório dos JSON de origem (para conferir o hash das fontes)
+
+    Returns:
+        CurriculoArtifact: Conteúdo, ou None se o arquivo não existir
+
+    Raises:
+        ValueError: Artefato desatualizado ou ilegível (use os JSON)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "rb") as f:
+            reason = check_header(pickle.load(f), data_dir)
+            if reason:
+                raise ValueError(f"Artefato {path} desatualizado: {reason}")
+            artifact = pickle.load(f)
+    except ValueError:
+        raise
+    except Exception as e:
+        # Arquivo truncado, ou dependência ausente neste ambiente (ex.: numpy)
+        raise ValueError(f"Artefato {path} ilegível: {e}") from e
+    if not isinstance(artifact, CurriculoArtifact):
+        raise ValueError(f"Artefato {path} ilegível: conteúdo inesperado")
+    return artifact
+
+
+def main(argv=None):
+    from config import get_config
+
+    config = get_config()
+    parser = argparse.ArgumentParser(description="Compile the curriculum data into a single artifact")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR)
+    parser.add_argument("--output", default=config.CURRICULO_ARTIFACT_PATH,
+                        help="artifact path (default: CURRICULO_ARTIFACT_PATH)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="compile data/ into the artifact")
+    subparsers.add_parser("check", help="exit 1 if the artifact is missing or stale")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        header = write_artifact(args.output, args.data_dir)
+        print(f"Built {args.output}: {header['sections']} sections, {header['roles']} roles, "
+              f"schema {header['schema']}, sources {header['sources']} "
+              f"({os.path.getsize(args.output)} bytes)")
+        return 0
+
+    try:
+        artifact = load_artifact(args.output, args.data_dir)
+    except ValueError as e:
+        print(e)
+        return 1
+    if artifact is None:
+        print(f"Artefato {args.output} não encontrado")
+        return 1
+    print(json.dumps(artifact.store.get_stats()))
+    return 0
+
+
+if __name__ == "__main__":
+    # Com -m, este arquivo roda como __main__: o pickle precisa referenciar utils.curriculo_artifact
+    from utils.curriculo_artifact import main
+    sys.exit(main())
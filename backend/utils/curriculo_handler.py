@@ -1,54 +1,221 @@
-import json
 import os
+import threading
+import time
+from utils.bm25_index import tokenize
+from utils.curriculo_store import ITEM_ROW_SECTIONS, CurriculoStore, build_project_index, iter_section_items
+
+# Termos que só dizem que a pergunta é sobre projetos: ignorados na consulta
+PROJECT_QUERY_STOPWORDS = frozenset(["projeto", "project", "portfolio"])
+
 
 class CurriculoHandler:
-    def __init__(self, data_dir=None):
+    def __init__(self, data_dir=None, store=None, check_interval=None):
+        """
+        Args:
+            data_dir (str): Diretório com um JSON por seção (padrão: backend/data)
+            store (CurriculoStore): Snapshot já carregado (ex.: do artefato compilado)
+            check_interval (float): A cada quantos segundos, no máximo, verificar se os
+                arquivos de data/ mudaram e recarregar (None = só com reload()). Assim uma
+                recarga feita em um worker (ou uma edição de data/) chega aos demais.
+        """
         if data_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             data_dir = os.path.join(base_dir, "data")
         self.data_dir = data_dir
-        self.cache = {}
+        self.check_interval = check_interval
+        self._source_stamp = self._data_stamp() if check_interval is not None else None
+        self._next_check = time.monotonic() + (check_interval or 0)
+        self._check_lock = threading.Lock()
+        # Todas as seções e os índices, carregados uma vez (ou do artefato compilado); trocado inteiro por reload()
+        self._store = CurriculoStore.load(data_dir) if store is None else store
+
+    def _data_stamp(self):
+        """Nome, mtime e tamanho dos JSON de data/ (muda quando algum arquivo muda)."""
+        if not os.path.isdir(self.data_dir):
+            return ()
+        stamp = []
+        for entry in sorted(os.scandir(self.data_dir), key=lambda entry: entry.name):
+            if entry.name.endswith(".json") and entry.is_file():
+                stat = entry.stat()
+                stamp.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(stamp)
+
+    def _current(self):
+        """Snapshot atual, recarregado antes se data/ mudou desde a última verificação."""
+        if self.check_interval is not None and time.monotonic() >= self._next_check:
+            # Uma verificação por vez; as demais requisições seguem com o snapshot atual
+            if self._check_lock.acquire(blocking=False):
+                try:
+                    self._next_check = time.monotonic() + self.check_interval
+                    if self._data_stamp() != self._source_stamp:
+                        self.reload()
+                finally:
+                    self._check_lock.release()
+        return self._store
+
+    @property
+    def store(self):
+        """Snapshot atual do currículo (imutável)."""
+        return self._current()
+
+    def reload(self):
+        """
+        Relê data/ e troca o snapshot de uma vez: requisições em andamento terminam
+        com o snapshot antigo, as novas já usam o novo.
+
+        Returns:
+            CurriculoStore: O snapshot novo
+        """
+        # Carimbo antes da leitura: uma edição durante a carga dispara outra recarga
+        stamp = self._data_stamp()
+        store = CurriculoStore.load(self.data_dir)
+        self._store = store
+        self._source_stamp = stamp
+        return store
+
+    @property
+    def cache(self):
+        """Seções carregadas: {seção: dado} (somente leitura)."""
+        return self._current().sections
+
+    @property
+    def versions(self):
+        """Hash do conteúdo de cada seção carregada."""
+        return self._current().versions
+
+    @property
+    def project_index(self):
+        """Índice de busca dos projetos, construído junto com o snapshot."""
+        return self._current().project_index
+
+    @property
+    def search_index(self):
+        """Índice de todos os itens de todas as seções pesquisáveis."""
+        return self._current().search_index
 
     def load_section(self, section):
-        """Carrega uma seção específica do currículo a partir do arquivo modular."""
-        filename = os.path.join(self.data_dir, f"{section}.json")
-        
-        # Verificar cache primeiro
-        if section in self.cache:
-            return self.cache[section]
-        
-        # Verificar se o arquivo existe
-        if not os.path.exists(filename):
-            print(f"Warning: Arquivo {filename} não encontrado")
-            return None
-        
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                
-            # Para arquivos modulares, o dado está na chave com o nome da seção
-            if section in data:
-                self.cache[section] = data[section]
-                return self.cache[section]
-            else:
-                # Se não encontrar a chave específica, retorna o dado completo
-                self.cache[section] = data
-                return self.cache[section]
-                
-        except json.JSONDecodeError as e:
-            print(f"Error: JSON inválido no arquivo {filename}: {e}")
-            return None
-        except Exception as e:
-            print(f"Error: Erro ao carregar arquivo {filename}: {e}")
-            return None
+        """Seção do currículo (já carregada), ou None se não existir ou tiver JSON inválido."""
+        return self._current().sections.get(section)
 
     def get(self, section):
         return self.load_section(section)
 
+    def get_version(self, section):
+        """Versão (hash do conteúdo) de uma seção, ou None se ela não existir."""
+        return self._current().versions.get(section)
+
+    def get_versions(self, sections):
+        """Versões das seções pedidas: {seção: hash do conteúdo ou None}."""
+        versions = self._current().versions
+        return {section: versions.get(section) for section in sections}
+
     def get_multiple(self, sections):
+        store_sections = self._current().sections
+        return {section: store_sections[section] for section in sections if section in store_sections}
+
+    def summary_rows(self, section, value):
+        """
+        Linhas do resumo factual de uma seção (pré-renderizadas quando os dados vêm
+        do snapshot atual).
+
+        Args:
+            section (str): Nome da seção
+            value: Dado da seção (inteiro ou podado por retrieve)
+
+        Returns:
+            list: Linhas do resumo, em Markdown
+        """
+        store = self._current()
+        if section in ITEM_ROW_SECTIONS and isinstance(value, list):
+            return [store.item_row(section, item) for item in value]
+        return [store.section_row(section, value)]
+
+    def search_projects(self, question, projects=None, limit=5):
+        """
+        Projetos mais relevantes para a pergunta, por BM25 sobre um índice invertido.
+        Sem nenhum termo em comum, retorna os mais recentes (e com mais tecnologias).
+
+        Args:
+            question (str): Pergunta do usuário
+            projects (list): Lista de projetos (padrão: a seção "projects" carregada)
+            limit (int): Máximo de projetos
+
+        Returns:
+            list: Projetos, do mais relevante ao menos
+        """
+        store = self._current()
+        if projects is None:
+            projects = store.sections.get("projects") or []
+        query = [term for term in tokenize(question) if term not in PROJECT_QUERY_STOPWORDS]
+
+        positions = store.project_positions(projects) if store.project_index is not None else None
+        if positions is None:
+            # Lista de outra origem (ex.: dados factuais de uma entrada do cache)
+            ranked = [projects[position] for position, _ in build_project_index(projects).search(query, limit)]
+        else:
+            # Projetos do snapshot: reaproveita o índice; com a lista podada por retrieve, fica só com os dela
+            index = store.project_index
+            allowed = set(positions)
+            all_projects = store.sections["projects"]
+            hits = index.search(query, limit if len(allowed) == len(index) else len(index))
+            ranked = [all_projects[position] for position, _ in hits if position in allowed][:limit]
+        if not ranked:
+            ranked = sorted(projects, key=lambda p: len(p.get("technologies", [])) + p.get("year", 0),
+                            reverse=True)[:limit]
+        return ranked
+
+    def searchable_sections(self):
+        """Seções do currículo consideradas pela busca (todas, menos as instruções do modelo)."""
+        return list(self._current().searchable_sections)
+
+    def search(self, question, limit=8):
+        """
+        Itens do currículo mais relevantes para a pergunta, entre todas as seções.
+
+        Args:
+            question (str): Pergunta do usuário
+            limit (int): Máximo de itens
+
+        Returns:
+            list: (seção, caminho do item, item, score), do mais relevante ao menos
+        """
+        return [(item.section, item.path, item.value, score) for item, score in self._current().search(question, limit)]
+
+    def retrieve(self, question, limit=8):
+        """
+        Dados factuais para a pergunta: só os `limit` itens mais relevantes, no mesmo
+        formato de get_multiple (cada seção com a estrutura original, podada). Seções
+        ordenadas pelo item mais relevante; itens na ordem original da seção.
+
+        Args:
+            question (str): Pergunta do usuário
+            limit (int): Máximo de itens
+
+        Returns:
+            dict: {seção: itens selecionados}, vazio se nenhum item tiver termos da pergunta
+        """
+        # Um único snapshot do início ao fim, mesmo que haja uma recarga no meio
+        store = self._current()
+        selected = {}
+        for item, _ in store.search(question, limit):
+            selected.setdefault(item.section, []).append(item.path)
+
         result = {}
-        for section in sections:
-            value = self.load_section(section)
-            if value is not None:
+        for section, paths in selected.items():
+            value = store.sections[section]
+            paths = set(paths)
+            if isinstance(value, list):
+                result[section] = [item for (i,), item in iter_section_items(value) if (i,) in paths]
+            elif isinstance(value, dict):
+                pruned = {}
+                for path, item in iter_section_items(value):
+                    if path not in paths:
+                        continue
+                    if len(path) == 2:
+                        pruned.setdefault(path[0], []).append(item)
+                    else:
+                        pruned[path[0]] = item
+                result[section] = pruned
+            else:
                 result[section] = value
-        return result 
\ No newline at end of file
+        return result
@@ -0,0 +1,347 @@
+import hashlib
+import json
+import os
+from types import MappingProxyType
+from typing import Dict, Hashable, List, NamedTuple, Optional, Tuple
+
+from utils.bm25_index import BM25Index, tokenize
+from utils.field_router import FIELD_KEYWORDS
+
+# Campos de cada projeto considerados na busca por pergunta
+PROJECT_SEARCH_FIELDS = ["name", "description", "role", "status", "team", "technologies", "features",
+                         "highlights", "challenges", "results"]
+
+# Termos que identificam seções sem palavras-chave de roteamento
+SECTION_ALIASES = {
+    'languages': ['idioma', 'idiomas', 'língua', 'línguas', 'language', 'languages', 'fluência', 'fluency'],
+}
+
+# Arquivos de data/ que não viram seções: o currículo monolítico repete as seções modulares
+SKIPPED_SECTIONS = ("curriculo",)
+# Seções carregadas mas fora da busca: instruções do modelo
+NON_SEARCHABLE_SECTIONS = ("system_instruction", "curriculo")
+
+
+def build_project_index(projects):
+    """Índice BM25 dos projetos (id de cada documento: a posição na lista)."""
+    documents = []
+    for position, project in enumerate(projects):
+        tokens = []
+        for field in PROJECT_SEARCH_FIELDS:
+            value = project.get(field, "")
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            tokens.extend(tokenize(str(value)))
+        documents.append((position, tokens))
+    return BM25Index(documents)
+
+
+def iter_section_items(value):
+    """
+    Itens pesquisáveis de uma seção: cada elemento de uma lista; cada entrada de um
+    dicionário, com listas de dicionários expandidas em seus elementos.
+
+    Yields:
+        tuple: (caminho do item na seção, item)
+    """
+    if isinstance(value, list):
+        for i, item in enumerate(value):
+            yield (i,), item
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, list) and item and all(isinstance(element, dict) for element in item):
+                for i, element in enumerate(item):
+                    yield (key, i), element
+            else:
+                yield (key,), item
+    else:
+        yield (), value
+
+
+def _leaf_text(value):
+    """Textos das folhas de um item (links ficam de fora)."""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _leaf_text(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _leaf_text(item)
+    elif value is not None and not str(value).startswith("http"):
+        yield str(value)
+
+
+def item_text(section, path, item):
+    """Texto pesquisável de um item, em minúsculas: nome e palavras-chave da seção, chave do item e o conteúdo."""
+    parts = [section.replace("_", " ")] + FIELD_KEYWORDS.get(section, []) + SECTION_ALIASES.get(section, [])
+    parts.extend(str(key).replace("_", " ") for key in path if isinstance(key, str))
+    parts.extend(_leaf_text(item))
+    return " ".join(parts).lower()
+
+
+def item_terms(section, path, item):
+    """Termos de busca de um item (ver item_text)."""
+    return tokenize(item_text(section, path, item))
+
+
+def highlight_terms(info_dict) -> Tuple[str, ...]:
+    """Valores a destacar em negrito numa linha do resumo (cada elemento das listas), na ordem de aplicação."""
+    terms = []
+    for value in info_dict.values():
+        for v in (value if isinstance(value, list) else [value]):
+            v_str = str(v)
+            if v_str:
+                terms.append(v_str)
+    return tuple(terms)
+
+
+def apply_highlights(text, terms):
+    """Destaca em negrito (Markdown) cada termo presente no texto."""
+    for term in terms:
+        if term in text:
+            text = text.replace(term, f"**{term}**")
+    return text
+
+
+def render_item_row(section, item):
+    """Linha do resumo factual de um item de academic_background ou projects."""
+    if section == 'academic_background':
+        row = f"- {item.get('degree', '')} em {item.get('school', '')} ({item.get('year', '')})"
+    else:
+        row = f"- Projeto: {item.get('name', '')} - {item.get('description', '')}"
+    return apply_highlights(row, highlight_terms(item))
+
+
+def render_section_row(section, value):
+    """Linha do resumo factual de uma seção inteira (listas, dicionários e valores simples)."""
+    label = section.replace('_', ' ').capitalize()
+    if isinstance(value, list):
+        row = f"- {label}: {', '.join(str(x) for x in value[:5])}"
+        return apply_highlights(row, highlight_terms({section: value}))
+    if isinstance(value, dict):
+        row = f"- {label}: {', '.join([f'{k}: {v}' for k, v in value.items()])}"
+        return apply_highlights(row, highlight_terms(value))
+    return apply_highlights(f"- {label}: {value}", highlight_terms({section: value}))
+
+
+# Palavras da pergunta que não dizem o que se procura (interrogativos e verbos genéricos): fora da busca
+QUESTION_TERMS = frozenset(tokenize(
+    "qual quais quem onde como quando quanto quantos quanta quantas porque lucas leria fale fala conte diga "
+    "sobre sabe conhece possui tem teve usa usou utiliza fez faz desenvolveu desenvolve trabalhou trabalha "
+    "atua atuou gostaria saber poderia pode algum alguma alguns algumas what which who where how when tell about"
+))
+# Um item só entra no resultado da busca se contiver ao menos esta fração do IDF dos termos da pergunta
+# (termos que o currículo não tem, como "email", pesam o máximo) ...
+MIN_QUERY_COVERAGE = 0.5
+# ... e tiver ao menos esta fração do score do melhor item
+MIN_SCORE_RATIO = 0.5
+
+# Seções resumidas com uma linha por item (as demais, uma linha para a seção)
+ITEM_ROW_SECTIONS = ('academic_background', 'projects')
+
+
+def render_item_fragment(section, path, item):
+    """
+    Trecho de um item no resumo factual, com os destaques já aplicados: a linha do
+    item (ITEM_ROW_SECTIONS) ou a sua parte na linha da seção (elemento da lista ou
+    entrada do dicionário), igual ao que render_section_row produz para ele.
+    """
+    if not path:
+        return render_section_row(section, item)
+    if isinstance(path[0], int):
+        if section in ITEM_ROW_SECTIONS and isinstance(item, dict):
+            return render_item_row(section, item)
+        return apply_highlights(str(item), highlight_terms({section: item}))
+    key = path[0]
+    if len(path) == 2:
+        # Elemento de uma lista de dicionários dentro da seção
+        return apply_highlights(str(item), highlight_terms({key: item}))
+    return apply_highlights(f"{key}: {item}", highlight_terms({key: item}))
+
+
+class CurriculoItem(NamedTuple):
+    """Item pesquisável de uma seção, com os artefatos derivados pré-calculados."""
+    section: str
+    path: Tuple[Hashable, ...]
+    value: object
+    # Texto pesquisável em minúsculas (ver item_text)
+    text: str
+    # Trecho do item no resumo factual, com destaques (ver render_item_fragment)
+    fragment: str
+
+
+def read_section_file(filename, section):
+    """
+    Lê o arquivo JSON de uma seção.
+
+    Returns:
+        tuple: (dado da seção, versão = hash do conteúdo), ou None se o arquivo for inválido
+    """
+    try:
+        with open(filename, "rb") as f:
+            raw_data = f.read()
+        data = json.loads(raw_data.decode("utf-8"))
+    except json.JSONDecodeError as e:
+        print(f"Error: JSON inválido no arquivo {filename}: {e}")
+        return None
+    except Exception as e:
+        print(f"Error: Erro ao carregar arquivo {filename}: {e}")
+        return None
+    # Para arquivos modulares, o dado está na chave com o nome da seção
+    if isinstance(data, dict) and section in data:
+        data = data[section]
+    return data, hashlib.sha1(raw_data).hexdigest()[:16]
+
+
+class CurriculoStore:
+    """
+    Snapshot imutável do currículo: todas as seções de data/ carregadas de uma vez,
+    com os índices de busca e os artefatos derivados (texto pesquisável e linhas e
+    trechos do resumo factual, já com os destaques) calculados na construção. Uma
+    seção podada por retrieve é resumida juntando os trechos dos itens escolhidos.
+
+    Depois de construído, nada muda: as consultas não tocam o disco nem fazem parse,
+    e podem ser feitas de qualquer thread sem lock. Uma recarga constrói um snapshot
+    novo e troca a referência (ver CurriculoHandler.reload). Os dados das seções são
+    os objetos JSON originais (dict/list, para continuarem serializáveis) e devem ser
+    tratados como somente leitura.
+    """
+
+    def __init__(self, sections: Dict[str, object], versions: Dict[str, str]):
+        """
+        Constrói o snapshot.
+
+        Args:
+            sections (Dict): Seção -> dado da seção
+            versions (Dict): Seção -> versão (hash do conteúdo do arquivo)
+        """
+        self.sections = MappingProxyType(dict(sections))
+        self.versions = MappingProxyType(dict(versions))
+        self.searchable_sections = tuple(sorted(s for s in self.sections if s not in NON_SEARCHABLE_SECTIONS))
+
+        projects = self.sections.get("projects")
+        self.project_index = build_project_index(projects) if isinstance(projects, list) else None
+
+        items = []
+        for section in self.searchable_sections:
+            for path, item in iter_section_items(self.sections[section]):
+                items.append(CurriculoItem(section, path, item, item_text(section, path, item),
+                                           render_item_fragment(section, path, item)))
+        self.items: Tuple[CurriculoItem, ...] = tuple(items)
+        self.search_index = BM25Index((position, tokenize(item.text)) for position, item in enumerate(self.items))
+
+        # Linhas do resumo das seções inteiras (as de ITEM_ROW_SECTIONS têm uma linha por item)
+        self._section_rows = MappingProxyType({
+            section: render_section_row(section, self.sections[section]) for section in self.searchable_sections
+            if not (section in ITEM_ROW_SECTIONS and isinstance(self.sections[section], list))
+        })
+        self._index_by_id()
+
+    def _index_by_id(self):
+        # Índices pelo id dos objetos das seções (estável enquanto o snapshot existir; refeitos ao desserializar)
+        item_rows = {}
+        fragments = {}
+        for item in self.items:
+            if not item.path:
+                continue
+            if isinstance(item.path[0], int):
+                if item.section in ITEM_ROW_SECTIONS and isinstance(item.value, dict):
+                    item_rows[id(item.value)] = item.fragment
+                fragments[(item.section, None, id(item.value))] = item.fragment
+            else:
+                fragments[(item.section, item.path[0], id(item.value))] = item.fragment
+        self._item_rows = MappingProxyType(item_rows)
+        # (seção, chave no dicionário da seção ou None numa lista, id do item) -> trecho
+        self._fragments = MappingProxyType(fragments)
+        projects = self.sections.get("projects")
+        self._project_positions = MappingProxyType(
+            {id(project): position for position, project in enumerate(projects)} if isinstance(projects, list) else {}
+        )
+
+    def __getstate__(self):
+        # MappingProxyType não é serializável, e ids de objetos mudam entre processos
+        return {key: dict(value) if isinstance(value, MappingProxyType) else value
+                for key, value in self.__dict__.items()
+                if key not in ('_item_rows', '_fragments', '_project_positions')}
+
+    def __setstate__(self, state):
+        # O pickle preserva as referências compartilhadas: os valores dos itens são os objetos das seções
+        self.__dict__.update({key: MappingProxyType(value) if key in ('sections', 'versions', '_section_rows') else value
+                              for key, value in state.items()})
+        self._index_by_id()
+
+    @classmethod
+    def load(cls, data_dir: str) -> "CurriculoStore":
+        """Carrega todas as seções (um arquivo JSON por seção) de `data_dir`."""
+        sections = {}
+        versions = {}
+        filenames = sorted(os.listdir(data_dir)) if os.path.isdir(data_dir) else []
+        for filename in filenames:
+            section = filename[:-len(".json")]
+            if not filename.endswith(".json") or section in SKIPPED_SECTIONS:
+                continue
+            loaded = read_section_file(os.path.join(data_dir, filename), section)
+            if loaded is not None:
+                sections[section], versions[section] = loaded
+        return cls(sections, versions)
+
+    def item_row(self, section: str, item) -> str:
+        """Linha do resumo de um item de academic_background/projects (pré-calculada para itens do snapshot)."""
+        row = self._item_rows.get(id(item))
+        return row if row is not None else render_item_row(section, item)
+
+    def project_positions(self, projects) -> Optional[List[int]]:
+        """
+        Posições no índice de projetos de uma lista de projetos do snapshot (a seção
+        inteira ou podada por retrieve), ou None se algum projeto for de outra origem.
+        """
+        if projects is self.sections.get("projects"):
+            return list(range(len(projects)))
+        positions = [self._project_positions.get(id(project)) for project in projects]
+        return None if None in positions else positions
+
+    def section_row(self, section: str, value) -> str:
+        """
+        Linha do resumo de uma seção: pré-calculada quando `value` é a seção inteira do
+        snapshot, montada com os trechos dos itens quando é uma poda dela (retrieve).
+        """
+        if value is self.sections.get(section) and section in self._section_rows:
+            return self._section_rows[section]
+        parts = self._fragment_parts(section, value)
+        if parts is None:
+            return render_section_row(section, value)
+        return f"- {section.replace('_', ' ').capitalize()}: {', '.join(parts)}"
+
+    def _fragment_parts(self, section: str, value) -> Optional[List[str]]:
+        """Trechos pré-renderizados dos itens de `value`, ou None se algum não for do snapshot."""
+        fragments = self._fragments
+        if isinstance(value, list):
+            parts = [fragments.get((section, None, id(item))) for item in value[:5]]
+        elif isinstance(value, dict):
+            parts = []
+            for key, item in value.items():
+                if isinstance(item, list) and item and all(isinstance(element, dict) for element in item):
+                    elements = [fragments.get((section, key, id(element))) for element in item]
+                    parts.append(None if None in elements else f"{key}: [{', '.join(elements)}]")
+                else:
+                    parts.append(fragments.get((section, key, id(item))))
+        else:
+            return None
+        return None if None in parts else parts
+
+    def search(self, question: str, limit: int = 8) -> List[Tuple[CurriculoItem, float]]:
+        """
+        Itens mais relevantes para a pergunta, entre todas as seções pesquisáveis.
+        Só entram itens com a maior parte dos termos da pergunta (MIN_QUERY_COVERAGE)
+        e score próximo do melhor (MIN_SCORE_RATIO); sem nenhum, retorna lista vazia.
+        """
+        terms = [term for term in tokenize(question) if term not in QUESTION_TERMS]
+        hits = self.search_index.search(terms, limit, min_coverage=MIN_QUERY_COVERAGE, min_score_ratio=MIN_SCORE_RATIO)
+        return [(self.items[position], score) for position, score in hits]
+
+    def get_stats(self) -> Dict[str, Optional[int]]:
+        """Tamanho do snapshot: seções, itens pesquisáveis e projetos indexados."""
+        return {
+            'sections': len(self.sections),
+            'searchable_items': len(self.items),
+            'projects_indexed': len(self.project_index) if self.project_index is not None else None
+        }
@@ -0,0 +1,206 @@
+import re
+from typing import Dict, List, Tuple
+
+# Padrões contextuais (maior prioridade): expressões regulares sobre a pergunta em minúsculas
+CONTEXT_PATTERNS = {
+    'academic_background': [r'formou.*em', r'graduou.*em', r'fez.*faculdade', r'estudou.*na'],
+    'professional_experience': [r'trabalhou.*na', r'atuou.*como', r'experiência.*com', r'empresa.*onde'],
+    'projects': [r'projeto.*chamado', r'projeto.*envolvendo', r'desenvolveu.*um', r'criou.*um'],
+    'skills': [r'conhecimento.*em', r'habilidade.*com', r'domina.*', r'experiência.*com'],
+    'certifications': [r'certificado.*em', r'certificação.*de', r'curso.*sobre'],
+    'soft_skills': [r'habilidade.*comportamental', r'comunicação.*com', r'trabalho.*equipe'],
+    'intelligent_responses': [r'conquista.*importante', r'resultado.*alcançado', r'aprendizado.*com']
+}
+
+# Palavras-chave (palavras inteiras), usadas quando nenhum padrão contextual corresponde
+FIELD_KEYWORDS = {
+    'academic_background': ['formação', 'formacao', 'academic', 'educação', 'education', 'graduação', 'graduacao', 'universidade', 'college', 'school', 'curso', 'diploma'],
+    'professional_experience': ['experiência', 'experiencia', 'trabalho', 'emprego', 'cargo', 'empresa', 'profissional', 'job', 'work', 'role', 'position', 'company'],
+    'projects': ['projeto', 'project', 'portfolio', 'case study', 'desenvolvimento de projeto', 'projeto de sistema', 'projeto desenvolvido'],
+    'skills': ['habilidade', 'skill', 'competência', 'competencia', 'tecnologia', 'tecnologias', 'stack', 'linguagem', 'framework', 'ferramenta'],
+    'certifications': ['certificado', 'certificação', 'certification', 'course', 'curso', 'licença', 'licenca'],
+    'soft_skills': ['soft skill', 'comportamental', 'liderança', 'lideranca', 'comunicação', 'comunicacao', 'trabalho em equipe', 'teamwork', 'colaboração', 'collaboration'],
+    'intelligent_responses': ['conquista', 'achievement', 'impacto', 'impact', 'resolução', 'solução', 'problem', 'solution', 'aprendizado', 'learning', 'adaptação', 'adaptability', 'progressão', 'progression', 'evolução', 'growth', 'mentoria', 'mentorship']
+}
+
+# Prioridade por role (fallback sem correspondências e desempate acima de MAX_FIELDS)
+ROLE_FIELD_PRIORITY = {
+    'recruiter': ['professional_experience', 'soft_skills', 'certifications', 'intelligent_responses', 'academic_background'],
+    'developer': ['skills', 'professional_experience', 'projects', 'intelligent_responses'],
+    'client': ['professional_experience', 'projects', 'intelligent_responses'],
+    'student': ['academic_background', 'skills', 'projects', 'intelligent_responses']
+}
+
+# Limite de campos por pergunta, para não sobrecarregar o modelo
+MAX_FIELDS = 3
+
+_WORD_CHAR = re.compile(r'\w')
+
+
+def _literal_prefix(pattern: str) -> str:
+    """Trecho literal no início de uma expressão regular (até o primeiro metacaractere)."""
+    prefix = []
+    for char in pattern:
+        if char in '*+?{':
+            # O quantificador torna opcional (ou repetível) o caractere anterior
+            return ''.join(prefix[:-1])
+        if char in '.^$}[]\\|()':
+            break
+        prefix.append(char)
+    return ''.join(prefix)
+
+
+class _LiteralScanner:
+    """
+    Encontra, em uma única passada, todas as ocorrências (inclusive sobrepostas) de
+    um conjunto de literais, com uma regex combinada compilada uma vez.
+
+    A alternativa fica num lookahead, então a busca avança um caractere por vez e
+    literais que começam em posições diferentes nunca se escondem. Na mesma posição
+    a regex reporta só o literal mais longo; os literais mais curtos que também
+    correspondem ali (prefixos dele) são pré-calculados na construção.
+    """
+
+    def __init__(self, literals: List[str], whole_words: bool = False):
+        literals = sorted(set(literals), key=len, reverse=True)
+        boundary = r'\b' if whole_words else ''
+        alternatives = '|'.join(re.escape(literal) for literal in literals)
+        self.pattern = re.compile(f'(?={boundary}({alternatives}){boundary})') if literals else None
+        self._implied = {}
+        for literal in literals:
+            self._implied[literal] = tuple(
+                other for other in literals
+                if literal.startswith(other) and (not whole_words or self._ends_word(literal, len(other)))
+            )
+
+    @staticmethod
+    def _ends_word(text: str, end: int) -> bool:
+        """Se há fronteira de palavra (\\b) em `text` na posição `end`."""
+        if end == len(text):
+            return True
+        return bool(_WORD_CHAR.match(text[end - 1])) != bool(_WORD_CHAR.match(text[end]))
+
+    def scan(self, text: str) -> Dict[str, int]:
+        """
+        Args:
+            text (str): Texto a varrer
+
+        Returns:
+            Dict[str, int]: Literal encontrado -> posição da primeira ocorrência
+        """
+        found = {}
+        if self.pattern is None:
+            return found
+        for match in self.pattern.finditer(text):
+            position = match.start()
+            for literal in self._implied[match.group(1)]:
+                found.setdefault(literal, position)
+        return found
+
+
+class FieldRouter:
+    """
+    Tabelas de roteamento de perguntas para seções do currículo, compiladas uma vez.
+
+    As palavras-chave viram uma única regex combinada, e os padrões contextuais são
+    indexados pelo trecho literal com que começam: uma passada encontra os inícios
+    presentes na pergunta e só os padrões desses inícios são testados (a partir da
+    primeira ocorrência). O resultado é o mesmo de testar cada padrão e cada
+    palavra-chave com re.search.
+    """
+
+    def __init__(self, context_patterns: Dict[str, List[str]] = None,
+                 field_keywords: Dict[str, List[str]] = None,
+                 role_priority: Dict[str, List[str]] = None, max_fields: int = MAX_FIELDS):
+        """
+        Compila as tabelas de roteamento.
+
+        Args:
+            context_patterns (Dict): Campo -> expressões regulares contextuais
+            field_keywords (Dict): Campo -> palavras-chave (palavras inteiras)
+            role_priority (Dict): Role -> campos em ordem de prioridade
+            max_fields (int): Máximo de campos retornados por pergunta
+        """
+        self.context_patterns = CONTEXT_PATTERNS if context_patterns is None else context_patterns
+        self.field_keywords = FIELD_KEYWORDS if field_keywords is None else field_keywords
+        self.role_priority = ROLE_FIELD_PRIORITY if role_priority is None else role_priority
+        self.max_fields = max_fields
+
+        # Padrões contextuais agrupados pelo início literal, na ordem das tabelas
+        self._patterns_by_prefix: Dict[str, List[Tuple[str, re.Pattern]]] = {}
+        for field, patterns in self.context_patterns.items():
+            for pattern in patterns:
+                self._patterns_by_prefix.setdefault(_literal_prefix(pattern), []).append(
+                    (field, re.compile(pattern))
+                )
+        # Um padrão sem início literal precisa ser testado sempre
+        self._unanchored = self._patterns_by_prefix.pop('', [])
+        self._context_scanner = _LiteralScanner(list(self._patterns_by_prefix))
+
+        self._fields_by_keyword: Dict[str, List[str]] = {}
+        for field, keywords in self.field_keywords.items():
+            for keyword in keywords:
+                self._fields_by_keyword.setdefault(keyword, []).append(field)
+        self._keyword_scanner = _LiteralScanner(list(self._fields_by_keyword), whole_words=True)
+        self._field_order = {
+            field: i for i, field in enumerate(dict.fromkeys([*self.context_patterns, *self.field_keywords]))
+        }
+
+    def _in_table_order(self, fields) -> List[str]:
+        return sorted(fields, key=lambda field: self._field_order.get(field, len(self._field_order)))
+
+    def _context_fields(self, text: str) -> List[str]:
+        """Campos com algum padrão contextual presente, na ordem da tabela."""
+        found = set()
+        for prefix, position in self._context_scanner.scan(text).items():
+            for field, pattern in self._patterns_by_prefix[prefix]:
+                if field not in found and pattern.search(text, position):
+                    found.add(field)
+        for field, pattern in self._unanchored:
+            if field not in found and pattern.search(text):
+                found.add(field)
+        return self._in_table_order(found)
+
+    def route(self, question: str, role_id: str) -> list:
+        """
+        Identifica as seções do currículo relevantes para uma pergunta.
+
+        Args:
+            question (str): Pergunta do usuário
+            role_id (str): Role selecionada
+
+        Returns:
+            list: Campos relevantes (no máximo `max_fields`), na ordem das tabelas
+        """
+        role_priority = self.role_priority.get(role_id)
+        q_lower = question.lower()
+
+        # 1. Padrões contextuais (maior prioridade)
+        context_matches = self._context_fields(q_lower)
+        found_fields = set(context_matches)
+
+        # 2. Sem padrões contextuais, palavras-chave inteiras
+        if not found_fields:
+            for keyword in self._keyword_scanner.scan(q_lower):
+                found_fields.update(self._fields_by_keyword[keyword])
+
+        # 3. Sem correspondências, a prioridade da role
+        if not found_fields and role_priority:
+            found_fields.update(role_priority)
+
+        if len(found_fields) > self.max_fields:
+            # Primeiro os campos contextuais, depois a prioridade da role, depois o resto
+            priority_list = list(context_matches)
+            for field in role_priority or list(self.field_keywords):
+                if field in found_fields and field not in priority_list:
+                    priority_list.append(field)
+                    if len(priority_list) >= self.max_fields:
+                        break
+            for field in self._in_table_order(found_fields):
+                if field not in priority_list:
+                    priority_list.append(field)
+                    if len(priority_list) >= self.max_fields:
+                        break
+            found_fields = set(priority_list[:self.max_fields])
+
+        return self._in_table_order(found_fields)
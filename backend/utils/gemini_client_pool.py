@@ -0,0 +1,89 @@
+import threading
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+from google import genai
+from google.genai import types
+
+
+class GeminiClientPool:
+    """
+    Pool de clientes google.genai de vida longa, indexado por chave de API.
+
+    Cada chave recebe um único genai.Client criado sob demanda e reutilizado por
+    todas as requisições. O httpx.Client interno mantém até `pool_size` conexões
+    keep-alive, então conexões TCP/TLS e o setup do cliente são aproveitados entre
+    requisições. httpx.Client é thread-safe; o lock protege apenas a criação.
+    """
+
+    def __init__(self, pool_size: int = 10, keepalive_seconds: float = 60.0,
+                 base_url: Optional[str] = None,
+                 client_factory: Optional[Callable[..., Any]] = None):
+        """
+        Inicializa o GeminiClientPool.
+
+        Args:
+            pool_size (int): Máximo de conexões (e de conexões keep-alive) por chave
+            keepalive_seconds (float): Tempo que uma conexão ociosa é mantida aberta
+            base_url (str): URL base alternativa da API (ex.: stub local em benchmarks)
+            client_factory (Callable): Fábrica de clientes; padrão é genai.Client
+        """
+        self.pool_size = pool_size
+        self.keepalive_seconds = keepalive_seconds
+        self.base_url = base_url
+        self.client_factory = client_factory or genai.Client
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'clients_created': 0,
+            'client_reuses': 0
+        }
+
+    def _build_http_options(self) -> types.HttpOptions:
+        """Opções HTTP com limites de conexão e keep-alive do pool."""
+        limits = httpx.Limits(
+            max_connections=self.pool_size,
+            max_keepalive_connections=self.pool_size,
+            keepalive_expiry=self.keepalive_seconds
+        )
+        return types.HttpOptions(base_url=self.base_url, client_args={'limits': limits})
+
+    def get_client(self, api_key: str) -> Any:
+        """
+        Retorna o cliente compartilhado para uma chave, criando-o na primeira vez.
+
+        Args:
+            api_key (str): Chave da API Gemini
+
+        Returns:
+            genai.Client: Cliente reutilizável
+        """
+        with self._lock:
+            client = self._clients.get(api_key)
+            if client is None:
+                client = self.client_factory(api_key=api_key, http_options=self._build_http_options())
+                self._clients[api_key] = client
+                self._stats['clients_created'] += 1
+            else:
+                self._stats['client_reuses'] += 1
+            return client
+
+    def clear(self):
+        """Descarta todos os clientes do pool."""
+        with self._lock:
+            self._clients.clear()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas do pool.
+
+        Returns:
+            Dict: Estatísticas
+        """
+        return {
+            'clients': len(self._clients),
+            'clients_created': self._stats['clients_created'],
+            'client_reuses': self._stats['client_reuses'],
+            'pool_size': self.pool_size,
+            'keepalive_seconds': self.keepalive_seconds
+        }
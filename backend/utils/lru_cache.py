@@ -0,0 +1,153 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """
+    Cache em memória com política LRU, limitado por número de entradas e bytes.
+
+    Cada entrada pode ter um instante de expiração próprio; entradas expiradas
+    são descartadas ao serem lidas. Seguro para uso entre threads.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: Optional[int] = None):
+        """
+        Inicializa o LRUCache.
+
+        Args:
+            max_entries (int): Número máximo de entradas
+            max_bytes (int): Soma máxima dos tamanhos informados em set() (None = sem limite)
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()  # chave -> (valor, tamanho, expira_em)
+        self._bytes = 0
+        self.lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'expirations': 0
+        }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Busca um valor, marcando-o como usado recentemente.
+
+        Args:
+            key (Hashable): Chave
+            default (Any): Valor retornado se a chave não existir ou tiver expirado
+
+        Returns:
+            Any: Valor armazenado ou `default`
+        """
+        with self.lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return default
+            value, _, expires_at = entry
+            if expires_at is not None and expires_at <= time.time():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return default
+            self._data.move_to_end(key)
+            self._stats['hits'] += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, size: int = 0, expires_at: Optional[float] = None):
+        """
+        Armazena um valor, removendo os menos usados se os limites forem excedidos.
+
+        Args:
+            key (Hashable): Chave
+            value (Any): Valor
+            size (int): Tamanho aproximado em bytes, usado no limite max_bytes
+            expires_at (float): Timestamp de expiração (None = não expira)
+        """
+        with self.lock:
+            if key in self._data:
+                self._remove(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                # Nunca caberia; não vale a pena esvaziar o cache por ela
+                return
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes is not None and self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._data))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def delete(self, key: Hashable) -> bool:
+        """
+        Remove uma chave.
+
+        Args:
+            key (Hashable): Chave
+
+        Returns:
+            bool: True se a chave existia
+        """
+        with self.lock:
+            if key in self._data:
+                self._remove(key)
+                return True
+            return False
+
+    def clear_expired(self) -> int:
+        """
+        Remove todas as entradas expiradas.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        now = time.time()
+        with self.lock:
+            expired = [key for key, (_, _, expires_at) in self._data.items()
+                       if expires_at is not None and expires_at <= now]
+            for key in expired:
+                self._remove(key)
+            self._stats['expirations'] += len(expired)
+            return len(expired)
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self.lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Retorna estatísticas do cache.
+
+        Returns:
+            Dict: Estatísticas
+        """
+        with self.lock:
+            total = self._stats['hits'] + self._stats['misses']
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self._stats['hits'],
+                'misses': self._stats['misses'],
+                'evictions': self._stats['evictions'],
+                'expirations': self._stats['expirations'],
+                'hit_rate': round(self._stats['hits'] / total * 100, 2) if total else 0
+            }
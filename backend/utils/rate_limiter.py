@@ -1,61 +1,135 @@
+import bisect
+import math
 import time
-from typing import Dict, Tuple, Optional
-from collections import defaultdict
+from typing import Any, Dict, Tuple, Optional
+from collections import OrderedDict
 import threading
 
+# Algoritmos disponíveis (ver create_rate_limiter)
+RATE_LIMIT_ALGORITHMS = ("sliding_window", "gcra")
+
 class RateLimiter:
     """
     Sistema de rate limiting para proteger contra spam e abuso.
     Implementa sliding window rate limiting.
+    
+    O estado por IP é limitado: IPs ociosos (sem requisições na janela) são
+    removidos em varreduras periódicas e, acima de `max_keys` IPs rastreados, o
+    usado há mais tempo é descartado (LRU). As estatísticas são totais mantidos
+    a cada requisição, sem percorrer o estado.
     """
     
-    def __init__(self, max_requests: int = 10, window_seconds: int = 60):
+    algorithm = "sliding_window"
+    
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60,
+                 max_keys: int = 10000, sweep_interval: Optional[float] = None):
         """
         Inicializa o RateLimiter.
         
         Args:
             max_requests (int): Número máximo de requisições por janela
             window_seconds (int): Tamanho da janela em segundos
+            max_keys (int): Máximo de IPs rastreados (os usados há mais tempo saem primeiro)
+            sweep_interval (float): Intervalo entre varreduras de IPs ociosos (padrão: a janela)
         """
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = defaultdict(list)  # IP -> lista de timestamps
+        self.max_keys = max_keys
+        self.sweep_interval = window_seconds if sweep_interval is None else sweep_interval
+        # IP -> lista de timestamps, do IP usado há mais tempo ao mais recente
+        self.requests: OrderedDict = OrderedDict()
         self.lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._stats = {
+            'allowed': 0,
+            'denied': 0,
+            'idle_evictions': 0,
+            'capacity_evictions': 0,
+            'sweeps': 0
+        }
+    
+    def _is_idle(self, state: Any, now: float) -> bool:
+        """Se o estado de um IP não limita mais nada (pode ser descartado)."""
+        return not state or state[-1] <= now - self.window_seconds
+    
+    def _track(self, ip: str, state: Any):
+        """Grava o estado de um IP como o mais recente, respeitando `max_keys`."""
+        self.requests[ip] = state
+        self.requests.move_to_end(ip)
+        while len(self.requests) > self.max_keys:
+            self.requests.popitem(last=False)
+            self._stats['capacity_evictions'] += 1
+    
+    def _maybe_sweep(self, now: float):
+        """Remove os IPs ociosos se a última varredura foi há mais de `sweep_interval`."""
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        self._stats['sweeps'] += 1
+        idle = [ip for ip, state in self.requests.items() if self._is_idle(state, now)]
+        for ip in idle:
+            del self.requests[ip]
+        self._stats['idle_evictions'] += len(idle)
+    
+    def sweep(self) -> int:
+        """
+        Remove imediatamente os IPs ociosos.
+        
+        Returns:
+            int: Número de IPs removidos
+        """
+        with self.lock:
+            before = self._stats['idle_evictions']
+            self._last_sweep = 0
+            self._maybe_sweep(time.time())
+            return self._stats['idle_evictions'] - before
     
-    def _clean_old_requests(self, ip: str):
+    def _clean_old_requests(self, ip: str, now: float) -> list:
         """
         Remove requisições antigas da janela de tempo.
         
         Args:
             ip (str): IP do cliente
+            now (float): Timestamp atual
+            
+        Returns:
+            list: Timestamps do IP dentro da janela (vazia se o IP não é rastreado)
         """
-        current_time = time.time()
-        cutoff_time = current_time - self.window_seconds
-        
-        # Filtrar requisições dentro da janela
-        self.requests[ip] = [
-            timestamp for timestamp in self.requests[ip]
-            if timestamp > cutoff_time
-        ]
+        timestamps = self.requests.get(ip)
+        if not timestamps:
+            return []
+        # Os timestamps estão em ordem: basta cortar o início da lista
+        del timestamps[:bisect.bisect_right(timestamps, now - self.window_seconds)]
+        return timestamps
     
-    def is_allowed(self, ip: str) -> Tuple[bool, Dict[str, int]]:
+    def is_allowed(self, ip: str, cost: int = 1) -> Tuple[bool, Dict[str, int]]:
         """
         Verifica se uma requisição é permitida.
         
         Args:
             ip (str): IP do cliente
+            cost (int): Unidades da cota consumidas pela requisição
             
         Returns:
             Tuple[bool, Dict]: (permitido, informações do rate limit)
         """
         with self.lock:
-            self._clean_old_requests(ip)
+            now = time.time()
+            self._maybe_sweep(now)
+            timestamps = self._clean_old_requests(ip, now)
             
-            current_requests = len(self.requests[ip])
-            is_allowed = current_requests < self.max_requests
+            current_requests = len(timestamps)
+            is_allowed = current_requests + cost <= self.max_requests
             
             if is_allowed:
-                self.requests[ip].append(time.time())
+                # Um timestamp por unidade consumida
+                timestamps.extend([now] * cost)
+                self._track(ip, timestamps)
+                self._stats['allowed'] += 1
+            else:
+                if ip in self.requests:
+                    self.requests.move_to_end(ip)
+                self._stats['denied'] += 1
             
             return is_allowed, {
                 'current_requests': current_requests,
@@ -64,25 +138,41 @@ class RateLimiter:
                 'remaining_requests': max(0, self.max_requests - current_requests)
             }
     
-    def get_remaining_time(self, ip: str) -> Optional[float]:
+    def get_remaining_time(self, ip: str, cost: int = 1) -> Optional[float]:
         """
         Retorna o tempo restante até a próxima requisição ser permitida.
         
         Args:
             ip (str): IP do cliente
+            cost (int): Unidades da cota que a requisição consumiria
             
         Returns:
             Optional[float]: Tempo restante em segundos ou None se permitido
         """
         with self.lock:
-            self._clean_old_requests(ip)
+            now = time.time()
+            timestamps = self._clean_old_requests(ip, now)
             
-            if len(self.requests[ip]) < self.max_requests:
+            excess = len(timestamps) + cost - self.max_requests
+            if excess <= 0:
                 return None
             
-            # Tempo da requisição mais antiga
-            oldest_request = min(self.requests[ip])
-            return max(0, oldest_request + self.window_seconds - time.time())
+            # Quando saírem da janela as unidades excedentes mais antigas
+            return max(0, timestamps[min(excess, len(timestamps)) - 1] + self.window_seconds - now)
+    
+    def refund(self, ip: str, cost: int = 1):
+        """
+        Devolve unidades consumidas por is_allowed (ex.: a requisição saiu mais barata que o reservado).
+        
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades a devolver
+        """
+        with self.lock:
+            timestamps = self.requests.get(ip)
+            if timestamps:
+                # As unidades mais recentes são as da reserva
+                del timestamps[-cost:]
     
     def reset(self, ip: str):
         """
@@ -92,37 +182,307 @@ class RateLimiter:
             ip (str): IP do cliente
         """
         with self.lock:
-            self.requests[ip].clear()
+            self.requests.pop(ip, None)
     
     def get_stats(self) -> Dict[str, int]:
         """
         Retorna estatísticas do rate limiter.
         
         Returns:
-            Dict: Estatísticas
+            Dict: Estatísticas (contadores acumulados desde o início)
         """
         with self.lock:
-            total_ips = len(self.requests)
-            total_requests = sum(len(requests) for requests in self.requests.values())
-            
             return {
-                'total_ips': total_ips,
-                'total_requests': total_requests,
+                'total_ips': len(self.requests),
+                'total_requests': self._stats['allowed'],
+                'denied_requests': self._stats['denied'],
+                'idle_evictions': self._stats['idle_evictions'],
+                'capacity_evictions': self._stats['capacity_evictions'],
+                'sweeps': self._stats['sweeps'],
+                'max_keys': self.max_keys,
                 'max_requests_per_window': self.max_requests,
-                'window_seconds': self.window_seconds
+                'window_seconds': self.window_seconds,
+                'algorithm': self.algorithm
+            }
+
+class GCRARateLimiter(RateLimiter):
+    """
+    Rate limiting com GCRA (Generic Cell Rate Algorithm), equivalente a um token
+    bucket com capacidade `max_requests` reabastecido a `max_requests / window_seconds`
+    requisições por segundo.
+    
+    Guarda um único número por IP (o instante teórico de chegada, TAT) em vez da
+    lista de timestamps, então memória e custo por verificação não crescem com o
+    volume de requisições. Uma rajada de `max_requests` é permitida como na janela
+    deslizante; a diferença é que a cota volta aos poucos (uma requisição a cada
+    `window_seconds / max_requests`) em vez de toda de uma vez.
+    """
+    
+    algorithm = "gcra"
+    
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60,
+                 max_keys: int = 10000, sweep_interval: Optional[float] = None):
+        """
+        Inicializa o GCRARateLimiter.
+        
+        Args:
+            max_requests (int): Número máximo de requisições por janela (tamanho da rajada)
+            window_seconds (int): Tamanho da janela em segundos
+            max_keys (int): Máximo de IPs rastreados (os usados há mais tempo saem primeiro)
+            sweep_interval (float): Intervalo entre varreduras de IPs ociosos (padrão: a janela)
+        """
+        super().__init__(max_requests, window_seconds, max_keys, sweep_interval)
+        # IP -> TAT (quando a cota do IP estará totalmente reabastecida), em ordem de uso
+        self.requests = OrderedDict()
+        # Intervalo entre requisições na taxa sustentada
+        self.emission_interval = window_seconds / max_requests
+    
+    def _is_idle(self, tat: float, now: float) -> bool:
+        return tat <= now
+    
+    def _used(self, tat: float, now: float) -> int:
+        """Requisições da rajada ainda "ocupadas" para um TAT (equivalente ao tamanho da janela)."""
+        return min(self.max_requests, max(0, math.ceil((tat - now) / self.emission_interval - 1e-9)))
+    
+    def is_allowed(self, ip: str, cost: int = 1) -> Tuple[bool, Dict[str, int]]:
+        """
+        Verifica se uma requisição é permitida.
+        
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades da cota consumidas pela requisição
+            
+        Returns:
+            Tuple[bool, Dict]: (permitido, informações do rate limit)
+        """
+        with self.lock:
+            now = time.time()
+            self._maybe_sweep(now)
+            tat = max(self.requests.get(ip, now), now)
+            # Depois da requisição, o TAT pode ficar até uma janela à frente do relógio
+            # (rajada de max_requests unidades)
+            is_allowed = tat - now <= self.window_seconds - cost * self.emission_interval
+            
+            if is_allowed:
+                self._track(ip, tat + cost * self.emission_interval)
+                self._stats['allowed'] += 1
+            else:
+                if ip in self.requests:
+                    self.requests.move_to_end(ip)
+                self._stats['denied'] += 1
+            
+            current_requests = self._used(tat, now)
+            return is_allowed, {
+                'current_requests': current_requests,
+                'max_requests': self.max_requests,
+                'window_seconds': self.window_seconds,
+                'remaining_requests': max(0, self.max_requests - current_requests)
             }
+    
+    def get_remaining_time(self, ip: str, cost: int = 1) -> Optional[float]:
+        """
+        Retorna o tempo restante até a próxima requisição ser permitida.
+        
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades da cota que a requisição consumiria
+            
+        Returns:
+            Optional[float]: Tempo restante em segundos ou None se permitido
+        """
+        with self.lock:
+            now = time.time()
+            tat = self.requests.get(ip)
+            tolerance = self.window_seconds - cost * self.emission_interval
+            if tat is None or tat - now <= tolerance:
+                return None
+            return tat - tolerance - now
+    
+    def refund(self, ip: str, cost: int = 1):
+        """
+        Devolve unidades consumidas por is_allowed (ex.: a requisição saiu mais barata que o reservado).
+        
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades a devolver
+        """
+        with self.lock:
+            tat = self.requests.get(ip)
+            if tat is not None:
+                self.requests[ip] = max(tat - cost * self.emission_interval, time.time())
+
+class ShardedRateLimiter:
+    """
+    Rate limiter dividido em `shards` limitadores independentes, cada um com seu
+    próprio lock e estado (lock striping). Cada IP pertence sempre ao mesmo shard
+    (pelo hash), então os limites por IP não mudam, e requisições de IPs em shards
+    diferentes nunca disputam o mesmo lock.
+    
+    Mesma interface do RateLimiter.
+    """
+    
+    def __init__(self, max_requests: int = 10, window_seconds: int = 60,
+                 algorithm: str = "sliding_window", max_keys: int = 10000, shards: int = 16):
+        """
+        Inicializa o ShardedRateLimiter.
+        
+        Args:
+            max_requests (int): Número máximo de requisições por janela
+            window_seconds (int): Tamanho da janela em segundos
+            algorithm (str): Algoritmo de cada shard (ver create_rate_limiter)
+            max_keys (int): Máximo de IPs rastreados, dividido entre os shards
+            shards (int): Número de shards
+        """
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.algorithm = algorithm
+        self.max_keys = max_keys
+        keys_per_shard = max(1, math.ceil(max_keys / shards))
+        self.shards = [create_rate_limiter(max_requests, window_seconds, algorithm, keys_per_shard)
+                       for _ in range(shards)]
+    
+    def _shard(self, ip: str) -> RateLimiter:
+        return self.shards[hash(ip) % len(self.shards)]
+    
+    def is_allowed(self, ip: str, cost: int = 1) -> Tuple[bool, Dict[str, int]]:
+        """Verifica se uma requisição é permitida (ver RateLimiter.is_allowed)."""
+        return self._shard(ip).is_allowed(ip, cost)
+    
+    def get_remaining_time(self, ip: str, cost: int = 1) -> Optional[float]:
+        """Tempo restante até a próxima requisição ser permitida (ver RateLimiter.get_remaining_time)."""
+        return self._shard(ip).get_remaining_time(ip, cost)
+    
+    def refund(self, ip: str, cost: int = 1):
+        """Devolve unidades consumidas por is_allowed (ver RateLimiter.refund)."""
+        self._shard(ip).refund(ip, cost)
+    
+    def reset(self, ip: str):
+        """Reseta o rate limit para um IP específico."""
+        self._shard(ip).reset(ip)
+    
+    def sweep(self) -> int:
+        """Remove imediatamente os IPs ociosos de todos os shards."""
+        return sum(shard.sweep() for shard in self.shards)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas do rate limiter, somadas entre os shards.
+        
+        Returns:
+            Dict: Estatísticas
+        """
+        stats = {
+            'total_ips': 0,
+            'total_requests': 0,
+            'denied_requests': 0,
+            'idle_evictions': 0,
+            'capacity_evictions': 0,
+            'sweeps': 0
+        }
+        for shard in self.shards:
+            shard_stats = shard.get_stats()
+            for name in stats:
+                stats[name] += shard_stats[name]
+        stats.update({
+            'max_keys': self.max_keys,
+            'max_requests_per_window': self.max_requests,
+            'window_seconds': self.window_seconds,
+            'algorithm': self.algorithm,
+            'shards': len(self.shards)
+        })
+        return stats
+
+def create_rate_limiter(max_requests: int = 10, window_seconds: int = 60,
+                        algorithm: str = "sliding_window", max_keys: int = 10000, shards: int = 1,
+                        backend: str = "memory", db_path: Optional[str] = None, namespace: str = "default"):
+    """
+    Cria um rate limiter com o algoritmo escolhido.
+    
+    Args:
+        max_requests (int): Número máximo de requisições por janela
+        window_seconds (int): Tamanho da janela em segundos
+        algorithm (str): "sliding_window" (lista de timestamps por IP) ou "gcra"
+            (um número por IP, cota reabastecida continuamente)
+        max_keys (int): Máximo de IPs rastreados
+        shards (int): Número de shards com locks independentes (1 = um único lock)
+        backend (str): "memory" (estado do processo, padrão) ou "sqlite" (estado
+            compartilhado entre processos em `db_path`; sempre GCRA)
+        db_path (str): Arquivo SQLite do backend "sqlite"
+        namespace (str): Nome do limitador dentro do arquivo SQLite
+            
+    Returns:
+        RateLimiter, ShardedRateLimiter ou SQLiteRateLimiter: Rate limiter configurado
+    """
+    if algorithm not in RATE_LIMIT_ALGORITHMS:
+        raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+    if backend == "sqlite":
+        from utils.shared_rate_limiter import SQLiteRateLimiter
+        return SQLiteRateLimiter(db_path or "cache/rate_limits.sqlite3", max_requests, window_seconds,
+                                 namespace=namespace, max_keys=max_keys)
+    if backend != "memory":
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    if shards > 1:
+        return ShardedRateLimiter(max_requests, window_seconds, algorithm, max_keys, shards)
+    if algorithm == "gcra":
+        return GCRARateLimiter(max_requests, window_seconds, max_keys)
+    return RateLimiter(max_requests, window_seconds, max_keys)
 
 class IPRateLimiter:
     """
     Rate limiter específico para IPs com diferentes limites por tipo de endpoint.
+    
+    O limite de chat é medido em custo: cada requisição reserva o custo de uma
+    chamada ao Gemini (`gemini_cost` unidades) antes de se saber se a resposta
+    está em cache; num cache hit, refund_cache_hit() devolve a diferença para o
+    custo de um hit (`cache_hit_cost`). Assim, perguntas já respondidas gastam
+    pouco da cota, e o limite de chamadas reais ao Gemini continua o mesmo.
     """
     
-    def __init__(self):
-        """Inicializa o IPRateLimiter com diferentes limites."""
+    # Endpoints que geram respostas com o Gemini compartilham o limite de chat
+    CHAT_ENDPOINTS = ('/chat', '/chat/stream')
+    # Endpoints que não passam pelo rate limiting (health check do deploy)
+    EXEMPT_ENDPOINTS = ('/health',)
+    
+    def __init__(self, algorithm: str = "sliding_window", max_keys: int = 10000, shards: int = 16,
+                 backend: str = "memory", db_path: Optional[str] = None,
+                 chat_requests: int = 5, chat_window: int = 60, gemini_cost: int = 1, cache_hit_cost: int = 1):
+        """
+        Inicializa o IPRateLimiter com diferentes limites.
+        
+        Args:
+            algorithm (str): Algoritmo dos limitadores (ver create_rate_limiter)
+            max_keys (int): Máximo de IPs rastreados por limitador
+            shards (int): Shards (locks independentes) por limitador
+            backend (str): "memory" (por processo) ou "sqlite" (compartilhado entre workers)
+            db_path (str): Arquivo SQLite do backend "sqlite"
+            chat_requests (int): Respostas geradas pelo Gemini permitidas por janela de chat
+            chat_window (int): Janela do limite de chat em segundos
+            gemini_cost (int): Custo (unidades) reservado por requisição de chat
+            cache_hit_cost (int): Custo final de uma requisição de chat respondida pelo cache
+        """
+        self.configure(algorithm, max_keys, shards, backend, db_path,
+                       chat_requests, chat_window, gemini_cost, cache_hit_cost)
+    
+    def configure(self, algorithm: str = "sliding_window", max_keys: int = 10000, shards: int = 16,
+                  backend: str = "memory", db_path: Optional[str] = None,
+                  chat_requests: int = 5, chat_window: int = 60, gemini_cost: int = 1, cache_hit_cost: int = 1):
+        """
+        (Re)cria os limitadores com outra configuração, descartando o estado atual.
+        Usado na inicialização do app, com os valores do Config (ver __init__).
+        """
+        if not 0 <= cache_hit_cost <= gemini_cost:
+            raise ValueError("cache_hit_cost must be between 0 and gemini_cost")
+        
+        def limiter(max_requests, window_seconds, name):
+            return create_rate_limiter(max_requests, window_seconds, algorithm, max_keys, shards,
+                                       backend=backend, db_path=db_path, namespace=name)
+        
+        self.gemini_cost = gemini_cost
+        self.cache_hit_cost = cache_hit_cost
         # Rate limiters para diferentes endpoints
-        self.chat_limiter = RateLimiter(max_requests=5, window_seconds=60)  # 5 req/min para chat
-        self.roles_limiter = RateLimiter(max_requests=20, window_seconds=60)  # 20 req/min para roles
-        self.general_limiter = RateLimiter(max_requests=30, window_seconds=60)  # 30 req/min geral
+        self.chat_limiter = limiter(chat_requests * gemini_cost, chat_window, "chat")  # em unidades de custo
+        self.roles_limiter = limiter(20, 60, "roles")  # 20 req/min para roles
+        self.general_limiter = limiter(30, 60, "general")  # 30 req/min geral
     
     def check_rate_limit(self, ip: str, endpoint: str) -> Tuple[bool, Dict[str, int]]:
         """
@@ -135,8 +495,9 @@ class IPRateLimiter:
         Returns:
             Tuple[bool, Dict]: (permitido, informações do rate limit)
         """
-        if endpoint == '/chat':
-            return self.chat_limiter.is_allowed(ip)
+        if endpoint in self.CHAT_ENDPOINTS:
+            # Reserva o custo de uma chamada ao Gemini; um cache hit devolve parte dele
+            return self.chat_limiter.is_allowed(ip, self.gemini_cost)
         elif endpoint == '/roles':
             return self.roles_limiter.is_allowed(ip)
         else:
@@ -153,13 +514,24 @@ class IPRateLimiter:
         Returns:
             Optional[float]: Tempo restante em segundos
         """
-        if endpoint == '/chat':
-            return self.chat_limiter.get_remaining_time(ip)
+        if endpoint in self.CHAT_ENDPOINTS:
+            return self.chat_limiter.get_remaining_time(ip, self.gemini_cost)
         elif endpoint == '/roles':
             return self.roles_limiter.get_remaining_time(ip)
         else:
             return self.general_limiter.get_remaining_time(ip)
     
+    def refund_cache_hit(self, ip: str):
+        """
+        Ajusta a reserva de uma requisição de chat respondida sem chamar o Gemini
+        (cache hit): devolve `gemini_cost - cache_hit_cost` unidades.
+        
+        Args:
+            ip (str): IP do cliente
+        """
+        if self.gemini_cost > self.cache_hit_cost:
+            self.chat_limiter.refund(ip, self.gemini_cost - self.cache_hit_cost)
+    
     def reset(self, ip: str, endpoint: str = None):
         """
         Reseta rate limit para um IP.
@@ -168,7 +540,7 @@ class IPRateLimiter:
             ip (str): IP do cliente
             endpoint (str): Endpoint específico ou None para todos
         """
-        if endpoint == '/chat':
+        if endpoint in self.CHAT_ENDPOINTS:
             self.chat_limiter.reset(ip)
         elif endpoint == '/roles':
             self.roles_limiter.reset(ip)
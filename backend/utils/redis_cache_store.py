@@ -0,0 +1,386 @@
+import json
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.cache_store import CacheStore, StoredEntry, _blob_refs, _select_victims
+from utils.compression import available_codecs, compress, decompress
+from utils.resp_client import RESPClient
+
+# Chaves lidas por comando MGET nas varreduras
+_SCAN_BATCH = 200
+# Remove o lock só se ele ainda guardar o token do dono (comparação e remoção atômicas)
+RELEASE_LOCK_SCRIPT = (
+    "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) else return 0 end"
+)
+
+
+class RedisCacheStore(CacheStore):
+    """
+    Armazenamento do cache em um servidor Redis (ou compatível com o protocolo),
+    compartilhado por todos os workers e instâncias.
+
+    Estrutura, sob o prefixo `prefix`:
+    - `e:<chave>`: entrada comprimida, com TTL (`ttl_seconds` a partir da criação)
+    - `idx`: sorted set chave -> criado_em (contagem e expiração)
+    - `size`, `refs`, `last`, `hits`: hashes chave -> tamanho, blobs referenciados,
+      último acesso e número de acessos
+    - `b:<hash>` e `blobs` (sorted set hash -> criado_em): dados factuais deduplicados
+    - `lock:<nome>`: locks com expiração (SET NX PX)
+
+    Operações com vários comandos são enviadas em pipeline (uma ida à rede).
+    """
+
+    name = "redis"
+    remote = True
+
+    def __init__(self, url: str = "redis://localhost:6379/0", prefix: str = "chatbot:cache:",
+                 ttl_seconds: Optional[float] = None, compression: str = "zlib",
+                 client: Optional[RESPClient] = None):
+        """
+        Inicializa o RedisCacheStore.
+
+        Args:
+            url (str): URL do servidor (redis://[:senha@]host[:porta][/db])
+            prefix (str): Prefixo de todas as chaves
+            ttl_seconds (float): Expiração das entradas a partir da criação (None = sem TTL)
+            compression (str): Codec das entradas e blobs ("zlib", "zstd" ou "none")
+            client (RESPClient): Cliente já configurado (padrão: um novo para `url`)
+        """
+        if compression not in available_codecs():
+            raise ValueError(f"Unsupported compression codec: {compression}")
+        self.client = client if client is not None else RESPClient(url)
+        self.prefix = prefix
+        self.ttl_seconds = ttl_seconds
+        self.compression = compression
+
+    def _key(self, *parts: str) -> str:
+        return self.prefix + ":".join(parts)
+
+    def _encode(self, data: Dict[str, Any], created_at: float) -> bytes:
+        raw = json.dumps({"c": created_at, "d": data}, ensure_ascii=False, separators=(',', ':'))
+        return compress(raw.encode('utf-8'), self.compression)
+
+    @staticmethod
+    def _decode(payload: bytes) -> Tuple[Dict[str, Any], float]:
+        wrapper = json.loads(decompress(payload))
+        return wrapper["d"], wrapper["c"]
+
+    def _set_commands(self, cache_key: str, data: Dict[str, Any], created_at: float) -> Tuple[list, int]:
+        payload = self._encode(data, created_at)
+        entry_command = ["SET", self._key("e", cache_key), payload]
+        if self.ttl_seconds is not None:
+            remaining_ms = int((created_at + self.ttl_seconds - time.time()) * 1000)
+            entry_command += ["PX", max(remaining_ms, 1)]
+        return [
+            entry_command,
+            ["ZADD", self._key("idx"), created_at, cache_key],
+            ["HSET", self._key("size"), cache_key, len(payload)],
+            ["HSET", self._key("refs"), cache_key, json.dumps(_blob_refs(data))],
+            ["HSET", self._key("last"), cache_key, created_at],
+            ["HDEL", self._key("hits"), cache_key],
+        ], len(payload)
+
+    def _delete_commands(self, cache_keys: List[str]) -> list:
+        if not cache_keys:
+            return []
+        return [
+            ["DEL"] + [self._key("e", cache_key) for cache_key in cache_keys],
+            ["ZREM", self._key("idx")] + cache_keys,
+            ["HDEL", self._key("size")] + cache_keys,
+            ["HDEL", self._key("refs")] + cache_keys,
+            ["HDEL", self._key("last")] + cache_keys,
+            ["HDEL", self._key("hits")] + cache_keys,
+        ]
+
+    def get(self, cache_key: str) -> Optional[StoredEntry]:
+        """
+        Lê uma entrada.
+
+        Args:
+            cache_key (str): Chave do cache
+
+        Returns:
+            Optional[StoredEntry]: (dados, criado_em, tamanho) ou None se não existir
+        """
+        return self.get_many([cache_key])[0]
+
+    def get_many(self, cache_keys: List[str]) -> List[Optional[StoredEntry]]:
+        """
+        Lê várias entradas com um único MGET.
+
+        Args:
+            cache_keys (List[str]): Chaves do cache
+
+        Returns:
+            List: (dados, criado_em, tamanho) ou None para cada chave, na mesma ordem
+        """
+        if not cache_keys:
+            return []
+        payloads = self.client.execute("MGET", *[self._key("e", cache_key) for cache_key in cache_keys])
+        entries = []
+        for payload in payloads:
+            if payload is None:
+                entries.append(None)
+                continue
+            data, created_at = self._decode(payload)
+            entries.append((data, created_at, len(payload)))
+        return entries
+
+    def set(self, cache_key: str, data: Dict[str, Any], created_at: Optional[float] = None) -> int:
+        """
+        Grava uma entrada (com TTL, se configurado), substituindo a anterior.
+
+        Args:
+            cache_key (str): Chave do cache
+            data (Dict): Dados da entrada
+            created_at (float): Timestamp de criação (padrão: agora)
+
+        Returns:
+            int: Tamanho gravado em bytes
+        """
+        commands, size = self._set_commands(cache_key, data, time.time() if created_at is None else created_at)
+        self.client.pipeline(commands)
+        return size
+
+    def set_many(self, entries: List[Tuple[str, Dict[str, Any], float]]) -> int:
+        """
+        Grava várias entradas (chave, dados, criado_em) em pipeline. Uma entrada só
+        substitui a de mesma chave se for mais nova; chaves ausentes são gravadas com
+        SET NX, para não sobrescrever o que outro worker gravar no meio tempo.
+
+        Returns:
+            int: Número de entradas gravadas
+        """
+        if not entries:
+            return 0
+        existing = self.get_many([cache_key for cache_key, _, _ in entries])
+        absent = [entry for entry, current in zip(entries, existing) if current is None]
+        newer = [entry for entry, current in zip(entries, existing) if current is not None and current[1] < entry[2]]
+        writes = [self._set_commands(*entry)[0] for entry in absent + newer]
+        for entry_commands in writes[:len(absent)]:
+            entry_commands[0].append("NX")
+        if not writes:
+            return 0
+        replies = self.client.pipeline([entry_commands[0] for entry_commands in writes])
+        commands = []
+        for entry_commands, reply in zip(writes, replies):
+            if reply == "OK":
+                commands.extend(entry_commands[1:])
+        if commands:
+            self.client.pipeline(commands)
+        return sum(1 for reply in replies if reply == "OK")
+
+    def delete(self, cache_key: str) -> bool:
+        """Remove uma entrada. Retorna True se ela existia."""
+        return self.client.pipeline(self._delete_commands([cache_key]))[0] > 0
+
+    def clear_expired(self, max_age_seconds: float) -> int:
+        """
+        Remove entradas mais antigas que `max_age_seconds` (e limpa do índice as
+        que o próprio servidor já expirou pelo TTL).
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        expired = self.client.execute("ZRANGEBYSCORE", self._key("idx"), "-inf", f"({time.time() - max_age_seconds}")
+        expired = [cache_key.decode('utf-8') for cache_key in expired]
+        if expired:
+            self.client.pipeline(self._delete_commands(expired))
+        return len(expired)
+
+    def clear_all(self) -> int:
+        """
+        Remove todas as entradas e blobs.
+
+        Returns:
+            int: Número de entradas removidas
+        """
+        cache_keys = self._all_keys()
+        blob_hashes = [blob_hash.decode('utf-8') for blob_hash in self.client.execute("ZRANGE", self._key("blobs"), 0, -1)]
+        commands = []
+        for start in range(0, len(cache_keys), _SCAN_BATCH):
+            commands.append(["DEL"] + [self._key("e", key) for key in cache_keys[start:start + _SCAN_BATCH]])
+        for start in range(0, len(blob_hashes), _SCAN_BATCH):
+            commands.append(["DEL"] + [self._key("b", key) for key in blob_hashes[start:start + _SCAN_BATCH]])
+        commands.append(["DEL"] + [self._key(name) for name in ("idx", "size", "refs", "last", "hits", "blobs")])
+        self.client.pipeline(commands)
+        return len(cache_keys)
+
+    def count(self) -> int:
+        """Número de entradas no índice (entradas expiradas pelo TTL saem na próxima limpeza)."""
+        return self.client.execute("ZCARD", self._key("idx"))
+
+    def total_size(self) -> int:
+        """Soma dos tamanhos das entradas em bytes."""
+        return sum(int(size) for size in self.client.execute("HVALS", self._key("size")))
+
+    def usage(self) -> Tuple[int, Optional[int]]:
+        """Entradas pelo ZCARD do índice (O(1)); o total de bytes exige ler todo o hash e fica para evict."""
+        return self.count(), None
+
+    def _all_keys(self) -> List[str]:
+        return [cache_key.decode('utf-8') for cache_key in self.client.execute("ZRANGE", self._key("idx"), 0, -1)]
+
+    def record_access(self, accesses: Dict[str, Tuple[float, int]]):
+        """
+        Registra acessos às entradas em um único pipeline, usados pelas políticas LRU/LFU.
+
+        Args:
+            accesses (Dict): chave -> (último acesso, número de acessos desde o último registro)
+        """
+        commands = []
+        for cache_key, (last_accessed, hits) in accesses.items():
+            commands.append(["HSET", self._key("last"), cache_key, last_accessed])
+            commands.append(["HINCRBY", self._key("hits"), cache_key, hits])
+        self.client.pipeline(commands)
+
+    def evict(self, max_entries: Optional[int] = None, max_bytes: Optional[int] = None,
+              policy: str = "lru") -> List[str]:
+        """
+        Remove entradas até respeitar os limites de quantidade e tamanho.
+
+        Args:
+            max_entries (int): Máximo de entradas (None = sem limite)
+            max_bytes (int): Máximo de bytes (None = sem limite)
+            policy (str): "lru" (menos recente primeiro) ou "lfu" (menos acessada primeiro)
+
+        Returns:
+            List[str]: Chaves removidas
+        """
+        sizes, last, hits = self.client.pipeline([
+            ["HGETALL", self._key("size")], ["HGETALL", self._key("last")], ["HGETALL", self._key("hits")]
+        ])
+        sizes, last, hits = (_pairs(reply) for reply in (sizes, last, hits))
+        count, total_bytes = len(sizes), sum(int(size) for size in sizes.values())
+        if (max_entries is None or count <= max_entries) and (max_bytes is None or total_bytes <= max_bytes):
+            return []
+
+        def rank(cache_key):
+            last_accessed = float(last.get(cache_key, 0))
+            return (int(hits.get(cache_key, 0)), last_accessed) if policy == "lfu" else (last_accessed,)
+
+        ordered = sorted(sizes, key=rank)
+        victims = _select_victims(((key, int(sizes[key])) for key in ordered), count, total_bytes,
+                                  max_entries, max_bytes)
+        if victims:
+            self.client.pipeline(self._delete_commands(victims))
+        return victims
+
+    def put_blob(self, blob_hash: str, raw: bytes):
+        """
+        Grava um blob de conteúdo, se ainda não existir.
+
+        Args:
+            blob_hash (str): Hash do conteúdo
+            raw (bytes): Conteúdo (JSON em UTF-8)
+        """
+        self.client.pipeline([
+            ["SET", self._key("b", blob_hash), compress(raw, self.compression), "NX"],
+            ["ZADD", self._key("blobs"), "NX", time.time(), blob_hash],
+        ])
+
+    def get_blob(self, blob_hash: str) -> Optional[bytes]:
+        """Lê um blob, ou None se ele não existir."""
+        payload = self.client.execute("GET", self._key("b", blob_hash))
+        return decompress(payload) if payload is not None else None
+
+    def prune_blobs(self, min_age_seconds: float = 3600) -> int:
+        """
+        Remove blobs que nenhuma entrada referencia.
+
+        Args:
+            min_age_seconds (float): Só remove blobs mais antigos que isso, para não
+                apagar um blob gravado por um set() ainda em andamento
+
+        Returns:
+            int: Número de blobs removidos
+        """
+        candidates, refs = self.client.pipeline([
+            ["ZRANGEBYSCORE", self._key("blobs"), "-inf", f"({time.time() - min_age_seconds}"],
+            ["HVALS", self._key("refs")],
+        ])
+        referenced = set()
+        for entry_refs in refs:
+            referenced.update(json.loads(entry_refs))
+        unused = [blob_hash.decode('utf-8') for blob_hash in candidates if blob_hash.decode('utf-8') not in referenced]
+        if unused:
+            self.client.pipeline([
+                ["DEL"] + [self._key("b", blob_hash) for blob_hash in unused],
+                ["ZREM", self._key("blobs")] + unused,
+            ])
+        return len(unused)
+
+    def blob_stats(self) -> Dict[str, int]:
+        """Número de blobs e bytes ocupados."""
+        blob_hashes = [blob_hash.decode('utf-8') for blob_hash in self.client.execute("ZRANGE", self._key("blobs"), 0, -1)]
+        sizes = self.client.pipeline([["STRLEN", self._key("b", blob_hash)] for blob_hash in blob_hashes])
+        return {'blobs': len(blob_hashes), 'blob_bytes': sum(sizes)}
+
+    def iter_entries(self) -> Iterator[Tuple[str, Dict[str, Any], float]]:
+        """
+        Percorre as entradas completas, lendo em lotes com MGET.
+
+        Returns:
+            Iterator: (chave, dados, criado_em) de cada entrada
+        """
+        cache_keys = self._all_keys()
+        for start in range(0, len(cache_keys), _SCAN_BATCH):
+            batch = cache_keys[start:start + _SCAN_BATCH]
+            for cache_key, stored in zip(batch, self.get_many(batch)):
+                if stored is not None:
+                    yield cache_key, stored[0], stored[1]
+
+    def iter_metadata(self) -> Iterator[Tuple[str, str, str, list]]:
+        """
+        Percorre as entradas sem manter os dados em memória.
+
+        Returns:
+            Iterator: (chave, pergunta, role, campos relevantes) de cada entrada
+        """
+        for cache_key, data, _ in self.iter_entries():
+            yield cache_key, data.get('question', ''), data.get('role', ''), data.get('relevant_fields', [])
+
+    def iter_blobs(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Percorre os blobs de dados factuais.
+
+        Returns:
+            Iterator: (hash, conteúdo) de cada blob
+        """
+        blob_hashes = [blob_hash.decode('utf-8') for blob_hash in self.client.execute("ZRANGE", self._key("blobs"), 0, -1)]
+        for start in range(0, len(blob_hashes), _SCAN_BATCH):
+            batch = blob_hashes[start:start + _SCAN_BATCH]
+            payloads = self.client.execute("MGET", *[self._key("b", blob_hash) for blob_hash in batch])
+            for blob_hash, payload in zip(batch, payloads):
+                if payload is not None:
+                    yield blob_hash, decompress(payload)
+
+    def acquire_lock(self, name: str, ttl_seconds: float) -> Optional[str]:
+        """
+        Tenta obter um lock compartilhado por todos os workers (SET NX PX).
+
+        Args:
+            name (str): Nome do lock (ex.: chave do cache)
+            ttl_seconds (float): Expiração do lock, caso o dono morra sem liberá-lo
+
+        Returns:
+            Optional[str]: Token do lock, ou None se outro worker já o tem
+        """
+        token = uuid.uuid4().hex
+        reply = self.client.execute("SET", self._key("lock", name), token, "NX", "PX", max(int(ttl_seconds * 1000), 1))
+        return token if reply == "OK" else None
+
+    def release_lock(self, name: str, token: str) -> bool:
+        """
+        Libera um lock se ele ainda pertencer ao token.
+
+        A verificação e a remoção rodam num script (EVAL), atomicamente: um lock
+        que expirou e foi obtido por outro worker nunca é liberado por engano.
+        """
+        return self.client.execute("EVAL", RELEASE_LOCK_SCRIPT, 1, self._key("lock", name), token) == 1
+
+
+def _pairs(reply: list) -> Dict[str, bytes]:
+    """Converte a resposta de HGETALL ([campo, valor, ...]) em dicionário."""
+    return {reply[i].decode('utf-8'): reply[i + 1] for i in range(0, len(reply), 2)}
@@ -0,0 +1,168 @@
+import socket
+import threading
+from typing import Any, List, Optional, Sequence
+from urllib.parse import unquote, urlparse
+
+
+# Comandos sem efeito no servidor: um pipeline só com eles pode ser reenviado sem risco
+READ_ONLY_COMMANDS = frozenset({"PING", "GET", "MGET", "STRLEN", "PTTL", "HGETALL", "HVALS",
+                                "ZCARD", "ZRANGE", "ZRANGEBYSCORE"})
+
+
+class RedisError(Exception):
+    """Erro retornado pelo servidor (resposta "-ERR ...") ou falha de protocolo."""
+
+
+def _command_name(command: Sequence[Any]) -> str:
+    name = command[0]
+    return (name.decode("utf-8") if isinstance(name, bytes) else str(name)).upper()
+
+
+class RESPClient:
+    """
+    Cliente mínimo do protocolo Redis (RESP2), sem dependências externas.
+
+    Suporta comandos isolados e pipelines (vários comandos enviados de uma vez,
+    respostas lidas em seguida). Cada thread usa sua própria conexão. Uma conexão
+    fechada pelo servidor é detectada e reaberta antes do envio; uma falha depois
+    do envio só é repetida em pipelines somente leitura, porque não dá para saber
+    quais escritas o servidor já aplicou.
+    """
+
+    def __init__(self, url: str = "redis://localhost:6379/0", socket_timeout: float = 5.0):
+        """
+        Inicializa o RESPClient.
+
+        Args:
+            url (str): redis://[:senha@]host[:porta][/db]
+            socket_timeout (float): Timeout de conexão e leitura em segundos
+        """
+        parsed = urlparse(url)
+        if parsed.scheme != "redis":
+            raise ValueError(f"Unsupported Redis URL: {url}")
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.socket_timeout = socket_timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.socket_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.reader = sock.makefile("rb")
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", self.db))
+        if setup:
+            for reply in self._send_and_read(setup):
+                if isinstance(reply, RedisError):
+                    self.close()
+                    raise reply
+
+    def _connection_alive(self) -> bool:
+        """Se a conexão aberta ainda serve: sem EOF nem bytes pendentes (leitura sem bloquear)."""
+        sock = self._local.sock
+        try:
+            sock.setblocking(False)
+            # EOF (b"") ou resposta que ninguém pediu: a conexão não serve mais
+            sock.recv(1, socket.MSG_PEEK)
+            return False
+        except BlockingIOError:
+            return True
+        except OSError:
+            return False
+        finally:
+            sock.settimeout(self.socket_timeout)
+
+    def close(self):
+        """Fecha a conexão da thread atual."""
+        sock = getattr(self._local, 'sock', None)
+        if sock is not None:
+            try:
+                self._local.reader.close()
+                sock.close()
+            finally:
+                self._local.sock = None
+
+    @staticmethod
+    def _encode(command: Sequence[Any]) -> bytes:
+        parts = [b"*%d\r\n" % len(command)]
+        for arg in command:
+            if isinstance(arg, bytes):
+                data = arg
+            elif isinstance(arg, str):
+                data = arg.encode("utf-8")
+            else:
+                data = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    def _read_reply(self):
+        line = self._local.reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode("utf-8")
+        if prefix == b"-":
+            return RedisError(payload.decode("utf-8"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            data = self._local.reader.read(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def _send_and_read(self, commands: List[Sequence[Any]]) -> list:
+        self._local.sock.sendall(b"".join(self._encode(command) for command in commands))
+        return [self._read_reply() for _ in commands]
+
+    def pipeline(self, commands: List[Sequence[Any]]) -> list:
+        """
+        Envia vários comandos em uma única ida à rede e lê todas as respostas.
+
+        Args:
+            commands (List): Comandos, cada um como sequência de argumentos
+
+        Returns:
+            list: Respostas, na ordem dos comandos
+
+        Raises:
+            RedisError: Se algum comando retornou erro
+            ConnectionError: Conexão perdida durante um pipeline com escritas (não é repetido)
+        """
+        if not commands:
+            return []
+        read_only = all(_command_name(command) in READ_ONLY_COMMANDS for command in commands)
+        for attempt in range(2):
+            if getattr(self._local, 'sock', None) is not None and not self._connection_alive():
+                self.close()
+            if getattr(self._local, 'sock', None) is None:
+                self._connect()
+            try:
+                replies = self._send_and_read(commands)
+                break
+            except (ConnectionError, OSError):
+                self.close()
+                if attempt or not read_only:
+                    raise
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    def execute(self, *command: Any) -> Optional[Any]:
+        """Executa um único comando e retorna a resposta."""
+        return self.pipeline([command])[0]
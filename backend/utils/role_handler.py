@@ -1,17 +1,23 @@
 import json
 import os
 from typing import Dict, Optional, List
-import re
+from utils.field_router import FieldRouter, ROLE_FIELD_PRIORITY
+from utils.lru_cache import LRUCache
 
 class RoleHandler:
-    def __init__(self, roles_dir: str = None):
+    def __init__(self, roles_dir: str = None, routing_memo_size: int = 1024, roles: Dict = None):
         if roles_dir is None:
             base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
             roles_dir = os.path.join(base_dir, "data", "roles")
         self.roles_dir = roles_dir
-        self.roles = self.load_roles()
+        # Roles já validadas (ex.: do artefato compilado) dispensam a leitura dos JSON
+        self.roles = self.load_roles() if roles is None else roles
         self.default_role = "recruiter"
         self._cache = {} 
+        # Tabelas de roteamento compiladas uma vez (recompiladas em reload_roles)
+        self.field_router = self._build_field_router()
+        # Memo do roteamento: as mesmas perguntas de exemplo chegam de todos os visitantes
+        self._routing_memo = LRUCache(max_entries=routing_memo_size)
     
     def load_roles(self) -> Dict:
         roles = {}
@@ -111,6 +117,8 @@ class RoleHandler:
     def reload_roles(self):
         self.clear_cache()
         self.roles = self.load_roles()
+        self.field_router = self._build_field_router()
+        self._routing_memo.clear()
     
     def get_available_roles(self) -> List[str]:
         return list(self.roles.keys())
@@ -123,94 +131,22 @@ class RoleHandler:
         summary_fields = ['id', 'name', 'description', 'icon', 'color', 'focus_areas', 'tone']
         return {field: role_config.get(field) for field in summary_fields if field in role_config}
     
+    def _build_field_router(self) -> FieldRouter:
+        # Roles podem sobrescrever a prioridade de campos com "field_priority"
+        role_priority = dict(ROLE_FIELD_PRIORITY)
+        for role_id, role_config in self.roles.items():
+            if isinstance(role_config.get('field_priority'), list):
+                role_priority[role_id] = role_config['field_priority']
+        return FieldRouter(role_priority=role_priority)
+    
     def identify_relevant_fields(self, question: str, role_id: str) -> list:
-        context_patterns = {
-            'academic_background': [r'formou.*em', r'graduou.*em', r'fez.*faculdade', r'estudou.*na'],
-            'professional_experience': [r'trabalhou.*na', r'atuou.*como', r'experiência.*com', r'empresa.*onde'],
-            'projects': [r'projeto.*chamado', r'projeto.*envolvendo', r'desenvolveu.*um', r'criou.*um'],
-            'skills': [r'conhecimento.*em', r'habilidade.*com', r'domina.*', r'experiência.*com'],
-            'certifications': [r'certificado.*em', r'certificação.*de', r'curso.*sobre'],
-            'soft_skills': [r'habilidade.*comportamental', r'comunicação.*com', r'trabalho.*equipe'],
-            'intelligent_responses': [r'conquista.*importante', r'resultado.*alcançado', r'aprendizado.*com']
-        }
-        
-        keywords_map = {
-            'academic_background': ['formação', 'formacao', 'academic', 'educação', 'education', 'graduação', 'graduacao', 'universidade', 'college', 'school', 'curso', 'diploma'],
-            'professional_experience': ['experiência', 'experiencia', 'trabalho', 'emprego', 'cargo', 'empresa', 'profissional', 'job', 'work', 'role', 'position', 'company'],
-            'projects': ['projeto', 'project', 'portfolio', 'case study', 'desenvolvimento de projeto', 'projeto de sistema', 'projeto desenvolvido'],
-            'skills': ['habilidade', 'skill', 'competência', 'competencia', 'tecnologia', 'tecnologias', 'stack', 'linguagem', 'framework', 'ferramenta'],
-            'certifications': ['certificado', 'certificação', 'certification', 'course', 'curso', 'licença', 'licenca'],
-            'soft_skills': ['soft skill', 'comportamental', 'liderança', 'lideranca', 'comunicação', 'comunicacao', 'trabalho em equipe', 'teamwork', 'colaboração', 'collaboration'],
-            'intelligent_responses': ['conquista', 'achievement', 'impacto', 'impact', 'resolução', 'solução', 'problem', 'solution', 'aprendizado', 'learning', 'adaptação', 'adaptability', 'progressão', 'progression', 'evolução', 'growth', 'mentoria', 'mentorship']
-        }
-        
-        # Prioridade por role
-        role_priority = {
-            'recruiter': ['professional_experience', 'soft_skills', 'certifications', 'intelligent_responses', 'academic_background'],
-            'developer': ['skills', 'professional_experience', 'projects', 'intelligent_responses'],
-            'client': ['professional_experience', 'projects', 'intelligent_responses'],
-            'student': ['academic_background', 'skills', 'projects', 'intelligent_responses']
-        }
-        
-        found_fields = set()
-        q_lower = question.lower()
-        
-        # 1. Verificar padrões contextuais (maior prioridade)
-        context_matches = {}
-        for field, patterns in context_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, q_lower):
-                    found_fields.add(field)
-                    context_matches[field] = True
-                    break
-        
-        # 2. Se não encontrou padrões contextuais, verificar keywords com word boundaries
-        if not found_fields:
-            for field, keywords in keywords_map.items():
-                for kw in keywords:
-                    # Usar regex para corresponder apenas a palavras inteiras
-                    pattern = r'\b' + re.escape(kw) + r'\b'
-                    if re.search(pattern, q_lower):
-                        found_fields.add(field)
-                        break
-        
-        # 3. Se ainda não encontrou campos, usar prioridade da role
-        if not found_fields and role_id in role_priority:
-            found_fields.update(role_priority[role_id])
-        
-        # Limitar o número de campos para não sobrecarregar o modelo
-        if len(found_fields) > 3:
-            # Priorizar campos que corresponderam a padrões contextuais
-            priority_list = []
-            
-            # Primeiro adicionar campos com correspondência contextual
-            for field in context_matches:
-                if field in found_fields:
-                    priority_list.append(field)
-            
-            # Depois adicionar outros campos de acordo com a prioridade da role
-            role_priority_order = role_priority.get(role_id, list(keywords_map.keys()))
-            for field in role_priority_order:
-                if field in found_fields and field not in priority_list:
-                    priority_list.append(field)
-                    if len(priority_list) >= 3:
-                        break
-            
-            # Se ainda não temos 3 campos, adicionar os restantes
-            for field in found_fields:
-                if field not in priority_list:
-                    priority_list.append(field)
-                    if len(priority_list) >= 3:
-                        break
-            
-            found_fields = set(priority_list[:3])
-        
-        # Logging para depuração
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.info(f"Question: {question}")
-        logger.info(f"Found fields: {found_fields}")
-        if not found_fields and role_id in role_priority:
-            logger.info(f"Using fallback for role {role_id}: {role_priority[role_id]}")
-        
-        return list(found_fields)
\ No newline at end of file
+        # O roteamento só depende da pergunta em minúsculas e da role
+        key = (question.lower(), role_id)
+        fields = self._routing_memo.get(key)
+        if fields is None:
+            fields = tuple(self.field_router.route(question, role_id))
+            self._routing_memo.set(key, fields)
+        return list(fields)
+    
+    def get_routing_stats(self) -> Dict:
+        return self._routing_memo.get_stats()
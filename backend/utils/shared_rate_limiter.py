@@ -0,0 +1,252 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional, Tuple
+
+
+class SQLiteRateLimiter:
+    """
+    Rate limiter GCRA com estado em um arquivo SQLite, compartilhado por todos os
+    processos (workers do gunicorn) da máquina. Com o limitador em memória, cada
+    worker tem sua própria cota e um cliente recebe N vezes o limite configurado.
+
+    Cada verificação é uma transação BEGIN IMMEDIATE (ler o TAT, decidir e gravar),
+    então verificações simultâneas de processos diferentes nunca concedem a mesma
+    cota duas vezes. Vários limitadores podem usar o mesmo arquivo, separados por
+    `namespace`.
+
+    Mesma interface do RateLimiter. Os contadores de get_stats são do processo atual;
+    o número de IPs rastreados é o do arquivo.
+    """
+
+    algorithm = "gcra"
+
+    SCHEMA = (
+        """CREATE TABLE IF NOT EXISTS rate_limits (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            tat REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        ) WITHOUT ROWID""",
+        "CREATE INDEX IF NOT EXISTS idx_rate_limits_tat ON rate_limits (namespace, tat)",
+    )
+
+    def __init__(self, db_path: str = "cache/rate_limits.sqlite3", max_requests: int = 10,
+                 window_seconds: int = 60, namespace: str = "default", max_keys: int = 10000,
+                 sweep_interval: Optional[float] = None):
+        """
+        Inicializa o SQLiteRateLimiter.
+
+        Args:
+            db_path (str): Caminho do arquivo SQLite compartilhado
+            max_requests (int): Número máximo de requisições por janela (tamanho da rajada)
+            window_seconds (int): Tamanho da janela em segundos
+            namespace (str): Nome do limitador dentro do arquivo
+            max_keys (int): Máximo de IPs rastreados no namespace
+            sweep_interval (float): Intervalo entre varreduras de IPs ociosos (padrão: a janela)
+        """
+        self.db_path = db_path
+        self.max_requests = max_requests
+        self.window_seconds = window_seconds
+        self.namespace = namespace
+        self.max_keys = max_keys
+        self.sweep_interval = window_seconds if sweep_interval is None else sweep_interval
+        self.emission_interval = window_seconds / max_requests
+        directory = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        self._last_sweep = time.time()
+        self._stats = {
+            'allowed': 0,
+            'denied': 0,
+            'idle_evictions': 0,
+            'capacity_evictions': 0,
+            'sweeps': 0
+        }
+        self._connection().execute("PRAGMA journal_mode=WAL")
+        with self._transaction() as conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão da thread atual (conexões SQLite não devem ser compartilhadas entre threads)."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # isolation_level=None: transações controladas explicitamente em _transaction()
+            conn = sqlite3.connect(self.db_path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Transação explícita (BEGIN IMMEDIATE): um escritor por vez entre todos os processos."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+
+    def _count(self, name: str, amount: int = 1):
+        with self._stats_lock:
+            self._stats[name] += amount
+
+    def _used(self, tat: float, now: float) -> int:
+        """Requisições da rajada ainda "ocupadas" para um TAT (equivalente ao tamanho da janela)."""
+        return min(self.max_requests, max(0, math.ceil((tat - now) / self.emission_interval - 1e-9)))
+
+    def _maybe_sweep(self, now: float):
+        """Varre IPs ociosos se a última varredura deste processo foi há mais de `sweep_interval`."""
+        with self._stats_lock:
+            if now - self._last_sweep < self.sweep_interval:
+                return
+            self._last_sweep = now
+        self._sweep(now)
+
+    def _sweep(self, now: float) -> int:
+        with self._transaction() as conn:
+            idle = conn.execute(
+                "DELETE FROM rate_limits WHERE namespace = ? AND tat <= ?", (self.namespace, now)
+            ).rowcount
+            count = conn.execute(
+                "SELECT COUNT(*) FROM rate_limits WHERE namespace = ?", (self.namespace,)
+            ).fetchone()[0]
+            over = count - self.max_keys
+            evicted = 0
+            if over > 0:
+                # Acima do limite, saem os IPs mais perto de ficar ociosos (menor TAT)
+                evicted = conn.execute(
+                    """DELETE FROM rate_limits WHERE namespace = ? AND key IN (
+                        SELECT key FROM rate_limits WHERE namespace = ? ORDER BY tat LIMIT ?)""",
+                    (self.namespace, self.namespace, over)
+                ).rowcount
+        with self._stats_lock:
+            self._stats['sweeps'] += 1
+            self._stats['idle_evictions'] += idle
+            self._stats['capacity_evictions'] += evicted
+        return idle
+
+    def sweep(self) -> int:
+        """
+        Remove imediatamente os IPs ociosos (e os excedentes de `max_keys`).
+
+        Returns:
+            int: Número de IPs ociosos removidos
+        """
+        now = time.time()
+        with self._stats_lock:
+            self._last_sweep = now
+        return self._sweep(now)
+
+    def is_allowed(self, ip: str, cost: int = 1) -> Tuple[bool, Dict[str, int]]:
+        """
+        Verifica se uma requisição é permitida (verificação e incremento atômicos).
+
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades da cota consumidas pela requisição
+
+        Returns:
+            Tuple[bool, Dict]: (permitido, informações do rate limit)
+        """
+        self._maybe_sweep(time.time())
+        with self._transaction() as conn:
+            # Relógio lido depois de obter o lock de escrita (pode ter esperado outro processo)
+            now = time.time()
+            row = conn.execute(
+                "SELECT tat FROM rate_limits WHERE namespace = ? AND key = ?", (self.namespace, ip)
+            ).fetchone()
+            tat = max(row[0], now) if row else now
+            is_allowed = tat - now <= self.window_seconds - cost * self.emission_interval
+            if is_allowed:
+                conn.execute(
+                    """INSERT INTO rate_limits (namespace, key, tat) VALUES (?, ?, ?)
+                       ON CONFLICT (namespace, key) DO UPDATE SET tat = excluded.tat""",
+                    (self.namespace, ip, tat + cost * self.emission_interval)
+                )
+        self._count('allowed' if is_allowed else 'denied')
+
+        current_requests = self._used(tat, now)
+        return is_allowed, {
+            'current_requests': current_requests,
+            'max_requests': self.max_requests,
+            'window_seconds': self.window_seconds,
+            'remaining_requests': max(0, self.max_requests - current_requests)
+        }
+
+    def get_remaining_time(self, ip: str, cost: int = 1) -> Optional[float]:
+        """
+        Retorna o tempo restante até a próxima requisição ser permitida.
+
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades da cota que a requisição consumiria
+
+        Returns:
+            Optional[float]: Tempo restante em segundos ou None se permitido
+        """
+        row = self._connection().execute(
+            "SELECT tat FROM rate_limits WHERE namespace = ? AND key = ?", (self.namespace, ip)
+        ).fetchone()
+        now = time.time()
+        tolerance = self.window_seconds - cost * self.emission_interval
+        if row is None or row[0] - now <= tolerance:
+            return None
+        return row[0] - tolerance - now
+
+    def refund(self, ip: str, cost: int = 1):
+        """
+        Devolve unidades consumidas por is_allowed (ex.: a requisição saiu mais barata que o reservado).
+
+        Args:
+            ip (str): IP do cliente
+            cost (int): Unidades a devolver
+        """
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE rate_limits SET tat = max(tat - ?, ?) WHERE namespace = ? AND key = ?",
+                (cost * self.emission_interval, time.time(), self.namespace, ip)
+            )
+
+    def reset(self, ip: str):
+        """
+        Reseta o rate limit para um IP específico (em todos os processos).
+
+        Args:
+            ip (str): IP do cliente
+        """
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM rate_limits WHERE namespace = ? AND key = ?", (self.namespace, ip))
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas do rate limiter.
+
+        Returns:
+            Dict: Estatísticas (contadores deste processo; IPs rastreados de todos)
+        """
+        total_ips = self._connection().execute(
+            "SELECT COUNT(*) FROM rate_limits WHERE namespace = ?", (self.namespace,)
+        ).fetchone()[0]
+        with self._stats_lock:
+            return {
+                'total_ips': total_ips,
+                'total_requests': self._stats['allowed'],
+                'denied_requests': self._stats['denied'],
+                'idle_evictions': self._stats['idle_evictions'],
+                'capacity_evictions': self._stats['capacity_evictions'],
+                'sweeps': self._stats['sweeps'],
+                'max_keys': self.max_keys,
+                'max_requests_per_window': self.max_requests,
+                'window_seconds': self.window_seconds,
+                'algorithm': self.algorithm,
+                'backend': "sqlite"
+            }
@@ -0,0 +1,177 @@
+import threading
+import zlib
+from collections import defaultdict
+from typing import Dict, FrozenSet, Hashable, List, Optional, Set, Tuple
+
+# Primo de Mersenne usado nas funções de hash universais do MinHash
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+# Negações (texto já normalizado, sem acentos): mudam o sentido com poucos caracteres de diferença
+NEGATION_TOKENS = frozenset([
+    "nao", "nem", "nunca", "jamais", "sem", "nenhum", "nenhuma", "not", "never", "without", "none", "sin",
+])
+
+
+def char_ngrams(text: str, n: int = 3) -> FrozenSet[str]:
+    """
+    Conjunto de n-gramas de caracteres de um texto já normalizado.
+
+    Args:
+        text (str): Texto normalizado
+        n (int): Tamanho dos n-gramas
+
+    Returns:
+        FrozenSet[str]: n-gramas (o próprio texto se ele for menor que n)
+    """
+    padded = f" {text} "
+    if len(padded) <= n:
+        return frozenset([padded])
+    return frozenset(padded[i:i + n] for i in range(len(padded) - n + 1))
+
+
+def guard_tokens(text: str) -> FrozenSet[str]:
+    """
+    Palavras que duas perguntas precisam ter em comum para serem consideradas iguais:
+    negações e números ("relacionais" x "não relacionais", "2023" x "2024").
+
+    Args:
+        text (str): Texto normalizado
+
+    Returns:
+        FrozenSet[str]: Negações e palavras com dígitos do texto
+    """
+    return frozenset(token for token in text.split(' ')
+                     if token in NEGATION_TOKENS or any(char.isdigit() for char in token))
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Similaridade de Jaccard entre dois conjuntos."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class MinHashIndex:
+    """
+    Índice de similaridade de perguntas via MinHash + LSH sobre n-gramas de caracteres.
+
+    Cada entrada pertence a uma partição (ex.: role + campos relevantes) e só é
+    comparada com entradas da mesma partição. O LSH por bandas reduz a busca a
+    poucos candidatos, e a similaridade de Jaccard exata dos n-gramas decide se o
+    candidato passa do limiar. Candidatos com negações ou números diferentes
+    (guard_tokens) nunca são considerados iguais, por mais parecido que seja o texto.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 64, bands: int = 16, ngram_size: int = 3):
+        """
+        Inicializa o MinHashIndex.
+
+        Args:
+            threshold (float): Similaridade de Jaccard mínima para considerar duas perguntas iguais
+            num_perm (int): Número de permutações do MinHash
+            bands (int): Número de bandas do LSH (deve dividir num_perm)
+            ngram_size (int): Tamanho dos n-gramas de caracteres
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram_size = ngram_size
+        # Coeficientes determinísticos, para que o índice seja reproduzível entre processos
+        self._coefficients = [
+            ((i + 1) * 0x9E3779B1 % _MERSENNE_PRIME | 1, (i + 7) * 0x85EBCA77 % _MERSENNE_PRIME)
+            for i in range(num_perm)
+        ]
+        # partição -> banda -> assinatura da banda -> ids
+        self._buckets: Dict[Hashable, List[Dict[Tuple[int, ...], Set[Hashable]]]] = {}
+        # id -> (partição, n-gramas, assinaturas das bandas, negações e números)
+        self._entries: Dict[Hashable, Tuple[Hashable, FrozenSet[str], List[Tuple[int, ...]], FrozenSet[str]]] = {}
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, shingles: FrozenSet[str]) -> List[Tuple[int, ...]]:
+        hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles]
+        signature = [
+            min(((a * h + b) % _MERSENNE_PRIME) & _MAX_HASH for h in hashes)
+            for a, b in self._coefficients
+        ]
+        return [tuple(signature[i:i + self.rows]) for i in range(0, self.num_perm, self.rows)]
+
+    def add(self, partition: Hashable, text: str, entry_id: Hashable):
+        """
+        Indexa um texto normalizado.
+
+        Args:
+            partition (Hashable): Partição da entrada
+            text (str): Texto normalizado
+            entry_id (Hashable): Identificador devolvido nas buscas (ex.: chave do cache)
+        """
+        shingles = char_ngrams(text, self.ngram_size)
+        band_signatures = self._signature(shingles)
+        with self.lock:
+            self._remove_locked(entry_id)
+            buckets = self._buckets.setdefault(partition, [defaultdict(set) for _ in range(self.bands)])
+            for band, band_signature in enumerate(band_signatures):
+                buckets[band][band_signature].add(entry_id)
+            self._entries[entry_id] = (partition, shingles, band_signatures, guard_tokens(text))
+
+    def _remove_locked(self, entry_id: Hashable):
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        partition, _, band_signatures, _ = entry
+        buckets = self._buckets[partition]
+        for band, band_signature in enumerate(band_signatures):
+            bucket = buckets[band].get(band_signature)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del buckets[band][band_signature]
+
+    def remove(self, entry_id: Hashable):
+        """Remove uma entrada do índice, se existir."""
+        with self.lock:
+            self._remove_locked(entry_id)
+
+    def query(self, partition: Hashable, text: str) -> Optional[Tuple[Hashable, float]]:
+        """
+        Busca a entrada mais parecida na partição.
+
+        Args:
+            partition (Hashable): Partição da busca
+            text (str): Texto normalizado
+
+        Returns:
+            Optional[Tuple]: (id, similaridade) da melhor entrada acima do limiar, ou None
+        """
+        shingles = char_ngrams(text, self.ngram_size)
+        band_signatures = self._signature(shingles)
+        guards = guard_tokens(text)
+        with self.lock:
+            buckets = self._buckets.get(partition)
+            if buckets is None:
+                return None
+            candidates = set()
+            for band, band_signature in enumerate(band_signatures):
+                candidates.update(buckets[band].get(band_signature, ()))
+
+            best = None
+            for entry_id in candidates:
+                _, entry_shingles, _, entry_guards = self._entries[entry_id]
+                if entry_guards != guards:
+                    continue
+                similarity = jaccard(shingles, entry_shingles)
+                if similarity >= self.threshold and (best is None or similarity > best[1]):
+                    best = (entry_id, similarity)
+            return best
+
+    def clear(self):
+        """Remove todas as entradas."""
+        with self.lock:
+            self._buckets.clear()
+            self._entries.clear()
@@ -0,0 +1,88 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """Uma execução em andamento e seu resultado compartilhado."""
+
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Deduplicação de chamadas idênticas em andamento (padrão "single-flight").
+
+    A primeira requisição para uma chave executa a função; as que chegam enquanto
+    ela roda esperam e recebem o mesmo resultado (ou a mesma exceção), em vez de
+    repetir a chamada ao Gemini.
+    """
+
+    def __init__(self):
+        """Inicializa o SingleFlight."""
+        self._calls: Dict[Hashable, _Call] = {}
+        self.lock = threading.Lock()
+        self._stats = {
+            'executions': 0,
+            'coalesced': 0
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        Executa `fn` uma única vez por chave entre chamadas concorrentes.
+
+        Args:
+            key (Hashable): Chave de deduplicação (ex.: chave do cache)
+            fn (Callable): Função sem argumentos que produz o resultado
+
+        Returns:
+            Tuple[Any, bool]: (resultado, se foi compartilhado de outra execução)
+        """
+        with self.lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats['coalesced'] += 1
+                is_leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._stats['executions'] += 1
+                is_leader = True
+
+        if not is_leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Retorna estatísticas de deduplicação.
+
+        Returns:
+            Dict: Estatísticas
+        """
+        with self.lock:
+            executions = self._stats['executions']
+            coalesced = self._stats['coalesced']
+            return {
+                'executions': executions,
+                'coalesced': coalesced,
+                'in_flight': len(self._calls),
+                'coalesced_rate': round(coalesced / (executions + coalesced) * 100, 2) if executions + coalesced else 0
+            }
@@ -0,0 +1,34 @@
+def build_system_instruction(instruction_data: dict) -> str:
+    """
+    Build a complete string of instruction system from the dict in JSON.
+    This function processes a dictionary to create a structured system instruction string
+    for the generative AI model, including role definition, core rules, and advanced behaviors.
+    """
+    instruction_parts = []
+    
+    # Get the first system instruction from the 'sys' array
+    if "sys" in instruction_data and instruction_data["sys"]:
+        sys_instruction = instruction_data["sys"][0]  # Use the first instruction
+        
+        if "role_definition" in sys_instruction:
+            role = sys_instruction["role_definition"]
+            instruction_parts.append(f"{role.get('purpose', '')}")
+
+        instruction_parts.append("\nIMPORTANT Rules:")
+        if "core_rules" in sys_instruction:
+            # Itera sobre as regras principais, adicionando-as e seus exemplos.
+            for key, rule_data in sys_instruction["core_rules"].items():
+                # Usa len(instruction_parts) para numerar as regras dinamicamente.
+                instruction_parts.append(f"{len(instruction_parts)}. {rule_data.get('title', key)}: {rule_data.get('instruction', '')}")
+                if "examples" in rule_data and rule_data["examples"]:
+                    instruction_parts.append("    Examples:")
+                    for example in rule_data["examples"]:
+                        instruction_parts.append(f"    - {example}")
+
+        instruction_parts.append("\nAdvanced Behaviors:")
+        if "advanced_behaviors" in sys_instruction:
+            # Itera sobre os comportamentos avançados.
+            for key, rule_data in sys_instruction["advanced_behaviors"].items():
+                instruction_parts.append(f"{len(instruction_parts)}. {rule_data.get('title', key)}: {rule_data.get('instruction', '')}")
+
+    return "\n".join(instruction_parts)
@@ -0,0 +1,53 @@
+import re
+import unicodedata
+
+# Palavras sem peso semântico para identificar a pergunta (pt/en/es). Negações e
+# palavras interrogativas ficam de fora de propósito: "não", "que", "qual", "por"...
+STOPWORDS = frozenset("""
+    o a os as um uma uns umas de do da dos das em no na nos nas ao aos pelo pela
+    para pra com e ou se ele ela eles voce voces seu sua seus suas me te lhe
+    eh foi sao esta isso isto esse essa este favor
+    the an of to in on at for with and or is are was were be been do does did
+    he she his her you your me my it its this that please
+    el la los las un una unos unas del al y es son su sus usted
+""".split())
+
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def strip_accents(text: str) -> str:
+    """Remove acentos e cedilha (ex.: "formação" -> "formacao")."""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza texto livre: minúsculas, sem acentos, sem pontuação e com espaços únicos.
+
+    Args:
+        text (str): Texto original
+
+    Returns:
+        str: Texto normalizado
+    """
+    text = strip_accents(text.lower())
+    text = _PUNCTUATION_RE.sub(' ', text).replace('_', ' ')
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normaliza uma pergunta para comparação: normalize_text + remoção de stopwords.
+    Se a pergunta só tiver stopwords, elas são mantidas.
+
+    Args:
+        question (str): Pergunta do usuário
+
+    Returns:
+        str: Pergunta normalizada
+    """
+    normalized = normalize_text(question)
+    tokens = [token for token in normalized.split(' ') if token not in STOPWORDS]
+    return ' '.join(tokens) if tokens else normalized